@@ -9,6 +9,16 @@ from .routes import auth_bp
 from .routes.admin_dashboard import admin_bp
 from .routes.student import student_bp
 from .routes.professor import professor_bp
+from .utils.activity_logger import activity_logger
+from .utils.admission import admission
+from .utils.compression import response_compression
+from .utils.idempotency import idempotency_cache
+from .utils.inference_budget import inference_budget
+from .utils.live_events import live_events
+from .utils.response_cache import response_cache
+from .utils.sentiment_classifier import sentiment_classifier
+from .utils.shadow_scoring import shadow_scorer
+from .commands import register_commands
 import os
 
 __version__ = '2.0.0'
@@ -25,10 +35,20 @@ def create_app():
     
     # Initialize extensions
     db.init_app(app)
+    activity_logger.init_app(app)
+    inference_budget.init_app(app)
+    admission.init_app(app)
+    idempotency_cache.init_app(app)
+    live_events.init_app(app)
+    response_cache.init_app(app)
+    response_compression.init_app(app)
+    sentiment_classifier.init_app(app)
+    shadow_scorer.init_app(app)
     CORS(app, 
          resources={r"/api/*": {"origins": "*"}},
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match", "If-Modified-Since"],
+         expose_headers=["Retry-After", "Idempotent-Replayed", "X-Cache", "ETag", "Last-Modified"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
     # Register blueprints
@@ -37,6 +57,9 @@ def create_app():
     app.register_blueprint(student_bp)
     app.register_blueprint(professor_bp)
     
+    # CLI maintenance commands (flask --app run.py <command>)
+    register_commands(app)
+    
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -0,0 +1,351 @@
+"""
+Flask CLI maintenance commands
+Run from the backend directory, e.g.: flask --app run.py activity-logs maintain
+"""
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+from .models import db, EvaluationPeriod
+from .utils.partitions import ensure_monthly_partitions, apply_retention, list_monthly_partitions
+from .utils.period_archive import archive_period, restore_period
+from .utils.trends import backfill_sentiment_daily
+from .utils.participation import rebuild_participation
+from .utils.keywords import rebuild_keyword_stats
+from .utils.duplicates import rebuild_duplicate_index
+from .utils.embeddings import backfill_embeddings
+from .utils.sentiment_classifier import SentimentClassifier
+from .utils import model_registry
+from .utils.shadow_scoring import shadow_report
+from .utils.rescoring import rescore_comments, model_version_counts
+from .utils.synthetic_data import PRESETS, generate as generate_synthetic_data
+
+activity_logs_cli = AppGroup('activity-logs', help='Audit log partition maintenance')
+
+
+@activity_logs_cli.command('maintain')
+@click.option('--keep-months', type=int, default=None,
+              help='Months of history to keep (default: ACTIVITY_LOG_RETENTION_MONTHS)')
+@click.option('--months-ahead', type=int, default=None,
+              help='Future monthly partitions to create (default: ACTIVITY_LOG_PARTITIONS_AHEAD)')
+@click.option('--archive-dir', default=None,
+              help='Dump expired partitions to CSV.gz here before dropping them')
+def maintain_activity_logs(keep_months, months_ahead, archive_dir):
+    """Create upcoming partitions and apply the retention policy (run daily from cron)"""
+    config = current_app.config
+    keep_months = keep_months if keep_months is not None else config['ACTIVITY_LOG_RETENTION_MONTHS']
+    months_ahead = months_ahead if months_ahead is not None else config['ACTIVITY_LOG_PARTITIONS_AHEAD']
+    archive_dir = archive_dir or config.get('ACTIVITY_LOG_ARCHIVE_DIR')
+
+    created = ensure_monthly_partitions('activity_logs', months_ahead=months_ahead)
+    click.echo(f"✓ Created {created} upcoming partition(s)")
+
+    result = apply_retention('activity_logs', keep_months, archive_dir=archive_dir)
+    for path in result['archived']:
+        click.echo(f"  archived {path}")
+    for name in result['dropped']:
+        click.echo(f"  dropped {name}")
+    for name, reason in result['skipped']:
+        click.echo(f"⚠ skipped {name}: {reason}")
+    click.echo(f"✓ Retention applied (keeping {keep_months} months): "
+               f"{len(result['dropped'])} partition(s) dropped")
+
+
+@activity_logs_cli.command('partitions')
+def show_activity_log_partitions():
+    """List the monthly partitions of activity_logs"""
+    for name, month_start in list_monthly_partitions('activity_logs'):
+        click.echo(f"{month_start:%Y-%m}  {name}")
+
+
+periods_cli = AppGroup('periods', help='Evaluation periods and their cold archive')
+
+
+@periods_cli.command('list')
+def list_periods():
+    """List evaluation periods and their status"""
+    for period in EvaluationPeriod.query.order_by(EvaluationPeriod.code).all():
+        click.echo(f"{period.code:10} {period.status:9} {period.starts_on} - {period.ends_on}"
+                   f"{'  ' + period.archive_path if period.archive_path else ''}")
+
+
+@periods_cli.command('create')
+@click.argument('code')
+@click.option('--starts-on', default=None, help='First day (YYYY-MM-DD), default from the semester code')
+@click.option('--ends-on', default=None, help='Last day (YYYY-MM-DD), default from the semester code')
+def create_period(code, starts_on, ends_on):
+    """Register a period (its survey/comment partitions are created by a trigger)"""
+    if starts_on and ends_on:
+        db.session.add(EvaluationPeriod(
+            code=code,
+            starts_on=datetime.strptime(starts_on, '%Y-%m-%d').date(),
+            ends_on=datetime.strptime(ends_on, '%Y-%m-%d').date(),
+            status='open'
+        ))
+    else:
+        db.session.execute(text("SELECT ensure_evaluation_period(:code)"), {'code': code})
+    db.session.commit()
+    click.echo(f"✓ Period {code} ready")
+
+
+@periods_cli.command('close')
+@click.argument('code')
+def close_period(code):
+    """Close a period (no more submissions, can be archived)"""
+    period = db.session.get(EvaluationPeriod, code)
+    if not period:
+        raise click.ClickException(f'Period {code} not found')
+    period.status = 'closed'
+    db.session.commit()
+    click.echo(f"✓ Period {code} closed")
+
+
+@periods_cli.command('archive')
+@click.argument('code')
+@click.option('--archive-dir', default=None, help='Bundle directory (default: PERIOD_ARCHIVE_DIR)')
+def archive_period_command(code, archive_dir):
+    """Export a closed period to a compressed bundle and drop its partitions"""
+    archive_dir = archive_dir or current_app.config['PERIOD_ARCHIVE_DIR']
+    try:
+        manifest = archive_period(code, archive_dir)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for name, info in manifest['tables'].items():
+        click.echo(f"  {name}: {info['rows']} rows -> {info['file']}")
+    click.echo(f"✓ Period {code} archived to {archive_dir}")
+
+
+@periods_cli.command('restore')
+@click.argument('code')
+@click.option('--archive-dir', default=None, help='Bundle directory (default: where it was archived)')
+def restore_period_command(code, archive_dir):
+    """Load an archived period back into the live tables"""
+    try:
+        restored = restore_period(code, archive_dir)
+    except (ValueError, OSError) as e:
+        raise click.ClickException(str(e))
+    for name, rows in restored.items():
+        click.echo(f"  {name}: {rows} rows")
+    click.echo(f"✓ Period {code} restored")
+
+
+trends_cli = AppGroup('trends', help='Sentiment trend rollups')
+
+
+@trends_cli.command('backfill')
+@click.option('--period', default=None, help='Only rebuild this period (default: every period not archived)')
+def backfill_trends(period):
+    """Rebuild sentiment_daily from the comments (the triggers keep it current afterwards)"""
+    rows = backfill_sentiment_daily(period)
+    click.echo(f"✓ sentiment_daily rebuilt: {rows} row(s)")
+
+
+participation_cli = AppGroup('participation', help='Survey participation counters')
+
+
+@participation_cli.command('rebuild')
+@click.option('--period', default=None, help='Only recount this period (default: every period not archived)')
+def rebuild_participation_counters(period):
+    """Recount participation counters and student completion flags from the surveys"""
+    result = rebuild_participation(period)
+    click.echo(f"✓ {result['counts']} counter row(s) for {result['periods']} period(s), "
+               f"{result['students']} student flag(s) changed")
+
+
+keywords_cli = AppGroup('keywords', help='Keyword statistics per professor and sentiment')
+
+
+@keywords_cli.command('rebuild')
+def rebuild_keywords():
+    """Recount keyword_stats/keyword_terms from the comments (periods not archived)"""
+    comments, rows = rebuild_keyword_stats()
+    click.echo(f"✓ {comments} comment(s) read, {rows} keyword row(s) written")
+
+
+duplicates_cli = AppGroup('duplicates', help='Near-duplicate comment detection')
+
+
+@duplicates_cli.command('rebuild')
+@click.option('--threshold', type=float, default=None,
+              help='Similarity to flag a duplicate (default: DUPLICATE_SIMILARITY_THRESHOLD)')
+def rebuild_duplicates(threshold):
+    """Recompute MinHash signatures, LSH buckets and duplicate flags of live comments"""
+    threshold = threshold if threshold is not None else current_app.config['DUPLICATE_SIMILARITY_THRESHOLD']
+    indexed, flagged = rebuild_duplicate_index(threshold)
+    click.echo(f"✓ {indexed} comment(s) indexed, {flagged} flagged as near-duplicates")
+
+
+embeddings_cli = AppGroup('embeddings', help='Comment embeddings for similar-comment search')
+
+
+@embeddings_cli.command('backfill')
+@click.option('--period', default=None, help='Only this period (default: every period not archived)')
+@click.option('--batch-size', type=int, default=64, show_default=True, help='Comments per forward pass')
+def backfill_comment_embeddings(period, batch_size):
+    """Compute embeddings for comments that have none (runs the model, CPU heavy)"""
+    try:
+        written = backfill_embeddings(
+            lambda texts: SentimentClassifier.embed(texts, batch_size=batch_size),
+            period_code=period,
+            batch_size=batch_size
+        )
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"✓ {written} embedding(s) stored")
+
+
+models_cli = AppGroup('models', help='Sentiment model maintenance')
+
+
+@models_cli.command('distill')
+@click.option('--output', required=True, help='Directory for the student model')
+@click.option('--teacher', default=None, help='Teacher model directory (default: SENTIMENT_MODEL_PATH)')
+@click.option('--layers', type=int, default=3, show_default=True, help='Encoder layers kept in the student')
+@click.option('--epochs', type=int, default=3, show_default=True)
+@click.option('--batch-size', type=int, default=32, show_default=True)
+@click.option('--learning-rate', type=float, default=5e-5, show_default=True)
+@click.option('--temperature', type=float, default=2.0, show_default=True, help='Softening of the teacher probabilities')
+@click.option('--limit', type=int, default=None, help='Only the latest N comments')
+def distill_model(output, teacher, layers, epochs, batch_size, learning_rate, temperature, limit):
+    """Train a compact student model from the teacher's labels on the stored comments (CPU)"""
+    # Imported here: it pulls in torch and transformers, which the other commands do not need
+    from .utils.distillation import distill
+
+    teacher = teacher or current_app.config['SENTIMENT_MODEL_PATH']
+    try:
+        report = distill(teacher, output, num_layers=layers, epochs=epochs, batch_size=batch_size,
+                         learning_rate=learning_rate, temperature=temperature, limit=limit, log=click.echo)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"\n{'model':8} {'layers':>6} {'params':>12} {'p50':>9} {'p95':>9} {'batched':>12}")
+    for name in ('teacher', 'student'):
+        info = report[f'{name}_model']
+        click.echo(f"{name:8} {info['layers']:>6} {info['parameters']:>12,} {info['p50_ms']:>7.1f}ms "
+                   f"{info['p95_ms']:>7.1f}ms {info['batched_per_second']:>8,.0f}/s")
+    click.echo(f"Holdout agreement with the teacher {report['holdout_agreement']:.1%}, "
+               f"macro F1 {report['holdout_macro_f1']:.3f}")
+    click.echo(f"✓ Student saved to {output} (use it with SENTIMENT_MODEL_PATH={output})")
+
+
+@models_cli.command('list')
+def list_models():
+    """Registered model versions and the active/shadow settings"""
+    registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+    state = model_registry.read_state(registry_dir)
+    shadow = state.get('shadow') or {}
+    versions = model_registry.list_versions(registry_dir)
+    if not versions:
+        click.echo(f"No model versions in {registry_dir}")
+    for entry in versions:
+        marker = 'active' if entry['version'] == state.get('active') else (
+            'shadow' if entry['version'] == shadow.get('version') else '')
+        click.echo(f"{entry['version']:24} {entry['size_mb']:>8.1f} MB  {entry['created_at'][:19]}  {marker}")
+    for pair in shadow_report():
+        click.echo(f"shadow {pair['shadow_version']} vs {pair['active_version']}: {pair['comparisons']} comparisons, "
+                   f"{pair['agreement']:.1%} agreement, {pair['mean_shadow_ms']:.1f} ms")
+
+
+@models_cli.command('activate')
+@click.argument('version')
+def activate_model(version):
+    """Make VERSION the active model (running workers switch within MODEL_REGISTRY_POLL_SECONDS)"""
+    registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+    try:
+        path = model_registry.version_path(registry_dir, version)
+        # Load it here first so a broken model is never announced to the workers
+        SentimentClassifier.read_model(path, version)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except OSError as e:
+        raise click.ClickException(f"Cannot load {version}: {str(e)}")
+    model_registry.write_state(registry_dir, active=version)
+    click.echo(f"✓ {version} is now the active model")
+
+
+@models_cli.command('shadow')
+@click.argument('version', required=False)
+@click.option('--sample-rate', type=float, default=0.1, show_default=True, help='Fraction of live comments scored')
+@click.option('--off', is_flag=True, help='Stop shadow scoring')
+def shadow_model(version, sample_rate, off):
+    """Score a sample of live comments with VERSION in the background, or stop with --off"""
+    registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+    if off:
+        model_registry.write_state(registry_dir, shadow=None)
+        click.echo("✓ Shadow scoring stopped")
+        return
+    if not 0 < sample_rate <= 1:
+        raise click.ClickException('--sample-rate must be in (0, 1]')
+    try:
+        model_registry.version_path(registry_dir, version)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    model_registry.write_state(registry_dir, shadow={'version': version, 'sample_rate': sample_rate})
+    click.echo(f"✓ Shadow scoring {version} on {sample_rate:.0%} of new comments")
+
+
+@models_cli.command('rescore')
+@click.option('--period', default=None, help='Only this period (default: every period not archived)')
+@click.option('--batch-size', type=int, default=256, show_default=True, help='Comments per committed batch')
+@click.option('--limit', type=int, default=None, help='Stop after N comments (run again to continue)')
+@click.option('--adopt-legacy', is_flag=True,
+              help='Stamp comments classified before versions were recorded instead of rescoring them')
+@click.option('--dry-run', is_flag=True, help='Only show comments per model version and status')
+def rescore_model_comments(period, batch_size, limit, adopt_legacy, dry_run):
+    """Classify again fallback, pending and out-of-date comments with the current model (CPU heavy)"""
+    try:
+        if dry_run:
+            SentimentClassifier.load_model()
+        else:
+            result = rescore_comments(period=period, batch_size=batch_size, adopt_legacy=adopt_legacy,
+                                      limit=limit, log=click.echo)
+            if adopt_legacy:
+                click.echo(f"✓ {result['adopted']} legacy comment(s) stamped with the current model")
+            click.echo(f"✓ {result['rescored']} comment(s) rescored, {result['changed']} changed sentiment")
+        for entry in model_version_counts(period):
+            state = {True: 'current', False: 'stale', None: ''}[entry['current']]
+            click.echo(f"{entry['model_version'] or '-':40} {entry['status']:9} {entry['comments']:>9,}  {state}")
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+
+synthetic_cli = AppGroup('synthetic', help='Synthetic data for scale testing')
+
+
+@synthetic_cli.command('generate')
+@click.option('--preset', type=click.Choice(list(PRESETS)), default='faculty', show_default=True,
+              help='Population size')
+@click.option('--seed', type=int, default=7, show_default=True, help='Same preset and seed, same data')
+@click.option('--first-period', default='2021-1', show_default=True, help='First of the new periods to fill')
+@click.option('--students', type=int, default=None, help='Override the preset student count')
+@click.option('--professors', type=int, default=None, help='Override the preset professor count')
+@click.option('--periods', type=int, default=None, help='Override the preset period count')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation')
+def generate_synthetic(preset, seed, first_period, students, professors, periods, yes):
+    """Bulk load synthetic professors, students, surveys and comments (scratch databases only)"""
+    if not yes:
+        click.confirm(f"Load the {preset} preset into {db.engine.url.database}?", abort=True)
+    try:
+        result = generate_synthetic_data(preset=preset, seed=seed, first_period=first_period, log=click.echo,
+                                         students=students, professors=professors, periods=periods)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    rows = ', '.join(f"{count:,} {table}" for table, count in result['rows'].items())
+    click.echo(f"✓ {rows} in {result['seconds']}s ({', '.join(result['periods'])})")
+    click.echo("  Run `flask keywords rebuild` and `flask duplicates rebuild` to index the new comments")
+
+
+def register_commands(app):
+    """Attach all CLI command groups to the app"""
+    app.cli.add_command(activity_logs_cli)
+    app.cli.add_command(periods_cli)
+    app.cli.add_command(trends_cli)
+    app.cli.add_command(participation_cli)
+    app.cli.add_command(keywords_cli)
+    app.cli.add_command(duplicates_cli)
+    app.cli.add_command(embeddings_cli)
+    app.cli.add_command(models_cli)
+    app.cli.add_command(synthetic_cli)
@@ -31,3 +31,120 @@ class Config:
     
     # CORS Configuration - Allow frontend origins
     CORS_ORIGINS = ['http://localhost:8080', 'http://localhost:3000', 'http://localhost:80']
+    
+    # Admin dashboard stats snapshot lifetime (seconds)
+    # Older snapshots are still served while a fresh one is computed in the background
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 30))
+    
+    # Audit log writer: entries are buffered and inserted in batches by a background thread,
+    # once ACTIVITY_LOG_BATCH_SIZE entries are waiting or ACTIVITY_LOG_FLUSH_INTERVAL seconds
+    # after the oldest one
+    # Set ACTIVITY_LOG_SYNC=true to write every entry immediately (useful for tests)
+    ACTIVITY_LOG_SYNC = os.environ.get('ACTIVITY_LOG_SYNC', 'false').lower() == 'true'
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 100))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+    # A failed batch INSERT is tried ACTIVITY_LOG_WRITE_ATTEMPTS times in all, waiting
+    # ACTIVITY_LOG_RETRY_BACKOFF seconds before the first retry and doubling, then dropped
+    ACTIVITY_LOG_WRITE_ATTEMPTS = int(os.environ.get('ACTIVITY_LOG_WRITE_ATTEMPTS', 4))
+    ACTIVITY_LOG_RETRY_BACKOFF = float(os.environ.get('ACTIVITY_LOG_RETRY_BACKOFF', 0.5))
+    
+    # activity_logs is partitioned by month; `flask activity-logs maintain` creates the
+    # upcoming partitions and drops (optionally archiving) the ones past retention
+    ACTIVITY_LOG_RETENTION_MONTHS = int(os.environ.get('ACTIVITY_LOG_RETENTION_MONTHS', 24))
+    ACTIVITY_LOG_PARTITIONS_AHEAD = int(os.environ.get('ACTIVITY_LOG_PARTITIONS_AHEAD', 3))
+    ACTIVITY_LOG_ARCHIVE_DIR = os.environ.get('ACTIVITY_LOG_ARCHIVE_DIR')
+    
+    # Where `flask periods archive` writes the bundles of archived evaluation periods
+    PERIOD_ARCHIVE_DIR = os.environ.get('PERIOD_ARCHIVE_DIR', os.path.join(os.getcwd(), 'archive', 'periods'))
+    
+    # Comments at least this similar (estimated Jaccard over character shingles) to an earlier
+    # one are flagged as near-duplicates and reuse its classification instead of running BETO
+    DUPLICATE_SIMILARITY_THRESHOLD = float(os.environ.get('DUPLICATE_SIMILARITY_THRESHOLD', 0.85))
+    
+    # Directory of the sentiment model loaded on first use: the fine-tuned BETO by default,
+    # or e.g. a student trained with `flask models distill`
+    SENTIMENT_MODEL_PATH = os.environ.get('SENTIMENT_MODEL_PATH', 'final_model')
+    
+    # Load torch and the model while the app starts instead of on the first classification.
+    # Leave it off for processes that never classify (admin-only workers, seeding, CLI)
+    PRELOAD_SENTIMENT_MODEL = os.environ.get('PRELOAD_SENTIMENT_MODEL', 'false').lower() == 'true'
+    
+    # Versioned models live in subdirectories of MODEL_REGISTRY_DIR; its registry.json names
+    # the active version (used instead of SENTIMENT_MODEL_PATH) and the shadow candidate.
+    # Workers re-read it every MODEL_REGISTRY_POLL_SECONDS and swap models in the background
+    MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', os.path.join(os.getcwd(), 'models'))
+    MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get('MODEL_REGISTRY_POLL_SECONDS', 10))
+    SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', 200))
+    
+    # CPU budget: the cores (CPU_CORES, default: affinity capped by the container quota) are
+    # split between the WEB_WORKERS processes serving the app; each runs at most
+    # INFERENCE_CONCURRENCY forward passes at once with INFERENCE_THREADS torch threads each
+    # (default: its cores / concurrency). Requests wait up to INFERENCE_QUEUE_TIMEOUT seconds
+    # for a slot (0 = no limit). Tune with benchmarks/bench_thread_budget.py
+    CPU_CORES = int(os.environ.get('CPU_CORES', 0)) or None
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 1))
+    INFERENCE_CONCURRENCY = int(os.environ.get('INFERENCE_CONCURRENCY', 1))
+    INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 0)) or None
+    INFERENCE_QUEUE_TIMEOUT = float(os.environ.get('INFERENCE_QUEUE_TIMEOUT', 10))
+    
+    # Admission control of survey submissions (inference bound), per worker process: at most
+    # ADMISSION_MAX_IN_FLIGHT run at once, ADMISSION_MAX_QUEUE more wait up to
+    # ADMISSION_QUEUE_TIMEOUT seconds, the rest get 503 with Retry-After: ADMISSION_RETRY_AFTER.
+    # Each student may submit SUBMIT_BURST surveys at once, refilled at SUBMIT_RATE_PER_MINUTE
+    # (429 past that; 0 = no per-student limit). Server threads should exceed in flight + queue
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 4))
+    ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 8))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 5))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+    SUBMIT_RATE_PER_MINUTE = float(os.environ.get('SUBMIT_RATE_PER_MINUTE', 6))
+    SUBMIT_BURST = int(os.environ.get('SUBMIT_BURST', 10))
+    
+    # Idempotency-Key: successful responses are replayed to repeats of a key for
+    # IDEMPOTENCY_TTL_SECONDS; a repeat arriving while the first request still runs waits
+    # up to IDEMPOTENCY_WAIT_SECONDS for its response (per worker process)
+    IDEMPOTENCY_TTL_SECONDS = float(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 600))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 15))
+    
+    # Live dashboard events (Server-Sent Events fed by LISTEN/NOTIFY, one listener per worker
+    # process). Each open stream holds a server thread, so a process accepts at most
+    # SSE_MAX_STREAMS; streams end after SSE_STREAM_SECONDS and the client reconnects.
+    # SSE_QUEUE_SIZE events can wait for a slow client before it is told to reload instead
+    LIVE_EVENTS_ENABLED = os.environ.get('LIVE_EVENTS_ENABLED', 'true').lower() == 'true'
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_STREAM_SECONDS = float(os.environ.get('SSE_STREAM_SECONDS', 600))
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 200))
+    SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+    
+    # Response cache of read endpoints (subjects, groups, a professor's subjects, a student's
+    # professors), invalidated by tag when the data changes: 'memory' (per worker process,
+    # other workers catch up within RESPONSE_CACHE_TTL seconds), 'database' (shared by all
+    # workers) or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+    
+    # JSON/text responses of at least COMPRESSION_MIN_SIZE bytes are sent gzip (or Brotli,
+    # when the brotli package is installed) compressed to clients that accept it
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    
+    # Keep the sentence embedding computed while classifying each comment (1.5 KB per comment)
+    # so /comments/<id>/similar can find related comments; fill older ones with
+    # `flask embeddings backfill`
+    STORE_COMMENT_EMBEDDINGS = os.environ.get('STORE_COMMENT_EMBEDDINGS', 'false').lower() == 'true'
+    
+    # Comments longer than the model's 192 tokens: 'truncate' reads only the beginning;
+    # 'mean', 'weighted' (by window length) or 'max_negative' classify overlapping windows
+    # in one batch and combine them. LONG_COMMENT_MAX_WINDOWS caps the batch, and with it
+    # the latency of one submission (cost grows about linearly with the windows)
+    LONG_COMMENT_STRATEGY = os.environ.get('LONG_COMMENT_STRATEGY', 'weighted')
+    LONG_COMMENT_WINDOW_OVERLAP = int(os.environ.get('LONG_COMMENT_WINDOW_OVERLAP', 48))
+    LONG_COMMENT_MAX_WINDOWS = int(os.environ.get('LONG_COMMENT_MAX_WINDOWS', 4))
+    
+    # Cascade: short, clear-cut comments ("excelente profesor", "muy malo") are answered by a
+    # Spanish lexicon when its confidence reaches the threshold; the rest go to BETO.
+    # Check agreement with benchmarks/bench_cascade.py before enabling it
+    SENTIMENT_CASCADE = os.environ.get('SENTIMENT_CASCADE', 'false').lower() == 'true'
+    SENTIMENT_CASCADE_THRESHOLD = float(os.environ.get('SENTIMENT_CASCADE_THRESHOLD', 0.85))
@@ -123,6 +123,32 @@ class Admin(db.Model):
     def __repr__(self):
         return f'<Admin {self.user_id}>'
 
+class EvaluationPeriod(db.Model):
+    """Evaluation period (semester); surveys and comments are partitioned by it"""
+    __tablename__ = 'evaluation_periods'
+    code = db.Column(db.String(20), primary_key=True)  # e.g. '2025-1'
+    starts_on = db.Column(db.Date, nullable=False)
+    ends_on = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')  # open, closed, archived
+    archive_path = db.Column(db.String(255))
+    archived_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert period to dictionary"""
+        return {
+            'code': self.code,
+            'starts_on': self.starts_on.isoformat() if self.starts_on else None,
+            'ends_on': self.ends_on.isoformat() if self.ends_on else None,
+            'status': self.status,
+            'archive_path': self.archive_path,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<EvaluationPeriod {self.code} {self.status}>'
+
+
 class Survey(db.Model):
     """ Survey """
     __tablename__ = 'surveys'
@@ -130,6 +156,8 @@ class Survey(db.Model):
     student_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     professor_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id', ondelete='CASCADE'), nullable=False)
+    # Partition key of surveys/comments (the table's primary key is (id, period))
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code'), nullable=False)
     status = db.Column(
         db.Enum('pending', 'completed', 'canceled', name='survey_status'),
         default='pending',
@@ -139,7 +167,7 @@ class Survey(db.Model):
     completed_at = db.Column(db.DateTime)
     
     __table_args__ = (
-        db.UniqueConstraint('student_id', 'professor_id', 'subject_id', name='unique_student_professor_subject'),
+        db.UniqueConstraint('student_id', 'professor_id', 'subject_id', 'period', name='unique_student_professor_subject'),
         # SQLAlchemy automatically creates indexes for Foreign Keys, 
         # but you can add specific index declarations if needed:
         # db.Index('idx_surveys_status', 'status'), 
@@ -152,6 +180,8 @@ class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
     survey_id = db.Column(db.Integer, db.ForeignKey('surveys.id', ondelete='CASCADE'), nullable=False)
+    # Always the survey's period (composite FK to surveys(id, period))
+    period = db.Column(db.String(20), nullable=False)
     text = db.Column(db.Text, nullable=False)
     sentiment = db.Column(
         db.Enum('positive', 'neutral', 'negative', name='sentiment_type'),
@@ -159,6 +189,15 @@ class Comment(db.Model):
     )
     confidence_score = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    # MinHash signature of the text and, for near-duplicates, the id of the original comment
+    minhash = db.Column(db.LargeBinary)
+    duplicate_of = db.Column(db.Integer)
+    # Stamp of the model (or lexicon) that produced the sentiment and how it was obtained:
+    # 'scored', 'fallback' (neutral default after a failure) or 'pending' (not classified yet)
+    model_version = db.Column(db.String(80))
+    sentiment_status = db.Column(db.String(10), nullable=False, default='scored')
+    # search_vector (tsvector) is a generated column maintained by PostgreSQL and only used
+    # by the raw SQL in utils/comment_search.py, so it is deliberately not mapped here
     
     def __repr__(self):
         return f'<Comment {self.id} Sentiment: {self.sentiment}>'
@@ -200,6 +239,134 @@ class GroupClass(db.Model):
     def __repr__(self):
         return f'<GroupClass {self.group_name} for Subject ID {self.subject_id}>'
 
+class PeriodAggregate(db.Model):
+    """Per period professor/subject sentiment summary, kept after the period is archived"""
+    __tablename__ = 'period_aggregates'
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), primary_key=True)
+    professor_id = db.Column(db.Integer, primary_key=True)  # users.id, like Survey.professor_id
+    subject_id = db.Column(db.Integer, primary_key=True)
+    total_surveys = db.Column(db.Integer, nullable=False, default=0)
+    completed_surveys = db.Column(db.Integer, nullable=False, default=0)
+    total_comments = db.Column(db.Integer, nullable=False, default=0)
+    positive_count = db.Column(db.Integer, nullable=False, default=0)
+    neutral_count = db.Column(db.Integer, nullable=False, default=0)
+    negative_count = db.Column(db.Integer, nullable=False, default=0)
+    avg_confidence = db.Column(db.Float)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PeriodAggregate {self.period} professor={self.professor_id} subject={self.subject_id}>'
+
+class SentimentDaily(db.Model):
+    """Daily sentiment counts per professor/subject, maintained by triggers on comments"""
+    __tablename__ = 'sentiment_daily'
+    day = db.Column(db.Date, primary_key=True)
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), primary_key=True)
+    professor_id = db.Column(db.Integer, primary_key=True)  # users.id, like Survey.professor_id
+    subject_id = db.Column(db.Integer, primary_key=True)
+    department = db.Column(db.String(100))
+    positive_count = db.Column(db.Integer, nullable=False, default=0)
+    neutral_count = db.Column(db.Integer, nullable=False, default=0)
+    negative_count = db.Column(db.Integer, nullable=False, default=0)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0)
+    confidence_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SentimentDaily {self.day} professor={self.professor_id} subject={self.subject_id}>'
+
+class ParticipationCount(db.Model):
+    """Surveys per status for one professor, subject and student group, maintained by triggers on surveys"""
+    __tablename__ = 'participation_counts'
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), primary_key=True)
+    professor_id = db.Column(db.Integer, primary_key=True)  # users.id, like Survey.professor_id
+    subject_id = db.Column(db.Integer, primary_key=True)
+    group_name = db.Column(db.String(20), primary_key=True, default='')  # Student.group
+    department = db.Column(db.String(100))
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    canceled_count = db.Column(db.Integer, nullable=False, default=0)
+    last_completed_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ParticipationCount {self.period} professor={self.professor_id} subject={self.subject_id} group={self.group_name}>'
+
+class PeriodParticipation(db.Model):
+    """Students with surveys, started and done in a period, maintained by triggers on surveys"""
+    __tablename__ = 'period_participation'
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), primary_key=True)
+    students_total = db.Column(db.Integer, nullable=False, default=0)
+    students_started = db.Column(db.Integer, nullable=False, default=0)
+    students_completed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PeriodParticipation {self.period} {self.students_completed}/{self.students_total}>'
+
+class KeywordStat(db.Model):
+    """Term counts per professor, sentiment and period (see utils/keywords.py)"""
+    __tablename__ = 'keyword_stats'
+    professor_id = db.Column(db.Integer, primary_key=True)  # users.id, like Survey.professor_id
+    sentiment = db.Column(db.String(20), primary_key=True)
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), primary_key=True)
+    term = db.Column(db.String(100), primary_key=True)
+    occurrences = db.Column(db.Integer, nullable=False, default=0)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<KeywordStat {self.term!r} professor={self.professor_id} {self.sentiment}>'
+
+class KeywordTerm(db.Model):
+    """Number of comments containing each term, across all professors (document frequency)"""
+    __tablename__ = 'keyword_terms'
+    term = db.Column(db.String(100), primary_key=True)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<KeywordTerm {self.term!r} {self.comment_count}>'
+
+class CommentLshBucket(db.Model):
+    """LSH band buckets of comment MinHash signatures (see utils/duplicates.py)"""
+    __tablename__ = 'comment_lsh_buckets'
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    comment_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(20), nullable=False)
+    
+    def __repr__(self):
+        return f'<CommentLshBucket band={self.band} comment={self.comment_id}>'
+
+class CommentEmbedding(db.Model):
+    """Sentence embedding of a comment, normalized float16 bytes (see utils/embeddings.py)"""
+    __tablename__ = 'comment_embeddings'
+    comment_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(20), db.ForeignKey('evaluation_periods.code', ondelete='CASCADE'), nullable=False)
+    professor_id = db.Column(db.Integer, nullable=False)  # users.id, like Survey.professor_id
+    dim = db.Column(db.SmallInteger, nullable=False)
+    embedding = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CommentEmbedding comment={self.comment_id} dim={self.dim}>'
+
+class ModelShadowStat(db.Model):
+    """Shadow scoring counts: live comments by active and candidate model label (see utils/shadow_scoring.py)"""
+    __tablename__ = 'model_shadow_stats'
+    shadow_version = db.Column(db.String(64), primary_key=True)
+    active_version = db.Column(db.String(64), primary_key=True)
+    active_sentiment = db.Column(db.String(20), primary_key=True)
+    shadow_sentiment = db.Column(db.String(20), primary_key=True)
+    comparisons = db.Column(db.Integer, nullable=False, default=0)
+    confidence_delta_sum = db.Column(db.Float, nullable=False, default=0)
+    shadow_ms_sum = db.Column(db.Float, nullable=False, default=0)
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ModelShadowStat {self.shadow_version} vs {self.active_version} {self.active_sentiment}->{self.shadow_sentiment}>'
+
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
     id = db.Column(db.Integer, primary_key=True)
@@ -209,7 +376,16 @@ class ActivityLog(db.Model):
     action_type = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(255), nullable=False)
     target_id = db.Column(db.Integer)
+    target_type = db.Column(db.String(50))
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.String(255))
+    extra_data = db.Column(db.JSON(none_as_null=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ActivityLog {self.id} {self.action_type}>'
 
 # Export all models
-__all__ = ['db', 'User', 'Student', 'Professor', 'Admin', 'Survey', 'Comment', 'Subject', 'GroupClass']
+__all__ = ['db', 'User', 'Student', 'Professor', 'Admin', 'EvaluationPeriod', 'Survey', 'Comment', 'Subject',
+           'GroupClass', 'PeriodAggregate', 'SentimentDaily', 'ParticipationCount', 'PeriodParticipation',
+           'KeywordStat', 'KeywordTerm', 'CommentLshBucket', 'CommentEmbedding', 'ModelShadowStat', 'ActivityLog']
@@ -1,45 +1,97 @@
-from flask import Blueprint, jsonify, request
-from ..models import db, User, Student, Professor, Admin, Survey, Comment, Subject, GroupClass, ActivityLog
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from sqlalchemy import select, text
+from ..models import (db, User, Student, Professor, Admin, Survey, Comment, Subject, GroupClass, ActivityLog,
+                      EvaluationPeriod, PeriodAggregate, CommentEmbedding)
 from ..config import Config
 from datetime import datetime
 import jwt
 from functools import wraps
 from ..routes import token_required
+from ..utils.snapshot_cache import SnapshotCache
+from ..utils.activity_logger import activity_logger
+from ..utils.pagination import (
+    encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, parse_limit, parse_date_arg
+)
+from ..utils.period_archive import compute_period_aggregates
+from ..utils.export import EXPORT_FORMATS, iter_export
+from ..utils.trends import parse_trend_args, sentiment_trends
+from ..utils.participation import PARTICIPATION_GROUPINGS, participation_progress
+from ..utils.comment_search import search_comments
+from ..utils.keywords import top_keywords, uncount_survey_keywords
+from ..utils.duplicates import duplicate_clusters
+from ..utils.embeddings import similar_comments
+from ..utils.sentiment_classifier import SentimentClassifier
+from ..utils.shadow_scoring import shadow_scorer, shadow_report
+from ..utils import model_registry
+from ..utils.rescoring import model_version_counts
+from ..utils.inference_budget import inference_budget
+from ..utils.admission import admission
+from ..utils.live_events import live_events, open_stream
+from ..utils.response_cache import cached_response, invalidate_cache, professor_tags, response_cache
+from ..utils.conditional import conditional_response
+from ..utils.compression import response_compression
 
 # Blueprint for admin dashboard routes
 admin_bp = Blueprint('admin_dashboard', __name__, url_prefix='/api/admin')
 
 
+# Snapshot of the dashboard counters, shared by every admin request in this process
+dashboard_stats_cache = SnapshotCache(ttl_seconds=Config.DASHBOARD_STATS_TTL)
+
+# All dashboard counters in one round trip; surveys are scanned once instead of four times
+DASHBOARD_STATS_QUERY = text("""
+    WITH survey_counts AS (
+        SELECT
+            COUNT(*) AS total_surveys,
+            COUNT(*) FILTER (WHERE status = 'completed') AS completed_surveys,
+            COUNT(*) FILTER (WHERE status = 'pending') AS pending_surveys,
+            COUNT(DISTINCT student_id) FILTER (WHERE status = 'completed') AS students_with_surveys
+        FROM surveys
+    )
+    SELECT
+        (SELECT COUNT(*) FROM users WHERE is_active) AS total_users,
+        (SELECT COUNT(*) FROM students) AS total_students,
+        (SELECT COUNT(*) FROM professors) AS total_professors,
+        (SELECT COUNT(*) FROM admins) AS total_admins,
+        (SELECT COUNT(*) FROM subjects) AS total_subjects,
+        (SELECT COUNT(*) FROM group_classes) AS total_groups,
+        sc.total_surveys,
+        sc.completed_surveys,
+        sc.pending_surveys,
+        sc.students_with_surveys
+    FROM survey_counts sc
+""")
+
+
+def compute_dashboard_stats():
+    """Run the aggregate stats query and return the counters as a dict"""
+    row = db.session.execute(DASHBOARD_STATS_QUERY).mappings().one()
+    return {key: int(value or 0) for key, value in row.items()}
+
+
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @token_required
 def get_dashboard_stats(current_user):
-    """Get statistics for admin dashboard"""
+    """
+    Get statistics for admin dashboard
+    Counters come from a snapshot that is at most DASHBOARD_STATS_TTL seconds old
+    (see computed_at); pass ?refresh=true to recompute them now
+    """
     try:
         # Check if user is admin
         if current_user.role != 'admin':
             return jsonify({'error': 'Unauthorized - Admin access required'}), 403
         
-        # Total counts
-        total_students = Student.query.count()
-        total_professors = Professor.query.count()
-        total_admins = Admin.query.count()
-        total_users = User.query.filter_by(is_active=True).count()
-        
-        # Survey statistics
-        total_surveys = Survey.query.count()
-        completed_surveys = Survey.query.filter_by(status='completed').count()
-        pending_surveys = Survey.query.filter_by(status='pending').count()
-        
-        # Calculate unique students who completed surveys for participation rate
-        students_with_surveys = db.session.query(Survey.student_id).filter(
-            Survey.status == 'completed'
-        ).distinct().count()
-        
-        # Get subjects and groups
-        total_subjects = Subject.query.count()
-        total_groups = GroupClass.query.count()
+        if request.args.get('refresh', '').lower() == 'true':
+            stats, computed_at = dashboard_stats_cache.refresh('dashboard_stats', compute_dashboard_stats)
+        else:
+            stats, computed_at = dashboard_stats_cache.get(
+                'dashboard_stats',
+                compute_dashboard_stats,
+                app=current_app._get_current_object()
+            )
         
-        # Recent activity (last 10 activities)
+        # Recent activity (last 10 activities, served by idx_activity_logs_created_at)
         recent_activities = ActivityLog.query.order_by(
             ActivityLog.created_at.desc()
         ).limit(10).all()
@@ -53,18 +105,8 @@ def get_dashboard_stats(current_user):
         } for log in recent_activities]
         
         return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'total_students': total_students,
-                'total_professors': total_professors,
-                'total_admins': total_admins,
-                'total_subjects': total_subjects,
-                'total_groups': total_groups,
-                'total_surveys': total_surveys,
-                'completed_surveys': completed_surveys,
-                'pending_surveys': pending_surveys,
-                'students_with_surveys': students_with_surveys
-            },
+            'stats': stats,
+            'computed_at': computed_at.isoformat(),
             'recent_activities': activities_list
         }), 200
         
@@ -73,6 +115,715 @@ def get_dashboard_stats(current_user):
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@admin_bp.route('/activity', methods=['GET'])
+@token_required
+def browse_activity(current_user):
+    """
+    Browse the audit log, newest first, with keyset pagination on (created_at, id)
+    
+    Query parameters:
+        user_id, action_type: optional filters
+        date_from, date_to: ISO dates/datetimes (date_to is inclusive for bare dates)
+        limit: page size (default 50, max 200)
+        cursor: next_cursor from the previous page
+    
+    writer: this worker's audit log writer counters (entries written, retried, dropped)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'), default=50, maximum=200)
+            date_from = parse_date_arg(request.args.get('date_from'))
+            date_to = parse_date_arg(request.args.get('date_to'), end_of_day=True)
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            user_id = request.args.get('user_id', type=int)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = ActivityLog.query
+        
+        if user_id:
+            query = query.filter(ActivityLog.user_id == user_id)
+        if request.args.get('action_type'):
+            query = query.filter(ActivityLog.action_type == request.args['action_type'])
+        # Date bounds also let PostgreSQL prune monthly partitions
+        if date_from:
+            query = query.filter(ActivityLog.created_at >= date_from)
+        if date_to:
+            query = query.filter(ActivityLog.created_at < date_to)
+        if after:
+            query = query.filter(db.tuple_(ActivityLog.created_at, ActivityLog.id) < after)
+        
+        # Fetch one extra row to know whether there is another page
+        logs = query.order_by(
+            ActivityLog.created_at.desc(),
+            ActivityLog.id.desc()
+        ).limit(limit + 1).all()
+        
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+        
+        activities_list = [{
+            'id': log.id,
+            'user_id': log.user_id,
+            'user_type': log.user_type,
+            'action_type': log.action_type,
+            'description': log.description,
+            'target_id': log.target_id,
+            'target_type': log.target_type,
+            'ip_address': log.ip_address,
+            'extra_data': log.extra_data,
+            'created_at': log.created_at.isoformat() if log.created_at else None
+        } for log in logs]
+        
+        return jsonify({
+            'activities': activities_list,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(logs[-1].created_at, logs[-1].id) if has_more else None,
+            'writer': activity_logger.stats()
+        }), 200
+        
+    except Exception as e:
+        print(f"Browse activity error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/periods', methods=['GET'])
+@token_required
+def get_periods(current_user):
+    """List evaluation periods (open, closed and archived)"""
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        periods = EvaluationPeriod.query.order_by(EvaluationPeriod.code.desc()).all()
+        
+        return jsonify({
+            'periods': [period.to_dict() for period in periods],
+            'total': len(periods)
+        }), 200
+        
+    except Exception as e:
+        print(f"Get periods error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/periods/<period_code>/aggregates', methods=['GET'])
+@token_required
+def get_period_aggregates(current_user, period_code):
+    """
+    Per professor/subject sentiment summary of a period
+    Archived periods are answered from period_aggregates, the others from the live tables
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        period = db.session.get(EvaluationPeriod, period_code)
+        if not period:
+            return jsonify({'error': 'Period not found'}), 404
+        
+        if period.status == 'archived':
+            rows = [{
+                'professor_id': agg.professor_id,
+                'subject_id': agg.subject_id,
+                'total_surveys': agg.total_surveys,
+                'completed_surveys': agg.completed_surveys,
+                'total_comments': agg.total_comments,
+                'positive_count': agg.positive_count,
+                'neutral_count': agg.neutral_count,
+                'negative_count': agg.negative_count,
+                'avg_confidence': agg.avg_confidence
+            } for agg in PeriodAggregate.query.filter_by(period=period_code).all()]
+        else:
+            rows = compute_period_aggregates(period_code)
+        
+        # Resolve names with one query per table instead of one per row
+        professor_ids = {row['professor_id'] for row in rows}
+        subject_ids = {row['subject_id'] for row in rows}
+        professors = {u.id: f"{u.first_name} {u.last_name}"
+                      for u in User.query.filter(User.id.in_(professor_ids)).all()} if professor_ids else {}
+        subjects = {s.id: s for s in Subject.query.filter(Subject.id.in_(subject_ids)).all()} if subject_ids else {}
+        
+        aggregates = []
+        for row in rows:
+            subject = subjects.get(row['subject_id'])
+            aggregates.append({
+                'professor_id': row['professor_id'],
+                'professor_name': professors.get(row['professor_id']),
+                'subject_id': row['subject_id'],
+                'subject_code': subject.code if subject else None,
+                'subject_name': subject.name if subject else None,
+                'total_surveys': row['total_surveys'],
+                'completed_surveys': row['completed_surveys'],
+                'sentiment_counts': {
+                    'positive': row['positive_count'],
+                    'neutral': row['neutral_count'],
+                    'negative': row['negative_count']
+                },
+                'total_comments': row['total_comments'],
+                'avg_confidence': round(row['avg_confidence'], 4) if row['avg_confidence'] is not None else None
+            })
+        
+        return jsonify({
+            'period': period.to_dict(),
+            'aggregates': aggregates,
+            'total': len(aggregates)
+        }), 200
+        
+    except Exception as e:
+        print(f"Get period aggregates error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/sentiment/cascade', methods=['GET'])
+@token_required
+def get_sentiment_cascade_stats(current_user):
+    """
+    How many comments the lexicon answered without running BETO
+    Counters are per worker process and reset on restart
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        stats = SentimentClassifier.cascade_stats()
+        stats['enabled'] = current_app.config['SENTIMENT_CASCADE']
+        stats['threshold'] = current_app.config['SENTIMENT_CASCADE_THRESHOLD']
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        print(f"Get cascade stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/events', methods=['GET'])
+@token_required
+def stream_events(current_user):
+    """
+    Server-Sent Events stream of survey submissions for live dashboards
+    Query params: professor_id, department (only events of that professor / department)
+    Events: survey_completed (period, professor_id, subject_id, department, sentiment,
+    first_for_student) and resync (reload the dashboard, events may have been missed)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return open_stream(
+            professor_id=request.args.get('professor_id', type=int),
+            department=request.args.get('department')
+        )
+        
+    except Exception as e:
+        print(f"Stream events error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/events/stats', methods=['GET'])
+@token_required
+def get_events_stats(current_user):
+    """Live event streams open in this worker and the events its listener fanned out"""
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return jsonify(live_events.stats()), 200
+        
+    except Exception as e:
+        print(f"Get events stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/cache', methods=['GET'])
+@token_required
+def get_cache_stats(current_user):
+    """
+    Response cache of this worker: backend, entries, hit rate per endpoint and tag
+    invalidations, and the bytes its response compression saved. Counters reset on restart
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        stats = response_cache.stats()
+        stats['compression'] = response_compression.stats()
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        print(f"Get cache stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/admission', methods=['GET'])
+@token_required
+def get_admission_stats(current_user):
+    """
+    Admission control of survey submissions in this worker: limits in effect, requests
+    admitted, queued and rejected (overload, queue timeout, per-student rate limit), and
+    the inference slot queue behind them. Counters reset on restart
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return jsonify({
+            'admission': admission.stats(),
+            'inference': inference_budget.stats()
+        }), 200
+        
+    except Exception as e:
+        print(f"Get admission stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/models', methods=['GET'])
+@token_required
+def get_models(current_user):
+    """
+    Registered sentiment model versions, the active and shadow settings, the version
+    this worker is serving with its CPU budget and inference queueing, the shadow scoring
+    statistics and how many live comments each model version classified (stale ones are
+    rescored by `flask models rescore`)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+        state = model_registry.read_state(registry_dir)
+        return jsonify({
+            'versions': model_registry.list_versions(registry_dir),
+            'active': state.get('active'),
+            'shadow': state.get('shadow'),
+            'worker': {**SentimentClassifier.model_status(), 'shadow_skipped': shadow_scorer.skipped,
+                       'inference': inference_budget.stats()},
+            'shadow_stats': shadow_report(),
+            'comment_versions': model_version_counts()
+        }), 200
+        
+    except Exception as e:
+        print(f"Get models error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/models/activate', methods=['POST'])
+@token_required
+def activate_model(current_user):
+    """
+    Make a registered version the active sentiment model
+    This worker loads it in the background and, once loaded, records it as active in the
+    registry; the other workers follow within MODEL_REGISTRY_POLL_SECONDS. Every worker
+    keeps serving its current model until the new one is loaded
+    Body: {"version": "<registered version>"}
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+        try:
+            path = model_registry.version_path(registry_dir, version)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        previous = model_registry.read_state(registry_dir).get('active')
+        started = SentimentClassifier.activate_in_background(
+            path, version, on_activated=lambda: model_registry.write_state(registry_dir, active=version)
+        )
+        if not started:
+            return jsonify({'error': f'Model {version} is already loading'}), 409
+        
+        activity_logger.log(
+            user_id=current_user.id,
+            user_type='admin',
+            action_type='model_activated',
+            description=f'Activated sentiment model {version}',
+            target_type='model',
+            extra_data={'version': version, 'previous': previous}
+        )
+        
+        return jsonify({'message': 'Model loading, it becomes active once loaded', 'version': version, 'previous': previous}), 202
+        
+    except Exception as e:
+        print(f"Activate model error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/models/shadow', methods=['PUT'])
+@token_required
+def set_shadow_model(current_user):
+    """
+    Start or stop shadow scoring of a candidate version
+    Body: {"version": "<registered version>", "sample_rate": 0.1} or {"version": null} to stop
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        registry_dir = current_app.config['MODEL_REGISTRY_DIR']
+        shadow = None
+        if version:
+            try:
+                model_registry.version_path(registry_dir, version)
+                sample_rate = float(data.get('sample_rate', 0.1))
+            except (TypeError, ValueError) as e:
+                return jsonify({'error': str(e)}), 400
+            if not 0 < sample_rate <= 1:
+                return jsonify({'error': 'sample_rate must be in (0, 1]'}), 400
+            shadow = {'version': version, 'sample_rate': sample_rate}
+        
+        model_registry.write_state(registry_dir, shadow=shadow)
+        
+        activity_logger.log(
+            user_id=current_user.id,
+            user_type='admin',
+            action_type='model_shadow_updated',
+            description=f'Shadow scoring {"of " + version if version else "stopped"}',
+            target_type='model',
+            extra_data={'shadow': shadow}
+        )
+        
+        return jsonify({'shadow': shadow}), 200
+        
+    except Exception as e:
+        print(f"Set shadow model error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/trends', methods=['GET'])
+@token_required
+def get_trends(current_user):
+    """
+    Sentiment over time, optionally narrowed to a professor, subject or department
+    Query params: bucket (day|week|period), professor_id (users.id), subject_id,
+    department, period, date_from, date_to
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            filters = parse_trend_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'bucket': filters['bucket'],
+            'series': sentiment_trends(
+                professor_id=request.args.get('professor_id', type=int),
+                department=request.args.get('department'),
+                **filters
+            )
+        }), 200
+        
+    except Exception as e:
+        print(f"Get trends error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/participation', methods=['GET'])
+@token_required
+def get_participation(current_user):
+    """
+    Live survey completion progress from the participation counters
+    Query params: period (default: the open periods), group_by (group|subject|professor|
+    department, default group), department
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        group_by = request.args.get('group_by', 'group')
+        if group_by not in PARTICIPATION_GROUPINGS:
+            return jsonify({'error': f"group_by must be one of {', '.join(PARTICIPATION_GROUPINGS)}"}), 400
+        
+        return jsonify(participation_progress(
+            period=request.args.get('period'),
+            group_by=group_by,
+            department=request.args.get('department')
+        )), 200
+        
+    except Exception as e:
+        print(f"Get participation error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/keywords', methods=['GET'])
+@token_required
+def get_keywords(current_user):
+    """
+    Top terms (TF-IDF weighted against all comments) for a professor, department or everyone
+    Query params: professor_id (users.id), department, sentiment, period, limit (default 20, max 100)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        sentiment = request.args.get('sentiment')
+        if sentiment and sentiment not in ('positive', 'neutral', 'negative'):
+            return jsonify({'error': 'sentiment must be positive, neutral or negative'}), 400
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'keywords': top_keywords(
+                professor_id=request.args.get('professor_id', type=int),
+                sentiment=sentiment,
+                period=request.args.get('period'),
+                department=request.args.get('department'),
+                limit=limit
+            )
+        }), 200
+        
+    except Exception as e:
+        print(f"Get keywords error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/duplicates', methods=['GET'])
+@token_required
+def get_duplicate_clusters(current_user):
+    """
+    Clusters of near-duplicate comments (copy-pasted or coordinated), largest first
+    Query params: period, limit (default 50, max 200)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'), default=50, maximum=200)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'clusters': duplicate_clusters(period=request.args.get('period'), limit=limit)
+        }), 200
+        
+    except Exception as e:
+        print(f"Get duplicate clusters error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/comments/<int:comment_id>/similar', methods=['GET'])
+@token_required
+def get_similar_comments(current_user, comment_id):
+    """
+    Comments closest in meaning to the given one (cosine over stored embeddings)
+    Query params: professor_id (users.id), department, scope=all to search every
+    professor; by default the comment's own professor. limit (default 10, max 50)
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'), default=10, maximum=50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        professor_id = request.args.get('professor_id', type=int)
+        department = request.args.get('department')
+        if not professor_id and not department and request.args.get('scope') != 'all':
+            source = db.session.get(CommentEmbedding, comment_id)
+            professor_id = source.professor_id if source else None
+        
+        results = similar_comments(comment_id, professor_id=professor_id, department=department, k=limit)
+        if results is None:
+            return jsonify({'error': 'Comment has no stored embedding'}), 404
+        
+        return jsonify({'comment_id': comment_id, 'similar': results}), 200
+        
+    except Exception as e:
+        print(f"Get similar comments error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_bp.route('/comments/search', methods=['GET'])
+@token_required
+def search_comments_endpoint(current_user):
+    """
+    Full-text search over all comments (Spanish stemming, accent insensitive), best match first
+    
+    Query parameters:
+        q: search text; supports "exact phrases", -excluded words and OR
+        professor_id (users.id), subject_id, sentiment, period: optional filters
+        limit: page size (default 20, max 100)
+        cursor: next_cursor from the previous page
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({'error': 'q is required'}), 400
+        
+        sentiment = request.args.get('sentiment')
+        if sentiment and sentiment not in ('positive', 'neutral', 'negative'):
+            return jsonify({'error': 'sentiment must be positive, neutral or negative'}), 400
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            after = decode_rank_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows, has_more = search_comments(db.session, q, {
+            'professor_id': request.args.get('professor_id', type=int),
+            'subject_id': request.args.get('subject_id', type=int),
+            'sentiment': sentiment,
+            'period': request.args.get('period')
+        }, limit=limit, after=after)
+        
+        results = [{
+            'id': row['id'],
+            'text': row['text'],
+            'snippet': row['snippet'],
+            'rank': round(row['rank'], 4),
+            'sentiment': row['sentiment'],
+            'confidence_score': row['confidence_score'],
+            'period': row['period'],
+            'professor_id': row['professor_id'],
+            'professor_name': row['professor_name'],
+            'subject_id': row['subject_id'],
+            'subject_name': row['subject_name'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None
+        } for row in rows]
+        
+        return jsonify({
+            'results': results,
+            'has_more': has_more,
+            'next_cursor': encode_rank_cursor(rows[-1]['rank'], rows[-1]['id']) if has_more else None
+        }), 200
+        
+    except Exception as e:
+        print(f"Search comments error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+COMMENT_EXPORT_COLUMNS = [
+    'comment_id', 'period', 'created_at', 'professor_id', 'professor_name', 'department',
+    'subject_id', 'subject_code', 'subject_name', 'sentiment', 'confidence_score', 'text'
+]
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+
+@admin_bp.route('/export/comments', methods=['GET'])
+@token_required
+def export_comments(current_user):
+    """
+    Stream every comment with its sentiment, professor and subject as CSV or NDJSON
+    
+    Query parameters:
+        format: csv (default) or ndjson
+        period, department, professor_id (users.id), sentiment: optional filters
+    
+    Rows come from a server-side cursor and are written out in chunks, so memory use
+    does not depend on how many comments match. The body is gzipped when the client
+    sends Accept-Encoding: gzip.
+    """
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        sentiment = request.args.get('sentiment')
+        if sentiment and sentiment not in ('positive', 'neutral', 'negative'):
+            return jsonify({'error': 'sentiment must be positive, neutral or negative'}), 400
+        
+        query = select(
+            Comment.id.label('comment_id'),
+            Comment.period,
+            Comment.created_at,
+            Survey.professor_id,
+            (User.first_name + ' ' + User.last_name).label('professor_name'),
+            Professor.department,
+            Subject.id.label('subject_id'),
+            Subject.code.label('subject_code'),
+            Subject.name.label('subject_name'),
+            Comment.sentiment,
+            Comment.confidence_score,
+            Comment.text
+        ).select_from(Comment).join(
+            Survey, db.and_(Survey.id == Comment.survey_id, Survey.period == Comment.period)
+        ).join(
+            User, User.id == Survey.professor_id
+        ).outerjoin(
+            Professor, Professor.user_id == Survey.professor_id
+        ).join(
+            Subject, Subject.id == Survey.subject_id
+        )
+        
+        filters = {}
+        if request.args.get('period'):
+            filters['period'] = request.args['period']
+            query = query.where(Comment.period == filters['period'])
+        if request.args.get('department'):
+            filters['department'] = request.args['department']
+            query = query.where(Professor.department == filters['department'])
+        if request.args.get('professor_id', type=int):
+            filters['professor_id'] = request.args.get('professor_id', type=int)
+            query = query.where(Survey.professor_id == filters['professor_id'])
+        if sentiment:
+            filters['sentiment'] = sentiment
+            query = query.where(Comment.sentiment == sentiment)
+        
+        query = query.order_by(Comment.id).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+        
+        activity_logger.log(
+            user_id=current_user.id,
+            user_type='admin',
+            action_type='comments_exported',
+            description=f'Exported comments as {export_format}',
+            target_type='comment',
+            extra_data=filters or None
+        )
+        
+        def generate():
+            result = db.session.execute(query)
+            try:
+                yield from iter_export(result.mappings(), COMMENT_EXPORT_COLUMNS, export_format, gzip=use_gzip)
+            finally:
+                result.close()
+        
+        headers = {
+            'Content-Disposition': f'attachment; filename=comments.{export_format}',
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'no-store'
+        }
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+        
+        return Response(
+            stream_with_context(generate()),
+            content_type=EXPORT_FORMATS[export_format],
+            headers=headers
+        )
+        
+    except Exception as e:
+        print(f"Export comments error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @admin_bp.route('/professors', methods=['GET'])
 @token_required
 def get_all_professors(current_user):
@@ -192,19 +943,20 @@ def update_professor(current_user, professor_id):
             professor.status = 'active' if data['is_active'] else 'inactive'
         
         db.session.commit()
+        invalidate_cache('professors', f'professor:{user.id}')
         
         print(f"Professor updated successfully")
         print(f"==========================================")
         
         # Log activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='user_updated',
-            description=f'Updated professor: {user.first_name} {user.last_name}'
+            description=f'Updated professor: {user.first_name} {user.last_name}',
+            target_id=professor.id,
+            target_type='professor'
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'Professor updated successfully',
@@ -228,6 +980,7 @@ def update_professor(current_user, professor_id):
 
 @admin_bp.route('/students', methods=['GET'])
 @token_required
+@conditional_response('students', 'users')
 def get_all_students(current_user):
     """Get all students"""
     try:
@@ -356,14 +1109,15 @@ def create_user(current_user):
         print(f"=====================================")
         
         # Log the activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='user_created',
-            description=f'Created new {data["role"]}: {new_user.first_name} {new_user.last_name}'
+            description=f'Created new {data["role"]}: {new_user.first_name} {new_user.last_name}',
+            target_id=new_user.id,
+            target_type='user',
+            extra_data={'role': new_user.role}
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'User created successfully',
@@ -386,6 +1140,7 @@ def create_user(current_user):
 
 @admin_bp.route('/users', methods=['GET'])
 @token_required
+@conditional_response('users', 'students', 'professors', 'admins')
 def get_all_users(current_user):
     """Get all users with pagination and filtering"""
     try:
@@ -530,19 +1285,22 @@ def update_user(current_user, user_id):
                     professor.email = data['email'].lower()
         
         db.session.commit()
+        if user.role == 'professor':
+            invalidate_cache('professors', f'professor:{user.id}')
         
         print(f"User updated successfully. New is_active value: {user.is_active}")
         print(f"==========================================")
         
         # Log activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='user_updated',
-            description=f'Updated user: {user.first_name} {user.last_name}'
+            description=f'Updated user: {user.first_name} {user.last_name}',
+            target_id=user.id,
+            target_type='user',
+            extra_data={'changed_fields': sorted(data.keys())}
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'User updated successfully',
@@ -604,22 +1362,31 @@ def delete_user(current_user, user_id):
                 print(f"Deleting admin record: {admin.id}")
                 db.session.delete(admin)
         
+        # Their surveys and comments go with them: take the comments out of the keyword counts
+        if user_role in ('student', 'professor'):
+            uncount_survey_keywords(f'{user_role}_id', user_id)
+        
         # Now delete the user
         db.session.delete(user)
         db.session.commit()
+        if user_role == 'professor':
+            invalidate_cache('professors', f'professor:{user_id}')
+        elif user_role == 'student':
+            invalidate_cache(f'student:{user_id}')
         
         print(f"User deleted successfully: {user_name}")
         print(f"==========================================")
         
         # Log activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='user_deleted',
-            description=f'Deleted {user_role}: {user_name}'
+            description=f'Deleted {user_role}: {user_name}',
+            target_id=user_id,
+            target_type='user',
+            extra_data={'role': user_role}
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'User deleted successfully'
@@ -633,6 +1400,7 @@ def delete_user(current_user, user_id):
 
 @admin_bp.route('/subjects', methods=['GET'])
 @token_required
+@cached_response(tags=('subjects', 'groups', 'professors'))
 def get_all_subjects(current_user):
     """Get all subjects"""
     try:
@@ -724,17 +1492,21 @@ def create_subject(current_user):
                 db.session.commit()
                 print(f"Assigned subject to {len(updated_groups)} groups")
         
+        invalidate_cache('subjects', 'groups' if updated_groups else None,
+                         *professor_tags(new_subject.professor_id))
+        
         print(f"Subject created successfully: {new_subject.code}")
         
         # Log activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='subject_created',
-            description=f'Created subject: {new_subject.code} - {new_subject.name}'
+            description=f'Created subject: {new_subject.code} - {new_subject.name}',
+            target_id=new_subject.id,
+            target_type='subject',
+            extra_data={'group_ids': group_ids} if group_ids else None
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'Subject created successfully',
@@ -768,6 +1540,7 @@ def update_subject(current_user, subject_id):
         
         data = request.get_json()
         print(f"Updating subject {subject_id} with data: {data}")
+        previous_professor_id = subject.professor_id
         
         # If assigning a professor, validate the professor exists and is active
         if 'professor_id' in data:
@@ -797,18 +1570,21 @@ def update_subject(current_user, subject_id):
             subject.is_active = data['is_active']
         
         db.session.commit()
+        invalidate_cache('subjects', 'groups', f'subject:{subject_id}',
+                         *professor_tags(previous_professor_id, subject.professor_id))
         
         print(f"Subject updated successfully: {subject.code}")
         
         # Log activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='subject_updated',
-            description=f'Updated subject: {subject.code} - {subject.name}'
+            description=f'Updated subject: {subject.code} - {subject.name}',
+            target_id=subject.id,
+            target_type='subject',
+            extra_data={'changed_fields': sorted(data.keys())}
         )
-        db.session.add(log)
-        db.session.commit()
         
         # Get updated professor info
         professor_name = None
@@ -851,6 +1627,7 @@ def delete_subject(current_user, subject_id):
         
         subject_code = subject.code
         subject_name = subject.name
+        subject_professor_tags = professor_tags(subject.professor_id)
         
         # Unbind groups from this subject (set subject_id to NULL)
         groups = GroupClass.query.filter_by(subject_id=subject_id).all()
@@ -859,7 +1636,8 @@ def delete_subject(current_user, subject_id):
             group.subject_id = None
         
         # Unbind surveys from this subject (delete surveys for this subject)
-        # This will cascade delete related comments
+        # This will cascade delete related comments, so uncount their keywords first
+        uncount_survey_keywords('subject_id', subject_id)
         surveys = Survey.query.filter_by(subject_id=subject_id).all()
         surveys_count = len(surveys)
         for survey in surveys:
@@ -868,16 +1646,18 @@ def delete_subject(current_user, subject_id):
         # Delete the subject itself
         db.session.delete(subject)
         db.session.commit()
+        invalidate_cache('subjects', 'groups', f'subject:{subject_id}', *subject_professor_tags)
         
         # Log the activity
-        log = ActivityLog(
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='subject_deleted',
-            description=f'Deleted subject: {subject_code} - {subject_name} (unbound from {groups_count} group(s), deleted {surveys_count} survey(s))'
+            description=f'Deleted subject: {subject_code} - {subject_name} (unbound from {groups_count} group(s), deleted {surveys_count} survey(s))',
+            target_id=subject_id,
+            target_type='subject',
+            extra_data={'groups_unbound': groups_count, 'surveys_deleted': surveys_count}
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'Subject deleted successfully',
@@ -893,6 +1673,7 @@ def delete_subject(current_user, subject_id):
 
 @admin_bp.route('/groups', methods=['GET'])
 @token_required
+@cached_response(tags=('groups', 'subjects', 'professors'))
 def get_all_groups(current_user):
     """Get all group classes"""
     try:
@@ -955,6 +1736,7 @@ def create_group(current_user):
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
         # Validate subject exists if provided
+        subject = None
         if data.get('subject_id'):
             subject = Subject.query.get(data['subject_id'])
             if not subject:
@@ -1006,17 +1788,20 @@ def create_group(current_user):
             db.session.commit()
             print(f"Added {len(student_ids)} students to group {new_group.group_name}")
         
+        invalidate_cache('groups', 'subjects', *professor_tags(new_group.professor_id))
+        
         print(f"Group created successfully: {new_group.group_name}")
         
-        # Log activity
-        log = ActivityLog(
+        # Log activity (the group may not have a subject yet)
+        group_label = f'{subject.code} - {new_group.group_name}' if subject else new_group.group_name
+        activity_logger.log(
             user_id=current_user.id,
             user_type='admin',
             action_type='group_created',
-            description=f'Created group: {subject.code} - {new_group.group_name}'
+            description=f'Created group: {group_label}',
+            target_id=new_group.id,
+            target_type='group'
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'message': 'Group created successfully',
@@ -3,8 +3,14 @@ Professor routes
 Handles professor-specific operations like viewing dashboard, subjects, and profile management
 """
 from flask import Blueprint, request, jsonify
-from ..models import db, User, Professor, Survey, Comment, Subject, GroupClass
+from ..models import db, User, Professor, Survey, Comment, Subject, GroupClass, CommentEmbedding
 from ..routes import token_required
+from ..utils.trends import parse_trend_args, sentiment_trends
+from ..utils.keywords import top_keywords
+from ..utils.embeddings import similar_comments
+from ..utils.live_events import open_stream
+from ..utils.response_cache import cached_response, cache_tags, invalidate_cache
+from ..utils.pagination import encode_cursor, decode_cursor, parse_limit
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from werkzeug.security import generate_password_hash
@@ -12,6 +18,24 @@ from werkzeug.security import generate_password_hash
 professor_bp = Blueprint('professor', __name__, url_prefix='/api/professor')
 
 
+def comment_feed_query(professor_user_id):
+    """
+    Comments on a professor's completed surveys with their subject, newest first
+    One joined query; the order matches the (created_at, id) keyset used by /comments
+    """
+    return db.session.query(Comment, Subject).join(
+        Survey, db.and_(Survey.id == Comment.survey_id, Survey.period == Comment.period)
+    ).outerjoin(
+        Subject, Subject.id == Survey.subject_id
+    ).filter(
+        Survey.professor_id == professor_user_id,
+        Survey.status == 'completed'
+    ).order_by(
+        Comment.created_at.desc(),
+        Comment.id.desc()
+    )
+
+
 @professor_bp.route('/dashboard', methods=['GET'])
 @token_required
 def get_dashboard_stats(current_user):
@@ -61,29 +85,17 @@ def get_dashboard_stats(current_user):
         
         # Get recent comments (last 10)
         recent_comments_data = []
-        recent_surveys = Survey.query.filter_by(
-            professor_id=current_user.id,
-            status='completed'
-        ).order_by(Survey.completed_at.desc()).limit(10).all()
-        
-        for survey in recent_surveys:
-            comments = Comment.query.filter_by(survey_id=survey.id).all()
-            subject = Subject.query.get(survey.subject_id)
+        for comment, subject in comment_feed_query(current_user.id).limit(10).all():
+            # Calculate days ago
+            days_ago = (datetime.utcnow() - comment.created_at).days if comment.created_at else 0
+            time_text = f"Hace {days_ago} días" if days_ago > 0 else "Hoy"
             
-            for comment in comments:
-                # Calculate days ago
-                days_ago = (datetime.utcnow() - comment.created_at).days if comment.created_at else 0
-                time_text = f"Hace {days_ago} días" if days_ago > 0 else "Hoy"
-                
-                recent_comments_data.append({
-                    'text': comment.text,
-                    'sentiment': comment.sentiment,
-                    'subject': subject.name if subject else 'Unknown',
-                    'time_ago': time_text
-                })
-        
-        # Limit to 10 most recent
-        recent_comments_data = recent_comments_data[:10]
+            recent_comments_data.append({
+                'text': comment.text,
+                'sentiment': comment.sentiment,
+                'subject': subject.name if subject else 'Unknown',
+                'time_ago': time_text
+            })
         
         return jsonify({
             'stats': {
@@ -106,8 +118,197 @@ def get_dashboard_stats(current_user):
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@professor_bp.route('/events', methods=['GET'])
+@token_required
+def stream_events(current_user):
+    """
+    Server-Sent Events stream of the authenticated professor's survey submissions
+    (survey_completed with subject_id and sentiment; resync to reload the dashboard)
+    """
+    try:
+        # Ensure the user is a professor
+        if current_user.role != 'professor':
+            return jsonify({'error': 'Access denied - Professors only'}), 403
+        
+        return open_stream(professor_id=current_user.id)
+        
+    except Exception as e:
+        print(f"Stream events error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@professor_bp.route('/comments', methods=['GET'])
+@token_required
+def get_comments(current_user):
+    """
+    Feed of comments received by the authenticated professor, newest first,
+    with keyset pagination on (created_at, id)
+    
+    Query parameters:
+        sentiment, subject_id, period: optional filters
+        min_confidence: only comments classified with at least this confidence (0-1)
+        limit: page size (default 20, max 100)
+        cursor: next_cursor from the previous page
+    """
+    try:
+        # Ensure the user is a professor
+        if current_user.role != 'professor':
+            return jsonify({'error': 'Access denied - Professors only'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            min_confidence = request.args.get('min_confidence', type=float)
+            # The comparison is also False for nan
+            if request.args.get('min_confidence') and (min_confidence is None or not 0 <= min_confidence <= 1):
+                raise ValueError('min_confidence must be a number between 0 and 1')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        sentiment = request.args.get('sentiment')
+        if sentiment and sentiment not in ('positive', 'neutral', 'negative'):
+            return jsonify({'error': 'sentiment must be positive, neutral or negative'}), 400
+        
+        query = comment_feed_query(current_user.id)
+        
+        if sentiment:
+            query = query.filter(Comment.sentiment == sentiment)
+        if request.args.get('subject_id', type=int):
+            query = query.filter(Survey.subject_id == request.args.get('subject_id', type=int))
+        # Filtering on the partition key lets PostgreSQL skip other periods entirely
+        if request.args.get('period'):
+            query = query.filter(Comment.period == request.args['period'])
+        if min_confidence is not None:
+            query = query.filter(Comment.confidence_score >= min_confidence)
+        if after:
+            query = query.filter(db.tuple_(Comment.created_at, Comment.id) < after)
+        
+        # Fetch one extra row to know whether there is another page
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        comments_data = [{
+            'id': comment.id,
+            'text': comment.text,
+            'sentiment': comment.sentiment,
+            'confidence_score': comment.confidence_score,
+            'period': comment.period,
+            'subject_id': subject.id if subject else None,
+            'subject': subject.name if subject else 'Unknown',
+            'subject_code': subject.code if subject else None,
+            'created_at': comment.created_at.isoformat() if comment.created_at else None
+        } for comment, subject in rows]
+        
+        last_comment = rows[-1][0] if rows else None
+        return jsonify({
+            'comments': comments_data,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(last_comment.created_at, last_comment.id) if has_more else None
+        }), 200
+        
+    except Exception as e:
+        print(f"Error fetching professor comments: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@professor_bp.route('/comments/<int:comment_id>/similar', methods=['GET'])
+@token_required
+def get_similar_comments(current_user, comment_id):
+    """
+    Other comments of the authenticated professor closest in meaning to one of theirs
+    Query params: limit (default 10, max 50)
+    """
+    try:
+        # Ensure the user is a professor
+        if current_user.role != 'professor':
+            return jsonify({'error': 'Access denied - Professors only'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'), default=10, maximum=50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        source = db.session.get(CommentEmbedding, comment_id)
+        if not source or source.professor_id != current_user.id:
+            return jsonify({'error': 'Comment not found'}), 404
+        
+        return jsonify({
+            'comment_id': comment_id,
+            'similar': similar_comments(comment_id, professor_id=current_user.id, k=limit)
+        }), 200
+        
+    except Exception as e:
+        print(f"Error fetching similar comments: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@professor_bp.route('/trends', methods=['GET'])
+@token_required
+def get_trends(current_user):
+    """
+    Sentiment over time for the authenticated professor
+    Query params: bucket (day|week|period), subject_id, period, date_from, date_to
+    """
+    try:
+        # Ensure the user is a professor
+        if current_user.role != 'professor':
+            return jsonify({'error': 'Access denied - Professors only'}), 403
+        
+        try:
+            filters = parse_trend_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'bucket': filters['bucket'],
+            'series': sentiment_trends(professor_id=current_user.id, **filters)
+        }), 200
+        
+    except Exception as e:
+        print(f"Error fetching professor trends: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@professor_bp.route('/keywords', methods=['GET'])
+@token_required
+def get_keywords(current_user):
+    """
+    What students talk about most in the authenticated professor's comments
+    Query params: sentiment, period, limit (default 20, max 100)
+    """
+    try:
+        # Ensure the user is a professor
+        if current_user.role != 'professor':
+            return jsonify({'error': 'Access denied - Professors only'}), 403
+        
+        sentiment = request.args.get('sentiment')
+        if sentiment and sentiment not in ('positive', 'neutral', 'negative'):
+            return jsonify({'error': 'sentiment must be positive, neutral or negative'}), 400
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'keywords': top_keywords(
+                professor_id=current_user.id,
+                sentiment=sentiment,
+                period=request.args.get('period'),
+                limit=limit
+            )
+        }), 200
+        
+    except Exception as e:
+        print(f"Error fetching professor keywords: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @professor_bp.route('/subjects', methods=['GET'])
 @token_required
+@cached_response(tags=lambda current_user: [f'professor:{current_user.id}'], scope='user')
 def get_subjects(current_user):
     """
     Get all subjects taught by the authenticated professor with groups and stats
@@ -150,6 +351,8 @@ def get_subjects(current_user):
                     elif comment.sentiment == 'negative':
                         subject_negative += 1
             
+            cache_tags(f'subject:{subject.id}', *{f'period:{survey.period}' for survey in subject_surveys})
+            
             subject_total = subject_positive + subject_neutral + subject_negative
             subject_satisfaction = round((subject_positive / subject_total * 100), 1) if subject_total > 0 else 0.0
             
@@ -288,6 +491,7 @@ def update_profile(current_user):
             professor.specialization = data['specialization']
         
         db.session.commit()
+        invalidate_cache('professors', f'professor:{current_user.id}')
         
         print(f"✅ Professor profile updated: {current_user.email}")
         
@@ -2,27 +2,36 @@
 Student routes
 Handles student-specific operations like viewing and submitting surveys
 """
-from flask import Blueprint, request, jsonify
-from ..models import db, User, Student, Survey, Comment, Professor, Subject
+from flask import Blueprint, request, jsonify, current_app
+from ..models import db, User, Student, Survey, Comment, Professor, Subject, EvaluationPeriod
 from ..routes import token_required
 from datetime import datetime
-from ..utils.sentiment_classifier import classify_comment
+from ..utils.sentiment_classifier import classify_comment_stamped
+from ..utils.keywords import record_comment_keywords
+from ..utils.duplicates import minhash_signature, signature_to_bytes, find_near_duplicate, index_comment
+from ..utils.embeddings import store_embedding, copy_embedding
+from ..utils.shadow_scoring import shadow_scorer
+from ..utils.admission import admission_controlled
+from ..utils.idempotency import idempotent
+from ..utils.live_events import notify_survey_completed
+from ..utils.response_cache import cached_response, cache_tags, invalidate_cache
 
 student_bp = Blueprint('student', __name__, url_prefix='/api/student')
 
 
-def analyze_sentiment(text):
+def analyze_sentiment(text, with_embedding=False):
     """
     Analyze sentiment of text using BETO fine-tuned model
-    Returns sentiment (positive/neutral/negative) and confidence score
+    Returns sentiment (positive/neutral/negative), confidence score, the sentence
+    embedding (or None unless with_embedding is set), the version of the model that
+    produced the result and its status ('scored' or 'fallback')
     """
     try:
-        sentiment, confidence = classify_comment(text)
-        return sentiment, confidence
+        return classify_comment_stamped(text, with_embedding=with_embedding)
     except Exception as e:
         print(f"Sentiment analysis error: {str(e)}")
         # Default to neutral with low confidence if analysis fails
-        return 'neutral', 0.5
+        return 'neutral', 0.5, None, None, 'fallback'
 
 
 @student_bp.route('/surveys', methods=['GET'])
@@ -144,11 +153,18 @@ def get_survey_details(current_user, survey_id):
 
 @student_bp.route('/surveys/<int:survey_id>/submit', methods=['POST'])
 @token_required
+@idempotent
+@admission_controlled
 def submit_survey(current_user, survey_id):
     """
     Submit a completed survey with ratings and comments
     Updates survey status and creates comment records with sentiment analysis
     
+    The survey row is locked for the whole submission, so it is classified and stored
+    exactly once: a concurrent duplicate waits for the lock and then finds it completed.
+    Requests carrying an Idempotency-Key get the original result in that case (and
+    repeats of a key are answered from the idempotency cache without reaching this code)
+    
     Expected request body:
     {
         "answers": {
@@ -164,8 +180,8 @@ def submit_survey(current_user, survey_id):
         if current_user.role != 'student':
             return jsonify({'error': 'Access denied - Students only'}), 403
         
-        # Get the survey
-        survey = Survey.query.get(survey_id)
+        # Get the survey, locked until this submission commits or rolls back
+        survey = Survey.query.filter_by(id=survey_id).with_for_update().populate_existing().first()
         
         if not survey:
             return jsonify({'error': 'Survey not found'}), 404
@@ -174,14 +190,30 @@ def submit_survey(current_user, survey_id):
         if survey.student_id != current_user.id:
             return jsonify({'error': 'Access denied - Not your survey'}), 403
         
-        # Check if survey is already completed
+        # Check if survey is already completed; a retried submission gets its original result
         if survey.status == 'completed':
+            comment = Comment.query.filter_by(survey_id=survey.id, period=survey.period).order_by(Comment.id).first()
+            if comment and request.headers.get('Idempotency-Key'):
+                db.session.rollback()
+                return jsonify({
+                    'message': 'Survey submitted successfully',
+                    'survey_id': survey.id,
+                    'status': 'completed',
+                    'sentiment': comment.sentiment,
+                    'confidence': comment.confidence_score
+                }), 200
             return jsonify({'error': 'Survey already completed'}), 400
         
         # Check if survey is not canceled
         if survey.status == 'canceled':
             return jsonify({'error': 'Cannot submit a canceled survey'}), 400
         
+        # Only open periods take submissions. The shared row lock makes `periods close` wait
+        # for submissions in flight, so nothing lands in a period once it is closed (and archivable)
+        period = EvaluationPeriod.query.filter_by(code=survey.period).with_for_update(read=True).first()
+        if not period or period.status != 'open':
+            return jsonify({'error': f'Evaluation period {survey.period} is closed'}), 409
+        
         # Get request data
         data = request.get_json()
         
@@ -199,28 +231,77 @@ def submit_survey(current_user, survey_id):
         if not comment_text or len(comment_text) < 10:
             return jsonify({'error': 'Comment must be at least 10 characters'}), 400
         
-        # Perform sentiment analysis on the comment
-        sentiment, confidence = analyze_sentiment(comment_text)
+        # Near-duplicates (copy-pasted or campaign comments) reuse the original's
+        # classification instead of running the model again
+        signature = minhash_signature(comment_text)
+        original = None
+        if signature is not None:
+            original = find_near_duplicate(signature, current_app.config['DUPLICATE_SIMILARITY_THRESHOLD'])
+        
+        store_embeddings = current_app.config['STORE_COMMENT_EMBEDDINGS']
+        embedding = None
+        if original:
+            sentiment, confidence = original.sentiment, original.confidence_score
+            model_version, sentiment_status = original.model_version, original.sentiment_status
+        else:
+            # Perform sentiment analysis on the comment, keeping the sentence embedding if stored
+            sentiment, confidence, embedding, model_version, sentiment_status = analyze_sentiment(
+                comment_text, with_embedding=store_embeddings
+            )
         
         # Create comment record
         comment = Comment(
             survey_id=survey.id,
+            period=survey.period,
             text=comment_text,
             sentiment=sentiment,
             confidence_score=confidence,
+            model_version=model_version,
+            sentiment_status=sentiment_status,
+            minhash=signature_to_bytes(signature) if signature is not None else None,
+            duplicate_of=original.id if original else None,
             created_at=datetime.utcnow()
         )
         db.session.add(comment)
         
+        if signature is not None or store_embeddings:
+            db.session.flush()
+        if signature is not None and not original:
+            index_comment(comment.id, comment.period, signature)
+        if embedding is not None:
+            store_embedding(comment.id, comment.period, survey.professor_id, embedding)
+        elif original and store_embeddings:
+            copy_embedding(original.id, comment.id, comment.period, survey.professor_id)
+        
         # Update survey status
         survey.status = 'completed'
         survey.completed_at = datetime.utcnow()
         
+        # Live dashboards get the submission once (and only if) this commits
+        notify_survey_completed(survey, sentiment)
+        
         # Commit changes
         db.session.commit()
         
+        # The student's survey list and the professor's subject statistics changed
+        invalidate_cache(f'student:{current_user.id}', f'professor:{survey.professor_id}')
+        
+        # Keyword counts are secondary: a failure here must not fail the submission
+        # (flask keywords rebuild repairs them)
+        try:
+            record_comment_keywords(comment_text, survey.professor_id, sentiment, survey.period)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Keyword stats update error: {str(e)}")
+        
+        # Candidate model, if one is in shadow mode: sampled and scored in the background
+        if not original and sentiment_status == 'scored':
+            shadow_scorer.submit(comment_text, sentiment, confidence, model_version)
+        
         print(f"✅ Survey {survey_id} submitted successfully by student {current_user.id}")
-        print(f"   Sentiment: {sentiment} (confidence: {confidence:.2f})")
+        print(f"   Sentiment: {sentiment} (confidence: {confidence:.2f})"
+              f"{f' - duplicate of comment {original.id}' if original else ''}")
         print(f"   Comment: {comment_text[:50]}...")
         
         return jsonify({
@@ -239,6 +320,7 @@ def submit_survey(current_user, survey_id):
 
 @student_bp.route('/professors', methods=['GET'])
 @token_required
+@cached_response(tags=lambda current_user: [f'student:{current_user.id}'], scope='user')
 def get_student_professors(current_user):
     """
     Get all professors that the student needs to evaluate
@@ -266,6 +348,8 @@ def get_student_professors(current_user):
             
             prof_id = professor_user.id
             
+            cache_tags(f'professor:{prof_id}', f'subject:{subject.id}', f'period:{survey.period}')
+            
             if prof_id not in professors_data:
                 professors_data[prof_id] = {
                     'id': prof_id,
@@ -0,0 +1,214 @@
+"""
+Buffered audit logging
+Activity log entries are queued in memory and written in batched multi-row INSERTs
+by a background thread, so admin requests don't pay an extra commit per audit record
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import insert
+
+from ..models import db, ActivityLog
+from .partitions import ensure_partitions_for
+
+
+class ActivityLogger:
+    """
+    Audit log writer
+
+    - async mode (default): entries go to a bounded in-memory queue and a daemon thread
+      writes them once ACTIVITY_LOG_BATCH_SIZE entries have accumulated or
+      ACTIVITY_LOG_FLUSH_INTERVAL seconds after the oldest waiting entry, whichever comes first
+    - sync mode (ACTIVITY_LOG_SYNC=true or app.testing): entries are written immediately
+
+    When the queue is full the entry is written inline instead of being dropped. A failed
+    INSERT is retried ACTIVITY_LOG_WRITE_ATTEMPTS times in all, waiting
+    ACTIVITY_LOG_RETRY_BACKOFF seconds and doubling; only then is the batch dropped (and
+    counted in stats()). Pending entries are flushed on interpreter shutdown.
+    """
+
+    _STOP = object()
+
+    def __init__(self, app=None):
+        self.app = None
+        self.sync = False
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.write_attempts = 4
+        self.retry_backoff = 0.5
+        self.written = 0
+        self.retried = 0
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read settings from the app config and register the shutdown flush"""
+        self.app = app
+        self.sync = app.config.get('ACTIVITY_LOG_SYNC', False) or app.testing
+        self.batch_size = app.config.get('ACTIVITY_LOG_BATCH_SIZE', 100)
+        self.flush_interval = app.config.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0)
+        self.write_attempts = max(1, app.config.get('ACTIVITY_LOG_WRITE_ATTEMPTS', 4))
+        self.retry_backoff = app.config.get('ACTIVITY_LOG_RETRY_BACKOFF', 0.5)
+        self._queue = queue.Queue(maxsize=app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+        app.extensions['activity_logger'] = self
+        atexit.register(self.shutdown)
+
+    def log(self, user_id, user_type, action_type, description,
+            target_id=None, target_type=None, extra_data=None):
+        """
+        Record an audit entry
+
+        Args:
+            user_id (int): User who performed the action
+            user_type (str): 'admin', 'professor' or 'student'
+            action_type (str): Short action code, e.g. 'user_created'
+            description (str): Human readable description (truncated to 255 chars)
+            target_id (int): Id of the affected record
+            target_type (str): Kind of the affected record, e.g. 'user', 'subject'
+            extra_data (dict): Any additional JSON-serializable context
+        """
+        entry = {
+            'user_id': user_id,
+            'user_type': user_type,
+            'action_type': action_type,
+            'description': description[:255],
+            'target_id': target_id,
+            'target_type': target_type,
+            'ip_address': None,
+            'user_agent': None,
+            'extra_data': extra_data,
+            'created_at': datetime.utcnow()
+        }
+
+        # Request metadata has to be captured now, the writer thread has no request context
+        if has_request_context():
+            forwarded_for = request.headers.get('X-Forwarded-For', '')
+            entry['ip_address'] = (forwarded_for.split(',')[0].strip() or request.remote_addr or '')[:45] or None
+            entry['user_agent'] = (request.headers.get('User-Agent') or '')[:255] or None
+
+        if self.sync:
+            self._write([entry])
+            return
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Backpressure: never drop audit records, write this one inline
+            self._write([entry])
+
+    def flush(self):
+        """Block until every queued entry has been written"""
+        if self._queue is not None and self._thread is not None:
+            self._queue.join()
+
+    def stats(self):
+        """Entries written, write retries and entries dropped since the process started"""
+        return {
+            'mode': 'sync' if self.sync else 'async',
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'written': self.written,
+            'retried': self.retried,
+            'dropped': self.dropped
+        }
+
+    def shutdown(self, timeout=5.0):
+        """Stop the writer thread after draining the queue"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(self._STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Start lazily (and again after a fork) so pre-forking servers get one writer per process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                return
+
+            # Accumulate until the batch is full or flush_interval has passed since its first entry
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _write(self, entries):
+        """Insert entries, retrying with backoff (database restarts, failovers) before dropping them"""
+        delay = self.retry_backoff
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                self._insert(entries)
+                self.written += len(entries)
+                return
+            except Exception as e:
+                if attempt == self.write_attempts:
+                    self.dropped += len(entries)
+                    print(f"Activity log write error ({len(entries)} entries dropped after "
+                          f"{attempt} attempts): {str(e)}")
+                    return
+                self.retried += 1
+                print(f"Activity log write error ({len(entries)} entries, retrying in {delay:g}s): {str(e)}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _insert(self, entries, retry=True):
+        """Insert entries with a single multi-row INSERT on its own connection"""
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(insert(ActivityLog.__table__).values(entries))
+            except Exception as e:
+                # activity_logs is partitioned by month: create the missing month and retry once
+                if not retry or 'no partition of relation' not in str(e):
+                    raise
+                ensure_partitions_for('activity_logs', [entry['created_at'] for entry in entries])
+                self._insert(entries, retry=False)
+
+
+# Global instance, bound to the app in create_app()
+activity_logger = ActivityLogger()
@@ -0,0 +1,211 @@
+"""
+Admission control for inference-bound requests
+When the survey window opens, submissions arrive faster than the CPU can classify them.
+Left alone they all wait behind the forward pass, holding a server thread and a database
+connection each, until nothing is left for cheap reads or even /api/health. The gate
+below lets at most ADMISSION_MAX_IN_FLIGHT such requests run per worker process, queues
+up to ADMISSION_MAX_QUEUE more for at most ADMISSION_QUEUE_TIMEOUT seconds, and turns
+everything beyond that away at once with 503 and Retry-After; clients come back later
+instead of piling up. Waiting requests give their database connection back to the pool.
+Each student additionally gets a token bucket of SUBMIT_BURST submissions refilled at
+SUBMIT_RATE_PER_MINUTE (429 with Retry-After once empty)
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify
+
+from ..models import db
+
+
+class TokenBuckets:
+    """Token bucket per key: up to `burst` requests at once, refilled at `rate` per second"""
+
+    def __init__(self, rate, burst, max_keys=50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """
+        Take one token of key's bucket
+
+        Returns:
+            float: 0 when a token was taken, else seconds until the next one
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return 0.0
+
+    def give_back(self, key):
+        """Return the token of a request that was turned away for another reason"""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(self.burst, tokens + 1), updated)
+
+    def _prune(self, now):
+        """Forget the buckets that have refilled completely (they start full anyway)"""
+        full_after = self.burst / self.rate
+        self._buckets = {key: value for key, value in self._buckets.items() if now - value[1] < full_after}
+
+
+class AdmissionController:
+    """Per-process in-flight limit, bounded wait queue and per-student rate limit"""
+
+    def __init__(self):
+        self.max_in_flight = 4
+        self.max_queue = 8
+        self.queue_timeout = 5.0
+        self.retry_after = 5
+        self.buckets = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._counts = {'admitted': 0, 'queued': 0, 'rejected_overload': 0, 'rejected_timeout': 0,
+                        'rejected_rate_limit': 0, 'max_waiting': 0, 'waited': 0, 'wait_ms_sum': 0.0,
+                        'max_wait_ms': 0.0}
+
+    def init_app(self, app):
+        self.configure(
+            max_in_flight=app.config.get('ADMISSION_MAX_IN_FLIGHT', 4),
+            max_queue=app.config.get('ADMISSION_MAX_QUEUE', 8),
+            queue_timeout=app.config.get('ADMISSION_QUEUE_TIMEOUT', 5.0),
+            retry_after=app.config.get('ADMISSION_RETRY_AFTER', 5),
+            rate_per_minute=app.config.get('SUBMIT_RATE_PER_MINUTE', 6),
+            burst=app.config.get('SUBMIT_BURST', 10)
+        )
+        app.extensions['admission'] = self
+
+    def configure(self, max_in_flight=4, max_queue=8, queue_timeout=5.0, retry_after=5, rate_per_minute=6,
+                  burst=10):
+        with self._condition:
+            self.max_in_flight = max(1, max_in_flight)
+            self.max_queue = max(0, max_queue)
+            self.queue_timeout = queue_timeout
+            self.retry_after = retry_after
+            self.buckets = TokenBuckets(rate_per_minute / 60, max(1, burst)) if rate_per_minute else None
+            self._condition.notify_all()
+
+    def rate_limit(self, key):
+        """Seconds key has to wait before its next request, 0 if it may go now"""
+        buckets = self.buckets
+        wait = buckets.take(key) if buckets is not None else 0.0
+        if wait:
+            with self._condition:
+                self._counts['rejected_rate_limit'] += 1
+        return wait
+
+    def give_back(self, key):
+        if self.buckets is not None:
+            self.buckets.give_back(key)
+
+    def enter(self, on_queue=None):
+        """
+        Wait for a turn to run
+
+        Args:
+            on_queue (callable): Called before waiting, to let go of what the request holds
+
+        Returns:
+            str: None once admitted (call leave() when done), else why the request is
+                 turned away ('overload' or 'timeout')
+        """
+        with self._condition:
+            if self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                self._counts['admitted'] += 1
+                return None
+            if self._waiting >= self.max_queue:
+                self._counts['rejected_overload'] += 1
+                return 'overload'
+            self._waiting += 1
+            self._counts['queued'] += 1
+            self._counts['max_waiting'] = max(self._counts['max_waiting'], self._waiting)
+
+        if on_queue is not None:
+            on_queue()
+
+        started = time.monotonic()
+        with self._condition:
+            while self._in_flight >= self.max_in_flight:
+                remaining = started + self.queue_timeout - time.monotonic()
+                if remaining <= 0:
+                    self._waiting -= 1
+                    self._counts['rejected_timeout'] += 1
+                    return 'timeout'
+                self._condition.wait(remaining)
+            self._waiting -= 1
+            self._in_flight += 1
+            waited_ms = (time.monotonic() - started) * 1000
+            self._counts['admitted'] += 1
+            self._counts['waited'] += 1
+            self._counts['wait_ms_sum'] += waited_ms
+            self._counts['max_wait_ms'] = max(self._counts['max_wait_ms'], waited_ms)
+            return None
+
+    def leave(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def stats(self):
+        """Limits in effect and admission counters since the process started"""
+        with self._condition:
+            counts = dict(self._counts, in_flight=self._in_flight, waiting=self._waiting)
+        wait_ms_sum, waited = counts.pop('wait_ms_sum'), counts.pop('waited')
+        counts['mean_queue_wait_ms'] = round(wait_ms_sum / waited, 2) if waited else 0.0
+        counts['max_wait_ms'] = round(counts['max_wait_ms'], 2)
+        return {
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'queue_timeout': self.queue_timeout,
+            'rate_per_minute': round(self.buckets.rate * 60, 2) if self.buckets else None,
+            'burst': self.buckets.burst if self.buckets else None,
+            **counts
+        }
+
+
+def _rejected(message, status, retry_after):
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, status
+
+
+def admission_controlled(f):
+    """
+    Decorator for inference-bound routes, placed below token_required: rate limits the
+    user and waits for a turn, or answers 429/503 with Retry-After right away
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        wait = admission.rate_limit(current_user.id)
+        if wait:
+            return _rejected('Too many submissions, please wait a moment', 429, math.ceil(wait))
+
+        # The connection token_required used goes back to the pool while the request waits
+        if admission.enter(on_queue=db.session.rollback) is not None:
+            admission.give_back(current_user.id)
+            return _rejected('The server is busy, please try again shortly', 503, admission.retry_after)
+        try:
+            return f(current_user, *args, **kwargs)
+        finally:
+            admission.leave()
+
+    return decorated
+
+
+# Global instance, configured in create_app()
+admission = AdmissionController()
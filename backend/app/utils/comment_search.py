@@ -0,0 +1,80 @@
+"""
+Full-text search over comments
+comments.search_vector is a stored tsvector built with the spanish_unaccent configuration
+(Spanish stemming, accents folded, stop words kept so "no explica" still means something)
+and indexed with GIN, see schema.sql
+"""
+from sqlalchemy import text
+
+SEARCH_CONFIG = 'spanish_unaccent'
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "'
+
+
+def build_search_query(filters, has_cursor):
+    """
+    Build the ranked search SQL for the given filters
+
+    The rank and the page are computed on the matching rows only; ts_headline (the slow
+    part) runs on the returned page alone.
+    """
+    conditions = ['c.search_vector @@ q.query']
+    if filters.get('professor_id'):
+        conditions.append('s.professor_id = :professor_id')
+    if filters.get('subject_id'):
+        conditions.append('s.subject_id = :subject_id')
+    if filters.get('sentiment'):
+        conditions.append('c.sentiment = :sentiment')
+    if filters.get('period'):
+        conditions.append('c.period = :period')
+
+    return text(f"""
+        WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query),
+        ranked AS (
+            SELECT c.id, c.period, c.text, c.sentiment, c.confidence_score, c.created_at,
+                   s.professor_id, s.subject_id,
+                   ts_rank_cd(c.search_vector, q.query)::float8 AS rank
+            FROM comments c
+            JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+            CROSS JOIN q
+            WHERE {' AND '.join(conditions)}
+        ),
+        page AS (
+            SELECT * FROM ranked
+            {'WHERE (rank, id) < (:after_rank, :after_id)' if has_cursor else ''}
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit
+        )
+        SELECT page.*,
+               u.first_name || ' ' || u.last_name AS professor_name,
+               sub.name AS subject_name,
+               ts_headline('{SEARCH_CONFIG}', page.text, q.query, '{HEADLINE_OPTIONS}') AS snippet
+        FROM page
+        CROSS JOIN q
+        LEFT JOIN users u ON u.id = page.professor_id
+        LEFT JOIN subjects sub ON sub.id = page.subject_id
+        ORDER BY page.rank DESC, page.id DESC
+    """)
+
+
+def search_comments(session, q, filters=None, limit=20, after=None):
+    """
+    Ranked full-text search
+
+    Args:
+        session: SQLAlchemy session
+        q (str): Web-search style query ("quoted phrases", -excluded, OR)
+        filters (dict): Optional professor_id (users.id), subject_id, sentiment, period
+        limit (int): Page size
+        after (tuple): (rank, id) of the last row of the previous page
+
+    Returns:
+        tuple: (rows as dicts, has_more)
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value}
+    params = dict(filters, q=q, limit=limit + 1)
+    if after:
+        params['after_rank'], params['after_id'] = after
+
+    rows = session.execute(build_search_query(filters, after is not None), params).mappings().all()
+    has_more = len(rows) > limit
+    return [dict(row) for row in rows[:limit]], has_more
@@ -0,0 +1,90 @@
+"""
+Response compression
+JSON and text responses of COMPRESSION_MIN_SIZE bytes or more are compressed after the
+view ran, with Brotli when the client accepts it and the brotli package is installed, else
+gzip. Smaller bodies go out as they are (the headers would eat the saving). Streamed
+responses (exports, event streams) and bodies that already have a Content-Encoding are
+left alone; the export compresses its own stream.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'text/plain', 'text/html', 'application/x-ndjson'}
+
+
+def choose_encoding(accept_encodings):
+    """'br', 'gzip' or None for a parsed Accept-Encoding header"""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_body(data, encoding, level=6):
+    if encoding == 'br':
+        # Brotli qualities go to 11; level 6 maps to a similar speed/ratio trade-off as gzip's
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ResponseCompression:
+    """after_request hook compressing large JSON/text responses; counts bytes saved (per worker)"""
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.level = 6
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', True)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESSION_LEVEL', 6)
+        app.after_request(self.compress)
+        app.extensions['response_compression'] = self
+
+    def compress(self, response):
+        if (not self.enabled or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206)
+                or response.status_code >= 300 or 'Content-Encoding' in response.headers):
+            return response
+
+        # Shared caches must not hand a compressed body to a client that cannot read it
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        data = response.get_data()
+        if encoding is None or len(data) < self.min_size:
+            return response
+
+        compressed = compress_body(data, encoding, self.level)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        self.responses += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        return response
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'brotli': brotli is not None,
+            'min_size': self.min_size,
+            'responses': self.responses,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None
+        }
+
+
+# Global instance, configured in create_app()
+response_compression = ResponseCompression()
@@ -0,0 +1,91 @@
+"""
+Conditional GETs for listings built from whole tables
+conditional_response reads the change counters of the tables a listing is built from
+(table_versions, bumped by triggers whenever listed data changes, including cascades and
+raw SQL) before the view runs. The counters, the endpoint, the caller's role and the query
+string make a weak ETag; the latest change is the Last-Modified. A client that already
+has that version (If-None-Match / If-Modified-Since) gets 304 and no query is run.
+
+200 responses say Cache-Control: private, no-cache, so browsers keep them and revalidate
+on every load: the dashboards need no change to benefit
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import bindparam, text
+from werkzeug.http import is_resource_modified
+
+from ..models import db
+
+TABLE_VERSIONS_QUERY = text("""
+    SELECT table_name, version, EXTRACT(EPOCH FROM CAST(changed_at AS TIMESTAMPTZ)) AS changed_at
+    FROM table_versions
+    WHERE table_name IN :tables
+""").bindparams(bindparam('tables', expanding=True))
+
+
+def table_versions(tables):
+    """
+    Change counters of tables
+
+    Returns:
+        tuple: ({table: version}, datetime of the latest change in UTC, or None)
+    """
+    rows = db.session.execute(TABLE_VERSIONS_QUERY, {'tables': list(tables)}).all()
+    versions = {table: 0 for table in tables}
+    latest = None
+    for row in rows:
+        versions[row.table_name] = row.version
+        latest = max(latest or 0, float(row.changed_at))
+    changed_at = datetime.fromtimestamp(int(latest), timezone.utc) if latest is not None else None
+    return versions, changed_at
+
+
+def make_etag(*parts):
+    """Opaque validator of a response built from the given parts"""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def conditional_response(*tables):
+    """
+    Decorator for GET routes built only from the given tables, placed below token_required
+
+    Answers 304 Not Modified when the client's validators still match the tables' versions;
+    otherwise runs the view and adds ETag (weak) and Last-Modified to its 200 response.
+    The role is part of the ETag, so a validator of an admin response never skips the
+    view's own authorization check for another role
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            if request.method != 'GET':
+                return f(current_user, *args, **kwargs)
+            try:
+                versions, changed_at = table_versions(tables)
+            except Exception as e:
+                # No validators (e.g. migration 013 not applied yet): plain response
+                db.session.rollback()
+                print(f"Conditional GET error ({request.endpoint}): {str(e)}")
+                return f(current_user, *args, **kwargs)
+
+            etag = make_etag(request.endpoint, current_user.role, sorted(kwargs.items()),
+                             sorted(request.args.items(multi=True)), versions)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=changed_at):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(current_user, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if changed_at is not None:
+                response.last_modified = changed_at
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,237 @@
+"""
+Knowledge distillation of the BETO classifier into a compact student
+The student keeps BETO's tokenizer, embeddings and width but only a few of its layers,
+copied from the teacher at evenly spaced depths (as in DistilBERT), and is trained on
+CPU to match the teacher's softened probabilities over the stored comments. It is saved
+with save_pretrained plus label_mappings.json, so SentimentClassifier.load_model reads
+it exactly like final_model (select it with SENTIMENT_MODEL_PATH)
+"""
+import copy
+import json
+import os
+import re
+import statistics
+import time
+import zlib
+
+import numpy as np
+import torch
+from sqlalchemy import text
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, get_linear_schedule_with_warmup
+
+from ..models import db
+from .sentiment_classifier import SentimentClassifier
+
+# Comments whose id hashes below this percentage are never trained on and form the
+# holdout of the report (stable across runs, so reports are comparable)
+HOLDOUT_PERCENT = 10
+
+REPORT_FILE = 'distillation_report.json'
+DEFAULT_LABELS = ['BUENO', 'MALO', 'REGULAR']
+
+
+def layer_indices(teacher_layers, student_layers):
+    """Teacher layers copied into the student: evenly spaced, always the last one"""
+    student_layers = max(1, min(student_layers, teacher_layers))
+    return [int(i) for i in np.linspace(0, teacher_layers - 1, student_layers).round()]
+
+
+def shrink_model(teacher, num_layers):
+    """
+    Student with the teacher's architecture cut down to num_layers encoder layers
+
+    Embeddings, pooler and classifier head are copied as they are; each student layer
+    is initialized from the teacher layer at the matching depth.
+    """
+    config = copy.deepcopy(teacher.config)
+    keep = layer_indices(config.num_hidden_layers, num_layers)
+    config.num_hidden_layers = len(keep)
+    student = type(teacher)(config)
+
+    teacher_state = teacher.state_dict()
+    state = {}
+    for name in student.state_dict():
+        match = re.search(r'\.layer\.(\d+)\.', name)
+        source = name
+        if match:
+            source = name.replace(match.group(0), f'.layer.{keep[int(match.group(1))]}.', 1)
+        state[name] = teacher_state[source].clone()
+    student.load_state_dict(state)
+    return student
+
+
+def distillation_loss(student_logits, teacher_logits, temperature):
+    """KL divergence between temperature-softened distributions, scaled by T^2"""
+    return torch.nn.functional.kl_div(
+        torch.nn.functional.log_softmax(student_logits / temperature, dim=-1),
+        torch.nn.functional.softmax(teacher_logits / temperature, dim=-1),
+        reduction='batchmean'
+    ) * temperature ** 2
+
+
+def is_holdout(comment_id):
+    return zlib.crc32(str(comment_id).encode()) % 100 < HOLDOUT_PERCENT
+
+
+def load_comments(limit=None):
+    """(ids, cleaned texts) of the stored comments, latest first when limited"""
+    rows = db.session.execute(text(f"""
+        SELECT id, text FROM comments
+        ORDER BY id DESC
+        {'LIMIT :limit' if limit else ''}
+    """), {'limit': limit}).all()
+    return [row.id for row in rows], [SentimentClassifier.clean_text(row.text) for row in rows]
+
+
+def _batches(tokenizer, texts, batch_size):
+    for start in range(0, len(texts), batch_size):
+        yield start, tokenizer(
+            texts[start:start + batch_size],
+            return_tensors='pt',
+            truncation=True,
+            max_length=SentimentClassifier.MAX_LENGTH,
+            padding=True
+        )
+
+
+def predict_logits(model, tokenizer, texts, batch_size=64):
+    """Logits of a model over many texts, [n, labels]"""
+    model.eval()
+    chunks = []
+    with torch.no_grad():
+        for _, inputs in _batches(tokenizer, texts, batch_size):
+            chunks.append(model(**inputs).logits)
+    return torch.cat(chunks) if chunks else torch.zeros((0, model.config.num_labels))
+
+
+def train_student(student, tokenizer, texts, teacher_logits, epochs=3, batch_size=32,
+                  learning_rate=5e-5, temperature=2.0, seed=13, log=print):
+    """Fit the student to the teacher's logits (CPU, shuffled mini-batches)"""
+    generator = torch.Generator().manual_seed(seed)
+    steps = epochs * ((len(texts) + batch_size - 1) // batch_size)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate)
+    scheduler = get_linear_schedule_with_warmup(optimizer, max(1, steps // 10), max(1, steps))
+
+    for epoch in range(epochs):
+        student.train()
+        order = torch.randperm(len(texts), generator=generator).tolist()
+        shuffled = [texts[i] for i in order]
+        targets = teacher_logits[order]
+        losses = []
+        started = time.perf_counter()
+        for start, inputs in _batches(tokenizer, shuffled, batch_size):
+            loss = distillation_loss(student(**inputs).logits, targets[start:start + batch_size], temperature)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            losses.append(loss.item())
+        log(f"  epoch {epoch + 1}/{epochs}: loss {statistics.mean(losses):.4f} "
+            f"({time.perf_counter() - started:.0f}s)")
+    student.eval()
+    return student
+
+
+def macro_f1(predicted, expected, num_labels):
+    scores = []
+    for label in range(num_labels):
+        true_positive = sum(1 for p, e in zip(predicted, expected) if p == label and e == label)
+        predicted_count = sum(1 for p in predicted if p == label)
+        expected_count = sum(1 for e in expected if e == label)
+        if not predicted_count and not expected_count:
+            continue
+        precision = true_positive / predicted_count if predicted_count else 0.0
+        recall = true_positive / expected_count if expected_count else 0.0
+        scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+    return statistics.mean(scores) if scores else 0.0
+
+
+def measure_latency(model, tokenizer, texts, batch_size=32, samples=200):
+    """Single comment p50/p95 in ms and batched throughput in comments/s"""
+    model.eval()
+    sample = texts[:samples]
+    timings = []
+    with torch.no_grad():
+        for comment_text in sample:
+            started = time.perf_counter()
+            model(**tokenizer(comment_text, return_tensors='pt', truncation=True,
+                              max_length=SentimentClassifier.MAX_LENGTH))
+            timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    predict_logits(model, tokenizer, sample, batch_size)
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 2) if timings else None,
+        'p95_ms': round(timings[max(0, int(len(timings) * 0.95) - 1)], 2) if timings else None,
+        'batched_per_second': round(len(sample) / elapsed, 1) if elapsed else None
+    }
+
+
+def model_summary(model):
+    return {
+        'layers': model.config.num_hidden_layers,
+        'parameters': sum(parameter.numel() for parameter in model.parameters())
+    }
+
+
+def distill(teacher_path, output_dir, num_layers=3, epochs=3, batch_size=32, learning_rate=5e-5,
+            temperature=2.0, limit=None, log=print):
+    """
+    Train a compact student from the teacher over the stored comments and save it
+
+    Returns:
+        dict: The comparison report (also written to <output_dir>/distillation_report.json)
+
+    Raises:
+        ValueError: If there are too few comments to train on
+    """
+    teacher = AutoModelForSequenceClassification.from_pretrained(teacher_path)
+    tokenizer = AutoTokenizer.from_pretrained(teacher_path)
+    label_file = os.path.join(teacher_path, 'label_mappings.json')
+    if os.path.exists(label_file):
+        with open(label_file, 'r', encoding='utf-8') as f:
+            label_info = json.load(f)
+    else:
+        label_info = {'label_encoder_classes': DEFAULT_LABELS}
+
+    ids, texts = load_comments(limit)
+    train = [comment for comment_id, comment in zip(ids, texts) if not is_holdout(comment_id)]
+    holdout = [comment for comment_id, comment in zip(ids, texts) if is_holdout(comment_id)]
+    if len(train) < batch_size or not holdout:
+        raise ValueError(f'Not enough comments to distill: {len(train)} for training, {len(holdout)} held out')
+    log(f"{len(train):,} training comments, {len(holdout):,} held out")
+
+    log("Labelling with the teacher...")
+    started = time.perf_counter()
+    train_logits = predict_logits(teacher, tokenizer, train)
+    holdout_labels = predict_logits(teacher, tokenizer, holdout).argmax(dim=-1).tolist()
+    log(f"  done in {time.perf_counter() - started:.0f}s")
+
+    log(f"Training a {num_layers}-layer student (teacher layers {layer_indices(teacher.config.num_hidden_layers, num_layers)})...")
+    student = train_student(shrink_model(teacher, num_layers), tokenizer, train, train_logits,
+                            epochs=epochs, batch_size=batch_size, learning_rate=learning_rate,
+                            temperature=temperature, log=log)
+
+    predicted = predict_logits(student, tokenizer, holdout).argmax(dim=-1).tolist()
+    report = {
+        'teacher': teacher_path,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'comments': {'train': len(train), 'holdout': len(holdout)},
+        'training': {'epochs': epochs, 'batch_size': batch_size, 'learning_rate': learning_rate,
+                     'temperature': temperature},
+        'holdout_agreement': round(sum(1 for p, e in zip(predicted, holdout_labels) if p == e) / len(holdout), 4),
+        'holdout_macro_f1': round(macro_f1(predicted, holdout_labels, teacher.config.num_labels), 4),
+        'teacher_model': {**model_summary(teacher), **measure_latency(teacher, tokenizer, holdout)},
+        'student_model': {**model_summary(student), **measure_latency(student, tokenizer, holdout)}
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    student.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, 'label_mappings.json'), 'w', encoding='utf-8') as f:
+        json.dump(label_info, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(output_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,259 @@
+"""
+Near-duplicate comment detection with MinHash + LSH
+Each comment gets a MinHash signature of its character shingles (stored in
+comments.minhash). The signature of every original (non-duplicate) comment is cut into
+bands and every band is hashed into comment_lsh_buckets, so candidates for a new comment
+are the originals sharing at least one bucket: a handful of index lookups instead of a
+scan. Candidates are confirmed with the Jaccard similarity estimated from the full
+signatures. A trigger removes the buckets of deleted comments.
+"""
+import hashlib
+
+import numpy as np
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import db, Comment, CommentLshBucket
+from .sentiment_classifier import SentimentClassifier
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 8
+ROWS_PER_BAND = NUM_PERM // BANDS
+# Chance that two comments become candidates is 1 - (1 - s^8)^8 for similarity s:
+# ~92% at 0.85, ~65% at 0.77 and under 2% at 0.5, so unrelated comments are rarely compared
+
+# The permutations must never change: stored signatures were computed with them
+MINHASH_SEED = 20240611
+_PRIME = np.uint64((1 << 31) - 1)
+_random = np.random.RandomState(MINHASH_SEED)
+_PERM_A = _random.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _random.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(comment_text):
+    """Character shingles of the cleaned text (the whole text if it is shorter)"""
+    cleaned = SentimentClassifier.clean_text(comment_text or '')
+    if len(cleaned) <= SHINGLE_SIZE:
+        return {cleaned} if cleaned else set()
+    return {cleaned[i:i + SHINGLE_SIZE] for i in range(len(cleaned) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(comment_text):
+    """
+    MinHash signature of a comment
+
+    Returns:
+        numpy.ndarray: NUM_PERM uint32 values, or None for a comment without text
+    """
+    items = shingles(comment_text)
+    if not items:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=4).digest(), 'little') for item in items),
+        dtype=np.uint64, count=len(items)
+    ) % _PRIME
+    # (a * x + b) mod p for every permutation and shingle; a, x < 2^31 so nothing overflows
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def signature_to_bytes(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def signature_from_bytes(data):
+    return np.frombuffer(data, dtype='<u4')
+
+
+def estimated_similarity(first, second):
+    """Jaccard similarity estimated from two signatures"""
+    return float(np.count_nonzero(first == second)) / NUM_PERM
+
+
+def band_buckets(signature):
+    """(band, bucket) keys of a signature for the LSH table"""
+    data = signature.astype('<u4')
+    keys = []
+    for band in range(BANDS):
+        chunk = data[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+def find_near_duplicate(signature, threshold):
+    """
+    Most similar original comment at or above the threshold
+
+    Only buckets shared with the signature are read, and only originals are indexed, so
+    the candidates stay few however many copies of a comment come in.
+
+    Returns:
+        Row: id, sentiment, confidence_score, model_version and sentiment_status of the
+            original comment, or None
+    """
+    candidate_ids = db.session.execute(
+        db.select(CommentLshBucket.comment_id).where(
+            tuple_(CommentLshBucket.band, CommentLshBucket.bucket).in_(band_buckets(signature))
+        ).distinct()
+    ).scalars().all()
+    if not candidate_ids:
+        return None
+
+    candidates = db.session.execute(
+        db.select(Comment.id, Comment.minhash, Comment.sentiment, Comment.confidence_score,
+                  Comment.model_version, Comment.sentiment_status)
+        .where(Comment.id.in_(candidate_ids), Comment.minhash.isnot(None), Comment.duplicate_of.is_(None))
+    ).all()
+    best, best_similarity = None, threshold
+    for candidate in candidates:
+        similarity = estimated_similarity(signature, signature_from_bytes(candidate.minhash))
+        if similarity > best_similarity or (similarity == best_similarity and (best is None or candidate.id < best.id)):
+            best, best_similarity = candidate, similarity
+    return best
+
+
+def index_comment(comment_id, period, signature):
+    """
+    Add an original comment's bands to the LSH table (current session, the caller commits)
+    Near-duplicates are not indexed: later copies match their original instead
+    """
+    db.session.execute(insert(CommentLshBucket.__table__).values([
+        {'band': band, 'bucket': bucket, 'comment_id': comment_id, 'period': period}
+        for band, bucket in band_buckets(signature)
+    ]).on_conflict_do_nothing())
+
+
+def index_period(period_code):
+    """Re-create the LSH rows of one period from the stored signatures (used after a restore)"""
+    db.session.execute(text("DELETE FROM comment_lsh_buckets WHERE period = :period"), {'period': period_code})
+    rows = db.session.execute(
+        text("""
+            SELECT id, minhash FROM comments
+            WHERE period = :period AND minhash IS NOT NULL AND duplicate_of IS NULL
+        """),
+        {'period': period_code}
+    ).all()
+    for row in rows:
+        index_comment(row.id, period_code, signature_from_bytes(row.minhash))
+    return len(rows)
+
+
+def rebuild_duplicate_index(threshold, batch_size=1000):
+    """
+    Recompute signatures, LSH buckets and duplicate flags for every live comment
+
+    Comments are replayed in id order against an in-memory LSH table, so the earliest
+    comment of each cluster is the original. Sentiments are not changed.
+
+    Returns:
+        tuple: (comments indexed, comments flagged as duplicates)
+    """
+    db.session.execute(text("""
+        DELETE FROM comment_lsh_buckets
+        WHERE period IN (SELECT code FROM evaluation_periods WHERE status <> 'archived')
+    """))
+
+    buckets = {}
+    signatures = {}
+    updates = []
+    bucket_rows = []
+    indexed = flagged = 0
+
+    def flush():
+        if updates:
+            db.session.execute(text("""
+                UPDATE comments SET minhash = :minhash, duplicate_of = :duplicate_of
+                WHERE id = :id AND period = :period
+            """), updates)
+        if bucket_rows:
+            db.session.execute(insert(CommentLshBucket.__table__).on_conflict_do_nothing(), bucket_rows)
+        updates.clear()
+        bucket_rows.clear()
+
+    result = db.session.execute(text("""
+        SELECT id, period, text FROM comments
+        WHERE period IN (SELECT code FROM evaluation_periods WHERE status <> 'archived')
+        ORDER BY id
+    """).execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        signature = minhash_signature(row.text)
+        duplicate_of = None
+        if signature is not None:
+            keys = band_buckets(signature)
+            best_similarity = threshold
+            for candidate_id in sorted({cid for key in keys for cid in buckets.get(key, ())}):
+                similarity = estimated_similarity(signature, signatures[candidate_id])
+                if similarity > best_similarity or (similarity == best_similarity and duplicate_of is None):
+                    duplicate_of, best_similarity = candidate_id, similarity
+            if duplicate_of is not None:
+                flagged += 1
+            else:
+                # Only originals are indexed, as in index_comment
+                signatures[row.id] = signature
+                for band, bucket in keys:
+                    buckets.setdefault((band, bucket), []).append(row.id)
+                    bucket_rows.append({'band': band, 'bucket': bucket, 'comment_id': row.id, 'period': row.period})
+        updates.append({
+            'id': row.id,
+            'period': row.period,
+            'minhash': signature_to_bytes(signature) if signature is not None else None,
+            'duplicate_of': duplicate_of
+        })
+        indexed += 1
+        if len(updates) >= batch_size:
+            flush()
+    flush()
+    db.session.commit()
+    return indexed, flagged
+
+
+def duplicate_clusters(period=None, limit=50):
+    """
+    Clusters of near-duplicate comments, largest first
+
+    Returns:
+        list: One dict per original comment with its duplicates and who wrote them
+    """
+    rows = db.session.execute(text(f"""
+        WITH members AS (
+            SELECT d.duplicate_of AS original_id, d.id, d.created_at, s.student_id, s.professor_id
+            FROM comments d
+            JOIN surveys s ON s.id = d.survey_id AND s.period = d.period
+            WHERE d.duplicate_of IS NOT NULL {'AND d.period = :period' if period else ''}
+        )
+        SELECT original_id,
+               COUNT(*) AS duplicates,
+               COUNT(DISTINCT student_id) AS students,
+               COUNT(DISTINCT professor_id) AS professors,
+               MIN(created_at) AS first_seen,
+               MAX(created_at) AS last_seen,
+               (array_agg(id ORDER BY id))[1:20] AS comment_ids
+        FROM members
+        GROUP BY original_id
+        ORDER BY duplicates DESC, original_id
+        LIMIT :limit
+    """), {'period': period, 'limit': limit}).mappings().all()
+
+    originals = {
+        comment.id: comment
+        for comment in Comment.query.filter(Comment.id.in_([row['original_id'] for row in rows])).all()
+    } if rows else {}
+
+    clusters = []
+    for row in rows:
+        original = originals.get(row['original_id'])
+        clusters.append({
+            'original_id': row['original_id'],
+            'text': original.text if original else None,
+            'sentiment': original.sentiment if original else None,
+            'confidence_score': original.confidence_score if original else None,
+            'duplicates': row['duplicates'],
+            'students': row['students'],
+            'professors': row['professors'],
+            'first_seen': row['first_seen'].isoformat() if row['first_seen'] else None,
+            'last_seen': row['last_seen'].isoformat() if row['last_seen'] else None,
+            'comment_ids': list(row['comment_ids'])
+        })
+    return clusters
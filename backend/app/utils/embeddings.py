@@ -0,0 +1,192 @@
+"""
+Comment embedding store and similar-comment search
+Sentence embeddings captured during classification are stored L2-normalized as packed
+float16 bytes in comment_embeddings (768 dims -> 1.5 KB per comment). Similarity search
+streams a scope (a professor, a department or everything) in chunks and keeps a running
+top-K, so memory stays bounded by the chunk size whatever the scope
+"""
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import db, CommentEmbedding
+
+STORAGE_DTYPE = np.dtype('<f2')
+SEARCH_CHUNK_ROWS = 20000
+
+
+def encode_embedding(vector):
+    """Pack a vector as little-endian float16 bytes (normalized first)"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector.astype(STORAGE_DTYPE).tobytes()
+
+
+def decode_embeddings(blobs, dim):
+    """Unpack stored embeddings into a float32 [n, dim] matrix"""
+    if not blobs:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.frombuffer(b''.join(blobs), dtype=STORAGE_DTYPE).reshape(len(blobs), dim).astype(np.float32)
+
+
+def top_k_cosine(query, chunks, k):
+    """
+    Running top-K cosine similarity over (ids, matrix) chunks of normalized vectors
+
+    Returns:
+        list: (id, score) pairs, best first
+    """
+    best_ids = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0, dtype=np.float32)
+    for ids, matrix in chunks:
+        if not len(ids):
+            continue
+        scores = matrix @ query
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            scores, ids = scores[keep], ids[keep]
+        best_ids = np.concatenate([best_ids, ids])
+        best_scores = np.concatenate([best_scores, scores])
+        if len(best_scores) > k:
+            keep = np.argpartition(-best_scores, k - 1)[:k]
+            best_ids, best_scores = best_ids[keep], best_scores[keep]
+    order = np.argsort(-best_scores, kind='stable')
+    return [(int(best_ids[i]), float(best_scores[i])) for i in order]
+
+
+def store_embedding(comment_id, period, professor_id, vector):
+    """Save (or replace) a comment's embedding; current session, the caller commits"""
+    stmt = insert(CommentEmbedding.__table__).values(
+        comment_id=comment_id,
+        period=period,
+        professor_id=professor_id,
+        dim=len(vector),
+        embedding=encode_embedding(vector)
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['comment_id'],
+        set_={'dim': stmt.excluded.dim, 'embedding': stmt.excluded.embedding}
+    ))
+
+
+def copy_embedding(from_comment_id, comment_id, period, professor_id):
+    """Give a near-duplicate the embedding of its original (no-op if it has none)"""
+    db.session.execute(text("""
+        INSERT INTO comment_embeddings (comment_id, period, professor_id, dim, embedding)
+        SELECT :comment_id, :period, :professor_id, dim, embedding
+        FROM comment_embeddings WHERE comment_id = :from_comment_id
+        ON CONFLICT (comment_id) DO NOTHING
+    """), {'comment_id': comment_id, 'period': period, 'professor_id': professor_id,
+           'from_comment_id': from_comment_id})
+
+
+def similar_comments(comment_id, professor_id=None, department=None, k=10):
+    """
+    Comments closest in meaning to a given one
+
+    Args:
+        comment_id (int): Source comment (must have a stored embedding)
+        professor_id (int): Search only this professor's comments (users.id)
+        department (str): Search only comments of professors in this department
+        k (int): Number of results
+
+    Returns:
+        list: Dicts with the comment, its subject and the cosine similarity, or None
+              if the source comment has no embedding
+    """
+    source = db.session.get(CommentEmbedding, comment_id)
+    if source is None:
+        return None
+    query = decode_embeddings([source.embedding], source.dim)[0]
+
+    conditions = ['e.comment_id <> :comment_id', 'e.dim = :dim']
+    params = {'comment_id': comment_id, 'dim': source.dim}
+    if professor_id:
+        conditions.append('e.professor_id = :professor_id')
+        params['professor_id'] = professor_id
+    if department:
+        conditions.append('e.professor_id IN (SELECT user_id FROM professors WHERE department = :department)')
+        params['department'] = department
+
+    result = db.session.execute(
+        text(f"SELECT e.comment_id, e.embedding FROM comment_embeddings e WHERE {' AND '.join(conditions)}")
+        .execution_options(stream_results=True, yield_per=SEARCH_CHUNK_ROWS),
+        params
+    )
+
+    def chunks():
+        for partition in result.partitions(SEARCH_CHUNK_ROWS):
+            yield [row.comment_id for row in partition], decode_embeddings([row.embedding for row in partition], source.dim)
+
+    matches = top_k_cosine(query, chunks(), k)
+    if not matches:
+        return []
+
+    rows = db.session.execute(text("""
+        SELECT c.id, c.text, c.sentiment, c.confidence_score, c.period, c.created_at,
+               s.professor_id, sub.id AS subject_id, sub.name AS subject_name
+        FROM comments c
+        JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+        LEFT JOIN subjects sub ON sub.id = s.subject_id
+        WHERE c.id = ANY(:ids)
+    """), {'ids': [comment for comment, _ in matches]}).mappings().all()
+    details = {row['id']: row for row in rows}
+
+    results = []
+    for match_id, score in matches:
+        row = details.get(match_id)
+        if row is None:
+            continue
+        results.append({
+            'id': row['id'],
+            'text': row['text'],
+            'sentiment': row['sentiment'],
+            'confidence_score': row['confidence_score'],
+            'period': row['period'],
+            'professor_id': row['professor_id'],
+            'subject_id': row['subject_id'],
+            'subject_name': row['subject_name'],
+            'similarity': round(score, 4),
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None
+        })
+    return results
+
+
+def backfill_embeddings(embed, period_code=None, batch_size=64):
+    """
+    Compute and store embeddings for live comments that have none
+
+    Args:
+        embed (callable): texts -> normalized [n, dim] matrix (SentimentClassifier.embed)
+        period_code (str): Only this period (default: every period not archived)
+
+    Returns:
+        int: Embeddings written
+    """
+    period_filter = 'AND c.period = :period' if period_code else ''
+    written = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(text(f"""
+            SELECT c.id, c.period, c.text, s.professor_id
+            FROM comments c
+            JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+            LEFT JOIN comment_embeddings e ON e.comment_id = c.id
+            WHERE e.comment_id IS NULL AND c.id > :last_id
+              AND c.period IN (SELECT code FROM evaluation_periods WHERE status <> 'archived')
+              {period_filter}
+            ORDER BY c.id
+            LIMIT :batch_size
+        """), {'last_id': last_id, 'batch_size': batch_size, 'period': period_code}).all()
+        if not rows:
+            break
+        vectors = embed([row.text for row in rows])
+        for row, vector in zip(rows, vectors):
+            store_embedding(row.id, row.period, row.professor_id, vector)
+        db.session.commit()
+        written += len(rows)
+        last_id = rows[-1].id
+    return written
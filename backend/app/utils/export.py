@@ -0,0 +1,74 @@
+"""
+Streaming export helpers
+Turn an iterator of row mappings into CSV or NDJSON text chunks (optionally gzipped)
+without ever holding the whole result in memory
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8'
+}
+
+# Rough size of each chunk handed to the WSGI server
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, columns, chunk_size=CHUNK_SIZE):
+    """Yield CSV text chunks (header first) for the given rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(row[column]) for column in columns])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows, columns, chunk_size=CHUNK_SIZE):
+    """Yield newline-delimited JSON chunks, one object per row"""
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps({column: _plain(row[column]) for column in columns}, ensure_ascii=False) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts)
+
+
+def iter_gzip(chunks, level=6):
+    """Gzip a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_export(rows, columns, export_format, gzip=False):
+    """Serialize rows in the requested format, gzipped if asked"""
+    serializer = iter_csv if export_format == 'csv' else iter_ndjson
+    chunks = serializer(rows, columns)
+    if gzip:
+        return iter_gzip(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
@@ -0,0 +1,131 @@
+"""
+Idempotent requests
+Clients send an Idempotency-Key header that stays the same when they retry a request
+(double clicks, timeouts, 503s). The first request with a key runs; its successful
+response is kept for IDEMPOTENCY_TTL_SECONDS and replayed to later requests with the
+same key and user, which never reach the handler. A duplicate that arrives while the
+first is still running waits up to IDEMPOTENCY_WAIT_SECONDS for its response instead
+of running in parallel, and runs itself if the first one fails. The cache is per worker
+process: handlers still have to be safe against duplicates that land on another worker
+(the survey submission locks its row)
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyCache:
+    """Responses per idempotency key for a short TTL, and the keys whose request is running"""
+
+    def __init__(self, ttl_seconds=600, wait_seconds=15, max_entries=20000):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.max_entries = max_entries
+        self._results = {}  # key -> (body, status, monotonic expiry)
+        self._running = {}  # key -> threading.Event set when the request finishes
+        self._lock = threading.Lock()
+        self.replayed = 0
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config.get('IDEMPOTENCY_TTL_SECONDS', 600)
+        self.wait_seconds = app.config.get('IDEMPOTENCY_WAIT_SECONDS', 15)
+        app.extensions['idempotency_cache'] = self
+
+    def claim(self, key):
+        """
+        Claim a key for this request
+
+        A duplicate that waited on a request which then stored nothing (it failed) claims
+        the key itself, as a retry arriving afterwards would
+
+        Returns:
+            tuple: ('run', None) when the caller must run the request and then call
+                   finish(), ('replay', (body, status)) with the stored response, or
+                   ('busy', None) if the first request is still running after the wait
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            with self._lock:
+                result = self._fresh(key)
+                if result is not None:
+                    self.replayed += 1
+                    return 'replay', result
+                event = self._running.get(key)
+                if event is None:
+                    self._running[key] = threading.Event()
+                    return 'run', None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not event.wait(remaining):
+                return 'busy', None
+
+    def finish(self, key, body=None, status=None):
+        """Store the response of a claimed key (None to store nothing) and wake its duplicates"""
+        with self._lock:
+            if body is not None:
+                if len(self._results) >= self.max_entries:
+                    self._prune()
+                self._results[key] = (body, status, time.monotonic() + self.ttl_seconds)
+            event = self._running.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _fresh(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            del self._results[key]
+            return None
+        return entry[:2]
+
+    def _prune(self):
+        now = time.monotonic()
+        self._results = {key: entry for key, entry in self._results.items() if entry[2] > now}
+        # Still full of live entries: drop the oldest half (dicts keep insertion order)
+        if len(self._results) >= self.max_entries:
+            self._results = dict(list(self._results.items())[len(self._results) // 2:])
+
+
+def idempotent(f):
+    """
+    Decorator for routes that must not run twice for one Idempotency-Key, placed below
+    token_required (keys are per user, method and path). Only 2xx responses are stored;
+    after any other outcome the client may retry with the same key
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key', '').strip()
+        if not key:
+            return f(current_user, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        cache_key = (current_user.id, request.method, request.path, key)
+        state, result = idempotency_cache.claim(cache_key)
+        if state == 'replay':
+            response = make_response(jsonify(result[0]), result[1])
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == 'busy':
+            response = make_response(jsonify({'error': 'This request is still being processed'}), 409)
+            response.headers['Retry-After'] = '2'
+            return response
+
+        body = status = None
+        try:
+            response = make_response(f(current_user, *args, **kwargs))
+            if 200 <= response.status_code < 300 and response.is_json:
+                body, status = response.get_json(), response.status_code
+            return response
+        finally:
+            idempotency_cache.finish(cache_key, body, status)
+
+    return decorated
+
+
+# Global instance, configured in create_app()
+idempotency_cache = IdempotencyCache()
@@ -0,0 +1,165 @@
+"""
+CPU budget for sentiment inference
+Torch sizes its thread pool to every core of the machine, in every process, so several
+web workers each running request threads oversubscribe the CPU as soon as forward passes
+overlap and every one of them slows down. The cores (CPU affinity capped by the cgroup
+quota of the container, or CPU_CORES) are split evenly between the WEB_WORKERS processes.
+Inside one process at most INFERENCE_CONCURRENCY forward passes run at a time, each with
+its share of the process' cores as torch threads; other request threads queue for a slot
+and give up after INFERENCE_QUEUE_TIMEOUT seconds (the comment is then stored as a
+fallback, which `flask models rescore` classifies later). The torch settings are applied
+when torch is first needed, so configuring the budget does not import it
+"""
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class InferenceBusy(RuntimeError):
+    """No inference slot freed up within the queue timeout"""
+
+
+def _cgroup_quota():
+    """CPU quota of the container in cores (cgroup v2, then v1), None when unlimited"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'r') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'r') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cores():
+    """Cores this process may use: its CPU affinity, capped by the cgroup CPU quota"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = _cgroup_quota()
+    if quota:
+        cores = min(cores, math.floor(quota))
+    return max(1, cores)
+
+
+def plan_budget(cores, workers=1, concurrency=1, threads=None):
+    """
+    Split cores between web worker processes and concurrent forward passes
+
+    Returns:
+        dict: cores, workers, cores_per_worker, concurrency (forward passes at once per
+              worker) and torch_threads (intra-op threads of each pass)
+    """
+    workers = max(1, workers)
+    concurrency = max(1, concurrency)
+    cores_per_worker = max(1, cores // workers)
+    return {
+        'cores': cores,
+        'workers': workers,
+        'cores_per_worker': cores_per_worker,
+        'concurrency': concurrency,
+        'torch_threads': threads or max(1, cores_per_worker // concurrency)
+    }
+
+
+class InferenceBudget:
+    """Per-process torch thread setting and the slots forward passes queue for"""
+
+    def __init__(self):
+        self.plan = plan_budget(available_cores())
+        self.queue_timeout = None
+        self._applied = False
+        self._slots = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+        self._counts = {'passes': 0, 'timeouts': 0, 'waiting': 0, 'max_waiting': 0,
+                        'wait_ms_sum': 0.0, 'max_wait_ms': 0.0}
+
+    def init_app(self, app):
+        self.configure(
+            cores=app.config.get('CPU_CORES') or available_cores(),
+            workers=app.config.get('WEB_WORKERS', 1),
+            concurrency=app.config.get('INFERENCE_CONCURRENCY', 1),
+            threads=app.config.get('INFERENCE_THREADS'),
+            queue_timeout=app.config.get('INFERENCE_QUEUE_TIMEOUT')
+        )
+        app.extensions['inference_budget'] = self
+
+    def configure(self, cores, workers=1, concurrency=1, threads=None, queue_timeout=None):
+        """Set the budget of this process (torch threads are process wide)"""
+        self.plan = plan_budget(cores, workers, concurrency, threads)
+        self.queue_timeout = queue_timeout or None
+        self._slots = threading.BoundedSemaphore(self.plan['concurrency'])
+        # The fast tokenizers' own pool would also size itself to every core
+        os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+        self._applied = False
+        if 'torch' in sys.modules:
+            self.apply()
+        return self.plan
+
+    def apply(self):
+        """Set torch's thread pools to the budget (imports torch)"""
+        import torch
+
+        torch.set_num_threads(self.plan['torch_threads'])
+        try:
+            # Passes already run in parallel through the slots, not inside one graph
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Only settable once, before any inter-op work started
+        self._applied = True
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one of the forward pass slots
+
+        Raises:
+            InferenceBusy: If none frees up within the queue timeout
+        """
+        if not self._applied:
+            self.apply()
+        started = time.perf_counter()
+        with self._lock:
+            self._counts['waiting'] += 1
+            self._counts['max_waiting'] = max(self._counts['max_waiting'], self._counts['waiting'])
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._counts['waiting'] -= 1
+            if acquired:
+                self._counts['passes'] += 1
+                self._counts['wait_ms_sum'] += waited_ms
+                self._counts['max_wait_ms'] = max(self._counts['max_wait_ms'], waited_ms)
+            else:
+                self._counts['timeouts'] += 1
+        if not acquired:
+            raise InferenceBusy(f'No inference slot free within {self.queue_timeout}s')
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Budget in effect and queueing since the process started"""
+        with self._lock:
+            counts = dict(self._counts)
+        wait_ms_sum = counts.pop('wait_ms_sum')
+        counts['mean_wait_ms'] = round(wait_ms_sum / counts['passes'], 2) if counts['passes'] else 0.0
+        counts['max_wait_ms'] = round(counts['max_wait_ms'], 2)
+        return {**self.plan, 'queue_timeout': self.queue_timeout, **counts}
+
+
+# Global instance, configured in create_app()
+inference_budget = InferenceBudget()
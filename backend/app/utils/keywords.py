@@ -0,0 +1,268 @@
+"""
+Keyword statistics per professor and sentiment
+Each classified comment is reduced to its terms (unigrams and bigrams of the text cleaned
+with SentimentClassifier.clean_text, Spanish stop words removed) and counted into
+keyword_stats. keyword_terms holds how many comments contain each term overall, which is
+the document frequency used to weight the top terms (TF-IDF)
+"""
+import math
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import db, KeywordStat, KeywordTerm
+from .sentiment_classifier import SentimentClassifier
+
+MAX_TERM_LENGTH = 100
+MIN_TOKEN_LENGTH = 3
+
+# Top terms by raw count considered before TF-IDF re-ranking
+CANDIDATE_POOL = 500
+
+# Kept out of unigrams but allowed to start a bigram ("no explica", "sin ejemplos")
+NEGATIONS = frozenset(['no', 'nunca', 'nada', 'sin', 'jamás', 'tampoco', 'ni'])
+
+SPANISH_STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes aquel aquella aquellas aquellos aqui aquí así asi aun aún
+bastante bien cada casi como cómo con contra cual cuál cuales cuando cuándo cuanto de del desde
+donde dónde dos durante e el él ella ellas ello ellos en entre era eran eres es esa esas ese eso
+esos esta está estaba estaban estado estamos están estar estas este esto estos estoy fue fueron
+fui ha había habían han has hasta hay he hemos hice hizo la las le les lo los mas más me mi mí
+mis mismo mucha muchas mucho muchos muy nos nosotros nuestra nuestro o os otra otras otro otros
+para pero poco por porque puede pueden que qué quien quién se sea sean según ser si sí sido
+siempre siendo sobre sois solo sólo somos son soy su sus también tan tanto te tenemos tener
+tengo tiene tienen toda todas todo todos tu tú tus un una unas uno unos usted ustedes va vamos
+van veces ya yo hacer hace hacen les ese esa cosa cosas vez manera forma
+""".split()) | NEGATIONS
+
+
+def extract_terms(comment_text):
+    """
+    Terms of one comment with their number of occurrences
+
+    Returns:
+        Counter: term -> occurrences (bigrams are joined with a space)
+    """
+    tokens = SentimentClassifier.clean_text(comment_text or '').split()
+    content = [
+        len(token) >= MIN_TOKEN_LENGTH and not token.isdigit() and token not in SPANISH_STOPWORDS
+        for token in tokens
+    ]
+
+    terms = Counter(token for token, keep in zip(tokens, content) if keep)
+    for i in range(len(tokens) - 1):
+        if content[i + 1] and (content[i] or tokens[i] in NEGATIONS):
+            terms[f'{tokens[i]} {tokens[i + 1]}'] += 1
+
+    return Counter({term[:MAX_TERM_LENGTH]: count for term, count in terms.items()})
+
+
+def _upsert_counts(stats_rows, term_rows):
+    """Add counts to keyword_stats and keyword_terms (rows sorted to avoid lock-order deadlocks)"""
+    if stats_rows:
+        stmt = insert(KeywordStat.__table__).values(sorted(
+            stats_rows, key=lambda row: (row['professor_id'], row['sentiment'], row['period'], row['term'])
+        ))
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['professor_id', 'sentiment', 'period', 'term'],
+            set_={
+                'occurrences': KeywordStat.__table__.c.occurrences + stmt.excluded.occurrences,
+                'comment_count': KeywordStat.__table__.c.comment_count + stmt.excluded.comment_count
+            }
+        ))
+    if term_rows:
+        stmt = insert(KeywordTerm.__table__).values(sorted(term_rows, key=lambda row: row['term']))
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['term'],
+            set_={'comment_count': KeywordTerm.__table__.c.comment_count + stmt.excluded.comment_count}
+        ))
+
+
+def record_comment_keywords(comment_text, professor_id, sentiment, period, delta=1):
+    """
+    Count (delta=1) or uncount (delta=-1) one comment's terms
+
+    Runs on the current session; the caller commits.
+
+    Args:
+        comment_text (str): Raw comment text
+        professor_id (int): users.id of the evaluated professor
+        sentiment (str): Classified sentiment
+        period (str): Evaluation period of the comment
+    """
+    terms = extract_terms(comment_text)
+    if not terms:
+        return
+    _upsert_counts(
+        [{
+            'professor_id': professor_id,
+            'sentiment': sentiment,
+            'period': period,
+            'term': term,
+            'occurrences': count * delta,
+            'comment_count': delta
+        } for term, count in terms.items()],
+        [{'term': term, 'comment_count': delta} for term in terms]
+    )
+
+
+def uncount_survey_keywords(column, value):
+    """
+    Uncount the terms of the comments of the surveys about to be deleted
+
+    Deleting a subject or a user cascades to their surveys and comments; call this first,
+    on the same session, so their terms leave keyword_stats and keyword_terms in the same
+    transaction as the delete. The caller commits.
+
+    Args:
+        column (str): 'subject_id', 'student_id' or 'professor_id' of surveys
+        value (int): Id whose surveys are being deleted
+
+    Returns:
+        int: Comments uncounted
+    """
+    if column not in ('subject_id', 'student_id', 'professor_id'):
+        raise ValueError(f'Unsupported survey column: {column}')
+
+    counts = {}
+    terms = Counter()
+    comments = 0
+    result = db.session.execute(text(f"""
+        SELECT c.text, c.sentiment, c.period, s.professor_id
+        FROM comments c
+        JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+        WHERE s.{column} = :value
+    """), {'value': value})
+    for row in result:
+        comments += 1
+        for term, occurrences in extract_terms(row.text).items():
+            entry = counts.setdefault((row.professor_id, row.sentiment, row.period, term), [0, 0])
+            entry[0] -= occurrences
+            entry[1] -= 1
+            terms[term] -= 1
+
+    _upsert_counts(
+        [{
+            'professor_id': professor_id,
+            'sentiment': sentiment,
+            'period': period,
+            'term': term,
+            'occurrences': occurrences,
+            'comment_count': comment_count
+        } for (professor_id, sentiment, period, term), (occurrences, comment_count) in counts.items()],
+        [{'term': term, 'comment_count': comment_count} for term, comment_count in terms.items()]
+    )
+    return comments
+
+
+def rebuild_keyword_stats(batch_size=2000):
+    """
+    Recompute keyword statistics from the comments in one streaming pass
+
+    Counts are accumulated in memory per (professor, sentiment, period, term), so memory
+    grows with the vocabulary, not with the number of comments. Archived periods keep
+    their stored counts (their comments are no longer in the live tables).
+
+    Returns:
+        tuple: (comments read, keyword_stats rows written)
+    """
+    live_periods = "SELECT code FROM evaluation_periods WHERE status <> 'archived'"
+    db.session.execute(text(f"DELETE FROM keyword_stats WHERE period IN ({live_periods})"))
+
+    counts = {}
+    comments = 0
+    result = db.session.execute(text(f"""
+        SELECT c.text, c.sentiment, c.period, s.professor_id
+        FROM comments c
+        JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+        WHERE c.period IN ({live_periods})
+    """).execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        comments += 1
+        for term, occurrences in extract_terms(row.text).items():
+            key = (row.professor_id, row.sentiment, row.period, term)
+            entry = counts.get(key)
+            if entry is None:
+                counts[key] = [occurrences, 1]
+            else:
+                entry[0] += occurrences
+                entry[1] += 1
+
+    rows = [{
+        'professor_id': professor_id,
+        'sentiment': sentiment,
+        'period': period,
+        'term': term,
+        'occurrences': occurrences,
+        'comment_count': comment_count
+    } for (professor_id, sentiment, period, term), (occurrences, comment_count) in counts.items()]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(KeywordStat.__table__), rows[start:start + batch_size])
+
+    # Document frequencies follow from the per professor counts, archived periods included
+    db.session.execute(text("DELETE FROM keyword_terms"))
+    db.session.execute(text("""
+        INSERT INTO keyword_terms (term, comment_count)
+        SELECT term, SUM(comment_count) FROM keyword_stats GROUP BY term HAVING SUM(comment_count) > 0
+    """))
+    db.session.commit()
+    return comments, len(rows)
+
+
+def top_keywords(professor_id=None, sentiment=None, period=None, department=None, limit=20):
+    """
+    Most characteristic terms of a slice of comments
+
+    Terms are ranked by occurrences * idf, idf = ln((1 + N) / (1 + df)) + 1, where N is the
+    number of comments overall and df the number of comments containing the term, so words
+    every student uses ("clase", "profesor") sink below the ones specific to this slice.
+
+    Returns:
+        list: Dicts with term, occurrences, comments and weight, best first
+    """
+    conditions = ['1 = 1']
+    params = {'pool': CANDIDATE_POOL}
+    if professor_id:
+        conditions.append('k.professor_id = :professor_id')
+        params['professor_id'] = professor_id
+    if sentiment:
+        conditions.append('k.sentiment = :sentiment')
+        params['sentiment'] = sentiment
+    if period:
+        conditions.append('k.period = :period')
+        params['period'] = period
+    if department:
+        conditions.append('k.professor_id IN (SELECT user_id FROM professors WHERE department = :department)')
+        params['department'] = department
+
+    rows = db.session.execute(text(f"""
+        WITH slice AS (
+            SELECT k.term, SUM(k.occurrences) AS occurrences, SUM(k.comment_count) AS comments
+            FROM keyword_stats k
+            WHERE {' AND '.join(conditions)}
+            GROUP BY k.term
+            HAVING SUM(k.occurrences) > 0
+            ORDER BY occurrences DESC
+            LIMIT :pool
+        )
+        SELECT slice.term, slice.occurrences, slice.comments, COALESCE(t.comment_count, 0) AS df
+        FROM slice
+        LEFT JOIN keyword_terms t ON t.term = slice.term
+    """), params).all()
+
+    total_comments = db.session.execute(
+        text("SELECT COALESCE(SUM(total_count), 0) FROM sentiment_daily")
+    ).scalar()
+
+    keywords = []
+    for row in rows:
+        idf = math.log((1 + total_comments) / (1 + row.df)) + 1
+        keywords.append({
+            'term': row.term,
+            'occurrences': int(row.occurrences),
+            'comments': int(row.comments),
+            'weight': round(row.occurrences * idf, 3)
+        })
+    keywords.sort(key=lambda keyword: (-keyword['weight'], keyword['term']))
+    return keywords[:limit]
@@ -0,0 +1,121 @@
+"""
+Spanish sentiment lexicon used as the cheap first stage in front of BETO
+Short comments with a clear polarity ("excelente profesor", "muy malo") are answered
+from word lists; anything long, mixed, contrasted or without sentiment words abstains
+and goes to the model
+"""
+import hashlib
+import math
+import unicodedata
+
+# Longer comments are left to the model: the lexicon cannot follow their structure
+MAX_TOKENS = 16
+
+POSITIVE = {
+    'excelente': 2, 'excelentes': 2, 'genial': 2, 'increible': 2, 'extraordinario': 2,
+    'extraordinaria': 2, 'maravilloso': 2, 'maravillosa': 2, 'fantastico': 2, 'fantastica': 2,
+    'perfecto': 2, 'perfecta': 2, 'mejor': 2, 'encanta': 2, 'encanto': 2, 'recomiendo': 2,
+    'recomendado': 2, 'recomendada': 2, 'buenisimo': 2, 'buenisima': 2,
+    'bueno': 1, 'buena': 1, 'buen': 1, 'buenos': 1, 'buenas': 1, 'gran': 1, 'claro': 1,
+    'clara': 1, 'claras': 1, 'paciente': 1, 'dedicado': 1, 'dedicada': 1, 'puntual': 1,
+    'ameno': 1, 'amena': 1, 'amable': 1, 'interesante': 1, 'interesantes': 1, 'justo': 1,
+    'justa': 1, 'dinamico': 1, 'dinamica': 1, 'agradable': 1, 'preparado': 1,
+    'preparada': 1, 'atento': 1, 'atenta': 1, 'gusta': 1, 'gusto': 1, 'aprendi': 1,
+}
+
+NEGATIVE = {
+    'pesimo': 2, 'pesima': 2, 'horrible': 2, 'terrible': 2, 'peor': 2, 'fatal': 2,
+    'nefasto': 2, 'nefasta': 2, 'deplorable': 2, 'grosero': 2, 'grosera': 2,
+    'malo': 1, 'mala': 1, 'mal': 1, 'malos': 1, 'malas': 1, 'aburrido': 1, 'aburrida': 1,
+    'aburridas': 1, 'impuntual': 1, 'injusto': 1, 'injusta': 1, 'confuso': 1, 'confusa': 1,
+    'desorganizado': 1, 'desorganizada': 1, 'prepotente': 1, 'irrespetuoso': 1,
+    'irrespetuosa': 1, 'deficiente': 1, 'mediocre': 1, 'flojo': 1, 'floja': 1,
+}
+
+INTENSIFIERS = {'muy': 2.0, 'super': 2.0, 'sumamente': 2.0, 'realmente': 1.5, 'bastante': 1.5, 'tan': 1.5}
+
+# A sentiment word within this many tokens after a negation makes the lexicon abstain:
+# negation flips polarity as often as it emphasizes it ("no es malo", "sin duda el mejor",
+# "no hay nadie mejor"), which only the model can tell apart
+NEGATIONS = {'no', 'nunca', 'ni', 'sin', 'tampoco', 'jamas', 'nada', 'nadie', 'cero'}
+NEGATION_SCOPE = 3
+
+# Contrast usually means a mixed opinion: leave it to the model
+CONTRASTS = {'pero', 'aunque', 'embargo', 'sino', 'excepto', 'salvo', 'mientras'}
+
+# "mejor" / "peor" are verdicts only as superlatives ("el mejor profesor"); as comparatives
+# or advice ("podria ser mejor", "mejor busquen otro profesor") they abstain
+COMPARATIVES = {'mejor', 'peor'}
+ARTICLES = {'el', 'la', 'los', 'las', 'lo'}
+
+# Wishes and conditionals describe what is missing ("ojala fuera mas claro"): abstain
+HYPOTHETICALS = {
+    'podria', 'podrian', 'deberia', 'deberian', 'fuera', 'fueran', 'hubiera', 'seria', 'serian',
+    'ojala', 'gustaria', 'quisiera', 'tendria', 'tendrian'
+}
+
+
+# Bump when lexicon_score changes how it reads the word lists
+# 2: negated sentiment words abstain instead of flipping polarity
+# 3: comparatives outside a superlative and hypotheticals abstain
+LEXICON_RULES = 3
+
+# Stamped on the comments the lexicon answers; derived from the word lists and the rules
+# revision so any edit to them makes those comments stale for `flask models rescore`
+LEXICON_VERSION = 'lexicon@' + hashlib.sha256(repr((
+    LEXICON_RULES, sorted(POSITIVE.items()), sorted(NEGATIVE.items()), sorted(INTENSIFIERS.items()),
+    sorted(NEGATIONS), NEGATION_SCOPE, sorted(CONTRASTS), sorted(COMPARATIVES), sorted(ARTICLES),
+    sorted(HYPOTHETICALS), MAX_TOKENS
+)).encode('utf-8')).hexdigest()[:12]
+
+
+def _fold(token):
+    """Lowercase token without accents (students often skip them)"""
+    return ''.join(ch for ch in unicodedata.normalize('NFD', token) if unicodedata.category(ch) != 'Mn')
+
+
+def lexicon_score(cleaned_text):
+    """
+    Polarity of a short comment from the word lists
+
+    Args:
+        cleaned_text (str): Text already passed through SentimentClassifier.clean_text
+
+    Returns:
+        tuple: (sentiment, confidence), or None when the lexicon abstains
+            - confidence: 1 - 2^-(1 + strength), e.g. 0.875 for "excelente" or "muy malo"
+    """
+    tokens = [_fold(token) for token in cleaned_text.split()]
+    if (not tokens or len(tokens) > MAX_TOKENS or CONTRASTS.intersection(tokens)
+            or HYPOTHETICALS.intersection(tokens)):
+        return None
+
+    positive = negative = 0.0
+    boost = 1.0
+    negated_until = -1
+    for i, token in enumerate(tokens):
+        if token in NEGATIONS:
+            negated_until = i + NEGATION_SCOPE
+            continue
+        if token in INTENSIFIERS:
+            boost = INTENSIFIERS[token]
+            continue
+        weight = POSITIVE.get(token, 0) - NEGATIVE.get(token, 0)
+        if weight:
+            if i <= negated_until:
+                return None
+            if token in COMPARATIVES and (i == 0 or tokens[i - 1] not in ARTICLES):
+                return None
+            weight *= boost
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+        boost = 1.0
+
+    if positive and negative:
+        return None
+    strength = positive or negative
+    if not strength:
+        return None
+    return ('positive' if positive else 'negative'), 1 - math.pow(2, -(1 + strength))
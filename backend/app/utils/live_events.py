@@ -0,0 +1,279 @@
+"""
+Live dashboard events over Server-Sent Events
+A survey submission sends a NOTIFY on the dashboard_events channel inside its transaction,
+so the event only goes out if it commits. Each worker process runs one listener thread on
+a dedicated connection that LISTENs on the channel and fans every event out to the SSE
+streams of that process whose filter matches (a professor only receives their own events).
+Dashboards apply the compact deltas to the counters they already show instead of fetching
+them again. An open stream waits on an in-memory queue: no database connection, no query,
+and one comment line every SSE_HEARTBEAT_SECONDS so proxies keep it open. When events may
+have been lost (listener reconnect, stream too slow) the stream gets a 'resync' event and
+the dashboard reloads once
+"""
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+from flask import Response, jsonify
+from sqlalchemy import text
+
+from ..models import db
+
+CHANNEL = 'dashboard_events'
+
+NOTIFY_SURVEY_COMPLETED = """
+    SELECT pg_notify(:channel, json_build_object(
+        'type', 'survey_completed',
+        'survey_id', s.id,
+        'period', s.period,
+        'professor_id', s.professor_id,
+        'subject_id', s.subject_id,
+        'department', p.department,
+        'sentiment', CAST(:sentiment AS TEXT),
+        'first_for_student', NOT EXISTS (
+            SELECT 1 FROM surveys o
+            WHERE o.student_id = s.student_id AND o.status = 'completed' AND o.id <> s.id
+        )
+    )::text)
+    FROM surveys s
+    LEFT JOIN professors p ON p.user_id = s.professor_id
+    WHERE s.id = :survey_id AND s.period = :period
+"""
+
+
+def notify_survey_completed(survey, sentiment):
+    """
+    Queue the survey_completed event in the current transaction (call before the commit
+    that completes the survey; PostgreSQL delivers it when that commit succeeds)
+    """
+    if not live_events.enabled:
+        return
+    db.session.execute(text(NOTIFY_SURVEY_COMPLETED), {
+        'channel': CHANNEL, 'survey_id': survey.id, 'period': survey.period, 'sentiment': sentiment
+    })
+
+
+def format_event(event):
+    """One SSE frame: the event type and its JSON data"""
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def open_stream(professor_id=None, department=None):
+    """
+    Response for an SSE endpoint: the event stream, or 503 when this process is at
+    SSE_MAX_STREAMS (404 when live events are disabled)
+    """
+    if not live_events.enabled:
+        return jsonify({'error': 'Live events are disabled'}), 404
+    subscription = live_events.subscribe(professor_id=professor_id, department=department)
+    if subscription is None:
+        response = jsonify({'error': 'Too many live connections, try again later'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    # The stream holds no database connection while it waits for events
+    db.session.remove()
+    return Response(live_events.stream(subscription), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+class Subscription:
+    """One open stream: its filter and a bounded queue of events waiting to be sent"""
+
+    def __init__(self, professor_id=None, department=None, queue_size=100):
+        self.professor_id = professor_id
+        self.department = department
+        self.events = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def matches(self, event):
+        if event.get('type') == 'resync':
+            return True
+        if self.professor_id is not None and event.get('professor_id') != self.professor_id:
+            return False
+        if self.department is not None and event.get('department') != self.department:
+            return False
+        return True
+
+    def offer(self, event):
+        try:
+            self.events.put_nowait(event)
+            return True
+        except queue.Full:
+            # The client is not keeping up: drop what is queued and have it reload instead
+            self.overflowed = True
+            return False
+
+    def next_event(self, timeout):
+        """The next event, a 'resync' after an overflow, or None after timeout seconds"""
+        if self.overflowed:
+            self.overflowed = False
+            while True:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    break
+            return {'type': 'resync'}
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LiveEvents:
+    """
+    Per-process LISTEN connection and the SSE streams it feeds
+
+    The listener thread starts with the first stream of the process (and again after a
+    fork) and stops, closing its connection, when the last stream goes away.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.heartbeat_seconds = 15
+        self.stream_seconds = 600
+        self.max_streams = 200
+        self.queue_size = 100
+        self._streams = set()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.received = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.reconnects = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('LIVE_EVENTS_ENABLED', True)
+        self.heartbeat_seconds = app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+        self.stream_seconds = app.config.get('SSE_STREAM_SECONDS', 600)
+        self.max_streams = app.config.get('SSE_MAX_STREAMS', 200)
+        self.queue_size = app.config.get('SSE_QUEUE_SIZE', 100)
+        app.extensions['live_events'] = self
+
+    def subscribe(self, professor_id=None, department=None):
+        """
+        Register a stream
+
+        Returns:
+            Subscription: or None when the process already has SSE_MAX_STREAMS streams
+        """
+        subscription = Subscription(professor_id, department, self.queue_size)
+        with self._lock:
+            if len(self._streams) >= self.max_streams:
+                return None
+            self._streams.add(subscription)
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._listen, name='live-events-listener', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._streams.discard(subscription)
+
+    def publish(self, event):
+        """Hand an event to every matching stream of this process"""
+        with self._lock:
+            streams = list(self._streams)
+        for subscription in streams:
+            if subscription.matches(event):
+                if subscription.offer(event):
+                    self.delivered += 1
+                else:
+                    self.overflows += 1
+
+    def stream(self, subscription):
+        """
+        Generator of SSE frames for a subscription; ends after SSE_STREAM_SECONDS so
+        the client reconnects (and its token is checked again)
+        """
+        deadline = time.monotonic() + self.stream_seconds
+        try:
+            yield 'retry: 3000\nevent: ready\ndata: {}\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                event = subscription.next_event(min(self.heartbeat_seconds, remaining))
+                yield format_event(event) if event else ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            streams = len(self._streams)
+        return {
+            'enabled': self.enabled,
+            'streams': streams,
+            'max_streams': self.max_streams,
+            'listening': self._thread is not None and self._thread.is_alive(),
+            'received': self.received,
+            'delivered': self.delivered,
+            'overflows': self.overflows,
+            'reconnects': self.reconnects
+        }
+
+    def _connect(self):
+        with self.app.app_context():
+            connection = db.engine.raw_connection()
+        # Keep it out of the pool: it stays in LISTEN for as long as there are streams
+        connection.detach()
+        dbapi_connection = connection.dbapi_connection
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return dbapi_connection
+
+    def _listen(self):
+        connection = None
+        backoff = 1
+        try:
+            while True:
+                with self._lock:
+                    if not self._streams:
+                        self._thread = None
+                        return
+                try:
+                    if connection is None:
+                        connection = self._connect()
+                        backoff = 1
+                    readable, _, _ = select.select([connection], [], [], self.heartbeat_seconds)
+                    if not readable:
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        self.received += 1
+                        try:
+                            self.publish(json.loads(notification.payload))
+                        except ValueError:
+                            print(f"Live events: ignoring malformed payload {notification.payload[:100]!r}")
+                except Exception as e:
+                    print(f"Live events listener error: {str(e)}")
+                    if connection is not None:
+                        try:
+                            connection.close()
+                        except Exception:
+                            pass
+                        connection = None
+                    # Events sent while we were not listening are lost: dashboards reload
+                    self.reconnects += 1
+                    self.publish({'type': 'resync'})
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+        finally:
+            if connection is not None:
+                connection.close()
+
+
+# Global instance, configured in create_app()
+live_events = LiveEvents()
@@ -0,0 +1,81 @@
+"""
+Versioned sentiment model registry
+Each model version is a directory under MODEL_REGISTRY_DIR laid out like final_model
+(config, weights, tokenizer and label_mappings.json). registry.json in the same directory
+says which version is active and which one, if any, is scored in shadow. Every worker
+polls that file, so activating a version from one worker reaches all of them
+"""
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+
+STATE_FILE = 'registry.json'
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+
+def version_path(registry_dir, version):
+    """
+    Directory of a registered version
+
+    Raises:
+        ValueError: If the name is invalid or no such model exists
+    """
+    if not version or not VERSION_PATTERN.match(version):
+        raise ValueError('Invalid model version name')
+    path = os.path.join(registry_dir, version)
+    if not os.path.isfile(os.path.join(path, 'config.json')):
+        raise ValueError(f'Model version {version} not found in the registry')
+    return path
+
+
+def list_versions(registry_dir):
+    """Registered versions, newest first, with size and distillation report if any"""
+    if not registry_dir or not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in os.listdir(registry_dir):
+        path = os.path.join(registry_dir, name)
+        if not VERSION_PATTERN.match(name) or not os.path.isfile(os.path.join(path, 'config.json')):
+            continue
+        files = [os.path.join(path, file_name) for file_name in os.listdir(path)]
+        entry = {
+            'version': name,
+            'created_at': datetime.utcfromtimestamp(os.path.getmtime(path)).isoformat(),
+            'size_mb': round(sum(os.path.getsize(f) for f in files if os.path.isfile(f)) / 1e6, 1)
+        }
+        report_file = os.path.join(path, 'distillation_report.json')
+        if os.path.isfile(report_file):
+            with open(report_file, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            entry['holdout_agreement'] = report.get('holdout_agreement')
+        versions.append(entry)
+    versions.sort(key=lambda entry: entry['created_at'], reverse=True)
+    return versions
+
+
+def read_state(registry_dir):
+    """Contents of registry.json ({} when there is none)"""
+    try:
+        with open(os.path.join(registry_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(registry_dir, **changes):
+    """Update registry.json atomically (write a temporary file, then rename it over)"""
+    state = read_state(registry_dir)
+    state.update(changes)
+    state['updated_at'] = datetime.utcnow().isoformat()
+    fd, temporary = tempfile.mkstemp(dir=registry_dir, prefix='.registry-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary, os.path.join(registry_dir, STATE_FILE))
+    except Exception:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return state
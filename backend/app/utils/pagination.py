@@ -0,0 +1,85 @@
+"""
+Helpers for keyset (cursor) pagination and list query parameters
+Cursors are opaque to clients: base64 of the sort key of the last row returned,
+(created_at, id) for feeds or (rank, id) for ranked search results
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+
+def encode_cursor(created_at, row_id):
+    """Build an opaque cursor from the sort key of the last row of a page"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor built by encode_cursor()
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def encode_rank_cursor(rank, row_id):
+    """Build an opaque cursor for results ordered by (rank DESC, id DESC)"""
+    payload = json.dumps([float(rank), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor):
+    """
+    Decode a cursor built by encode_rank_cursor()
+
+    Returns:
+        tuple: (rank, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return float(rank), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_limit(value, default=20, maximum=100):
+    """Parse a page size argument, clamped to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def parse_date_arg(value, end_of_day=False):
+    """
+    Parse an ISO date/datetime query argument
+
+    A bare date (YYYY-MM-DD) used as an upper bound means "through the end of that day",
+    so it is returned as the start of the next day (to be used with <).
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
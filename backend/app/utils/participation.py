@@ -0,0 +1,185 @@
+"""
+Survey participation progress
+Read from participation_counts and period_participation, which triggers on surveys keep
+current as surveys are created, completed, canceled or deleted, so the progress of a
+period costs one row per professor/subject/group however many surveys it has. The same
+triggers keep students.has_completed_survey (every survey of the open periods done)
+"""
+from sqlalchemy import text
+
+from ..models import db
+
+LIVE_PERIODS = "SELECT code FROM evaluation_periods WHERE status <> 'archived'"
+
+# group_by -> (columns selected, columns grouped by, extra join)
+PARTICIPATION_GROUPINGS = {
+    'group': ('pc.group_name', 'pc.group_name', ''),
+    'subject': ('pc.subject_id, sj.code, sj.name', 'pc.subject_id, sj.code, sj.name',
+                'LEFT JOIN subjects sj ON sj.id = pc.subject_id'),
+    'professor': ("pc.professor_id, u.first_name || ' ' || u.last_name AS name",
+                  'pc.professor_id, u.first_name, u.last_name', 'LEFT JOIN users u ON u.id = pc.professor_id'),
+    'department': ('pc.department', 'pc.department', '')
+}
+
+REBUILD_COUNTS_QUERY = """
+    INSERT INTO participation_counts (period, professor_id, subject_id, group_name, department,
+                                      pending_count, completed_count, canceled_count, last_completed_at)
+    SELECT
+        s.period,
+        s.professor_id,
+        s.subject_id,
+        COALESCE(st."group", ''),
+        MAX(p.department),
+        COUNT(*) FILTER (WHERE s.status = 'pending'),
+        COUNT(*) FILTER (WHERE s.status = 'completed'),
+        COUNT(*) FILTER (WHERE s.status = 'canceled'),
+        MAX(s.completed_at) FILTER (WHERE s.status = 'completed')
+    FROM surveys s
+    LEFT JOIN students st ON st.user_id = s.student_id
+    LEFT JOIN professors p ON p.user_id = s.professor_id
+    WHERE s.period IN ({periods})
+    GROUP BY 1, 2, 3, 4
+"""
+
+REBUILD_PERIODS_QUERY = """
+    INSERT INTO period_participation (period, students_total, students_started, students_completed)
+    SELECT
+        period,
+        COUNT(*) FILTER (WHERE counted > 0),
+        COUNT(*) FILTER (WHERE completed > 0),
+        COUNT(*) FILTER (WHERE counted > 0 AND completed = counted)
+    FROM (
+        SELECT period, student_id,
+               COUNT(*) FILTER (WHERE status <> 'canceled') AS counted,
+               COUNT(*) FILTER (WHERE status = 'completed') AS completed
+        FROM surveys
+        WHERE period IN ({periods})
+        GROUP BY period, student_id
+    ) per_student
+    GROUP BY period
+"""
+
+REBUILD_STUDENTS_QUERY = """
+    UPDATE students st
+    SET has_completed_survey = COALESCE(o.done, FALSE),
+        survey_completed_at = CASE WHEN o.done THEN o.finished_at END
+    FROM students target
+    LEFT JOIN (
+        SELECT s.student_id,
+               COUNT(*) FILTER (WHERE s.status = 'pending') = 0 AS done,
+               MAX(s.completed_at) AS finished_at
+        FROM surveys s
+        JOIN evaluation_periods ep ON ep.code = s.period AND ep.status = 'open'
+        WHERE s.status <> 'canceled'
+        GROUP BY s.student_id
+    ) o ON o.student_id = target.user_id
+    WHERE st.id = target.id
+      AND (st.has_completed_survey IS DISTINCT FROM COALESCE(o.done, FALSE)
+           OR st.survey_completed_at IS DISTINCT FROM CASE WHEN o.done THEN o.finished_at END)
+"""
+
+
+def rebuild_participation(period_code=None):
+    """
+    Recount the participation counters and student completion flags from the surveys
+
+    Archived periods are left alone: their surveys are no longer in the live tables and
+    the counters are all that remains of them.
+
+    Args:
+        period_code (str): Only recount this period (default: every live period)
+
+    Returns:
+        dict: counter rows written, periods recounted and student flags changed
+    """
+    periods = f"{LIVE_PERIODS} {'AND code = :period' if period_code else ''}"
+    params = {'period': period_code} if period_code else {}
+    db.session.execute(text(f"DELETE FROM participation_counts WHERE period IN ({periods})"), params)
+    db.session.execute(text(f"DELETE FROM period_participation WHERE period IN ({periods})"), params)
+    counts = db.session.execute(text(REBUILD_COUNTS_QUERY.format(periods=periods)), params).rowcount
+    recounted = db.session.execute(text(REBUILD_PERIODS_QUERY.format(periods=periods)), params).rowcount
+    students = db.session.execute(text(REBUILD_STUDENTS_QUERY)).rowcount
+    db.session.commit()
+    return {'counts': counts, 'periods': recounted, 'students': students}
+
+
+def _rate(done, total):
+    return round(done * 100 / total, 1) if total else 0.0
+
+
+def participation_progress(period=None, group_by='group', department=None):
+    """
+    Completion progress of a period (default: the open periods) from the counters
+
+    Args:
+        group_by (str): Key of PARTICIPATION_GROUPINGS the rows are broken down by
+        department (str): Only professors of this department
+
+    Returns:
+        dict: periods, summary (surveys and students) and rows, least completed first
+    """
+    columns, grouped_by, join = PARTICIPATION_GROUPINGS[group_by]
+    if period:
+        periods = [period]
+    else:
+        periods = db.session.execute(
+            text("SELECT code FROM evaluation_periods WHERE status = 'open' ORDER BY code")
+        ).scalars().all()
+    params = {'periods': periods, 'department': department}
+    department_filter = 'AND pc.department = :department' if department else ''
+
+    rows = db.session.execute(text(f"""
+        SELECT {columns},
+               SUM(pc.pending_count) AS pending,
+               SUM(pc.completed_count) AS completed,
+               SUM(pc.canceled_count) AS canceled,
+               MAX(pc.last_completed_at) AS last_completed_at
+        FROM participation_counts pc
+        {join}
+        WHERE pc.period = ANY(:periods) {department_filter}
+        GROUP BY {grouped_by}
+    """), params).mappings().all()
+
+    breakdown = []
+    for row in rows:
+        entry = {key: value for key, value in row.items()
+                 if key not in ('pending', 'completed', 'canceled', 'last_completed_at')}
+        if 'group_name' in entry:
+            entry['group'] = entry.pop('group_name') or None
+        surveys = int(row['pending']) + int(row['completed'])
+        entry.update({
+            'surveys': surveys,
+            'completed': int(row['completed']),
+            'pending': int(row['pending']),
+            'canceled': int(row['canceled']),
+            'completion_rate': _rate(int(row['completed']), surveys),
+            'last_completed_at': row['last_completed_at'].isoformat() if row['last_completed_at'] else None
+        })
+        breakdown.append(entry)
+    breakdown.sort(key=lambda entry: (entry['completion_rate'], -entry['surveys']))
+
+    surveys = sum(entry['surveys'] for entry in breakdown)
+    completed = sum(entry['completed'] for entry in breakdown)
+    summary = {
+        'surveys': surveys,
+        'completed': completed,
+        'pending': surveys - completed,
+        'completion_rate': _rate(completed, surveys),
+        'last_completed_at': max((entry['last_completed_at'] for entry in breakdown
+                                  if entry['last_completed_at']), default=None)
+    }
+    if not department:
+        students = db.session.execute(text("""
+            SELECT COALESCE(SUM(students_total), 0) AS total, COALESCE(SUM(students_started), 0) AS started,
+                   COALESCE(SUM(students_completed), 0) AS done
+            FROM period_participation
+            WHERE period = ANY(:periods)
+        """), params).one()
+        summary.update({
+            'students': int(students.total),
+            'students_started': int(students.started),
+            'students_completed': int(students.done),
+            'student_completion_rate': _rate(int(students.done), int(students.total))
+        })
+
+    return {'periods': periods, 'group_by': group_by, 'summary': summary, 'rows': breakdown}
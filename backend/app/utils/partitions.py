@@ -0,0 +1,139 @@
+"""
+Monthly range partition maintenance
+Creates upcoming partitions and detaches/drops (optionally archiving) expired ones.
+Partitions are named <table>_YYYY_MM, see ensure_monthly_partitions() in database/schema.sql
+"""
+import gzip
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from ..models import db
+
+PARTITION_SUFFIX = re.compile(r'_(\d{4})_(\d{2})$')
+
+
+def add_months(day, months):
+    """Return the first day of the month `months` away from `day`'s month"""
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_monthly_partitions(table, months_back=0, months_ahead=3, today=None):
+    """
+    Create any missing monthly partitions around today
+
+    Returns:
+        int: Number of partitions created
+    """
+    today = today or date.today()
+    created = db.session.execute(
+        text("SELECT ensure_monthly_partitions(:table, :from_month, :to_month)"),
+        {
+            'table': table,
+            'from_month': add_months(today, -months_back),
+            'to_month': add_months(today, months_ahead)
+        }
+    ).scalar()
+    db.session.commit()
+    return created or 0
+
+
+def ensure_partitions_for(table, timestamps):
+    """Create the monthly partitions needed to hold the given timestamps"""
+    months = sorted({date(ts.year, ts.month, 1) for ts in timestamps})
+    if not months:
+        return 0
+    created = db.session.execute(
+        text("SELECT ensure_monthly_partitions(:table, :from_month, :to_month)"),
+        {'table': table, 'from_month': months[0], 'to_month': months[-1]}
+    ).scalar()
+    db.session.commit()
+    return created or 0
+
+
+def list_monthly_partitions(table):
+    """
+    List the monthly partitions attached to a table
+
+    Returns:
+        list: (partition_name, month_start) tuples, oldest first
+    """
+    rows = db.session.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+        """),
+        {'table': table}
+    ).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def apply_retention(table, keep_months, archive_dir=None, lock_timeout='5s', today=None):
+    """
+    Detach and drop partitions older than `keep_months` full months
+
+    Each partition is detached with DETACH PARTITION ... CONCURRENTLY, so readers and
+    writers of the parent table are never blocked for long; lock_timeout bounds the
+    short lock the detach still needs. When archive_dir is given the partition is
+    dumped to <archive_dir>/<partition>.csv.gz before it is dropped.
+
+    Returns:
+        dict: {'dropped': [...], 'archived': [...], 'skipped': [(name, reason), ...]}
+    """
+    cutoff = add_months(today or date.today(), -keep_months)
+    expired = [name for name, month_start in list_monthly_partitions(table)
+               if add_months(month_start, 1) <= cutoff]
+    # Release the session's snapshot before running DDL on its own connection
+    db.session.commit()
+
+    result = {'dropped': [], 'archived': [], 'skipped': []}
+    if not expired:
+        return result
+
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    connection = db.engine.raw_connection()
+    driver_connection = connection.driver_connection
+    previous_autocommit = driver_connection.autocommit
+    driver_connection.autocommit = True
+    try:
+        cursor = driver_connection.cursor()
+        cursor.execute("SET lock_timeout = %s", (lock_timeout,))
+        for name in expired:
+            try:
+                cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" CONCURRENTLY')
+            except Exception as e:
+                # A cancelled concurrent detach leaves the partition "pending", finish it next run
+                if 'pending detach' in str(e):
+                    cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" FINALIZE')
+                else:
+                    result['skipped'].append((name, str(e).strip()))
+                    continue
+
+            if archive_dir:
+                archive_path = os.path.join(archive_dir, f'{name}.csv.gz')
+                with gzip.open(archive_path, 'wb') as archive:
+                    cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+                result['archived'].append(archive_path)
+
+            cursor.execute(f'DROP TABLE "{name}"')
+            result['dropped'].append(name)
+        cursor.close()
+    finally:
+        driver_connection.autocommit = previous_autocommit
+        connection.close()
+
+    return result
@@ -0,0 +1,240 @@
+"""
+Cold archive for closed evaluation periods
+Surveys and comments of a closed period are exported to a compressed JSONL bundle
+(<archive_dir>/<period>/{surveys,comments}.jsonl.gz + manifest.json), their partitions
+are dropped, and a per professor/subject summary stays queryable in period_aggregates.
+restore_period() loads a bundle back into freshly created partitions.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from datetime import date, datetime
+
+from sqlalchemy import insert, select, text
+
+from ..models import db, EvaluationPeriod, Survey, Comment
+from .duplicates import index_period
+from .response_cache import invalidate_cache, response_cache
+
+ARCHIVE_FORMAT_VERSION = 1
+BATCH_SIZE = 5000
+
+# Tables in export order; restore uses the same order (comments reference surveys)
+ARCHIVED_TABLES = [('surveys', Survey.__table__), ('comments', Comment.__table__)]
+
+PERIOD_AGGREGATES_QUERY = text("""
+    SELECT
+        s.period,
+        s.professor_id,
+        s.subject_id,
+        COUNT(DISTINCT s.id) AS total_surveys,
+        COUNT(DISTINCT s.id) FILTER (WHERE s.status = 'completed') AS completed_surveys,
+        COUNT(c.id) AS total_comments,
+        COUNT(c.id) FILTER (WHERE c.sentiment = 'positive') AS positive_count,
+        COUNT(c.id) FILTER (WHERE c.sentiment = 'neutral') AS neutral_count,
+        COUNT(c.id) FILTER (WHERE c.sentiment = 'negative') AS negative_count,
+        AVG(c.confidence_score) AS avg_confidence
+    FROM surveys s
+    LEFT JOIN comments c ON c.survey_id = s.id AND c.period = s.period
+    WHERE s.period = :period
+    GROUP BY s.period, s.professor_id, s.subject_id
+""")
+
+
+def partition_suffix(period_code):
+    """Partition name suffix for a period, matching ensure_period_partitions() in schema.sql"""
+    return ''.join(ch if ch.isalnum() else '_' for ch in period_code)
+
+
+def compute_period_aggregates(period_code):
+    """Compute the per professor/subject summary of a period from the live tables"""
+    rows = db.session.execute(PERIOD_AGGREGATES_QUERY, {'period': period_code}).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def store_period_aggregates(period_code):
+    """Replace the stored summary of a period with a freshly computed one"""
+    db.session.execute(text("DELETE FROM period_aggregates WHERE period = :period"), {'period': period_code})
+    db.session.execute(text("""
+        INSERT INTO period_aggregates (period, professor_id, subject_id, total_surveys, completed_surveys,
+                                       total_comments, positive_count, neutral_count, negative_count,
+                                       avg_confidence, computed_at)
+        SELECT agg.*, CURRENT_TIMESTAMP FROM (""" + PERIOD_AGGREGATES_QUERY.text + """) agg
+    """), {'period': period_code})
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def _export_table(table, period_code, path):
+    """Stream one period's rows to a gzipped JSONL file, return (rows, sha256)"""
+    rows = 0
+    result = db.session.execute(
+        select(table).where(table.c.period == period_code).order_by(table.c.id),
+        execution_options={'yield_per': BATCH_SIZE}
+    )
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        for row in result.mappings():
+            handle.write(json.dumps(dict(row), default=_json_default, ensure_ascii=False))
+            handle.write('\n')
+            rows += 1
+    return rows, _sha256(path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def archive_period(period_code, archive_dir):
+    """
+    Move a closed period to the cold archive
+
+    Returns:
+        dict: The written manifest
+
+    Raises:
+        ValueError: If the period does not exist or is not closed
+    """
+    period = db.session.get(EvaluationPeriod, period_code)
+    if not period:
+        raise ValueError(f'Period {period_code} not found')
+    if period.status != 'closed':
+        raise ValueError(f'Period {period_code} is {period.status}; only closed periods can be archived')
+
+    # Everything below is one transaction: the partitions stay read-only (SHARE) from here
+    # until they are dropped, so the aggregates, the bundle and the dropped rows are the same
+    # rows. submit_survey already refuses closed periods; this also holds off admin writes
+    # and re-scoring. The period row is only updated at the end: a submission waiting on it
+    # while holding its survey row would deadlock with the DETACH otherwise
+    suffix = partition_suffix(period_code)
+    db.session.execute(text(f'LOCK TABLE "surveys_{suffix}", "comments_{suffix}" IN SHARE MODE'))
+    store_period_aggregates(period_code)
+
+    # Write into a temporary directory first so a half-written bundle is never mistaken for a valid one
+    bundle_dir = os.path.join(archive_dir, period_code)
+    staging_dir = bundle_dir + '.partial'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    manifest = {
+        'format_version': ARCHIVE_FORMAT_VERSION,
+        'period': period_code,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': {}
+    }
+    for name, table in ARCHIVED_TABLES:
+        filename = f'{name}.jsonl.gz'
+        rows, checksum = _export_table(table, period_code, os.path.join(staging_dir, filename))
+        manifest['tables'][name] = {
+            'file': filename,
+            'rows': rows,
+            'sha256': checksum,
+            'columns': [column.name for column in table.columns]
+        }
+
+    with open(os.path.join(staging_dir, 'manifest.json'), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+    shutil.rmtree(bundle_dir, ignore_errors=True)
+    os.rename(staging_dir, bundle_dir)
+
+    # Drop the partitions (comments first, they reference surveys) and mark the period archived
+    db.session.execute(text(f'ALTER TABLE comments DETACH PARTITION "comments_{suffix}"'))
+    db.session.execute(text(f'DROP TABLE "comments_{suffix}"'))
+    db.session.execute(text(f'ALTER TABLE surveys DETACH PARTITION "surveys_{suffix}"'))
+    db.session.execute(text(f'DROP TABLE "surveys_{suffix}"'))
+    db.session.execute(text("DELETE FROM comment_lsh_buckets WHERE period = :period"), {'period': period_code})
+    # Embeddings are not part of the bundle; `flask embeddings backfill` recomputes them after a restore
+    db.session.execute(text("DELETE FROM comment_embeddings WHERE period = :period"), {'period': period_code})
+    period.status = 'archived'
+    period.archive_path = bundle_dir
+    period.archived_at = datetime.utcnow()
+    db.session.commit()
+    invalidate_cache(f'period:{period_code}')
+
+    return manifest
+
+
+def _load_rows(path, table, columns):
+    """Read a JSONL bundle file back into row dicts with Python types"""
+    datetime_columns = {c.name for c in table.columns if isinstance(c.type, db.DateTime)}
+    binary_columns = {c.name for c in table.columns if isinstance(c.type, db.LargeBinary)}
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            record = json.loads(line)
+            row = {}
+            for column in columns:
+                value = record.get(column)
+                if value is not None and column in datetime_columns:
+                    value = datetime.fromisoformat(value)
+                elif value is not None and column in binary_columns:
+                    value = base64.b64decode(value)
+                row[column] = value
+            yield row
+
+
+def restore_period(period_code, archive_dir=None):
+    """
+    Load an archived period back into the live tables
+
+    The bundle checksums are verified before anything is written. Columns added to the
+    tables after the bundle was written are left at their defaults.
+
+    Returns:
+        dict: Rows restored per table
+    """
+    period = db.session.get(EvaluationPeriod, period_code)
+    if not period:
+        raise ValueError(f'Period {period_code} not found')
+    if period.status != 'archived':
+        raise ValueError(f'Period {period_code} is {period.status}, not archived')
+
+    bundle_dir = os.path.join(archive_dir, period_code) if archive_dir else period.archive_path
+    with open(os.path.join(bundle_dir, 'manifest.json'), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+
+    for name, info in manifest['tables'].items():
+        if _sha256(os.path.join(bundle_dir, info['file'])) != info['sha256']:
+            raise ValueError(f'Checksum mismatch for {name} in {bundle_dir}')
+
+    db.session.execute(text("SELECT ensure_period_partitions(:period)"), {'period': period_code})
+    # The comment triggers rebuild the period's rollup rows as the comments are reinserted
+    db.session.execute(text("DELETE FROM sentiment_daily WHERE period = :period"), {'period': period_code})
+    # Likewise the survey triggers recount its participation
+    db.session.execute(text("DELETE FROM participation_counts WHERE period = :period"), {'period': period_code})
+    db.session.execute(text("DELETE FROM period_participation WHERE period = :period"), {'period': period_code})
+
+    restored = {}
+    for name, table in ARCHIVED_TABLES:
+        info = manifest['tables'][name]
+        columns = [c for c in info['columns'] if c in table.c]
+        batch = []
+        restored[name] = 0
+        for row in _load_rows(os.path.join(bundle_dir, info['file']), table, columns):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                db.session.execute(insert(table), batch)
+                restored[name] += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(table), batch)
+            restored[name] += len(batch)
+
+    index_period(period_code)
+    period.status = 'closed'
+    period.archived_at = None
+    db.session.commit()
+    # No cached response knows the restored surveys by tag
+    response_cache.clear()
+    return restored
@@ -0,0 +1,120 @@
+"""
+Incremental re-scoring of stored comment sentiments
+Every comment carries the stamp of the model (or lexicon) that classified it
+(comments.model_version) and a status: 'scored', 'fallback' when the neutral default was
+stored after a failure, or 'pending' when it was stored without classification. After a
+model change only the rows that are not current are classified again, in id order and in
+batches committed one by one, so an interrupted run simply resumes on the next call.
+sentiment_daily follows through its triggers; keyword_stats are moved here
+"""
+from sqlalchemy import text
+
+from ..models import db
+from .keywords import record_comment_keywords
+from .sentiment_classifier import SentimentClassifier
+
+LIVE_PERIODS = "SELECT code FROM evaluation_periods WHERE status <> 'archived'"
+
+
+def _current_model():
+    """(model stamp, every current stamp), loading the model if this process has none"""
+    if SentimentClassifier.model_status()['loaded_stamp'] is None and not SentimentClassifier.load_model():
+        raise RuntimeError('Sentiment model is not available')
+    return SentimentClassifier.model_status()['loaded_stamp'], SentimentClassifier.current_stamps()
+
+
+def model_version_counts(period=None):
+    """
+    Live comments per (model_version, sentiment_status)
+
+    Returns:
+        list: Dicts with model_version, status, comments and whether the row is current
+              for the model this process serves (None when no model is loaded)
+    """
+    rows = db.session.execute(text(f"""
+        SELECT model_version, sentiment_status, COUNT(*) AS comments
+        FROM comments
+        WHERE period IN ({LIVE_PERIODS}) {'AND period = :period' if period else ''}
+        GROUP BY model_version, sentiment_status
+        ORDER BY comments DESC
+    """), {'period': period}).all()
+
+    stamps = SentimentClassifier.current_stamps() if SentimentClassifier.model_status()['loaded_stamp'] else None
+    return [{
+        'model_version': row.model_version,
+        'status': row.sentiment_status,
+        'comments': row.comments,
+        'current': (row.sentiment_status == 'scored' and row.model_version in stamps) if stamps else None
+    } for row in rows]
+
+
+def rescore_comments(period=None, batch_size=256, adopt_legacy=False, limit=None, log=print):
+    """
+    Classify again the live comments whose sentiment is not current
+
+    A comment is stale when it is a fallback or pending, or was stamped by another model
+    (or lexicon) version than the ones in use. Comments from before stamping have no
+    version; adopt_legacy stamps those with the current model instead of rescoring them.
+
+    Returns:
+        dict: adopted, rescored and changed (sentiment differs from the stored one) counts
+
+    Raises:
+        RuntimeError: If the model cannot be loaded
+    """
+    model_stamp, stamps = _current_model()
+    live = f"c.period IN ({LIVE_PERIODS}) {'AND c.period = :period' if period else ''}"
+    params = {'period': period, 'stamps': stamps, 'model_stamp': model_stamp}
+
+    adopted = 0
+    if adopt_legacy:
+        adopted = db.session.execute(text(f"""
+            UPDATE comments c SET model_version = :model_stamp
+            WHERE {live} AND c.model_version IS NULL AND c.sentiment_status = 'scored'
+        """), params).rowcount
+        db.session.commit()
+
+    rescored = changed = 0
+    after = 0
+    while limit is None or rescored < limit:
+        size = batch_size if limit is None else min(batch_size, limit - rescored)
+        rows = db.session.execute(text(f"""
+            SELECT c.id, c.period, c.text, c.sentiment, s.professor_id
+            FROM comments c
+            JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+            WHERE {live} AND c.id > :after
+              AND (c.sentiment_status <> 'scored' OR c.model_version IS NULL OR c.model_version <> ALL(:stamps))
+            ORDER BY c.id
+            LIMIT :size
+        """), {**params, 'after': after, 'size': size}).all()
+        if not rows:
+            break
+
+        updates = []
+        results = SentimentClassifier.classify_many_stamped([row.text for row in rows])
+        for row, (sentiment, confidence, model_version, status) in zip(rows, results):
+            updates.append({
+                'id': row.id,
+                'period': row.period,
+                'sentiment': sentiment,
+                'confidence_score': confidence,
+                'model_version': model_version,
+                'sentiment_status': status
+            })
+            if sentiment != row.sentiment:
+                record_comment_keywords(row.text, row.professor_id, row.sentiment, row.period, delta=-1)
+                record_comment_keywords(row.text, row.professor_id, sentiment, row.period)
+                changed += 1
+        db.session.execute(text("""
+            UPDATE comments
+            SET sentiment = :sentiment, confidence_score = :confidence_score,
+                model_version = :model_version, sentiment_status = :sentiment_status
+            WHERE id = :id AND period = :period
+        """), updates)
+        db.session.commit()
+
+        rescored += len(rows)
+        after = rows[-1].id
+        log(f"  {rescored} comment(s) rescored, {changed} changed sentiment")
+
+    return {'adopted': adopted, 'rescored': rescored, 'changed': changed}
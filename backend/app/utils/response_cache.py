@@ -0,0 +1,321 @@
+"""
+Response cache for read endpoints
+cached_response keeps the JSON of a route's successful responses per endpoint, arguments,
+query string and principal (the caller's role, or the caller for per-user payloads),
+tagged with the data they were built from: professor:<users.id>, student:<users.id>,
+subject:<id>, period:<code> and the collection tags 'subjects', 'groups' and 'professors'.
+Routes that change that data call invalidate_cache() with the same tags once committed.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- memory: per worker process, LRU bounded. An invalidation only reaches the process that
+  made it, so other workers (and changes made from the CLI) wait for RESPONSE_CACHE_TTL
+- database: UNLOGGED tables shared by every worker, invalidated everywhere at once, at the
+  cost of one indexed lookup per request
+- none: caching off
+
+A response whose tags were invalidated while it was being computed is not stored, so a
+read that raced a write cannot put the old data back after the invalidation
+"""
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, jsonify, make_response, request
+from sqlalchemy import text
+
+from ..models import db, Professor
+
+# Invalidation times are kept this long: longer than any request takes
+INVALIDATION_MEMORY_SECONDS = 600
+
+
+class MemoryCacheBackend:
+    """Entries of this process, least recently used first, with a tag -> keys index"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (body, status, tags, expiry epoch)
+        self._keys_by_tag = {}
+        self._invalidated = {}  # tag -> epoch of its last invalidation
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, body, status, tags, ttl, started):
+        with self._lock:
+            if any(self._invalidated.get(tag, 0) >= started for tag in tags):
+                return False
+            self._drop(key)
+            self._entries[key] = (body, status, tags, time.time() + ttl)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, tags):
+        now = time.time()
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                self._invalidated[tag] = now
+                keys |= self._keys_by_tag.pop(tag, set())
+            for key in keys:
+                self._drop(key)
+            if len(self._invalidated) > self.max_entries:
+                self._invalidated = {tag: at for tag, at in self._invalidated.items()
+                                     if at > now - INVALIDATION_MEMORY_SECONDS}
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def size(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+class DatabaseCacheBackend:
+    """response_cache / response_cache_invalidations, on connections of their own"""
+
+    name = 'database'
+
+    def __init__(self, max_entries=None):
+        pass
+
+    def get(self, key):
+        with db.engine.begin() as connection:
+            row = connection.execute(text(
+                "SELECT body, status FROM response_cache WHERE key = :key AND expires_at > :now"
+            ), {'key': key, 'now': time.time()}).first()
+        return (json.loads(row.body), row.status) if row else None
+
+    def set(self, key, body, status, tags, ttl, started):
+        now = time.time()
+        with db.engine.begin() as connection:
+            stored = connection.execute(text("""
+                INSERT INTO response_cache (key, body, status, tags, expires_at)
+                SELECT :key, :body, :status, CAST(:tags AS TEXT[]), :expires_at
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM response_cache_invalidations
+                    WHERE tag = ANY(CAST(:tags AS TEXT[])) AND invalidated_at >= :started
+                )
+                ON CONFLICT (key) DO UPDATE SET
+                    body = EXCLUDED.body, status = EXCLUDED.status,
+                    tags = EXCLUDED.tags, expires_at = EXCLUDED.expires_at
+            """), {
+                'key': key, 'body': json.dumps(body), 'status': status, 'tags': sorted(tags),
+                'expires_at': now + ttl, 'started': started
+            }).rowcount
+            # Expired rows are swept now and then by the writers
+            if random.random() < 0.01:
+                connection.execute(text("DELETE FROM response_cache WHERE expires_at <= :now"), {'now': now})
+                connection.execute(text("DELETE FROM response_cache_invalidations WHERE invalidated_at < :before"),
+                                   {'before': now - INVALIDATION_MEMORY_SECONDS})
+        return stored > 0
+
+    def invalidate(self, tags):
+        with db.engine.begin() as connection:
+            connection.execute(text("""
+                INSERT INTO response_cache_invalidations (tag, invalidated_at)
+                SELECT unnest(CAST(:tags AS TEXT[])), :now
+                ON CONFLICT (tag) DO UPDATE SET invalidated_at = EXCLUDED.invalidated_at
+            """), {'tags': sorted(tags), 'now': time.time()})
+            return connection.execute(text(
+                "DELETE FROM response_cache WHERE tags && CAST(:tags AS TEXT[])"
+            ), {'tags': sorted(tags)}).rowcount
+
+    def clear(self):
+        with db.engine.begin() as connection:
+            connection.execute(text("TRUNCATE response_cache"))
+
+    def size(self):
+        with db.engine.begin() as connection:
+            return connection.execute(text("SELECT COUNT(*) FROM response_cache")).scalar()
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'database': DatabaseCacheBackend
+}
+
+
+class ResponseCache:
+    """The configured backend and hit/miss counters per endpoint (per worker process)"""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl_seconds = 300
+        self._counters = {}  # endpoint -> {'hits', 'misses', 'stored', 'errors'}
+        self.invalidations = 0
+        self.entries_invalidated = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        name = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        self.ttl_seconds = app.config.get('RESPONSE_CACHE_TTL', 300)
+        if name == 'none':
+            self.backend = None
+        elif name in CACHE_BACKENDS:
+            self.backend = CACHE_BACKENDS[name](app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+        else:
+            raise ValueError(f"RESPONSE_CACHE_BACKEND must be 'none' or one of {', '.join(CACHE_BACKENDS)}")
+        app.extensions['response_cache'] = self
+
+    def lookup(self, endpoint, key):
+        """Stored (body, status) of a key, or None; cache errors count as misses"""
+        try:
+            result = self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache read error ({endpoint}): {str(e)}")
+            self._count(endpoint, 'errors')
+            return None
+        self._count(endpoint, 'hits' if result is not None else 'misses')
+        return result
+
+    def store(self, endpoint, key, body, status, tags, ttl, started):
+        try:
+            if self.backend.set(key, body, status, tags, ttl or self.ttl_seconds, started):
+                self._count(endpoint, 'stored')
+        except Exception as e:
+            print(f"Response cache write error ({endpoint}): {str(e)}")
+            self._count(endpoint, 'errors')
+
+    def invalidate(self, *tags):
+        """Drop every response tagged with any of the tags; returns how many were dropped"""
+        tags = {tag for tag in tags if tag}
+        if self.backend is None or not tags:
+            return 0
+        try:
+            dropped = self.backend.invalidate(tags)
+        except Exception as e:
+            print(f"Response cache invalidation error ({', '.join(sorted(tags))}): {str(e)}")
+            return 0
+        with self._lock:
+            self.invalidations += 1
+            self.entries_invalidated += dropped
+        return dropped
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+        for counters in endpoints.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / lookups, 3) if lookups else None
+        hits = sum(counters['hits'] for counters in endpoints.values())
+        lookups = hits + sum(counters['misses'] for counters in endpoints.values())
+        try:
+            entries = self.backend.size() if self.backend is not None else 0
+        except Exception:
+            entries = None
+        return {
+            'backend': self.backend.name if self.backend is not None else 'none',
+            'ttl_seconds': self.ttl_seconds,
+            'entries': entries,
+            'hit_rate': round(hits / lookups, 3) if lookups else None,
+            'invalidations': self.invalidations,
+            'entries_invalidated': self.entries_invalidated,
+            'endpoints': endpoints
+        }
+
+    def _count(self, endpoint, counter):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'hits': 0, 'misses': 0, 'stored': 0, 'errors': 0})
+            counters[counter] += 1
+
+
+def cache_tags(*tags):
+    """Add dependency tags to the response being built (call from a cached_response view)"""
+    if 'cache_tags' in g:
+        g.cache_tags.update(tag for tag in tags if tag)
+
+
+def professor_tags(*professor_ids):
+    """Cache tags of professors given by professors.id (tags use users.id, like surveys)"""
+    ids = {professor_id for professor_id in professor_ids if professor_id}
+    if not ids:
+        return []
+    rows = db.session.query(Professor.user_id).filter(Professor.id.in_(ids)).all()
+    return [f'professor:{row.user_id}' for row in rows]
+
+
+def invalidate_cache(*tags):
+    """Drop the cached responses built from the given data (call after the commit)"""
+    return response_cache.invalidate(*tags)
+
+
+def cached_response(tags=(), scope='role', ttl=None):
+    """
+    Decorator for GET routes, placed below token_required
+
+    Args:
+        tags: Dependency tags of every response, or a callable(current_user, **view_args)
+              returning them; the view adds the ones it only knows while building the
+              response with cache_tags()
+        scope (str): 'role' for responses that are the same for everyone with the caller's
+                     role, 'user' for responses about the caller
+        ttl (float): Seconds an entry lives (default RESPONSE_CACHE_TTL)
+
+    Only 2xx JSON responses are stored. Responses say X-Cache: HIT or MISS
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            if response_cache.backend is None or request.method != 'GET':
+                return f(current_user, *args, **kwargs)
+
+            principal = current_user.id if scope == 'user' else current_user.role
+            key = json.dumps([request.endpoint, principal, sorted(kwargs.items()),
+                              sorted(request.args.items(multi=True))], default=str)
+            cached = response_cache.lookup(request.endpoint, key)
+            if cached is not None:
+                response = make_response(jsonify(cached[0]), cached[1])
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            started = time.time()
+            g.cache_tags = set(tags(current_user, **kwargs) if callable(tags) else tags)
+            response = make_response(f(current_user, *args, **kwargs))
+            if 200 <= response.status_code < 300 and response.is_json:
+                response_cache.store(request.endpoint, key, response.get_json(), response.status_code,
+                                     g.cache_tags, ttl, started)
+                response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return decorated
+
+    return decorator
+
+
+# Global instance, configured in create_app()
+response_cache = ResponseCache()
@@ -1,22 +1,64 @@
 """
 BETO Sentiment Classification Utility
 Uses the fine-tuned BETO model to classify professor comments
+torch and transformers are imported on first use, not with this module: processes that
+never classify (admin-only workers, seeding, most CLI commands) do not pay for them
 """
+import hashlib
 import os
 import re
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import time
+import numpy as np
 import json
+import threading
+from collections import namedtuple
+
+from .lexicon import lexicon_score, LEXICON_VERSION
+from . import model_registry
+from .inference_budget import inference_budget
+
+# Everything one model needs, swapped as a single reference so a request never mixes
+# the tokenizer or labels of one version with the weights of another. Fast tokenizers
+# are not safe to call from several threads at once ("Already borrowed"), hence the
+# per-model tokenizer_lock. The stamp ("<version>@<fingerprint>") is what gets stored in
+# comments.model_version
+LoadedModel = namedtuple('LoadedModel', ['model', 'tokenizer', 'labels', 'path', 'version', 'stamp', 'tokenizer_lock'])
+
+# Stored with sentiment_status 'fallback' when classification fails
+FALLBACK_RESULT = ('neutral', 0.5, {'positive': 0.33, 'neutral': 0.34, 'negative': 0.33})
 
 
 class SentimentClassifier:
     """Singleton class for BETO sentiment classification"""
     
     _instance = None
-    _model = None
-    _tokenizer = None
-    _label_mapping = None
-    _model_loaded = False
+    _loaded = None
+    _model_path = "final_model"
+    
+    # Model registry (None = always SENTIMENT_MODEL_PATH): registry.json is re-read at most
+    # every _registry_poll_seconds and a newly activated version is loaded in the background
+    _registry_dir = None
+    _registry_poll_seconds = 10
+    _registry_checked_at = 0.0
+    _loading_version = None
+    _failed_version = None
+    _swap_lock = threading.Lock()
+    
+    # Tokens per forward pass (special tokens included), as in training
+    MAX_LENGTH = 192
+    
+    # How comments longer than MAX_LENGTH are read: 'truncate' keeps only the beginning,
+    # the others classify overlapping windows and combine them (see _aggregate)
+    LONG_TEXT_STRATEGIES = ('truncate', 'mean', 'weighted', 'max_negative')
+    _long_text_strategy = 'weighted'
+    _window_overlap = 48
+    _max_windows = 4
+    
+    # Cascade: the lexicon answers short clear-cut comments at or above this confidence
+    # without running the model (None = off)
+    _cascade_threshold = None
+    _cascade_counts = {'lexicon': 0, 'model': 0}
+    _cascade_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -28,39 +70,207 @@ class SentimentClassifier:
         pass
     
     @classmethod
-    def load_model(cls, model_path="final_model"):
+    def init_app(cls, app):
+        """Read the model and long comment settings from the app config (and preload the model if asked)"""
+        cls._model_path = app.config.get('SENTIMENT_MODEL_PATH', cls._model_path)
+        cls._registry_dir = app.config.get('MODEL_REGISTRY_DIR')
+        cls._registry_poll_seconds = app.config.get('MODEL_REGISTRY_POLL_SECONDS', cls._registry_poll_seconds)
+        strategy = app.config.get('LONG_COMMENT_STRATEGY', cls._long_text_strategy)
+        if strategy not in cls.LONG_TEXT_STRATEGIES:
+            raise ValueError(f"LONG_COMMENT_STRATEGY must be one of {', '.join(cls.LONG_TEXT_STRATEGIES)}")
+        cls._long_text_strategy = strategy
+        cls._window_overlap = app.config.get('LONG_COMMENT_WINDOW_OVERLAP', cls._window_overlap)
+        cls._max_windows = max(1, app.config.get('LONG_COMMENT_MAX_WINDOWS', cls._max_windows))
+        cls._cascade_threshold = (
+            app.config.get('SENTIMENT_CASCADE_THRESHOLD') if app.config.get('SENTIMENT_CASCADE') else None
+        )
+        if app.config.get('PRELOAD_SENTIMENT_MODEL'):
+            # Inference workers pay for torch and the weights at startup, not on the first submission
+            cls.load_model()
+    
+    @classmethod
+    def cascade_stats(cls):
+        """Comments answered by the lexicon vs the model since the process started"""
+        with cls._cascade_lock:
+            counts = dict(cls._cascade_counts)
+        total = counts['lexicon'] + counts['model']
+        counts['short_circuit_rate'] = round(counts['lexicon'] / total, 4) if total else 0.0
+        return counts
+    
+    @classmethod
+    def _count(cls, stage):
+        with cls._cascade_lock:
+            cls._cascade_counts[stage] += 1
+    
+    @staticmethod
+    def read_model(model_path, version=None):
         """
-        Load the BETO model and tokenizer
-        Only loads once (singleton pattern)
+        Load a model directory without touching the active model
+        
+        Returns:
+            LoadedModel
         """
-        if cls._model_loaded:
-            return True
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
         
-        try:
-            print(f"Loading BETO model from: {model_path}")
-            
-            # Load the model
-            cls._model = AutoModelForSequenceClassification.from_pretrained(model_path)
-            cls._tokenizer = AutoTokenizer.from_pretrained(model_path)
-            
-            # Load label mappings
-            label_file = os.path.join(model_path, "label_mappings.json")
-            if os.path.exists(label_file):
-                with open(label_file, 'r', encoding='utf-8') as f:
-                    label_info = json.load(f)
-                    cls._label_mapping = label_info.get("label_encoder_classes", ["BUENO", "MALO", "REGULAR"])
-            else:
-                # Default labels
-                cls._label_mapping = ["BUENO", "MALO", "REGULAR"]
-            
-            cls._model_loaded = True
-            print(f"✓ Model loaded successfully. Labels: {cls._label_mapping}")
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        
+        # Load label mappings
+        label_file = os.path.join(model_path, "label_mappings.json")
+        if os.path.exists(label_file):
+            with open(label_file, 'r', encoding='utf-8') as f:
+                label_info = json.load(f)
+                labels = label_info.get("label_encoder_classes", ["BUENO", "MALO", "REGULAR"])
+        else:
+            # Default labels
+            labels = ["BUENO", "MALO", "REGULAR"]
+        
+        version = version or os.path.basename(os.path.normpath(model_path))
+        stamp = f"{version}@{SentimentClassifier.model_fingerprint(model_path)}"
+        return LoadedModel(model, tokenizer, labels, model_path, version, stamp, threading.Lock())
+    
+    @staticmethod
+    def model_fingerprint(model_path):
+        """
+        Short hash identifying a model directory's contents
+        Covers config, label mappings and weights (size and first MB), so a retrained model
+        saved under the same name still gets a new fingerprint without hashing every byte
+        """
+        digest = hashlib.sha256()
+        if not os.path.isdir(model_path):
+            # Hub model id: the name is all there is to go on
+            digest.update(model_path.encode('utf-8'))
+            return digest.hexdigest()[:12]
+        for name in sorted(os.listdir(model_path)):
+            if name not in ('config.json', 'label_mappings.json') and not name.endswith(('.safetensors', '.bin')):
+                continue
+            path = os.path.join(model_path, name)
+            digest.update(name.encode('utf-8'))
+            digest.update(str(os.path.getsize(path)).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read(1 << 20))
+        return digest.hexdigest()[:12]
+    
+    @classmethod
+    def current_stamps(cls):
+        """model_version values that count as up to date (the lexicon's too when the cascade is on)"""
+        stamps = [cls._loaded.stamp] if cls._loaded is not None else []
+        if cls._cascade_threshold is not None:
+            stamps.append(LEXICON_VERSION)
+        return stamps
+    
+    @classmethod
+    def _default_model(cls):
+        """(path, version) loaded on first use: the registry's active version, else SENTIMENT_MODEL_PATH"""
+        if cls._registry_dir:
+            active = model_registry.read_state(cls._registry_dir).get('active')
+            if active:
+                try:
+                    return model_registry.version_path(cls._registry_dir, active), active
+                except ValueError as e:
+                    print(f"⚠ Registry model unavailable, using {cls._model_path}: {str(e)}")
+        return cls._model_path, None
+    
+    @classmethod
+    def load_model(cls, model_path=None):
+        """
+        Load the BETO model and tokenizer (default: the registry's active version or
+        SENTIMENT_MODEL_PATH)
+        Only loads once (singleton pattern); use activate() to change models
+        """
+        if cls._loaded is not None:
             return True
+        
+        with cls._swap_lock:
+            if cls._loaded is not None:
+                return True
             
-        except Exception as e:
-            print(f"✗ Error loading BETO model: {str(e)}")
-            cls._model_loaded = False
-            return False
+            version = None
+            if not model_path:
+                model_path, version = cls._default_model()
+            try:
+                print(f"Loading BETO model from: {model_path}")
+                cls._loaded = cls.read_model(model_path, version)
+                print(f"✓ Model loaded successfully. Labels: {cls._loaded.labels}")
+                return True
+                
+            except Exception as e:
+                print(f"✗ Error loading BETO model: {str(e)}")
+                return False
+    
+    @classmethod
+    def activate(cls, model_path, version=None):
+        """
+        Load a model and make it the active one
+        
+        The new model is fully loaded before the swap; requests already running finish on
+        the model they started with and no request waits for the load.
+        
+        Raises:
+            Exception: Whatever loading raised (the active model is left unchanged)
+        """
+        loaded = cls.read_model(model_path, version)
+        with cls._swap_lock:
+            cls._loaded = loaded
+        print(f"✓ Sentiment model {loaded.version} active ({model_path})")
+        return loaded
+    
+    @classmethod
+    def activate_in_background(cls, model_path, version, on_activated=None):
+        """
+        Start loading a version on a daemon thread (no-op if it is already loading)
+        on_activated() runs after the swap, only if the load succeeded
+        """
+        with cls._swap_lock:
+            if cls._loading_version == version:
+                return False
+            cls._loading_version = version
+        
+        def load():
+            try:
+                cls.activate(model_path, version)
+                cls._failed_version = None
+                if on_activated:
+                    on_activated()
+            except Exception as e:
+                cls._failed_version = version
+                print(f"✗ Error activating model {version}: {str(e)}")
+            finally:
+                cls._loading_version = None
+        
+        threading.Thread(target=load, name=f'model-load-{version}', daemon=True).start()
+        return True
+    
+    @classmethod
+    def follow_registry(cls, force=False):
+        """Switch to the registry's active version if another worker activated a new one"""
+        if not cls._registry_dir or cls._loaded is None:
+            return
+        now = time.monotonic()
+        if not force and now - cls._registry_checked_at < cls._registry_poll_seconds:
+            return
+        cls._registry_checked_at = now
+        
+        active = model_registry.read_state(cls._registry_dir).get('active')
+        if not active or active in (cls._loaded.version, cls._loading_version, cls._failed_version):
+            return
+        try:
+            cls.activate_in_background(model_registry.version_path(cls._registry_dir, active), active)
+        except ValueError as e:
+            print(f"⚠ Cannot follow registry: {str(e)}")
+    
+    @classmethod
+    def model_status(cls):
+        """Version served by this worker and the one being loaded, if any"""
+        loaded = cls._loaded
+        return {
+            'loaded_version': loaded.version if loaded else None,
+            'loaded_stamp': loaded.stamp if loaded else None,
+            'loaded_path': loaded.path if loaded else None,
+            'loading_version': cls._loading_version,
+            'failed_version': cls._failed_version
+        }
     
     @staticmethod
     def clean_text(text):
@@ -80,12 +290,161 @@ class SentimentClassifier:
         return text
     
     @classmethod
-    def classify(cls, text):
+    def _forward(cls, loaded, cleaned_texts, with_embedding=False):
+        """
+        Run one batched forward pass over already cleaned texts (truncated to MAX_LENGTH)
+        
+        Returns:
+            tuple: (probabilities tensor [n, labels], embeddings array [n, hidden] or None)
+                - embeddings are the attention-masked mean of the last hidden layer,
+                  L2-normalized so cosine similarity is a dot product
+        """
+        with loaded.tokenizer_lock:
+            inputs = loaded.tokenizer(
+                cleaned_texts,
+                return_tensors="pt",
+                truncation=True,
+                max_length=cls.MAX_LENGTH,
+                padding=True
+            )
+        probs, embeddings = cls._run(loaded, inputs, with_embedding)
+        return probs, embeddings.numpy() if embeddings is not None else None
+    
+    @staticmethod
+    def _run(loaded, inputs, with_embedding):
+        """Model forward pass over tokenized inputs, in one of the inference slots; embeddings stay a tensor"""
+        import torch
+        
+        with inference_budget.slot(), torch.no_grad():
+            outputs = loaded.model(**inputs, output_hidden_states=with_embedding)
+            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            
+            embeddings = None
+            if with_embedding:
+                hidden = outputs.hidden_states[-1]
+                mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                embeddings = torch.nn.functional.normalize(pooled, dim=-1)
+        
+        return probs, embeddings
+    
+    @staticmethod
+    def window_starts(n_tokens, window, overlap, max_windows):
+        """
+        Start offsets of the token windows covering a long text
+        
+        Consecutive windows share `overlap` tokens and the last one ends at the end of the
+        text. Past max_windows, evenly spaced windows are kept (always the first and the
+        last, since openings and conclusions carry most of a review's verdict).
+        """
+        if n_tokens <= window:
+            return [0]
+        step = max(1, window - overlap)
+        starts = list(range(0, n_tokens - window, step)) + [n_tokens - window]
+        if len(starts) > max_windows:
+            picks = np.linspace(0, len(starts) - 1, max_windows).round().astype(int)
+            starts = [starts[i] for i in sorted(set(picks.tolist()))]
+        return starts
+    
+    @classmethod
+    def _forward_windows(cls, loaded, cleaned_text, with_embedding=False):
+        """
+        Classify an over-length text as overlapping windows, all in one batch
+        
+        Returns:
+            tuple: (probabilities [windows, labels], embeddings tensor or None,
+                    tokens per window), or None if the text fits in one pass
+        """
+        import torch
+        
+        with loaded.tokenizer_lock:
+            token_ids = loaded.tokenizer(cleaned_text, add_special_tokens=False)['input_ids']
+        window = cls.MAX_LENGTH - loaded.tokenizer.num_special_tokens_to_add()
+        if len(token_ids) <= window:
+            return None
+        
+        windows = [
+            loaded.tokenizer.build_inputs_with_special_tokens(token_ids[start:start + window])
+            for start in cls.window_starts(len(token_ids), window, cls._window_overlap, cls._max_windows)
+        ]
+        width = max(len(ids) for ids in windows)
+        pad_id = loaded.tokenizer.pad_token_id or 0
+        inputs = {
+            'input_ids': torch.tensor([ids + [pad_id] * (width - len(ids)) for ids in windows]),
+            'attention_mask': torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids in windows])
+        }
+        probs, embeddings = cls._run(loaded, inputs, with_embedding)
+        return probs, embeddings, inputs['attention_mask'].sum(dim=1).to(probs.dtype)
+    
+    @staticmethod
+    def _aggregate(probs, lengths, strategy, labels):
+        """
+        Combine per-window probabilities into one distribution
+        
+        - mean: every window counts the same
+        - weighted: windows count by their number of tokens (the short tail window less)
+        - max_negative: the window most likely to be negative decides, so a complaint at
+          the end of a long positive review is not averaged away
+        """
+        if strategy == 'mean':
+            return probs.mean(dim=0)
+        if strategy == 'max_negative' and 'MALO' in labels:
+            return probs[probs[:, labels.index('MALO')].argmax()]
+        weights = lengths / lengths.sum()
+        return (probs * weights.unsqueeze(-1)).sum(dim=0)
+    
+    @staticmethod
+    def _pool_windows(embeddings, lengths):
+        """One L2-normalized embedding from per-window embeddings, weighted by tokens per window"""
+        pooled = (embeddings * (lengths / lengths.sum()).unsqueeze(-1)).sum(dim=0)
+        return (pooled / pooled.norm().clamp(min=1e-12)).numpy()
+    
+    @staticmethod
+    def _to_result(probs, labels):
+        """Turn one row of class probabilities into (sentiment, confidence, probabilities)"""
+        # Get predicted class
+        predicted_class = probs.argmax().item()
+        confidence = float(probs[predicted_class].item())
+        label = labels[predicted_class]
+        
+        # Map BETO labels to database sentiment values
+        # BUENO -> positive, MALO -> negative, REGULAR -> neutral
+        sentiment_map = {
+            'BUENO': 'positive',
+            'MALO': 'negative',
+            'REGULAR': 'neutral'
+        }
+        sentiment = sentiment_map.get(label, 'neutral')
+        
+        # Create probabilities dict with database sentiment keys
+        probabilities = {
+            'positive': float(probs[labels.index('BUENO')].item()) if 'BUENO' in labels else 0.0,
+            'negative': float(probs[labels.index('MALO')].item()) if 'MALO' in labels else 0.0,
+            'neutral': float(probs[labels.index('REGULAR')].item()) if 'REGULAR' in labels else 0.0
+        }
+        
+        return sentiment, confidence, probabilities
+    
+    @classmethod
+    def _lexicon_result(cls, cleaned_text, threshold):
+        """First cascade stage: (sentiment, confidence, probabilities) or None to fall through"""
+        scored = lexicon_score(cleaned_text)
+        if scored is None or scored[1] < threshold:
+            return None
+        sentiment, confidence = scored
+        rest = (1 - confidence) / 2
+        probabilities = {'positive': rest, 'negative': rest, 'neutral': rest}
+        probabilities[sentiment] = confidence
+        return sentiment, confidence, probabilities
+    
+    @classmethod
+    def classify(cls, text, strategy=None):
         """
         Classify a comment using the BETO model
         
         Args:
             text (str): The comment text to classify
+            strategy (str): Long comment strategy (default: LONG_COMMENT_STRATEGY)
             
         Returns:
             tuple: (sentiment, confidence, probabilities)
@@ -93,59 +452,166 @@ class SentimentClassifier:
                 - confidence: float (0-1, confidence of the prediction)
                 - probabilities: dict with all class probabilities
         """
+        sentiment, confidence, probabilities, _ = cls.classify_with_embedding(text, with_embedding=False, strategy=strategy)
+        return sentiment, confidence, probabilities
+    
+    @classmethod
+    def classify_with_embedding(cls, text, with_embedding=True, strategy=None):
+        """
+        Classify a comment and keep the sentence embedding computed on the way
+        
+        Returns:
+            tuple: (sentiment, confidence, probabilities, embedding)
+                - embedding: numpy float32 vector, None if not requested or unavailable
+        """
+        return cls.classify_stamped(text, with_embedding=with_embedding, strategy=strategy)[:4]
+    
+    @classmethod
+    def classify_stamped(cls, text, with_embedding=False, strategy=None):
+        """
+        Classify a comment and say what produced the result
+        Over-length comments are read as windows unless the strategy is 'truncate'; their
+        embedding is the length-weighted mean of the window embeddings. With the cascade on,
+        clear-cut short comments are answered by the lexicon when no embedding is needed
+        
+        Returns:
+            tuple: (sentiment, confidence, probabilities, embedding, model_version, status)
+                - model_version: stamp of the model (or lexicon) used, None on fallback
+                - status: 'scored', or 'fallback' when the neutral default was returned
+        """
+        if cls._cascade_threshold is not None and not with_embedding:
+            result = cls._lexicon_result(cls.clean_text(text), cls._cascade_threshold)
+            if result is not None:
+                cls._count('lexicon')
+                return result + (None, LEXICON_VERSION, 'scored')
+            cls._count('model')
+        
         # Ensure model is loaded
-        if not cls._model_loaded:
+        if cls._loaded is None:
             if not cls.load_model():
                 # Fallback to a default if model fails to load
                 print("⚠ Using default sentiment due to model loading failure")
-                return 'neutral', 0.5, {'positive': 0.33, 'neutral': 0.34, 'negative': 0.33}
+                return FALLBACK_RESULT + (None, None, 'fallback')
+        cls.follow_registry()
         
+        loaded = cls._loaded
         try:
-            # Clean the text
-            cleaned_text = cls.clean_text(text)
-            
-            # Tokenize
-            inputs = cls._tokenizer(
-                cleaned_text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=192,
-                padding=True
+            return cls.classify_loaded(loaded, text, with_embedding=with_embedding, strategy=strategy) + (
+                loaded.stamp, 'scored'
             )
             
-            # Get prediction
-            with torch.no_grad():
-                outputs = cls._model(**inputs)
-                logits = outputs.logits
-                probs = torch.nn.functional.softmax(logits, dim=-1)[0]
-            
-            # Get predicted class
-            predicted_class = torch.argmax(probs).item()
-            confidence = float(probs[predicted_class].item())
-            label = cls._label_mapping[predicted_class]
-            
-            # Map BETO labels to database sentiment values
-            # BUENO -> positive, MALO -> negative, REGULAR -> neutral
-            sentiment_map = {
-                'BUENO': 'positive',
-                'MALO': 'negative',
-                'REGULAR': 'neutral'
-            }
-            sentiment = sentiment_map.get(label, 'neutral')
-            
-            # Create probabilities dict with database sentiment keys
-            probabilities = {
-                'positive': float(probs[cls._label_mapping.index('BUENO')].item()) if 'BUENO' in cls._label_mapping else 0.0,
-                'negative': float(probs[cls._label_mapping.index('MALO')].item()) if 'MALO' in cls._label_mapping else 0.0,
-                'neutral': float(probs[cls._label_mapping.index('REGULAR')].item()) if 'REGULAR' in cls._label_mapping else 0.0
-            }
-            
-            return sentiment, confidence, probabilities
-            
         except Exception as e:
             print(f"✗ Error during classification: {str(e)}")
             # Fallback to neutral sentiment
-            return 'neutral', 0.5, {'positive': 0.33, 'neutral': 0.34, 'negative': 0.33}
+            return FALLBACK_RESULT + (None, None, 'fallback')
+    
+    @classmethod
+    def classify_loaded(cls, loaded, text, with_embedding=False, strategy=None):
+        """
+        Classify a comment with a specific loaded model (no fallbacks, errors propagate)
+        
+        Returns:
+            tuple: (sentiment, confidence, probabilities, embedding)
+        """
+        # Clean the text
+        cleaned_text = cls.clean_text(text)
+        
+        strategy = strategy or cls._long_text_strategy
+        windowed = None
+        if strategy != 'truncate':
+            windowed = cls._forward_windows(loaded, cleaned_text, with_embedding=with_embedding)
+        
+        # Get prediction
+        if windowed is None:
+            probs, embeddings = cls._forward(loaded, [cleaned_text], with_embedding=with_embedding)
+            probs, embedding = probs[0], embeddings[0] if embeddings is not None else None
+        else:
+            window_probs, window_embeddings, lengths = windowed
+            probs = cls._aggregate(window_probs, lengths, strategy, loaded.labels)
+            embedding = cls._pool_windows(window_embeddings, lengths) if window_embeddings is not None else None
+        
+        sentiment, confidence, probabilities = cls._to_result(probs, loaded.labels)
+        
+        return sentiment, confidence, probabilities, embedding
+    
+    @classmethod
+    def classify_many_stamped(cls, texts, batch_size=32):
+        """
+        Classify stored comments again (re-scoring), the short ones in batched passes
+        Gives the results classify_stamped would give one by one: the lexicon answers when
+        the cascade is on, over-length comments are still read as windows
+        
+        Returns:
+            list: (sentiment, confidence, model_version, status) per text
+        
+        Raises:
+            RuntimeError: If the model cannot be loaded
+        """
+        if cls._loaded is None and not cls.load_model():
+            raise RuntimeError('Sentiment model is not available')
+        
+        loaded = cls._loaded
+        window = cls.MAX_LENGTH - loaded.tokenizer.num_special_tokens_to_add()
+        results = [None] * len(texts)
+        batched = []
+        for i, text in enumerate(texts):
+            cleaned_text = cls.clean_text(text)
+            if cls._cascade_threshold is not None:
+                result = cls._lexicon_result(cleaned_text, cls._cascade_threshold)
+                if result is not None:
+                    results[i] = result[:2] + (LEXICON_VERSION, 'scored')
+                    continue
+            if cls._long_text_strategy != 'truncate':
+                with loaded.tokenizer_lock:
+                    n_tokens = len(loaded.tokenizer(cleaned_text, add_special_tokens=False)['input_ids'])
+                if n_tokens > window:
+                    results[i] = cls.classify_loaded(loaded, text)[:2] + (loaded.stamp, 'scored')
+                    continue
+            batched.append((i, cleaned_text))
+        
+        for start in range(0, len(batched), batch_size):
+            chunk = batched[start:start + batch_size]
+            probs, _ = cls._forward(loaded, [cleaned_text for _, cleaned_text in chunk])
+            for (i, _), row in zip(chunk, probs):
+                results[i] = cls._to_result(row, loaded.labels)[:2] + (loaded.stamp, 'scored')
+        return results
+    
+    @classmethod
+    def embed(cls, texts, batch_size=32):
+        """
+        Sentence embeddings for many texts, in batches (used to backfill stored embeddings)
+        Gives the embeddings classify_loaded stores at submission: unless the long comment
+        strategy is 'truncate', over-length texts are pooled over their windows
+        
+        Returns:
+            numpy.ndarray: [len(texts), hidden] float32, L2-normalized
+        
+        Raises:
+            RuntimeError: If the model cannot be loaded
+        """
+        if cls._loaded is None and not cls.load_model():
+            raise RuntimeError('Sentiment model is not available')
+        
+        loaded = cls._loaded
+        results = [None] * len(texts)
+        batched = []
+        for i, text in enumerate(texts):
+            cleaned_text = cls.clean_text(text)
+            windowed = None
+            if cls._long_text_strategy != 'truncate':
+                windowed = cls._forward_windows(loaded, cleaned_text, with_embedding=True)
+            if windowed is None:
+                batched.append((i, cleaned_text))
+            else:
+                _, window_embeddings, lengths = windowed
+                results[i] = cls._pool_windows(window_embeddings, lengths)
+        
+        for start in range(0, len(batched), batch_size):
+            chunk = batched[start:start + batch_size]
+            _, embeddings = cls._forward(loaded, [cleaned_text for _, cleaned_text in chunk], with_embedding=True)
+            for (i, _), embedding in zip(chunk, embeddings):
+                results[i] = embedding
+        return np.stack(results).astype(np.float32) if results else np.zeros((0, 0), dtype=np.float32)
 
 
 # Global instance
@@ -166,3 +632,29 @@ def classify_comment(text):
     """
     sentiment, confidence, _ = sentiment_classifier.classify(text)
     return sentiment, confidence
+
+
+def classify_comment_with_embedding(text):
+    """
+    Classify a comment and return its sentence embedding as well
+    
+    Returns:
+        tuple: (sentiment, confidence, embedding)
+            - embedding: numpy float32 vector, or None if the model is unavailable
+    """
+    sentiment, confidence, _, embedding = sentiment_classifier.classify_with_embedding(text)
+    return sentiment, confidence, embedding
+
+
+def classify_comment_stamped(text, with_embedding=False):
+    """
+    Classify a comment for storage
+    
+    Returns:
+        tuple: (sentiment, confidence, embedding, model_version, status)
+            - see SentimentClassifier.classify_stamped
+    """
+    sentiment, confidence, _, embedding, model_version, status = sentiment_classifier.classify_stamped(
+        text, with_embedding=with_embedding
+    )
+    return sentiment, confidence, embedding, model_version, status
@@ -0,0 +1,219 @@
+"""
+Shadow scoring of a candidate sentiment model
+A sampled fraction of live comments is classified again by the candidate model on a
+background thread, after the student's submission has been answered. Only counts are
+kept (model_shadow_stats, one row per active label / candidate label pair), stored
+results are never touched
+"""
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import db, ModelShadowStat
+from . import model_registry
+from .sentiment_classifier import SentimentClassifier
+
+
+class ShadowScorer:
+    """
+    Background candidate-model scorer
+
+    The shadow settings ({'version', 'sample_rate'}) live in the registry's registry.json,
+    re-read at most every MODEL_REGISTRY_POLL_SECONDS. When the queue is full the comment
+    is skipped: shadow scoring must never slow down or fail a submission.
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self.app = None
+        self.registry_dir = None
+        self.poll_seconds = 10
+        self.skipped = 0
+        self._settings = None
+        self._checked_at = 0.0
+        self._candidate = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.registry_dir = app.config.get('MODEL_REGISTRY_DIR')
+        self.poll_seconds = app.config.get('MODEL_REGISTRY_POLL_SECONDS', 10)
+        self._queue = queue.Queue(maxsize=app.config.get('SHADOW_QUEUE_SIZE', 200))
+        app.extensions['shadow_scorer'] = self
+        atexit.register(self.shutdown)
+
+    def settings(self):
+        """Current shadow settings, or None when shadow scoring is off"""
+        if not self.registry_dir:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.poll_seconds:
+            self._checked_at = now
+            shadow = model_registry.read_state(self.registry_dir).get('shadow') or None
+            self._settings = shadow if shadow and shadow.get('version') and shadow.get('sample_rate') else None
+        return self._settings
+
+    def submit(self, comment_text, sentiment, confidence, model_version):
+        """
+        Maybe queue a classified live comment for the candidate model
+
+        Only comments the loaded model itself scored (model_version is its stamp) are
+        compared: lexicon answers, fallbacks and copied results would be counted as the
+        active model's labels
+        """
+        shadow = self.settings()
+        if shadow is None or random.random() >= shadow['sample_rate']:
+            return False
+        status = SentimentClassifier.model_status()
+        active_version = status['loaded_version']
+        if active_version is None or active_version == shadow['version'] or model_version != status['loaded_stamp']:
+            return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((shadow['version'], active_version, comment_text, sentiment, confidence))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    def flush(self):
+        """Block until every queued comment has been scored"""
+        if self._queue is not None and self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout=5.0):
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(self._STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Start lazily (and again after a fork), one scorer thread per process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._candidate = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                self._score(*item)
+            except Exception as e:
+                print(f"Shadow scoring error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, shadow_version, active_version, comment_text, sentiment, confidence):
+        if self._candidate is None or self._candidate.version != shadow_version:
+            # Only one candidate is kept in memory; it is loaded on this thread, never in a request
+            self._candidate = None
+            self._candidate = SentimentClassifier.read_model(
+                model_registry.version_path(self.registry_dir, shadow_version), shadow_version
+            )
+
+        started = time.perf_counter()
+        shadow_sentiment, shadow_confidence, _, _ = SentimentClassifier.classify_loaded(self._candidate, comment_text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        now = datetime.utcnow()
+        stmt = insert(ModelShadowStat.__table__).values(
+            shadow_version=shadow_version,
+            active_version=active_version,
+            active_sentiment=sentiment,
+            shadow_sentiment=shadow_sentiment,
+            comparisons=1,
+            confidence_delta_sum=abs(shadow_confidence - confidence),
+            shadow_ms_sum=elapsed_ms,
+            first_seen=now,
+            last_seen=now
+        )
+        table = ModelShadowStat.__table__.c
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(stmt.on_conflict_do_update(
+                    index_elements=['shadow_version', 'active_version', 'active_sentiment', 'shadow_sentiment'],
+                    set_={
+                        'comparisons': table.comparisons + 1,
+                        'confidence_delta_sum': table.confidence_delta_sum + stmt.excluded.confidence_delta_sum,
+                        'shadow_ms_sum': table.shadow_ms_sum + stmt.excluded.shadow_ms_sum,
+                        'last_seen': stmt.excluded.last_seen
+                    }
+                ))
+
+
+def shadow_report(shadow_version=None):
+    """
+    Disagreement statistics per (candidate, active) model pair
+
+    Returns:
+        list: Dicts with comparisons, agreement rate, mean confidence change, mean
+              candidate latency and the confusion counts (active label -> candidate label)
+    """
+    rows = db.session.execute(text(f"""
+        SELECT shadow_version, active_version, active_sentiment, shadow_sentiment, comparisons,
+               confidence_delta_sum, shadow_ms_sum, first_seen, last_seen
+        FROM model_shadow_stats
+        {'WHERE shadow_version = :shadow_version' if shadow_version else ''}
+        ORDER BY shadow_version, active_version
+    """), {'shadow_version': shadow_version}).mappings().all()
+
+    pairs = {}
+    for row in rows:
+        key = (row['shadow_version'], row['active_version'])
+        pair = pairs.setdefault(key, {
+            'shadow_version': key[0], 'active_version': key[1], 'comparisons': 0, 'agreements': 0,
+            'delta': 0.0, 'ms': 0.0, 'first_seen': row['first_seen'], 'last_seen': row['last_seen'],
+            'confusion': {}
+        })
+        pair['comparisons'] += row['comparisons']
+        if row['active_sentiment'] == row['shadow_sentiment']:
+            pair['agreements'] += row['comparisons']
+        pair['delta'] += row['confidence_delta_sum']
+        pair['ms'] += row['shadow_ms_sum']
+        pair['first_seen'] = min(pair['first_seen'], row['first_seen'])
+        pair['last_seen'] = max(pair['last_seen'], row['last_seen'])
+        pair['confusion'].setdefault(row['active_sentiment'], {})[row['shadow_sentiment']] = row['comparisons']
+
+    report = []
+    for pair in pairs.values():
+        comparisons = pair['comparisons'] or 1
+        report.append({
+            'shadow_version': pair['shadow_version'],
+            'active_version': pair['active_version'],
+            'comparisons': pair['comparisons'],
+            'agreement': round(pair['agreements'] / comparisons, 4),
+            'mean_confidence_change': round(pair['delta'] / comparisons, 4),
+            'mean_shadow_ms': round(pair['ms'] / comparisons, 2),
+            'confusion': pair['confusion'],
+            'first_seen': pair['first_seen'].isoformat() if pair['first_seen'] else None,
+            'last_seen': pair['last_seen'].isoformat() if pair['last_seen'] else None
+        })
+    return report
+
+
+# Global instance, bound to the app in create_app()
+shadow_scorer = ShadowScorer()
@@ -0,0 +1,86 @@
+"""
+Snapshot cache for expensive aggregate queries
+Serves the last computed value and refreshes it in the background once it is stale
+"""
+import threading
+import time
+from datetime import datetime
+
+
+class SnapshotCache:
+    """
+    Keeps one computed snapshot per key with a short TTL
+
+    - No snapshot yet: compute it in the request (only the very first caller pays)
+    - Fresh snapshot: return it as-is
+    - Stale snapshot: return it immediately and refresh it in a background thread
+      (stale-while-revalidate), so latency does not depend on the size of the tables
+    """
+
+    def __init__(self, ttl_seconds=30):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}  # key -> (value, computed_at, monotonic timestamp)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, app=None):
+        """
+        Get the snapshot for a key
+
+        Args:
+            key (str): Snapshot name
+            compute (callable): Function that builds the value (runs inside an app context)
+            app (Flask): Application used to push a context for background refreshes
+
+        Returns:
+            tuple: (value, computed_at)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None:
+            return self.refresh(key, compute)
+
+        value, computed_at, stamp = entry
+        if time.monotonic() - stamp >= self.ttl_seconds:
+            self._refresh_in_background(key, compute, app)
+
+        return value, computed_at
+
+    def refresh(self, key, compute):
+        """Compute the snapshot synchronously and store it"""
+        value = compute()
+        computed_at = datetime.utcnow()
+        with self._lock:
+            self._entries[key] = (value, computed_at, time.monotonic())
+        return value, computed_at
+
+    def invalidate(self, key=None):
+        """Drop one snapshot (or all of them) so the next read recomputes it"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _refresh_in_background(self, key, compute, app):
+        # Only one refresh per key at a time, the rest keep serving the stale value
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def worker():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        self.refresh(key, compute)
+                else:
+                    self.refresh(key, compute)
+            except Exception as e:
+                print(f"Snapshot refresh error ({key}): {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, name=f'snapshot-refresh-{key}', daemon=True).start()
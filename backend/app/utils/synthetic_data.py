@@ -0,0 +1,474 @@
+"""
+Synthetic data for scale testing
+Deterministic for a preset and seed: professors, students, subjects, class groups,
+enrollments, surveys and Spanish comments with a realistic mix of sentiments (every
+professor has a latent quality that tilts their comments) and lengths (mostly one to
+three sentences, with a long tail of full reviews). Everything is bulk loaded with COPY.
+Surveys and comments go into new evaluation periods only: each period's partitions are
+filled as standalone tables and attached afterwards, so their indexes are built once in
+bulk and no row trigger fires; the sentiment_daily and participation counters are then
+rebuilt for those periods.
+
+Synthetic users have @synthetic.uaem.mx emails and SYN matriculas (password synthetic123).
+Meant for a scratch database: users and subjects are added next to whatever is there.
+"""
+import hashlib
+import io
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+from ..models import db
+from .participation import rebuild_participation
+from .trends import backfill_sentiment_daily
+
+EMAIL_DOMAIN = 'synthetic.uaem.mx'
+MATRICULA_PREFIX = 'SYN'
+PASSWORD = 'synthetic123'
+MODEL_VERSION = 'synthetic'
+SEMESTERS = 9
+GROUP_SIZE = 35
+EVALUATION_WEEKS = 5
+MAX_SENTENCES = 14
+DUPLICATE_RATE = 0.01
+COPY_CHUNK = 100000
+
+# A preset has careers x SEMESTERS x subjects_per_semester subjects; each period every
+# student evaluates `courses` subjects of their career and semester
+PRESETS = {
+    'faculty': {'careers': 3, 'subjects_per_semester': 6, 'professors': 60, 'students': 2400,
+                'periods': 2, 'courses': 5, 'completion_rate': 0.85},
+    'campus': {'careers': 12, 'subjects_per_semester': 7, 'professors': 450, 'students': 24000,
+               'periods': 3, 'courses': 5, 'completion_rate': 0.85},
+    'university': {'careers': 40, 'subjects_per_semester': 7, 'professors': 1800, 'students': 80000,
+                   'periods': 3, 'courses': 5, 'completion_rate': 0.85},
+}
+
+CAREERS = [
+    ('Ingeniería en Computación', 'Ingeniería'), ('Ingeniería Civil', 'Ingeniería'),
+    ('Ingeniería Industrial', 'Ingeniería'), ('Arquitectura', 'Ingeniería'),
+    ('Licenciatura en Matemáticas', 'Ciencias'), ('Licenciatura en Física', 'Ciencias'),
+    ('Licenciatura en Biología', 'Ciencias'), ('Química', 'Ciencias'),
+    ('Medicina', 'Ciencias de la Salud'), ('Enfermería', 'Ciencias de la Salud'),
+    ('Psicología', 'Ciencias de la Salud'), ('Derecho', 'Ciencias Sociales'),
+    ('Contaduría', 'Ciencias Económico Administrativas'), ('Administración', 'Ciencias Económico Administrativas'),
+    ('Economía', 'Ciencias Económico Administrativas'), ('Comunicación', 'Humanidades'),
+    ('Historia', 'Humanidades'), ('Letras Hispánicas', 'Humanidades'),
+    ('Diseño Gráfico', 'Artes'), ('Música', 'Artes'),
+]
+FIRST_NAMES = [
+    'María', 'José', 'Guadalupe', 'Juan', 'Fernanda', 'Luis', 'Sofía', 'Carlos', 'Valeria', 'Miguel',
+    'Daniela', 'Jorge', 'Ana', 'Alejandro', 'Camila', 'Ricardo', 'Mariana', 'Eduardo', 'Paola', 'Diego',
+    'Andrea', 'Francisco', 'Gabriela', 'Roberto', 'Ximena', 'Fernando', 'Regina', 'Arturo', 'Lucía', 'Raúl',
+]
+LAST_NAMES = [
+    'Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez', 'Cruz',
+    'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez', 'Torres', 'Díaz', 'Gutiérrez', 'Ruiz',
+    'Mendoza', 'Aguilar', 'Ortiz', 'Moreno', 'Castillo', 'Romero', 'Álvarez', 'Méndez', 'Chávez', 'Rivera',
+]
+SUBJECT_NAMES = [
+    'Cálculo Diferencial', 'Álgebra Lineal', 'Programación', 'Estadística', 'Física', 'Química General',
+    'Metodología de la Investigación', 'Redacción', 'Bases de Datos', 'Ética Profesional', 'Economía',
+    'Derecho Civil', 'Anatomía', 'Contabilidad', 'Historia de México', 'Taller de Diseño',
+]
+
+# Sentence templates per sentiment; slots are filled from the word lists below
+TEMPLATES = {
+    'positive': [
+        'El profesor explica {tema} con mucha claridad.',
+        'Sus clases son {buena} y siempre aprendo algo nuevo.',
+        'Siempre está dispuesto a resolver dudas sobre {tema}.',
+        'Los ejemplos que usa para {tema} son {buena}.',
+        'La forma de evaluar es justa y clara.',
+        'Domina {tema} y se nota que le apasiona la materia.',
+        'Es puntual, organizado y respeta nuestro tiempo.',
+        'Las prácticas ayudan {mucho} a entender {tema}.',
+        'Recomiendo {mucho} tomar la materia con este profesor.',
+        'Da retroalimentación útil en las tareas y los exámenes.',
+        'Motiva a participar y crea un ambiente de respeto.',
+        'El material del curso está actualizado y bien organizado.',
+    ],
+    'neutral': [
+        'La materia cubre {tema} durante el semestre.',
+        'Las clases son {horario}.',
+        'Usamos la plataforma para entregar las tareas.',
+        'El curso tiene tres exámenes parciales y un proyecto final.',
+        'Algunos temas como {tema} se ven rápido.',
+        'La carga de trabajo es normal para el semestre.',
+        'Hay prácticas cada dos semanas.',
+        'El profesor sigue el programa de la materia.',
+        'Se revisan {tema} con ejercicios en clase.',
+        'La asistencia cuenta para la calificación final.',
+        'Casi siempre trabajamos en equipos.',
+        'El examen final incluye {tema}.',
+    ],
+    'negative': [
+        'No explica bien {tema} y es difícil seguirle el ritmo.',
+        'Llega tarde a clase con frecuencia.',
+        'Las clases son {mala} y casi no se aprende.',
+        'No responde los correos ni resuelve dudas sobre {tema}.',
+        'La calificación de los exámenes es {muy} injusta.',
+        'Deja demasiadas tareas y no las revisa.',
+        'Se limita a leer las diapositivas sin explicar {tema}.',
+        'No respeta las opiniones de los alumnos.',
+        'Los exámenes no tienen relación con lo visto sobre {tema}.',
+        'Falta mucho a clase y no avisa.',
+        'La retroalimentación llega tarde o nunca llega.',
+        'Nunca quedan claros los criterios de evaluación.',
+    ],
+}
+SLOTS = {
+    'tema': ['los conceptos básicos', 'la teoría', 'los ejercicios', 'los temas del examen',
+             'las prácticas de laboratorio', 'los algoritmos', 'las derivadas', 'la estadística',
+             'los casos prácticos', 'las lecturas', 'el proyecto final', 'las bases de datos',
+             'la programación', 'los circuitos', 'la contabilidad', 'el derecho civil'],
+    'buena': ['dinámicas', 'interesantes', 'muy claras', 'muy útiles', 'entretenidas', 'excelentes'],
+    'mala': ['aburridas', 'desordenadas', 'confusas', 'monótonas', 'poco útiles', 'muy pesadas'],
+    'mucho': ['mucho', 'bastante', 'muchísimo', 'ampliamente'],
+    'muy': ['muy', 'bastante', 'demasiado', 'totalmente'],
+    'horario': ['temprano', 'por la tarde', 'en línea los viernes', 'los lunes y miércoles'],
+}
+SENTIMENTS = ('positive', 'neutral', 'negative')
+# Cumulative chances that a sentence of a positive / neutral / negative comment is
+# positive, neutral or negative (the first sentence always carries the comment's sentiment)
+SENTENCE_MIX = np.array([[0.80, 0.95, 1.0], [0.30, 0.70, 1.0], [0.05, 0.25, 1.0]])
+# Confidence is 0.34 + 0.66 * Beta(a, b)
+CONFIDENCE_BETA = np.array([[6.0, 2.0], [3.0, 3.0], [6.0, 2.0]])
+
+
+def period_codes(first_period, count):
+    """Consecutive period codes starting at first_period ('2021-1', '2021-2', '2022-1', ...)"""
+    match = re.match(r'^(\d{4})-([12])$', first_period or '')
+    if not match:
+        raise ValueError('first period must look like 2021-1')
+    year, half = int(match.group(1)), int(match.group(2))
+    codes = []
+    for _ in range(count):
+        codes.append(f'{year}-{half}')
+        year, half = (year, 2) if half == 1 else (year + 1, 1)
+    return codes
+
+
+def period_dates(code):
+    year, half = int(code[:4]), int(code[-1])
+    return (date(year, 1, 1), date(year, 6, 30)) if half == 1 else (date(year, 7, 1), date(year, 12, 31))
+
+
+def sentence_pools(rng, size=2000):
+    """size filled-in sentences per sentiment"""
+    pools = []
+    for sentiment in SENTIMENTS:
+        templates = TEMPLATES[sentiment]
+        pool = []
+        for i in rng.integers(len(templates), size=size):
+            template = templates[i]
+            pool.append(template.format(**{
+                slot: words[rng.integers(len(words))] for slot, words in SLOTS.items() if '{' + slot + '}' in template
+            }))
+        pools.append(pool)
+    return pools
+
+
+def comment_texts(rng, sentiments, pools):
+    """
+    One comment per entry of sentiments (0 positive, 1 neutral, 2 negative)
+
+    Sentence counts are log-normal (median 2, up to MAX_SENTENCES); each sentence is drawn
+    from the pool of its own sentiment, mostly the comment's.
+    """
+    count = len(sentiments)
+    if not count:
+        return []
+    lengths = np.clip(np.rint(rng.lognormal(0.6, 0.65, count)), 1, MAX_SENTENCES).astype(np.int64)
+    width = int(lengths.max())
+    kinds = (rng.random((count, width))[:, :, None] > SENTENCE_MIX[sentiments][:, None, :]).sum(axis=2)
+    kinds[:, 0] = sentiments
+    pool_size = len(pools[0])
+    picks = (kinds * pool_size + rng.integers(pool_size, size=(count, width))).tolist()
+    flat = [sentence for pool in pools for sentence in pool]
+    return [' '.join([flat[j] for j in row[:n]]) for row, n in zip(picks, lengths.tolist())]
+
+
+def _copy(cursor, table, columns, values):
+    """COPY columns (equal length sequences of str, None for NULL) into table"""
+    count = len(values[0]) if values else 0
+    for start in range(0, count, COPY_CHUNK):
+        rows = zip(*[column[start:start + COPY_CHUNK] for column in values])
+        buffer = io.StringIO('\n'.join(
+            '\t'.join('\\N' if value is None else value for value in row) for row in rows
+        ) + '\n')
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+def _reserve_ids(cursor, table, count):
+    """First of count consecutive ids taken from the table's sequence"""
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+    sequence = cursor.fetchone()[0]
+    cursor.execute("SELECT nextval(%s)", (sequence,))
+    first = cursor.fetchone()[0]
+    if count > 1:
+        cursor.execute("SELECT setval(%s, %s)", (sequence, first + count - 1))
+    return first
+
+
+def _strings(array):
+    return array.astype(str).tolist()
+
+
+def _timestamps(base, seconds):
+    """ISO timestamps base + seconds (numpy array)"""
+    return _strings(np.datetime64(base, 's') + seconds.astype('timedelta64[s]'))
+
+
+def generate(preset='faculty', seed=7, first_period='2021-1', log=print, **overrides):
+    """
+    Generate and bulk load a synthetic population
+
+    Args:
+        preset (str): Key of PRESETS; overrides replace any of its values
+
+    Returns:
+        dict: Rows loaded per table, the periods and the seconds taken
+
+    Raises:
+        ValueError: For an unknown preset, inconsistent sizes, existing periods or
+                    synthetic data already loaded
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"preset must be one of {', '.join(PRESETS)}")
+    params = {**PRESETS[preset], **{key: value for key, value in overrides.items() if value is not None}}
+    careers, per_semester = params['careers'], params['subjects_per_semester']
+    n_professors, n_students, courses = params['professors'], params['students'], params['courses']
+    if courses > per_semester:
+        raise ValueError('courses per student cannot exceed subjects per semester')
+    if n_professors < careers:
+        raise ValueError('need at least one professor per career')
+
+    periods = period_codes(first_period, params['periods'])
+    existing = db.session.execute(
+        text("SELECT code FROM evaluation_periods WHERE code = ANY(:codes)"), {'codes': periods}
+    ).scalars().all()
+    if existing:
+        raise ValueError(f"Period(s) {', '.join(existing)} already exist; synthetic data only goes into new periods")
+    if db.session.execute(
+        text("SELECT 1 FROM users WHERE matricula LIKE :prefix LIMIT 1"), {'prefix': MATRICULA_PREFIX + '%'}
+    ).first():
+        raise ValueError('Synthetic data is already loaded in this database')
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    pools = sentence_pools(rng)
+    password_hash = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    n_subjects = careers * SEMESTERS * per_semester
+    counts = {}
+
+    # Professors are spread over the careers; each career's professors own its subjects in turn
+    professor_career = np.arange(n_professors) % careers
+    by_career = np.argsort(professor_career, kind='stable')
+    career_start = np.searchsorted(professor_career[by_career], np.arange(careers))
+    career_size = np.bincount(professor_career, minlength=careers)
+    quality = rng.normal(0.0, 1.0, n_professors)
+
+    subject_ids = np.arange(n_subjects)
+    subject_career = subject_ids // (SEMESTERS * per_semester)
+    subject_semester = (subject_ids // per_semester) % SEMESTERS + 1
+    owner_rank = (subject_ids % (SEMESTERS * per_semester)) % career_size[subject_career]
+    subject_owner = by_career[career_start[subject_career] + owner_rank]
+
+    student_career = rng.integers(careers, size=n_students)
+    student_semester = rng.integers(1, SEMESTERS + 1, size=n_students)
+
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # Room for the index builds when the partitions are attached
+        cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+        user_base = _reserve_ids(cursor, 'users', n_professors + n_students)
+        professor_base = _reserve_ids(cursor, 'professors', n_professors)
+        student_base = _reserve_ids(cursor, 'students', n_students)
+        subject_base = _reserve_ids(cursor, 'subjects', n_subjects)
+
+        first = rng.integers(len(FIRST_NAMES), size=n_professors + n_students)
+        last = rng.integers(len(LAST_NAMES), size=n_professors + n_students)
+        first_names = [FIRST_NAMES[i] for i in first.tolist()]
+        last_names = [LAST_NAMES[i] for i in last.tolist()]
+        professor_emails = [f'profesor{i + 1}@{EMAIL_DOMAIN}' for i in range(n_professors)]
+        matriculas = [f'{MATRICULA_PREFIX}{i + 1:07d}' for i in range(n_students)]
+        counts['users'] = _copy(cursor, 'users', (
+            'id', 'email', 'password_hash', 'first_name', 'last_name', 'role', 'matricula', 'is_active'
+        ), [
+            _strings(user_base + np.arange(n_professors + n_students)),
+            professor_emails + [None] * n_students,
+            [password_hash] * (n_professors + n_students),
+            first_names,
+            last_names,
+            ['professor'] * n_professors + ['student'] * n_students,
+            [None] * n_professors + matriculas,
+            ['t'] * (n_professors + n_students)
+        ])
+        counts['professors'] = _copy(cursor, 'professors', (
+            'id', 'user_id', 'email', 'department', 'specialization', 'status'
+        ), [
+            _strings(professor_base + np.arange(n_professors)),
+            _strings(user_base + np.arange(n_professors)),
+            professor_emails,
+            [CAREERS[c % len(CAREERS)][1] for c in professor_career.tolist()],
+            [CAREERS[c % len(CAREERS)][0] for c in professor_career.tolist()],
+            ['active'] * n_professors
+        ])
+        counts['students'] = _copy(cursor, 'students', (
+            'id', 'user_id', 'matricula', 'semester', 'career', '"group"', 'status'
+        ), [
+            _strings(student_base + np.arange(n_students)),
+            _strings(user_base + n_professors + np.arange(n_students)),
+            matriculas,
+            _strings(student_semester),
+            [CAREERS[c % len(CAREERS)][0] for c in student_career.tolist()],
+            [f'{s}0{c % 9 + 1}' for s, c in zip(student_semester.tolist(), student_career.tolist())],
+            ['active'] * n_students
+        ])
+        counts['subjects'] = _copy(cursor, 'subjects', (
+            'id', 'name', 'code', 'professor_id', 'semester', 'credits'
+        ), [
+            _strings(subject_base + subject_ids),
+            [f'{SUBJECT_NAMES[i % len(SUBJECT_NAMES)]} {i // len(SUBJECT_NAMES) + 1}' for i in range(n_subjects)],
+            [f'{MATRICULA_PREFIX}{i + 1:05d}' for i in range(n_subjects)],
+            _strings(professor_base + subject_owner),
+            _strings(subject_semester),
+            _strings(rng.integers(4, 9, size=n_subjects))
+        ])
+        log(f"  {n_professors:,} professors, {n_students:,} students, {n_subjects:,} subjects "
+            f"({time.perf_counter() - started:.1f}s)")
+
+        counts.update({'group_classes': 0, 'surveys': 0, 'comments': 0})
+        for index, period in enumerate(periods):
+            # This period's courses: consecutive subjects of the student's career and semester block
+            semester = (student_semester - 1 + index) % SEMESTERS + 1
+            block = (student_career * SEMESTERS + semester - 1) * per_semester
+            offset = rng.integers(per_semester, size=n_students)
+            subjects = (block[:, None] + (offset[:, None] + np.arange(courses)) % per_semester).ravel()
+            students = np.repeat(np.arange(n_students), courses)
+
+            # Groups of GROUP_SIZE per subject, the first taught by the owner, the rest by colleagues
+            order = np.argsort(subjects, kind='stable')
+            sorted_subjects = subjects[order]
+            rank = np.arange(len(order)) - np.searchsorted(sorted_subjects, sorted_subjects)
+            group = np.empty_like(rank)
+            group[order] = rank // GROUP_SIZE
+            career = subject_career[subjects]
+            professor = by_career[career_start[career] + (owner_rank[subjects] + group) % career_size[career]]
+
+            group_keys, group_index, group_counts = np.unique(
+                subjects * 1000 + group, return_inverse=True, return_counts=True
+            )
+            group_subjects, group_numbers = group_keys // 1000, group_keys % 1000
+            group_professor = np.zeros(len(group_keys), dtype=np.int64)
+            group_professor[group_index] = professor
+            group_base = _reserve_ids(cursor, 'group_classes', len(group_keys))
+            counts['group_classes'] += _copy(cursor, 'group_classes', (
+                'id', 'subject_id', 'professor_id', 'group_name', 'semester_period', 'max_students',
+                'current_students'
+            ), [
+                _strings(group_base + np.arange(len(group_keys))),
+                _strings(subject_base + group_subjects),
+                _strings(professor_base + group_professor),
+                [f'{s}{g + 1:02d}' for s, g in zip(subject_semester[group_subjects].tolist(), group_numbers.tolist())],
+                [period] * len(group_keys),
+                [str(GROUP_SIZE)] * len(group_keys),
+                _strings(group_counts)
+            ])
+
+            # Surveys open for the last EVALUATION_WEEKS of the period
+            starts_on, ends_on = period_dates(period)
+            window_start = datetime.combine(ends_on - timedelta(weeks=EVALUATION_WEEKS), datetime.min.time())
+            n_surveys = len(subjects)
+            completed = rng.random(n_surveys) < params['completion_rate']
+            completed_seconds = rng.integers(EVALUATION_WEEKS * 7 * 86400, size=n_surveys)
+            completed_at = _timestamps(window_start, completed_seconds)
+            survey_base = _reserve_ids(cursor, 'surveys', n_surveys)
+            survey_ids = survey_base + np.arange(n_surveys)
+
+            suffix = re.sub(r'[^0-9A-Za-z]', '_', period)
+            cursor.execute(f'CREATE TABLE "surveys_{suffix}" (LIKE surveys INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(f'CREATE TABLE "comments_{suffix}" '
+                           f'(LIKE comments INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)')
+            # The partitions exist already, so the period trigger leaves them alone
+            cursor.execute("INSERT INTO evaluation_periods (code, starts_on, ends_on, status) VALUES (%s, %s, %s, %s)",
+                           (period, starts_on, ends_on, 'closed'))
+            counts['surveys'] += _copy(cursor, f'"surveys_{suffix}"', (
+                'id', 'student_id', 'professor_id', 'subject_id', 'period', 'status', 'created_at', 'completed_at'
+            ), [
+                _strings(survey_ids),
+                _strings(user_base + n_professors + students),
+                _strings(user_base + professor),
+                _strings(subject_base + subjects),
+                [period] * n_surveys,
+                np.where(completed, 'completed', 'pending').tolist(),
+                [window_start.isoformat()] * n_surveys,
+                [value if done else None for value, done in zip(completed_at, completed.tolist())]
+            ])
+
+            # One comment per completed survey, its sentiment tilted by the professor's quality
+            commented = np.flatnonzero(completed)
+            q = quality[professor[commented]]
+            logits = np.stack([1.1 + q, np.full_like(q, 0.1), -0.3 - q], axis=1)
+            probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            sentiments = (rng.random(len(commented))[:, None] > probabilities.cumsum(axis=1)).sum(axis=1)
+            sentiments = np.minimum(sentiments, 2)
+            texts = comment_texts(rng, sentiments, pools)
+            beta = CONFIDENCE_BETA[sentiments]
+            confidence = 0.34 + 0.66 * rng.beta(beta[:, 0], beta[:, 1])
+            # Copy-pasted comments (campaigns), so duplicate detection has something to find
+            copies = np.flatnonzero(rng.random(len(commented)) < DUPLICATE_RATE)
+            sources = rng.integers(len(commented), size=len(copies))
+            for target, source in zip(copies.tolist(), sources.tolist()):
+                texts[target] = texts[source]
+            sentiments[copies], confidence[copies] = sentiments[sources], confidence[sources]
+
+            comment_base = _reserve_ids(cursor, 'comments', len(commented))
+            counts['comments'] += _copy(cursor, f'"comments_{suffix}"', (
+                'id', 'survey_id', 'period', 'text', 'sentiment', 'confidence_score', 'created_at',
+                'model_version', 'sentiment_status'
+            ), [
+                _strings(comment_base + np.arange(len(commented))),
+                _strings(survey_ids[commented]),
+                [period] * len(commented),
+                texts,
+                [SENTIMENTS[s] for s in sentiments.tolist()],
+                _strings(confidence.round(4)),
+                [completed_at[i] for i in commented.tolist()],
+                [MODEL_VERSION] * len(commented),
+                ['scored'] * len(commented)
+            ])
+
+            # Attaching builds the indexes of the filled tables in one pass each
+            cursor.execute(f"ALTER TABLE surveys ATTACH PARTITION \"surveys_{suffix}\" FOR VALUES IN ('{period}')")
+            cursor.execute(f"ALTER TABLE comments ATTACH PARTITION \"comments_{suffix}\" FOR VALUES IN ('{period}')")
+            log(f"  {period}: {n_surveys:,} surveys, {len(commented):,} comments, {len(group_keys):,} groups "
+                f"({time.perf_counter() - started:.1f}s)")
+
+        # Current enrollment: the courses of the latest period
+        counts['student_subjects'] = _copy(cursor, 'student_subjects', ('student_id', 'subject_id'), [
+            _strings(student_base + students),
+            _strings(subject_base + subjects)
+        ])
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    for period in periods:
+        backfill_sentiment_daily(period)
+        rebuild_participation(period)
+        suffix = re.sub(r'[^0-9A-Za-z]', '_', period)
+        db.session.execute(text(f'ANALYZE "surveys_{suffix}"'))
+        db.session.execute(text(f'ANALYZE "comments_{suffix}"'))
+    db.session.commit()
+
+    return {'periods': periods, 'rows': counts, 'seconds': round(time.perf_counter() - started, 1)}
@@ -0,0 +1,140 @@
+"""
+Sentiment trends
+Series are read from the sentiment_daily rollup (kept current by triggers on comments),
+never from the comments themselves, so they cost the same however many comments exist
+"""
+from sqlalchemy import func, text
+
+from ..models import db, SentimentDaily
+from .pagination import parse_date_arg
+
+TREND_BUCKETS = ('day', 'week', 'period')
+
+BACKFILL_QUERY = """
+    INSERT INTO sentiment_daily (day, period, professor_id, subject_id, department,
+                                 positive_count, neutral_count, negative_count, total_count,
+                                 confidence_sum, confidence_count)
+    SELECT
+        COALESCE(c.created_at, CURRENT_TIMESTAMP)::date,
+        c.period,
+        s.professor_id,
+        s.subject_id,
+        MAX(p.department),
+        COUNT(*) FILTER (WHERE c.sentiment = 'positive'),
+        COUNT(*) FILTER (WHERE c.sentiment = 'neutral'),
+        COUNT(*) FILTER (WHERE c.sentiment = 'negative'),
+        COUNT(*),
+        COALESCE(SUM(c.confidence_score), 0),
+        COUNT(c.confidence_score)
+    FROM comments c
+    JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+    LEFT JOIN professors p ON p.user_id = s.professor_id
+    WHERE c.period IN (SELECT code FROM evaluation_periods WHERE status <> 'archived' {period_filter})
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def backfill_sentiment_daily(period_code=None):
+    """
+    Rebuild the rollup from the comments table
+
+    Archived periods are left alone: their comments are no longer in the live tables
+    and the rollup rows are all that remains of them.
+
+    Args:
+        period_code (str): Only rebuild this period (default: every live period)
+
+    Returns:
+        int: Rollup rows written
+    """
+    period_filter = 'AND code = :period' if period_code else ''
+    params = {'period': period_code} if period_code else {}
+    db.session.execute(text(f"""
+        DELETE FROM sentiment_daily
+        WHERE period IN (SELECT code FROM evaluation_periods WHERE status <> 'archived' {period_filter})
+    """), params)
+    result = db.session.execute(text(BACKFILL_QUERY.format(period_filter=period_filter)), params)
+    db.session.commit()
+    return result.rowcount
+
+
+def sentiment_trends(bucket='day', professor_id=None, subject_id=None, department=None,
+                     period=None, date_from=None, date_to=None):
+    """
+    Bucketed sentiment series from the rollup
+
+    Args:
+        bucket (str): 'day', 'week' (starting Monday) or 'period'
+        professor_id (int): users.id of the professor
+        subject_id (int), department (str), period (str): Optional filters
+        date_from (date): First day included
+        date_to (date): First day excluded
+
+    Returns:
+        list: One dict per bucket, oldest first
+    """
+    if bucket == 'week':
+        bucket_column = func.date_trunc('week', SentimentDaily.day).cast(db.Date)
+    elif bucket == 'period':
+        bucket_column = SentimentDaily.period
+    else:
+        bucket_column = SentimentDaily.day
+    bucket_column = bucket_column.label('bucket')
+
+    query = db.session.query(
+        bucket_column,
+        func.sum(SentimentDaily.positive_count).label('positive'),
+        func.sum(SentimentDaily.neutral_count).label('neutral'),
+        func.sum(SentimentDaily.negative_count).label('negative'),
+        func.sum(SentimentDaily.total_count).label('total'),
+        (func.sum(SentimentDaily.confidence_sum) /
+         func.nullif(func.sum(SentimentDaily.confidence_count), 0)).label('avg_confidence')
+    )
+    if professor_id:
+        query = query.filter(SentimentDaily.professor_id == professor_id)
+    if subject_id:
+        query = query.filter(SentimentDaily.subject_id == subject_id)
+    if department:
+        query = query.filter(SentimentDaily.department == department)
+    if period:
+        query = query.filter(SentimentDaily.period == period)
+    if date_from:
+        query = query.filter(SentimentDaily.day >= date_from)
+    if date_to:
+        query = query.filter(SentimentDaily.day < date_to)
+
+    series = []
+    for row in query.group_by(bucket_column).order_by(bucket_column).all():
+        if not row.total:
+            continue
+        series.append({
+            'bucket': row.bucket if isinstance(row.bucket, str) else row.bucket.isoformat(),
+            'positive': int(row.positive),
+            'neutral': int(row.neutral),
+            'negative': int(row.negative),
+            'total': int(row.total),
+            'positive_rate': round(row.positive / row.total * 100, 1),
+            'avg_confidence': round(row.avg_confidence, 3) if row.avg_confidence is not None else None
+        })
+    return series
+
+
+def parse_trend_args(args):
+    """
+    Read bucket, subject_id, period and date range from request args
+
+    Raises:
+        ValueError: On an unknown bucket or a malformed date
+    """
+    bucket = args.get('bucket', 'day')
+    if bucket not in TREND_BUCKETS:
+        raise ValueError('bucket must be day, week or period')
+    date_from = parse_date_arg(args.get('date_from'))
+    date_to = parse_date_arg(args.get('date_to'), end_of_day=True)
+    return {
+        'bucket': bucket,
+        'subject_id': args.get('subject_id', type=int),
+        'period': args.get('period'),
+        'date_from': date_from.date() if date_from else None,
+        'date_to': date_to.date() if date_to else None
+    }
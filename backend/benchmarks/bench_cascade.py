@@ -0,0 +1,102 @@
+"""
+Evaluation of the lexicon cascade in front of BETO
+On a holdout of comments, reports the share the lexicon answers at each confidence
+threshold, how often those answers agree with BETO, and the end-to-end throughput
+of classifying the holdout with and without the cascade.
+
+By default the holdout is synthetic (short verdicts mixed with longer reviews);
+--live uses the latest comments in DATABASE_URL. BETO's labels are computed fresh,
+so the stored sentiments are not trusted (they may come from an earlier model).
+
+Usage (from the backend directory):
+    python benchmarks/bench_cascade.py --model final_model
+    python benchmarks/bench_cascade.py --model final_model --live --limit 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.utils.lexicon import lexicon_score
+from app.utils.sentiment_classifier import SentimentClassifier
+
+SHORT = [
+    'Excelente profesor', 'Muy buena clase', 'Pésimo maestro', 'Muy malo', 'Lo recomiendo',
+    'No lo recomiendo', 'Excelente', 'Horrible', 'Buen profesor, muy paciente', 'Clases aburridas',
+    'Muy buen profesor', 'Es muy impuntual', 'Genial, aprendí mucho', 'Regular', 'Nada que decir',
+]
+LONG = [
+    'El profesor explica bien pero a veces llega tarde y las tareas son demasiadas.',
+    'Las clases son interesantes aunque la forma de evaluar no está clara desde el inicio.',
+    'Domina la materia, sin embargo no responde los correos ni da retroalimentación.',
+    'Durante el semestre vimos todos los temas del programa con ejemplos y prácticas.',
+]
+
+THRESHOLDS = (0.75, 0.8, 0.85, 0.9, 0.95)
+
+
+def synthetic_holdout(count, seed=9):
+    """Half short verdicts, half longer mixed reviews"""
+    random = np.random.default_rng(seed)
+    pools = (SHORT, LONG)
+    return [pools[i % 2][int(random.integers(0, len(pools[i % 2])))] for i in range(count)]
+
+
+def live_holdout(limit):
+    from sqlalchemy import text
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT text FROM comments ORDER BY id DESC LIMIT :limit"), {'limit': limit}
+        ).scalars().all()
+
+
+def classify_all(comments, threshold):
+    SentimentClassifier._cascade_threshold = threshold
+    started = time.perf_counter()
+    labels = [SentimentClassifier.classify(comment)[0] for comment in comments]
+    return labels, time.perf_counter() - started
+
+
+def run(comments, threshold):
+    # Warm up, then the teacher labels (cascade off)
+    classify_all(comments[:20], None)
+    beto, beto_seconds = classify_all(comments, None)
+    scores = [lexicon_score(SentimentClassifier.clean_text(comment)) for comment in comments]
+
+    print(f"{len(comments):,} comments\n")
+    print(f"{'threshold':>9} {'answered':>9} {'agreement':>10}")
+    for candidate in THRESHOLDS:
+        answered = [(score[0], label) for score, label in zip(scores, beto) if score and score[1] >= candidate]
+        agreement = sum(1 for mine, teacher in answered if mine == teacher) / len(answered) if answered else 0.0
+        print(f"{candidate:>9.2f} {len(answered) / len(comments):>9.1%} {agreement:>10.1%}")
+
+    cascade, cascade_seconds = classify_all(comments, threshold)
+    changed = sum(1 for a, b in zip(cascade, beto) if a != b) / len(comments)
+    print(f"\nthreshold {threshold}: BETO only {len(comments) / beto_seconds:,.0f} comments/s, "
+          f"cascade {len(comments) / cascade_seconds:,.0f} comments/s "
+          f"({beto_seconds / cascade_seconds:.2f}x), {changed:.1%} of labels differ from BETO")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate the lexicon cascade against BETO')
+    parser.add_argument('--model', default='final_model', help='Model directory')
+    parser.add_argument('--rows', type=int, default=2000, help='Synthetic comments')
+    parser.add_argument('--live', action='store_true', help='Use the comments in the database')
+    parser.add_argument('--limit', type=int, default=2000, help='Latest comments read with --live')
+    parser.add_argument('--threshold', type=float, default=0.85, help='Cascade threshold for the throughput run')
+    args = parser.parse_args()
+
+    if not SentimentClassifier.load_model(args.model):
+        sys.exit(f'Could not load a model from {args.model}')
+    comments = live_holdout(args.limit) if args.live else synthetic_holdout(args.rows)
+    if not comments:
+        sys.exit('No comments to classify')
+    run(comments, args.threshold)
@@ -0,0 +1,91 @@
+"""
+Benchmark of repeated admin dashboard loads: conditional GETs and compressed JSON
+Loads each listing the way a browser does on every visit and reports, per load, the
+median time and the body bytes on the wire for:
+  full         no validators, no compression (before)
+  compressed   Accept-Encoding: gzip, br
+  revalidated  compressed, with the ETag of the previous load (what a browser sends)
+
+Needs a database (DATABASE_URL) with migration 013 applied; load it with
+`flask --app run.py synthetic generate` first to see the effect on large listings.
+
+Usage (from the backend directory):
+    python benchmarks/bench_conditional.py
+    python benchmarks/bench_conditional.py --repeat 50 --endpoints /api/admin/users,/api/admin/students
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_ENDPOINTS = '/api/admin/users,/api/admin/students'
+
+
+def load(client, url, headers, repeat):
+    """Request url repeat times; returns (median ms, bytes of the last body, last response)"""
+    timings = []
+    response = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        size = len(response.data)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), size, response
+
+
+def run(endpoints, repeat):
+    import jwt
+    from app import create_app
+    from app.config import Config
+    from app.models import User
+    from app.utils.compression import brotli
+
+    app = create_app()
+    with app.app_context():
+        admin = User.query.filter_by(role='admin', is_active=True).first()
+        if not admin:
+            sys.exit('No active admin user in the database')
+        users = User.query.count()
+        token = jwt.encode(
+            {'user_id': admin.id, 'role': admin.role, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            Config.SECRET_KEY,
+            algorithm='HS256'
+        )
+
+    client = app.test_client()
+    auth = {'Authorization': f'Bearer {token}'}
+    encodings = 'gzip, br' if brotli is not None else 'gzip'
+    print(f"{users:,} users, {repeat} loads per mode, Accept-Encoding: {encodings}")
+    print(f"{'endpoint':28} {'mode':12} {'status':>6} {'median ms':>10} {'bytes':>10} {'time saved':>11} {'bytes saved':>12}")
+
+    for url in endpoints:
+        full_ms, full_bytes, response = load(client, url, auth, repeat)
+        if response.status_code != 200:
+            print(f"{url:28} {'full':12} {response.status_code:>6}  skipped")
+            continue
+        modes = [('full', auth)]
+        modes.append(('compressed', {**auth, 'Accept-Encoding': encodings}))
+        etag = response.headers.get('ETag')
+        if etag:
+            modes.append(('revalidated', {**auth, 'Accept-Encoding': encodings, 'If-None-Match': etag}))
+
+        for mode, headers in modes:
+            if mode == 'full':
+                ms, size, response = full_ms, full_bytes, response
+            else:
+                ms, size, response = load(client, url, headers, repeat)
+            print(f"{url:28} {mode:12} {response.status_code:>6} {ms:>10.2f} {size:>10,} "
+                  f"{1 - ms / full_ms:>10.0%} {1 - size / full_bytes if full_bytes else 0:>11.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark conditional GETs and compression of admin listings')
+    parser.add_argument('--repeat', type=int, default=20, help='Loads per endpoint and mode')
+    parser.add_argument('--endpoints', default=DEFAULT_ENDPOINTS, help='Comma separated listing URLs')
+    args = parser.parse_args()
+
+    run([url.strip() for url in args.endpoints.split(',') if url.strip()], args.repeat)
@@ -0,0 +1,78 @@
+"""
+Latency and memory benchmark for the similar-comment search
+Generates synthetic normalized embeddings (no database, no model) and times the same
+chunked running top-K used by utils/embeddings.py, with the vectors held as float16
+(how they are stored) and as float32 for comparison.
+
+Usage (from the backend directory):
+    python benchmarks/bench_embeddings.py                    # 1,000,000 x 768
+    python benchmarks/bench_embeddings.py --rows 200000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.utils.embeddings import SEARCH_CHUNK_ROWS, STORAGE_DTYPE, top_k_cosine
+
+
+def synthetic_embeddings(rows, dim, dtype, seed=7):
+    """Random unit vectors, generated chunk by chunk to keep the float32 peak small"""
+    random = np.random.default_rng(seed)
+    matrix = np.empty((rows, dim), dtype=dtype)
+    for start in range(0, rows, SEARCH_CHUNK_ROWS):
+        block = random.standard_normal((min(SEARCH_CHUNK_ROWS, rows - start), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        matrix[start:start + len(block)] = block
+    return matrix
+
+
+def chunks(matrix, ids):
+    """(ids, float32 matrix) chunks, decoded the way similar_comments does"""
+    for start in range(0, len(matrix), SEARCH_CHUNK_ROWS):
+        yield ids[start:start + SEARCH_CHUNK_ROWS], matrix[start:start + SEARCH_CHUNK_ROWS].astype(np.float32)
+
+
+def run(rows, dim, k, repeat):
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+    print(f"{rows:,} embeddings x {dim} dims, top {k}, chunks of {SEARCH_CHUNK_ROWS:,} rows")
+    print(f"{'dtype':8} {'stored':>10} {'chunk peak':>11} {'p50':>9} {'p95':>9} {'recall vs f32':>14}")
+
+    reference = None
+    for dtype in (np.float32, STORAGE_DTYPE):
+        matrix = synthetic_embeddings(rows, dim, dtype)
+        queries = synthetic_embeddings(repeat, dim, np.float32, seed=11)
+        timings = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            found.append({comment_id for comment_id, _ in top_k_cosine(query, chunks(matrix, ids), k)})
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        if reference is None:
+            reference = found
+            recall = 1.0
+        else:
+            recall = statistics.mean(len(a & b) / k for a, b in zip(found, reference))
+        chunk_peak = SEARCH_CHUNK_ROWS * dim * 4  # each chunk is decoded to float32
+        name = np.dtype(dtype).name
+        print(f"{name:8} {matrix.nbytes / 1e6:>8.0f}MB {chunk_peak / 1e6:>9.0f}MB "
+              f"{statistics.median(timings):>7.1f}ms {timings[int(len(timings) * 0.95) - 1]:>7.1f}ms {recall:>14.3f}")
+        del matrix
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark similar-comment search')
+    parser.add_argument('--rows', type=int, default=1000000, help='Synthetic embeddings')
+    parser.add_argument('--dim', type=int, default=768, help='Embedding dimensions (BETO base: 768)')
+    parser.add_argument('-k', type=int, default=10, help='Results per query')
+    parser.add_argument('--repeat', type=int, default=10, help='Queries to time')
+    args = parser.parse_args()
+
+    run(args.rows, args.dim, args.k, args.repeat)
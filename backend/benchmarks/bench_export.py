@@ -0,0 +1,119 @@
+"""
+Throughput benchmark for the streaming comment export
+Reports rows/s, MB/s and peak Python memory for CSV/NDJSON, plain and gzipped
+
+Usage (from the backend directory):
+    python benchmarks/bench_export.py                 # synthetic rows, no database needed
+    python benchmarks/bench_export.py --rows 500000
+    python benchmarks/bench_export.py --live          # stream /api/admin/export/comments from DATABASE_URL
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.export import iter_export
+
+COLUMNS = [
+    'comment_id', 'period', 'created_at', 'professor_id', 'professor_name', 'department',
+    'subject_id', 'subject_code', 'subject_name', 'sentiment', 'confidence_score', 'text'
+]
+
+SAMPLE_TEXTS = [
+    'El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar.',
+    'Las clases son aburridas y no se entiende la forma de evaluar, llega tarde con frecuencia.',
+    'Buen curso en general, aunque el material podría estar más actualizado.',
+]
+
+
+def synthetic_rows(count):
+    """Generate export rows lazily so the generator itself uses constant memory"""
+    start = datetime(2025, 1, 15, 8, 0, 0)
+    sentiments = ('positive', 'neutral', 'negative')
+    for i in range(count):
+        yield {
+            'comment_id': i + 1,
+            'period': '2025-1',
+            'created_at': start + timedelta(seconds=i),
+            'professor_id': 2 + i % 40,
+            'professor_name': f'Profesor {i % 40}',
+            'department': 'Computer Science',
+            'subject_id': 1 + i % 25,
+            'subject_code': f'CS{100 + i % 25}',
+            'subject_name': 'Introduction to Data Science',
+            'sentiment': sentiments[i % 3],
+            'confidence_score': 0.5 + (i % 50) / 100,
+            'text': SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)],
+        }
+
+
+def measure(label, chunks, rows):
+    """Drain a chunk iterator and print throughput and peak traced memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    total_bytes = 0
+    for chunk in chunks:
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:22} {rows / elapsed:>12,.0f} rows/s {total_bytes / elapsed / 1e6:>8.1f} MB/s "
+          f"{total_bytes / 1e6:>8.1f} MB out  peak {peak / 1e6:.1f} MB")
+
+
+def run_synthetic(rows):
+    print(f"Synthetic export of {rows:,} rows")
+    for export_format in ('csv', 'ndjson'):
+        for use_gzip in (False, True):
+            label = f"{export_format}{' + gzip' if use_gzip else ''}"
+            measure(label, iter_export(synthetic_rows(rows), COLUMNS, export_format, gzip=use_gzip), rows)
+
+
+def run_live():
+    """Stream the real endpoint through the test client as the first active admin"""
+    import jwt
+    from app import create_app
+    from app.config import Config
+    from app.models import User, Comment
+
+    app = create_app()
+    with app.app_context():
+        admin = User.query.filter_by(role='admin', is_active=True).first()
+        if not admin:
+            sys.exit('No active admin user in the database')
+        rows = Comment.query.count()
+        token = jwt.encode(
+            {'user_id': admin.id, 'role': admin.role, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            Config.SECRET_KEY,
+            algorithm='HS256'
+        )
+
+    print(f"Live export of {rows:,} comments")
+    client = app.test_client()
+    for export_format in ('csv', 'ndjson'):
+        for use_gzip in (False, True):
+            headers = {'Authorization': f'Bearer {token}'}
+            if use_gzip:
+                headers['Accept-Encoding'] = 'gzip'
+            response = client.get(f'/api/admin/export/comments?format={export_format}',
+                                  headers=headers, buffered=False)
+            label = f"{export_format}{' + gzip' if use_gzip else ''}"
+            measure(label, response.response, rows)
+            response.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the streaming comment export')
+    parser.add_argument('--rows', type=int, default=200000, help='Synthetic rows to export')
+    parser.add_argument('--live', action='store_true', help='Benchmark the HTTP endpoint against the database')
+    args = parser.parse_args()
+
+    if args.live:
+        run_live()
+    else:
+        run_synthetic(args.rows)
@@ -0,0 +1,126 @@
+"""
+Cost of sliding-window inference for long comments versus the truncating path
+Classifies the same comments once per long-comment strategy and reports latency
+per comment, how many comments needed windows, and how often the label differs
+from what truncation gives.
+
+By default comment lengths follow a long-tailed synthetic distribution (most
+comments a couple of sentences, a few full-page reviews); --live uses the real
+comments from DATABASE_URL instead.
+
+Usage (from the backend directory):
+    python benchmarks/bench_long_text.py --model final_model
+    python benchmarks/bench_long_text.py --model final_model --live --limit 2000
+    python benchmarks/bench_long_text.py --max-windows 8 --budget-ms 250
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.utils.sentiment_classifier import SentimentClassifier
+
+SENTENCES = [
+    'El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar.',
+    'Las clases son dinámicas y los ejemplos prácticos ayudan a entender la teoría.',
+    'A veces llega tarde y el ritmo de la clase es muy rápido.',
+    'Las tareas son demasiadas para el tiempo que tenemos.',
+    'La forma de evaluar es justa y deja claro lo que espera de nosotros.',
+    'No responde los correos y la retroalimentación de los exámenes llega tarde.',
+    'El material del curso está actualizado y bien organizado.',
+    'Pero al final del semestre siento que no aprendí nada de la materia.',
+]
+
+
+def synthetic_comments(count, seed=5):
+    """Comments whose sentence counts follow a log-normal (median ~3, long tail)"""
+    random = np.random.default_rng(seed)
+    lengths = np.clip(random.lognormal(mean=1.1, sigma=0.9, size=count).round().astype(int), 1, 80)
+    return [' '.join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(n)) for i, n in enumerate(lengths)]
+
+
+def live_comments(limit):
+    from sqlalchemy import text
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT text FROM comments ORDER BY id DESC LIMIT :limit"), {'limit': limit}
+        ).scalars().all()
+
+
+def token_lengths(comments):
+    tokenizer = SentimentClassifier._loaded.tokenizer
+    return [len(tokenizer(SentimentClassifier.clean_text(comment), add_special_tokens=False)['input_ids'])
+            for comment in comments]
+
+
+def run(comments, budget_ms):
+    lengths = token_lengths(comments)
+    window = SentimentClassifier.MAX_LENGTH - SentimentClassifier._loaded.tokenizer.num_special_tokens_to_add()
+    windows = Counter(
+        len(SentimentClassifier.window_starts(n, window, SentimentClassifier._window_overlap,
+                                              SentimentClassifier._max_windows))
+        for n in lengths
+    )
+    long_share = sum(1 for n in lengths if n > window) / len(lengths)
+    print(f"{len(comments):,} comments, tokens p50 {statistics.median(lengths):.0f} "
+          f"p95 {np.percentile(lengths, 95):.0f} max {max(lengths)}; "
+          f"{long_share:.1%} over {window} tokens")
+    print("windows per comment: " + ', '.join(f"{n}: {windows[n]:,}" for n in sorted(windows)))
+    print(f"overlap {SentimentClassifier._window_overlap} tokens, at most "
+          f"{SentimentClassifier._max_windows} windows\n")
+
+    # Warm up so the first strategy does not pay for lazy initialization
+    for comment in comments[:20]:
+        SentimentClassifier.classify(comment, strategy='mean')
+
+    print(f"{'strategy':13} {'p50':>8} {'p95':>8} {'p99':>8} {'long p95':>9} {'total':>8} {'changed':>8}")
+    baseline = None
+    for strategy in SentimentClassifier.LONG_TEXT_STRATEGIES:
+        timings, labels = [], []
+        for comment in comments:
+            started = time.perf_counter()
+            labels.append(SentimentClassifier.classify(comment, strategy=strategy)[0])
+            timings.append((time.perf_counter() - started) * 1000)
+        if baseline is None:
+            baseline = labels
+        changed = sum(1 for a, b in zip(labels, baseline) if a != b) / len(labels)
+        long_timings = [t for t, n in zip(timings, lengths) if n > window]
+        long_p95 = f"{np.percentile(long_timings, 95):>7.1f}ms" if long_timings else f"{'-':>9}"
+        flag = '  over budget' if budget_ms and long_timings and np.percentile(long_timings, 95) > budget_ms else ''
+        print(f"{strategy:13} {statistics.median(timings):>6.1f}ms {np.percentile(timings, 95):>6.1f}ms "
+              f"{np.percentile(timings, 99):>6.1f}ms {long_p95} "
+              f"{sum(timings) / 1000:>7.1f}s {changed:>8.1%}{flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark long comment inference strategies')
+    parser.add_argument('--model', default='final_model', help='Model directory')
+    parser.add_argument('--rows', type=int, default=500, help='Synthetic comments')
+    parser.add_argument('--live', action='store_true', help='Use the comments in the database')
+    parser.add_argument('--limit', type=int, default=1000, help='Latest comments read with --live')
+    parser.add_argument('--overlap', type=int, default=None, help='Tokens shared by consecutive windows')
+    parser.add_argument('--max-windows', type=int, default=None, help='Windows per comment at most')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Flag strategies whose long comment p95 exceeds this')
+    args = parser.parse_args()
+
+    if not SentimentClassifier.load_model(args.model):
+        sys.exit(f'Could not load a model from {args.model}')
+    if args.overlap is not None:
+        SentimentClassifier._window_overlap = args.overlap
+    if args.max_windows is not None:
+        SentimentClassifier._max_windows = args.max_windows
+
+    comments = live_comments(args.limit) if args.live else synthetic_comments(args.rows)
+    if not comments:
+        sys.exit('No comments to classify')
+    run(comments, args.budget_ms)
@@ -0,0 +1,133 @@
+"""
+Latency benchmark for the comment full-text search
+Builds a temporary table of synthetic Spanish comments with the same generated
+search_vector and GIN index as comments, then times ranked searches against it
+(and the same lookup done with an ILIKE scan for comparison).
+Nothing is written to the real tables.
+
+Usage (from the backend directory, DATABASE_URL pointing at a migrated database):
+    python benchmarks/bench_search.py                 # 1,000,000 comments
+    python benchmarks/bench_search.py --rows 200000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from app import create_app
+from app.models import db
+from app.utils.comment_search import SEARCH_CONFIG, HEADLINE_OPTIONS
+
+OPENINGS = [
+    'El profesor', 'La maestra', 'El docente', 'La profesora', 'El titular de la materia',
+    'Nuestro profesor', 'La coordinadora', 'El instructor'
+]
+BODIES = [
+    'explica muy bien los temas', 'no explica con claridad', 'siempre llega con puntualidad',
+    'tiene problemas de puntualidad', 'deja demasiadas tareas', 'responde todas las dudas',
+    'usa ejemplos prácticos en clase', 'no respeta los horarios', 'califica de forma justa',
+    'es muy exigente con los exámenes', 'motiva a participar', 'lee las diapositivas sin explicar'
+]
+ENDINGS = [
+    'y la clase se disfruta.', 'pero el ritmo es rápido.', 'y el material está actualizado.',
+    'aunque falta retroalimentación.', 'y se nota su experiencia.', 'pero cuesta seguirle.',
+    'lo recomiendo.', 'no lo recomiendo.'
+]
+
+QUERIES = ['puntualidad', '"no explica"', 'tareas exámenes', 'retroalimentación', 'explicar -diapositivas']
+
+
+def sql_array(values):
+    return 'ARRAY[' + ', '.join("'" + value.replace("'", "''") + "'" for value in values) + ']'
+
+
+def build_table(rows):
+    """Create and fill the temporary bench_comments table"""
+    db.session.execute(text(f"""
+        CREATE TEMPORARY TABLE bench_comments (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', text)) STORED
+        )
+    """))
+    started = time.perf_counter()
+    db.session.execute(text(f"""
+        INSERT INTO bench_comments (id, text)
+        SELECT g,
+               o[1 + abs(hashint4(g)) % array_length(o, 1)] || ' ' ||
+               b[1 + abs(hashint4(g + 7919)) % array_length(b, 1)] || ' ' ||
+               e[1 + abs(hashint4(g + 104729)) % array_length(e, 1)]
+        FROM generate_series(1, :rows) g,
+             (SELECT {sql_array(OPENINGS)} AS o, {sql_array(BODIES)} AS b, {sql_array(ENDINGS)} AS e) fragments
+    """), {'rows': rows})
+    loaded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    db.session.execute(text("CREATE INDEX ON bench_comments USING GIN (search_vector)"))
+    db.session.execute(text("ANALYZE bench_comments"))
+    indexed = time.perf_counter() - started
+    print(f"Loaded {rows:,} comments in {loaded:.1f}s, GIN index built in {indexed:.1f}s")
+
+
+def time_query(sql, params, repeat):
+    """Run a query repeatedly, return (p50 ms, p95 ms, rows of the last run)"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(db.session.execute(sql, params).all())
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], rows
+
+
+def run(rows, repeat, limit):
+    build_table(rows)
+
+    ranked = text(f"""
+        WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query),
+        page AS (
+            SELECT c.id, c.text, ts_rank_cd(c.search_vector, q.query) AS rank
+            FROM bench_comments c, q
+            WHERE c.search_vector @@ q.query
+            ORDER BY rank DESC, c.id DESC
+            LIMIT :limit
+        )
+        SELECT page.id, ts_headline('{SEARCH_CONFIG}', page.text, q.query, '{HEADLINE_OPTIONS}')
+        FROM page, q
+    """)
+    matches = text(f"""
+        SELECT count(*) FROM bench_comments
+        WHERE search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', :q)
+    """)
+    scan = text("SELECT count(*) FROM bench_comments WHERE text ILIKE :pattern")
+
+    print(f"\nranked page = top {limit} by ts_rank_cd with snippets; count = all matches")
+    print(f"{'query':26} {'matches':>9} {'page p50':>10} {'page p95':>10} {'count p50':>10} {'ILIKE count':>12}")
+    for q in QUERIES:
+        total = db.session.execute(matches, {'q': q}).scalar()
+        p50, p95, _ = time_query(ranked, {'q': q, 'limit': limit}, repeat)
+        count_p50, _, _ = time_query(matches, {'q': q}, repeat)
+        pattern = '%' + q.strip('"').split(' -')[0].split(' ')[0] + '%'
+        scan_p50, _, _ = time_query(scan, {'pattern': pattern}, max(3, repeat // 5))
+        print(f"{q:26} {total:>9,} {p50:>8.1f}ms {p95:>8.1f}ms {count_p50:>8.1f}ms {scan_p50:>10.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark comment full-text search')
+    parser.add_argument('--rows', type=int, default=1000000, help='Synthetic comments to generate')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per query')
+    parser.add_argument('--limit', type=int, default=20, help='Page size')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            run(args.rows, args.repeat, args.limit)
+        finally:
+            db.session.rollback()
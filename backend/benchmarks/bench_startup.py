@@ -0,0 +1,88 @@
+"""
+Cold start of the backend: create_app() with and without the inference stack
+Starts fresh interpreters under `python -X importtime` that build the app, once as an
+admin/CLI process (nothing preloaded) and once as an inference worker
+(PRELOAD_SENTIMENT_MODEL=true, which imports torch and loads the model). Reports
+wall time, create_app() time and peak RSS (medians over --runs), whether torch was
+imported, and the slowest top-level imports of the last run.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py --model final_model
+    python benchmarks/bench_startup.py --runs 5 --top 10
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'create_app_s': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'torch': 'torch' in sys.modules,
+    'transformers': 'transformers' in sys.modules
+}))
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def top_imports(stderr, top):
+    """Top-level imports (not nested under another) by cumulative microseconds"""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            imports.append((int(match.group(2)), match.group(4)))
+    return sorted(imports, reverse=True)[:top]
+
+
+def start(preload, model, runs):
+    env = dict(os.environ, PRELOAD_SENTIMENT_MODEL='true' if preload else 'false', PYTHONWARNINGS='ignore')
+    if model:
+        env['SENTIMENT_MODEL_PATH'] = model
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        child = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD], cwd=BACKEND_DIR, env=env,
+                               capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if child.returncode != 0:
+            sys.exit(child.stderr[-2000:])
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        result['wall_s'] = wall
+        samples.append((result, child.stderr))
+    return samples
+
+
+def report(label, samples, top):
+    results = [result for result, _ in samples]
+    print(f"{label}: wall {statistics.median(r['wall_s'] for r in results):.2f}s, "
+          f"create_app {statistics.median(r['create_app_s'] for r in results):.2f}s, "
+          f"peak RSS {statistics.median(r['rss_mb'] for r in results):.0f} MB, "
+          f"torch {'imported' if results[-1]['torch'] else 'not imported'}")
+    for cumulative, name in top_imports(samples[-1][1], top):
+        print(f"    {cumulative / 1e6:>6.2f}s  {name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark backend cold start with and without inference')
+    parser.add_argument('--model', default=None, help='Model directory preloaded by the inference run '
+                                                      '(default: SENTIMENT_MODEL_PATH)')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per configuration')
+    parser.add_argument('--top', type=int, default=6, help='Slowest top-level imports shown')
+    args = parser.parse_args()
+
+    report('admin/CLI process', start(False, args.model, args.runs), args.top)
+    report('inference worker ', start(True, args.model, args.runs), args.top)
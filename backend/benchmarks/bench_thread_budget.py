@@ -0,0 +1,161 @@
+"""
+Autotune of the CPU budget: web workers x torch threads x batch size
+For every way of splitting the cores between worker processes and concurrent forward
+passes (WEB_WORKERS, INFERENCE_CONCURRENCY, INFERENCE_THREADS), all workers classify
+comments at once for a few seconds, each pass over `batch` comments (1 is a student's
+submission, larger sizes are the rescore/backfill jobs). Reports throughput and pass
+latency per configuration and the best one: the highest throughput whose single comment
+p95 stays within --budget-ms.
+
+Worker processes are pinned to the first --cores CPUs, so the sweep for a smaller
+machine can be run on a bigger one.
+
+Usage (from the backend directory):
+    python benchmarks/bench_thread_budget.py --model final_model
+    python benchmarks/bench_thread_budget.py --model final_model --cores 4 --batch-sizes 1,8,32
+    python benchmarks/bench_thread_budget.py --seconds 10 --budget-ms 150
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.utils.inference_budget import available_cores
+
+SENTENCES = [
+    'El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar.',
+    'Las clases son dinámicas y los ejemplos prácticos ayudan a entender la teoría.',
+    'A veces llega tarde y el ritmo de la clase es muy rápido.',
+    'Las tareas son demasiadas para el tiempo que tenemos.',
+    'La forma de evaluar es justa y deja claro lo que espera de nosotros.',
+    'No responde los correos y la retroalimentación de los exámenes llega tarde.',
+]
+
+
+def comments(count):
+    """Comments of one to three sentences, the usual submission"""
+    return [' '.join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(1 + i % 3)) for i in range(count)]
+
+
+def worker(model_path, cpus, connection):
+    """One web worker: loads the model once, then runs every configuration it is sent"""
+    from app.utils.inference_budget import inference_budget
+    from app.utils.sentiment_classifier import SentimentClassifier
+
+    os.sched_setaffinity(0, cpus)
+    loaded = SentimentClassifier.read_model(model_path)
+    texts = [SentimentClassifier.clean_text(comment) for comment in comments(256)]
+    SentimentClassifier._forward(loaded, texts[:8])
+    connection.send('ready')
+
+    while True:
+        job = connection.recv()
+        if job is None:
+            return
+        threads, concurrency, batch, seconds, start_at = job
+        inference_budget.configure(cores=len(cpus), concurrency=concurrency, threads=threads)
+        timings = [[] for _ in range(concurrency)]
+
+        def run(slot):
+            offset = slot * batch
+            time.sleep(max(0.0, start_at - time.time()))
+            deadline = start_at + seconds
+            while time.time() < deadline:
+                chunk = [texts[(offset + i) % len(texts)] for i in range(batch)]
+                started = time.perf_counter()
+                SentimentClassifier._forward(loaded, chunk)
+                timings[slot].append((time.perf_counter() - started) * 1000)
+                offset += batch
+
+        slots = [threading.Thread(target=run, args=(slot,)) for slot in range(concurrency)]
+        for thread in slots:
+            thread.start()
+        for thread in slots:
+            thread.join()
+        connection.send([t for slot_timings in timings for t in slot_timings])
+
+
+def configurations(cores, batch_sizes):
+    """(workers, concurrency, threads, batch) that use every core, fewest workers first"""
+    for workers in range(1, cores + 1):
+        if cores % workers:
+            continue
+        per_worker = cores // workers
+        for threads in range(1, per_worker + 1):
+            if per_worker % threads:
+                continue
+            for batch in batch_sizes:
+                yield workers, per_worker // threads, threads, batch
+
+
+def sweep(model_path, cores, batch_sizes, seconds, budget_ms):
+    cpus = sorted(os.sched_getaffinity(0))[:cores]
+    context = multiprocessing.get_context('spawn')
+    print(f"{cores} core(s) {cpus}, {seconds:g}s per configuration\n")
+    print(f"{'workers':>7} {'passes':>6} {'threads':>7} {'batch':>5} {'comments/s':>11} "
+          f"{'pass p50':>9} {'pass p95':>9}")
+
+    results = []
+    by_workers = {}
+    for config in configurations(cores, batch_sizes):
+        by_workers.setdefault(config[0], []).append(config)
+
+    for workers, configs in by_workers.items():
+        pipes, processes = [], []
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=worker, args=(model_path, cpus, child), daemon=True)
+            process.start()
+            pipes.append(parent)
+            processes.append(process)
+        for pipe in pipes:
+            pipe.recv()
+
+        for _, concurrency, threads, batch in configs:
+            start_at = time.time() + 0.5
+            for pipe in pipes:
+                pipe.send((threads, concurrency, batch, seconds, start_at))
+            timings = [t for pipe in pipes for t in pipe.recv()]
+            throughput = len(timings) * batch / seconds
+            p50, p95 = statistics.median(timings), float(np.percentile(timings, 95))
+            results.append((workers, concurrency, threads, batch, throughput, p95))
+            print(f"{workers:>7} {concurrency:>6} {threads:>7} {batch:>5} {throughput:>11,.1f} "
+                  f"{p50:>7.1f}ms {p95:>7.1f}ms")
+
+        for pipe in pipes:
+            pipe.send(None)
+        for process in processes:
+            process.join()
+
+    print()
+    for batch in batch_sizes:
+        candidates = [r for r in results if r[3] == batch and (batch > 1 or not budget_ms or r[5] <= budget_ms)]
+        if not candidates:
+            print(f"batch {batch}: no configuration within {budget_ms:g}ms")
+            continue
+        workers, concurrency, threads, _, throughput, p95 = max(candidates, key=lambda r: r[4])
+        print(f"batch {batch}: WEB_WORKERS={workers} INFERENCE_CONCURRENCY={concurrency} "
+              f"INFERENCE_THREADS={threads} ({throughput:,.1f} comments/s, pass p95 {p95:.1f}ms)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep CPU budget configurations for sentiment inference')
+    parser.add_argument('--model', default='final_model', help='Model directory')
+    parser.add_argument('--cores', type=int, default=None, help='Cores to split (default: all available)')
+    parser.add_argument('--batch-sizes', default='1,8,32', help='Comments per forward pass, comma separated')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each configuration')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Single comment (batch 1) pass p95 a configuration must stay within')
+    args = parser.parse_args()
+
+    if not os.path.isfile(os.path.join(args.model, 'config.json')):
+        sys.exit(f'No model in {args.model}')
+    cores = min(args.cores or available_cores(), len(os.sched_getaffinity(0)))
+    sweep(args.model, cores, [int(size) for size in args.batch_sizes.split(',')], args.seconds, args.budget_ms)
@@ -0,0 +1,132 @@
+"""
+Tests for the buffered audit log writer
+Run with: python tests/test_activity_logger.py (or pytest)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from sqlalchemy import event, select
+
+import app.utils.activity_logger as activity_logger_module
+from app.models import db, ActivityLog
+from app.utils.activity_logger import ActivityLogger
+
+
+def make_logger(**config):
+    """Logger on a bare app whose writes are recorded instead of inserted"""
+    app = Flask(__name__)
+    app.config.update(config)
+    logger = ActivityLogger(app)
+    batches = []
+    logger._write = lambda entries: batches.append(entries)
+    return app, logger, batches
+
+
+def action_types(batches):
+    return [[entry['action_type'] for entry in batch] for batch in batches]
+
+
+def test_sync_mode_writes_immediately():
+    """Testing apps write each entry inline, with the request's client address and agent"""
+    app, logger, batches = make_logger(TESTING=True)
+    assert logger.sync
+    with app.test_request_context(headers={'X-Forwarded-For': '10.0.0.7, 10.0.0.1', 'User-Agent': 'pytest'}):
+        logger.log(1, 'admin', 'user_created', 'x' * 300, target_id=4, target_type='user')
+    entry = batches[0][0]
+    assert len(batches) == 1 and logger._thread is None
+    assert entry['ip_address'] == '10.0.0.7' and entry['user_agent'] == 'pytest'
+    assert len(entry['description']) == 255
+    print("✓ Sync mode test passed")
+
+
+def test_entries_wait_for_a_full_batch_or_the_interval():
+    """Entries accumulate until the batch fills or the flush interval passes, not one per INSERT"""
+    app, logger, batches = make_logger(ACTIVITY_LOG_BATCH_SIZE=3, ACTIVITY_LOG_FLUSH_INTERVAL=0.3)
+    for i in range(7):
+        logger.log(1, 'admin', f'action_{i}', 'bulk')
+    time.sleep(0.1)
+    assert action_types(batches) == [['action_0', 'action_1', 'action_2'], ['action_3', 'action_4', 'action_5']]
+
+    started = time.monotonic()
+    logger.flush()
+    assert action_types(batches)[-1] == ['action_6']
+    assert time.monotonic() - started >= 0.1  # the partial batch waited for the interval
+
+    logger.log(1, 'admin', 'last', 'on shutdown')
+    logger.shutdown()
+    assert action_types(batches)[-1] == ['last'] and logger._thread is None
+    print("✓ Batching test passed")
+
+
+def test_missing_partition_is_created_and_the_insert_retried():
+    """An INSERT rejected for a missing monthly partition creates it and is retried once"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    logger = ActivityLogger(app)
+    created = []
+    failures = ['no partition of relation "activity_logs" found for row']
+
+    def reject_first_insert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO activity_logs') and failures:
+            raise Exception(failures.pop())
+
+    original_ensure = activity_logger_module.ensure_partitions_for
+    activity_logger_module.ensure_partitions_for = lambda table, timestamps: created.append((table, len(timestamps)))
+    try:
+        with app.app_context():
+            ActivityLog.__table__.create(db.engine)
+            event.listen(db.engine, 'before_cursor_execute', reject_first_insert)
+            logger._write([{'user_id': 1, 'user_type': 'admin', 'action_type': 'user_created',
+                            'description': 'retried', 'created_at': activity_logger_module.datetime.utcnow()}])
+            with db.engine.connect() as connection:
+                rows = connection.execute(select(ActivityLog.description)).scalars().all()
+    finally:
+        activity_logger_module.ensure_partitions_for = original_ensure
+
+    assert created == [('activity_logs', 1)]
+    assert rows == ['retried']
+    print("✓ Partition retry test passed")
+
+
+def test_failed_writes_are_retried_with_backoff_then_counted_as_dropped():
+    """Other database errors are retried with doubling waits; only then is the batch dropped"""
+    app = Flask(__name__)
+    app.config.update(ACTIVITY_LOG_WRITE_ATTEMPTS=3, ACTIVITY_LOG_RETRY_BACKOFF=0.01)
+    logger = ActivityLogger(app)
+    inserted = []
+    failures = ['server closed the connection unexpectedly'] * 2
+
+    def insert(entries):
+        if failures:
+            raise Exception(failures.pop())
+        inserted.append(entries)
+
+    logger._insert = insert
+    sleeps = []
+    original_sleep = activity_logger_module.time.sleep
+    activity_logger_module.time.sleep = sleeps.append
+    try:
+        logger._write([{'action_type': 'recovered'}])
+        failures.extend(['server closed the connection unexpectedly'] * 3)
+        logger._write([{'action_type': 'lost'}, {'action_type': 'lost'}])
+    finally:
+        activity_logger_module.time.sleep = original_sleep
+
+    assert action_types(inserted) == [['recovered']]
+    assert sleeps == [0.01, 0.02, 0.01, 0.02]
+    stats = logger.stats()
+    assert (stats['written'], stats['retried'], stats['dropped']) == (1, 4, 2)
+    print("✓ Write retry test passed")
+
+
+if __name__ == '__main__':
+    test_sync_mode_writes_immediately()
+    test_entries_wait_for_a_full_batch_or_the_interval()
+    test_missing_partition_is_created_and_the_insert_retried()
+    test_failed_writes_are_retried_with_backoff_then_counted_as_dropped()
+    print("\n✅ All activity logger tests passed!")
@@ -0,0 +1,55 @@
+"""
+Tests for admission control of inference-bound requests
+Run with: python tests/test_admission.py (or pytest)
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.admission import AdmissionController, TokenBuckets
+
+
+def test_token_bucket_refills():
+    """A burst goes through, then requests wait for the refill"""
+    buckets = TokenBuckets(rate=1.0, burst=2)
+    assert buckets.take('a', now=0.0) == 0 and buckets.take('a', now=0.0) == 0
+    assert abs(buckets.take('a', now=0.0) - 1.0) < 1e-9
+    assert buckets.take('b', now=0.0) == 0
+    assert buckets.take('a', now=1.5) == 0
+    buckets.give_back('a')
+    assert buckets.take('a', now=1.5) == 0
+    print("✓ Token bucket test passed")
+
+
+def test_gate_queues_then_sheds():
+    """Past the in-flight limit requests wait in a bounded queue, the rest are rejected"""
+    admission = AdmissionController()
+    admission.configure(max_in_flight=1, max_queue=1, queue_timeout=5, rate_per_minute=0)
+    assert admission.enter() is None
+
+    released, results = [], []
+    waiter = threading.Thread(target=lambda: results.append(admission.enter(on_queue=lambda: released.append(1))))
+    waiter.start()
+    while not admission.stats()['waiting']:
+        pass
+    assert admission.enter() == 'overload'
+    admission.leave()
+    waiter.join()
+    assert results == [None] and released == [1]
+
+    admission.configure(max_in_flight=1, max_queue=1, queue_timeout=0.05, rate_per_minute=0)
+    assert admission.enter() == 'timeout'
+    admission.leave()
+
+    stats = admission.stats()
+    assert stats['admitted'] == 2 and stats['queued'] == 2 and stats['in_flight'] == 0
+    assert stats['rejected_overload'] == 1 and stats['rejected_timeout'] == 1
+    print("✓ Admission gate test passed")
+
+
+if __name__ == '__main__':
+    test_token_bucket_refills()
+    test_gate_queues_then_sheds()
+    print("\n✅ All admission tests passed!")
@@ -0,0 +1,71 @@
+"""
+Tests for response compression
+Run with: python tests/test_compression.py (or pytest)
+"""
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, Response, jsonify
+
+from app.utils.compression import ResponseCompression
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['COMPRESSION_MIN_SIZE'] = 512
+    compression = ResponseCompression()
+    compression.init_app(app)
+
+    @app.route('/large')
+    def large():
+        return jsonify({'users': [{'id': i, 'name': f'Usuario {i}'} for i in range(200)]})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'healthy'})
+
+    @app.route('/stream')
+    def stream():
+        return Response((line for line in ['a\n'] * 1000), mimetype='text/plain')
+
+    return app, compression
+
+
+def test_large_json_is_gzipped():
+    """Large JSON is gzipped for clients that accept it, and only for them"""
+    app, compression = make_app()
+    client = app.test_client()
+
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert len(json.loads(gzip.decompress(response.data))['users']) == 200
+    assert compression.stats()['bytes_out'] < compression.stats()['bytes_in']
+
+    response = client.get('/large')
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_json()['users']) == 200
+    print("✓ Large JSON compression test passed")
+
+
+def test_small_and_streamed_responses_are_left_alone():
+    """Bodies under the threshold and streamed responses go out uncompressed"""
+    app, _ = make_app()
+    client = app.test_client()
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'a\n' * 1000
+    print("✓ Small and streamed responses test passed")
+
+
+if __name__ == '__main__':
+    test_large_json_is_gzipped()
+    test_small_and_streamed_responses_are_left_alone()
+    print("\n✅ All compression tests passed!")
@@ -0,0 +1,49 @@
+"""
+Tests for the distillation helpers
+Run with: python tests/test_distillation.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+
+from app.utils.distillation import layer_indices, shrink_model, distillation_loss, macro_f1
+
+
+def test_student_copies_evenly_spaced_teacher_layers():
+    """The student keeps the first and last layer and their weights"""
+    assert layer_indices(12, 3) == [0, 6, 11]
+    assert layer_indices(4, 8) == [0, 1, 2, 3]
+
+    teacher = BertForSequenceClassification(BertConfig(
+        vocab_size=50, hidden_size=16, num_hidden_layers=4, num_attention_heads=2,
+        intermediate_size=32, num_labels=3
+    ))
+    student = shrink_model(teacher, 2)
+
+    assert student.config.num_hidden_layers == 2
+    assert teacher.config.num_hidden_layers == 4
+    assert torch.equal(student.bert.encoder.layer[1].output.dense.weight,
+                       teacher.bert.encoder.layer[3].output.dense.weight)
+    assert torch.equal(student.classifier.weight, teacher.classifier.weight)
+    print("✓ Student initialization test passed")
+
+
+def test_distillation_loss_and_f1():
+    """Loss is zero when the student matches the teacher, F1 is per-label averaged"""
+    logits = torch.tensor([[2.0, 0.5, -1.0], [0.1, 0.2, 0.3]])
+    assert distillation_loss(logits, logits, 2.0).item() < 1e-6
+    assert distillation_loss(-logits, logits, 2.0).item() > 0.1
+
+    assert macro_f1([0, 1, 2], [0, 1, 2], 3) == 1.0
+    assert abs(macro_f1([0, 0, 1, 1], [0, 1, 1, 1], 3) - (2 / 3 + 0.8) / 2) < 1e-9
+    print("✓ Loss and F1 test passed")
+
+
+if __name__ == '__main__':
+    test_student_copies_evenly_spaced_teacher_layers()
+    test_distillation_loss_and_f1()
+    print("\n✅ All distillation tests passed!")
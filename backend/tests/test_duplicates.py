@@ -0,0 +1,49 @@
+"""
+Tests for MinHash near-duplicate detection helpers
+Run with: python tests/test_duplicates.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.duplicates import (
+    minhash_signature, estimated_similarity, band_buckets, signature_to_bytes, signature_from_bytes, BANDS
+)
+
+ORIGINAL = 'Pésimo profesor, nunca llega a tiempo y no explica nada de la materia. No lo recomiendo.'
+
+
+def test_copy_paste_variants_share_buckets():
+    """Case and punctuation changes give the same signature"""
+    first = minhash_signature(ORIGINAL)
+    second = minhash_signature(ORIGINAL.upper() + '!!')
+
+    assert estimated_similarity(first, second) == 1.0
+    assert band_buckets(first) == band_buckets(second)
+    print("✓ Copy-paste variant test passed")
+
+
+def test_unrelated_comments_are_not_similar():
+    """Different comments share almost no MinHash values"""
+    first = minhash_signature(ORIGINAL)
+    other = minhash_signature('El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar.')
+
+    assert estimated_similarity(first, other) < 0.3
+    assert len(band_buckets(first)) == BANDS
+    print("✓ Unrelated comment test passed")
+
+
+def test_signature_bytes_round_trip():
+    """Signatures survive storage in a BYTEA column"""
+    signature = minhash_signature(ORIGINAL)
+    assert (signature_from_bytes(signature_to_bytes(signature)) == signature).all()
+    assert minhash_signature('¡¡!!') is None
+    print("✓ Signature storage test passed")
+
+
+if __name__ == '__main__':
+    test_copy_paste_variants_share_buckets()
+    test_unrelated_comments_are_not_similar()
+    test_signature_bytes_round_trip()
+    print("\n✅ All duplicate detection tests passed!")
@@ -0,0 +1,49 @@
+"""
+Tests for the comment embedding storage and top-K helpers
+Run with: python tests/test_embeddings.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.utils.embeddings import encode_embedding, decode_embeddings, top_k_cosine
+
+
+def test_embedding_bytes_round_trip():
+    """Embeddings are stored normalized as 2 bytes per dimension"""
+    vector = np.arange(1, 769, dtype=np.float32)
+    blob = encode_embedding(vector)
+    decoded = decode_embeddings([blob, blob], 768)
+
+    assert len(blob) == 768 * 2
+    assert decoded.shape == (2, 768)
+    assert abs(np.linalg.norm(decoded[0]) - 1.0) < 1e-3
+    assert np.allclose(decoded[0], vector / np.linalg.norm(vector), atol=1e-3)
+    print("✓ Embedding storage test passed")
+
+
+def test_top_k_across_chunks():
+    """The running top-K matches a full sort whatever the chunking"""
+    random = np.random.default_rng(3)
+    matrix = random.standard_normal((1000, 16)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = np.arange(100, 1100)
+    query = matrix[42]
+
+    expected = [int(ids[i]) for i in np.argsort(-(matrix @ query))[:5]]
+    chunks = [(ids[start:start + 64], matrix[start:start + 64]) for start in range(0, 1000, 64)]
+    found = top_k_cosine(query, chunks, 5)
+
+    assert [comment_id for comment_id, _ in found] == expected
+    assert found[0] == (142, found[0][1]) and abs(found[0][1] - 1.0) < 1e-5
+    assert top_k_cosine(query, [], 5) == []
+    print("✓ Chunked top-K test passed")
+
+
+if __name__ == '__main__':
+    test_embedding_bytes_round_trip()
+    test_top_k_across_chunks()
+    print("\n✅ All embedding tests passed!")
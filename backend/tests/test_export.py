@@ -0,0 +1,59 @@
+"""
+Tests for the streaming export serializers
+Run with: python tests/test_export.py (or pytest)
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.export import iter_export
+
+COLUMNS = ['comment_id', 'created_at', 'text']
+ROWS = [
+    {'comment_id': 1, 'created_at': datetime(2025, 3, 1, 10, 0), 'text': 'Muy buen profesor, explica "todo"'},
+    {'comment_id': 2, 'created_at': datetime(2025, 3, 2, 11, 30), 'text': 'Línea uno,\nlínea dos'},
+]
+
+
+def test_csv_export():
+    """CSV output has a header and survives quotes, commas and newlines"""
+    body = b''.join(iter_export(iter(ROWS), COLUMNS, 'csv')).decode('utf-8')
+    records = list(csv.DictReader(io.StringIO(body)))
+
+    assert [r['comment_id'] for r in records] == ['1', '2']
+    assert records[0]['created_at'] == '2025-03-01T10:00:00'
+    assert records[1]['text'] == 'Línea uno,\nlínea dos'
+    print("✓ CSV export test passed")
+
+
+def test_ndjson_gzip_export():
+    """Gzipped NDJSON decompresses to one JSON object per row"""
+    body = gzip.decompress(b''.join(iter_export(iter(ROWS), COLUMNS, 'ndjson', gzip=True)))
+    records = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+    assert len(records) == 2
+    assert records[0]['text'] == 'Muy buen profesor, explica "todo"'
+    assert records[1]['created_at'] == '2025-03-02T11:30:00'
+    print("✓ NDJSON gzip export test passed")
+
+
+def test_export_is_chunked():
+    """Large exports are emitted in several chunks instead of one big string"""
+    rows = ({'comment_id': i, 'created_at': None, 'text': 'x' * 100} for i in range(5000))
+    chunks = list(iter_export(rows, COLUMNS, 'csv'))
+
+    assert len(chunks) > 1
+    print("✓ Chunked export test passed")
+
+
+if __name__ == '__main__':
+    test_csv_export()
+    test_ndjson_gzip_export()
+    test_export_is_chunked()
+    print("\n✅ All export tests passed!")
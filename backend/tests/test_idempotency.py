@@ -0,0 +1,71 @@
+"""
+Tests for the idempotency key cache
+Run with: python tests/test_idempotency.py (or pytest)
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.idempotency import IdempotencyCache
+
+
+def test_duplicates_wait_for_the_first_response():
+    """A repeat arriving while the first request runs gets its response, not a second run"""
+    cache = IdempotencyCache(ttl_seconds=60, wait_seconds=5)
+    assert cache.claim('k') == ('run', None)
+
+    results = []
+    duplicate = threading.Thread(target=lambda: results.append(cache.claim('k')))
+    duplicate.start()
+    time.sleep(0.05)
+    cache.finish('k', {'sentiment': 'positive'}, 200)
+    duplicate.join()
+
+    assert results == [('replay', ({'sentiment': 'positive'}, 200))]
+    assert cache.claim('k') == ('replay', ({'sentiment': 'positive'}, 200))
+    assert cache.replayed == 2
+    print("✓ Duplicate request test passed")
+
+
+def test_failures_and_expired_keys_run_again():
+    """Nothing is stored for a failed request, and stored responses expire"""
+    cache = IdempotencyCache(ttl_seconds=0.05, wait_seconds=0.05)
+    assert cache.claim('k') == ('run', None)
+    assert cache.claim('k') == ('busy', None)
+    cache.finish('k')
+    assert cache.claim('k') == ('run', None)
+    cache.finish('k', {'ok': True}, 200)
+    time.sleep(0.06)
+    assert cache.claim('k') == ('run', None)
+    print("✓ Failure and expiry test passed")
+
+
+def test_duplicate_runs_when_the_first_request_fails():
+    """A repeat that waited on a request which stored nothing runs instead of answering busy"""
+    cache = IdempotencyCache(ttl_seconds=60, wait_seconds=5)
+    assert cache.claim('k') == ('run', None)
+
+    results = []
+    duplicates = [threading.Thread(target=lambda: results.append(cache.claim('k'))) for _ in range(2)]
+    for duplicate in duplicates:
+        duplicate.start()
+    time.sleep(0.05)
+    cache.finish('k')  # e.g. a 500: nothing stored
+    time.sleep(0.05)
+    assert results == [('run', None)]
+
+    cache.finish('k', {'sentiment': 'negative'}, 200)
+    for duplicate in duplicates:
+        duplicate.join()
+    assert results == [('run', None), ('replay', ({'sentiment': 'negative'}, 200))]
+    print("✓ Failed first request test passed")
+
+
+if __name__ == '__main__':
+    test_duplicates_wait_for_the_first_response()
+    test_failures_and_expired_keys_run_again()
+    test_duplicate_runs_when_the_first_request_fails()
+    print("\n✅ All idempotency tests passed!")
@@ -0,0 +1,55 @@
+"""
+Tests for the CPU budget of sentiment inference
+Run with: python tests/test_inference_budget.py (or pytest)
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.inference_budget import InferenceBudget, InferenceBusy, plan_budget
+
+
+def test_cores_are_split_between_workers_and_passes():
+    """Each worker gets its share of the cores, divided between concurrent passes"""
+    assert plan_budget(8, workers=2, concurrency=2)['torch_threads'] == 2
+    assert plan_budget(8, workers=4)['torch_threads'] == 2
+    assert plan_budget(2, workers=4, concurrency=3)['torch_threads'] == 1
+    assert plan_budget(16, workers=2, threads=3)['torch_threads'] == 3
+    print("✓ Budget split test passed")
+
+
+def test_passes_queue_for_a_slot():
+    """A pass waits for a free slot and gives up after the queue timeout"""
+    budget = InferenceBudget()
+    budget.configure(cores=1, concurrency=1, queue_timeout=0.05)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with budget.slot():
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        with budget.slot():
+            assert False, 'the slot is taken'
+    except InferenceBusy:
+        pass
+    release.set()
+    thread.join()
+    with budget.slot():
+        pass
+
+    stats = budget.stats()
+    assert stats['passes'] == 2 and stats['timeouts'] == 1 and stats['waiting'] == 0
+    print("✓ Slot queueing test passed")
+
+
+if __name__ == '__main__':
+    test_cores_are_split_between_workers_and_passes()
+    test_passes_queue_for_a_slot()
+    print("\n✅ All inference budget tests passed!")
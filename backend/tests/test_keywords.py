@@ -0,0 +1,47 @@
+"""
+Tests for keyword extraction
+Run with: python tests/test_keywords.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.keywords import extract_terms
+
+
+def test_stopwords_and_punctuation_are_dropped():
+    """Only content words survive cleaning, counted per occurrence"""
+    terms = extract_terms('¡El profesor explica muy bien! Explica con ejemplos, de verdad.')
+
+    assert terms['explica'] == 2
+    assert 'muy' not in terms
+    assert 'el' not in terms
+    assert 'ejemplos' in terms
+    print("✓ Stopword test passed")
+
+
+def test_bigrams_keep_negations():
+    """Negations are not terms on their own but start bigrams"""
+    terms = extract_terms('No explica bien y nunca responde dudas')
+
+    assert 'no' not in terms
+    assert terms['no explica'] == 1
+    assert terms['nunca responde'] == 1
+    assert terms['responde dudas'] == 1
+    assert 'explica bien' not in terms  # "bien" is a stop word
+    print("✓ Bigram test passed")
+
+
+def test_empty_comment_has_no_terms():
+    """Comments made only of stop words or numbers produce nothing"""
+    assert not extract_terms('')
+    assert not extract_terms('es muy 10 de 10')
+    print("✓ Empty comment test passed")
+
+
+if __name__ == '__main__':
+    test_stopwords_and_punctuation_are_dropped()
+    test_bigrams_keep_negations()
+    test_empty_comment_has_no_terms()
+    print("\n✅ All keyword tests passed!")
@@ -0,0 +1,68 @@
+"""
+Tests for the lexicon first stage of the sentiment cascade
+Run with: python tests/test_lexicon.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.lexicon import lexicon_score
+from app.utils.sentiment_classifier import SentimentClassifier
+
+
+def score(comment_text):
+    return lexicon_score(SentimentClassifier.clean_text(comment_text))
+
+
+def test_clear_short_comments_are_answered():
+    """Unambiguous verdicts get a polarity, intensifiers raise the confidence"""
+    assert score('Excelente profesor')[0] == 'positive'
+    assert score('Pesimo maestro')[0] == 'negative'
+    assert score('El mejor profesor de la carrera')[0] == 'positive'
+    assert score('Es la peor maestra')[0] == 'negative'
+    assert score('Muy malo')[1] > score('Malo')[1]
+    print("✓ Clear comment test passed")
+
+
+def test_unclear_comments_abstain():
+    """Mixed, contrasted, negated, neutral and long comments fall through to the model"""
+    assert score('Bueno pero aburrido') is None
+    assert score('Es buena aunque impuntual') is None
+    assert score('No es malo') is None
+    assert score('No lo recomiendo') is None
+    assert score('Sin duda el mejor profesor') is None
+    assert score('Sin duda excelente') is None
+    assert score('No hay mejor maestro') is None
+    assert score('No hay nadie mejor') is None
+    assert score('Nunca falta, excelente') is None
+    assert score('Podría ser mejor') is None
+    assert score('Ojalá fuera mejor') is None
+    assert score('Mejor busquen otro profesor') is None
+    assert score('Mejor ni lo tomen') is None
+    assert score('Nada recomendado') is None
+    assert score('Para nada recomendado') is None
+    assert score('Llega a tiempo a clase') is None
+    assert score('excelente ' * 20) is None
+    print("✓ Abstention test passed")
+
+
+def test_cascade_answers_without_the_model():
+    """Above the threshold the classifier returns the lexicon answer and counts it"""
+    SentimentClassifier._cascade_threshold = 0.85
+    try:
+        before = SentimentClassifier.cascade_stats()['lexicon']
+        sentiment, confidence, probabilities = SentimentClassifier.classify('¡Excelente profesor!')
+        assert sentiment == 'positive' and confidence >= 0.85
+        assert abs(sum(probabilities.values()) - 1.0) < 1e-9
+        assert SentimentClassifier.cascade_stats()['lexicon'] == before + 1
+    finally:
+        SentimentClassifier._cascade_threshold = None
+    print("✓ Cascade short-circuit test passed")
+
+
+if __name__ == '__main__':
+    test_clear_short_comments_are_answered()
+    test_unclear_comments_abstain()
+    test_cascade_answers_without_the_model()
+    print("\n✅ All lexicon tests passed!")
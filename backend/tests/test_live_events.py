@@ -0,0 +1,52 @@
+"""
+Tests for live dashboard event streams
+Run with: python tests/test_live_events.py (or pytest)
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.live_events import LiveEvents, Subscription, format_event
+
+
+def test_subscription_filters_and_overflow():
+    """Professor streams only get their events; a full queue turns into one resync"""
+    event = {'type': 'survey_completed', 'professor_id': 2, 'department': 'Math', 'sentiment': 'positive'}
+    assert Subscription().matches(event)
+    assert Subscription(professor_id=2).matches(event)
+    assert not Subscription(professor_id=3).matches(event)
+    assert not Subscription(department='Physics').matches(event)
+    assert Subscription(professor_id=3).matches({'type': 'resync'})
+
+    subscription = Subscription(queue_size=2)
+    assert subscription.offer(event) and subscription.offer(event)
+    assert not subscription.offer(event)
+    assert subscription.next_event(timeout=0) == {'type': 'resync'}
+    assert subscription.next_event(timeout=0) is None
+    print("✓ Subscription filter test passed")
+
+
+def test_stream_frames():
+    """The stream sends the retry delay, the events, keep-alives, then ends and unsubscribes"""
+    live_events = LiveEvents()
+    live_events.heartbeat_seconds = 0.02
+    live_events.stream_seconds = 0.1
+    subscription = Subscription()
+    subscription.offer({'type': 'survey_completed', 'professor_id': 2})
+
+    frames = list(live_events.stream(subscription))
+    assert frames[0].startswith('retry: 3000\n')
+    assert frames[1] == format_event({'type': 'survey_completed', 'professor_id': 2})
+    assert frames[1].startswith('event: survey_completed\ndata: ')
+    assert json.loads(frames[1].split('data: ')[1]) == {'type': 'survey_completed', 'professor_id': 2}
+    assert len(frames) > 2 and all(frame == ': keep-alive\n\n' for frame in frames[2:])
+    assert live_events.stats()['streams'] == 0
+    print("✓ Stream frames test passed")
+
+
+if __name__ == '__main__':
+    test_subscription_filters_and_overflow()
+    test_stream_frames()
+    print("\n✅ All live events tests passed!")
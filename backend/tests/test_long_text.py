@@ -0,0 +1,55 @@
+"""
+Tests for the sliding-window handling of long comments
+Run with: python tests/test_long_text.py (or pytest)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import torch
+
+from app.utils.sentiment_classifier import SentimentClassifier
+
+
+def test_windows_cover_the_whole_text():
+    """Windows overlap, start at 0 and the last one ends at the end of the text"""
+    assert SentimentClassifier.window_starts(150, 190, 48, 4) == [0]
+    assert SentimentClassifier.window_starts(300, 190, 48, 4) == [0, 110]
+
+    starts = SentimentClassifier.window_starts(500, 190, 48, 8)
+    assert starts[0] == 0 and starts[-1] + 190 == 500
+    assert all(later - earlier <= 190 - 48 for earlier, later in zip(starts, starts[1:]))
+    print("✓ Window coverage test passed")
+
+
+def test_window_budget_keeps_first_and_last():
+    """Past the window cap, evenly spaced windows are kept including both ends"""
+    starts = SentimentClassifier.window_starts(5000, 190, 48, 4)
+    assert len(starts) == 4
+    assert starts[0] == 0 and starts[-1] == 5000 - 190
+    assert SentimentClassifier.window_starts(5000, 190, 48, 1) == [0]
+    print("✓ Window budget test passed")
+
+
+def test_aggregation_strategies():
+    """mean, length-weighted and max_negative combine window probabilities differently"""
+    labels = ['BUENO', 'MALO', 'REGULAR']
+    probs = torch.tensor([[0.8, 0.1, 0.1], [0.8, 0.1, 0.1], [0.2, 0.7, 0.1]])
+    lengths = torch.tensor([190.0, 190.0, 20.0])
+
+    mean = SentimentClassifier._aggregate(probs, lengths, 'mean', labels)
+    weighted = SentimentClassifier._aggregate(probs, lengths, 'weighted', labels)
+    worst = SentimentClassifier._aggregate(probs, lengths, 'max_negative', labels)
+
+    assert torch.allclose(mean, torch.tensor([0.6, 0.3, 0.1]))
+    assert weighted[1] < mean[1]
+    assert torch.allclose(worst, probs[2])
+    print("✓ Aggregation strategy test passed")
+
+
+if __name__ == '__main__':
+    test_windows_cover_the_whole_text()
+    test_window_budget_keeps_first_and_last()
+    test_aggregation_strategies()
+    print("\n✅ All long comment tests passed!")
@@ -0,0 +1,102 @@
+"""
+Tests for the versioned model registry
+Run with: python tests/test_model_registry.py (or pytest)
+"""
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils import model_registry
+from app.utils.lexicon import LEXICON_VERSION
+from app.utils.sentiment_classifier import SentimentClassifier
+from app.utils.shadow_scoring import ShadowScorer
+
+
+def make_version(registry_dir, name):
+    os.makedirs(os.path.join(registry_dir, name))
+    with open(os.path.join(registry_dir, name, 'config.json'), 'w') as f:
+        f.write('{}')
+
+
+def test_version_names_are_validated():
+    """Only registered versions with safe names resolve to a directory"""
+    with tempfile.TemporaryDirectory() as registry_dir:
+        make_version(registry_dir, 'beto-2025.1')
+        os.makedirs(os.path.join(registry_dir, 'empty'))
+
+        assert model_registry.version_path(registry_dir, 'beto-2025.1') == os.path.join(registry_dir, 'beto-2025.1')
+        for bad in ('../final_model', 'empty', 'missing', '', None, '.hidden'):
+            try:
+                model_registry.version_path(registry_dir, bad)
+                assert False, f'{bad!r} should be rejected'
+            except ValueError:
+                pass
+        assert [entry['version'] for entry in model_registry.list_versions(registry_dir)] == ['beto-2025.1']
+    print("✓ Version validation test passed")
+
+
+def test_state_updates_keep_other_keys():
+    """registry.json updates merge, and a missing file reads as empty"""
+    with tempfile.TemporaryDirectory() as registry_dir:
+        assert model_registry.read_state(registry_dir) == {}
+        model_registry.write_state(registry_dir, active='v1')
+        model_registry.write_state(registry_dir, shadow={'version': 'v2', 'sample_rate': 0.1})
+        state = model_registry.read_state(registry_dir)
+
+        assert state['active'] == 'v1' and state['shadow']['version'] == 'v2'
+        assert sorted(os.listdir(registry_dir)) == ['registry.json']
+    print("✓ Registry state test passed")
+
+
+
+def test_fingerprint_follows_weights():
+    """The stamp changes with the weights, not with files that do not affect results"""
+    with tempfile.TemporaryDirectory() as registry_dir:
+        make_version(registry_dir, 'v1')
+        path = os.path.join(registry_dir, 'v1')
+        with open(os.path.join(path, 'model.safetensors'), 'wb') as f:
+            f.write(b'\x00' * 1024)
+        first = SentimentClassifier.model_fingerprint(path)
+
+        with open(os.path.join(path, 'distillation_report.json'), 'w') as f:
+            f.write('{}')
+        assert SentimentClassifier.model_fingerprint(path) == first
+
+        with open(os.path.join(path, 'model.safetensors'), 'wb') as f:
+            f.write(b'\x01' * 1024)
+        assert SentimentClassifier.model_fingerprint(path) != first
+    print("✓ Model fingerprint test passed")
+
+
+def test_shadow_scoring_compares_only_model_results():
+    """Lexicon answers and fallbacks are not queued as the active model's labels"""
+    scorer = ShadowScorer()
+    scorer.registry_dir = 'registry'
+    scorer.poll_seconds = 3600
+    scorer._settings = {'version': 'v2', 'sample_rate': 1.0}
+    scorer._checked_at = time.monotonic()
+    scorer._queue = queue.Queue()
+    scorer._ensure_worker = lambda: None
+
+    original_status = SentimentClassifier.model_status
+    SentimentClassifier.model_status = classmethod(lambda cls: {'loaded_version': 'v1', 'loaded_stamp': 'v1@abc'})
+    try:
+        assert not scorer.submit('Excelente profesor', 'positive', 0.875, LEXICON_VERSION)
+        assert not scorer.submit('Explica bien los temas', 'neutral', 0.5, None)
+        assert scorer.submit('Explica bien los temas', 'positive', 0.9, 'v1@abc')
+    finally:
+        SentimentClassifier.model_status = original_status
+    assert scorer._queue.get_nowait() == ('v2', 'v1', 'Explica bien los temas', 'positive', 0.9)
+    assert scorer._queue.empty()
+    print("✓ Shadow scoring source test passed")
+
+if __name__ == '__main__':
+    test_version_names_are_validated()
+    test_state_updates_keep_other_keys()
+    test_fingerprint_follows_weights()
+    test_shadow_scoring_compares_only_model_results()
+    print("\n✅ All model registry tests passed!")
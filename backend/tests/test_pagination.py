@@ -0,0 +1,69 @@
+"""
+Tests for keyset pagination helpers
+Run with: python tests/test_pagination.py (or pytest)
+"""
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.pagination import (
+    encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, parse_limit, parse_date_arg
+)
+
+
+def test_cursor_round_trip():
+    """A cursor decodes back to the same (created_at, id) key"""
+    created_at = datetime(2025, 3, 14, 9, 26, 53, 589793)
+    cursor = encode_cursor(created_at, 42)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    """Garbage cursors raise ValueError instead of reaching the query"""
+    for cursor in ['zzz', 'bm90IGpzb24', encode_cursor(datetime(2025, 1, 1), 1)[:-3]]:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            continue
+        assert False, f'cursor {cursor!r} should be rejected'
+
+
+def test_rank_cursor_round_trip():
+    """Search cursors keep the exact float rank so the next page starts right after it"""
+    rank = 0.06079271
+    assert decode_rank_cursor(encode_rank_cursor(rank, 7)) == (rank, 7)
+    try:
+        decode_rank_cursor(encode_cursor(datetime(2025, 1, 1), 1))
+    except ValueError:
+        pass
+    else:
+        assert False, 'a date cursor is not a rank cursor'
+
+
+def test_parse_limit_is_clamped():
+    """Page sizes fall back to the default and stay within bounds"""
+    assert parse_limit(None, default=50) == 50
+    assert parse_limit('0') == 1
+    assert parse_limit('1000', maximum=200) == 200
+    assert parse_limit('25') == 25
+
+
+def test_date_upper_bound_includes_whole_day():
+    """A bare date used as upper bound covers that entire day"""
+    assert parse_date_arg('2025-05-01') == datetime(2025, 5, 1)
+    assert parse_date_arg('2025-05-01', end_of_day=True) == datetime(2025, 5, 2)
+    assert parse_date_arg('2025-05-01T10:30:00', end_of_day=True) == datetime(2025, 5, 1, 10, 30)
+    assert parse_date_arg('') is None
+
+
+if __name__ == '__main__':
+    test_cursor_round_trip()
+    test_invalid_cursor_is_rejected()
+    test_rank_cursor_round_trip()
+    test_parse_limit_is_clamped()
+    test_date_upper_bound_includes_whole_day()
+    print("✅ All pagination tests passed!")
@@ -0,0 +1,49 @@
+"""
+Tests for the in-process response cache backend
+Run with: python tests/test_response_cache.py (or pytest)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.response_cache import MemoryCacheBackend
+
+
+def test_tag_invalidation_and_lru():
+    """Invalidating a tag drops only the entries built from it; the least recently used entry goes first"""
+    backend = MemoryCacheBackend(max_entries=2)
+    started = time.time()
+    assert backend.set('a', {'n': 1}, 200, {'professor:2', 'subjects'}, 60, started)
+    assert backend.set('b', {'n': 2}, 200, {'professor:3'}, 60, started)
+    assert backend.get('a') == ({'n': 1}, 200)
+
+    assert backend.set('c', {'n': 3}, 200, {'professor:3'}, 60, started)
+    assert backend.get('b') is None  # least recently used
+    assert backend.size() == 2
+
+    assert backend.invalidate({'professor:3'}) == 1
+    assert backend.get('c') is None
+    assert backend.get('a') == ({'n': 1}, 200)
+    print("✓ Tag invalidation and LRU test passed")
+
+
+def test_expiry_and_stale_store():
+    """Entries expire after their TTL; a response computed before an invalidation is not stored"""
+    backend = MemoryCacheBackend()
+    assert backend.set('a', {}, 200, {'groups'}, 0, time.time())
+    assert backend.get('a') is None
+
+    started = time.time()
+    backend.invalidate({'student:4'})
+    assert not backend.set('b', {}, 200, {'student:4', 'period:2025-2'}, 60, started)
+    assert backend.get('b') is None
+    assert backend.set('b', {}, 200, {'student:4', 'period:2025-2'}, 60, time.time() + 1)
+    print("✓ Expiry and stale store test passed")
+
+
+if __name__ == '__main__':
+    test_tag_invalidation_and_lru()
+    test_expiry_and_stale_store()
+    print("\n✅ All response cache tests passed!")
@@ -0,0 +1,73 @@
+"""
+Tests for the dashboard snapshot cache
+Run with: python tests/test_snapshot_cache.py (or pytest)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.snapshot_cache import SnapshotCache
+
+
+def test_first_read_computes_and_fresh_reads_are_cached():
+    """The first read computes the value, later reads within the TTL reuse it"""
+    calls = []
+    cache = SnapshotCache(ttl_seconds=60)
+
+    def compute():
+        calls.append(1)
+        return {'total': len(calls)}
+
+    value, computed_at = cache.get('stats', compute)
+    again, again_at = cache.get('stats', compute)
+
+    assert value == {'total': 1}
+    assert again == value
+    assert again_at == computed_at
+    assert len(calls) == 1
+
+
+def test_stale_read_serves_old_value_and_refreshes_in_background():
+    """A stale snapshot is returned immediately while a new one is computed"""
+    calls = []
+    cache = SnapshotCache(ttl_seconds=0)
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get('stats', compute)[0] == 1
+    # Stale: still returns the old value
+    assert cache.get('stats', compute)[0] == 1
+
+    deadline = time.time() + 2
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+    assert len(calls) == 2
+    assert cache.get('stats', compute)[0] == 2
+
+
+def test_invalidate_forces_recompute():
+    """Invalidated snapshots are recomputed on the next read"""
+    calls = []
+    cache = SnapshotCache(ttl_seconds=60)
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    cache.get('stats', compute)
+    cache.invalidate('stats')
+
+    assert cache.get('stats', compute)[0] == 2
+
+
+if __name__ == '__main__':
+    test_first_read_computes_and_fresh_reads_are_cached()
+    test_stale_read_serves_old_value_and_refreshes_in_background()
+    test_invalidate_forces_recompute()
+    print("✅ All snapshot cache tests passed!")
@@ -0,0 +1,57 @@
+"""
+Tests for survey submission guards
+Run with: python tests/test_survey_submission.py (or pytest)
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import jwt
+from flask import Flask
+
+from app.config import Config
+from app.models import db, User, Survey, EvaluationPeriod
+from app.routes.student import student_bp
+
+
+def make_app(period_status):
+    """Student routes on an in-memory database with one pending survey in a period"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(student_bp)
+    with app.app_context():
+        for model in (User, EvaluationPeriod, Survey):
+            model.__table__.create(db.engine)
+        db.session.add(User(id=3, first_name='Ana', last_name='Ruiz', role='student',
+                            matricula='A01700002', password_hash='x'))
+        db.session.add(EvaluationPeriod(code='2025-2', starts_on=date(2025, 8, 1), ends_on=date(2025, 12, 15),
+                                        status=period_status))
+        db.session.add(Survey(id=5, student_id=3, professor_id=2, subject_id=3, period='2025-2', status='pending'))
+        db.session.commit()
+    return app
+
+
+def test_closed_period_rejects_submissions():
+    """A survey of a closed or archived period cannot be submitted: 409, and it stays pending"""
+    token = jwt.encode({'user_id': 3, 'role': 'student', 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       Config.SECRET_KEY, algorithm='HS256')
+    for status in ('closed', 'archived'):
+        app = make_app(status)
+        response = app.test_client().post(
+            '/api/student/surveys/5/submit',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'answers': {'q1': 5}, 'comment': 'Explica muy bien y es puntual'}
+        )
+        assert response.status_code == 409
+        assert response.get_json()['error'] == 'Evaluation period 2025-2 is closed'
+        with app.app_context():
+            assert db.session.get(Survey, 5).status == 'pending'
+    print("✓ Closed period rejection test passed")
+
+
+if __name__ == '__main__':
+    test_closed_period_rejects_submissions()
+    print("\n✅ All survey submission tests passed!")
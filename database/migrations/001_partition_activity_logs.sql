@@ -0,0 +1,79 @@
+-- ============================================
+-- MIGRATION 001 - Monthly partitions for activity_logs
+-- Converts an existing activity_logs table (schema.sql before partitioning)
+-- into a table range partitioned by month on created_at.
+-- Run once with: psql -d uaem_evaluation -f 001_partition_activity_logs.sql
+-- ============================================
+BEGIN;
+
+-- Same helper as in schema.sql
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent_table TEXT, from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= date_trunc('month', to_month)::date LOOP
+        partition_name := format('%s_%s', parent_table, to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, parent_table, month_start, (month_start + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep the old rows aside while the partitioned table is built
+ALTER TABLE activity_logs RENAME TO activity_logs_legacy;
+ALTER INDEX IF EXISTS activity_logs_pkey RENAME TO activity_logs_legacy_pkey;
+-- Free the constraint names for the new table (rows were already validated)
+ALTER TABLE activity_logs_legacy DROP CONSTRAINT IF EXISTS activity_logs_user_id_fkey;
+ALTER TABLE activity_logs_legacy DROP CONSTRAINT IF EXISTS activity_logs_user_type_check;
+DROP INDEX IF EXISTS idx_activity_logs_user_id;
+DROP INDEX IF EXISTS idx_activity_logs_user_type;
+DROP INDEX IF EXISTS idx_activity_logs_action_type;
+DROP INDEX IF EXISTS idx_activity_logs_created_at;
+
+CREATE TABLE activity_logs (
+    id INTEGER NOT NULL DEFAULT nextval('activity_logs_id_seq'),
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    user_type VARCHAR(20) NOT NULL CHECK (user_type IN ('admin', 'professor', 'student')),
+    action_type VARCHAR(50) NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    target_id INTEGER,
+    target_type VARCHAR(50),
+    ip_address VARCHAR(45),
+    user_agent VARCHAR(255),
+    extra_data JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id;
+
+CREATE INDEX idx_activity_logs_created_at_id ON activity_logs(created_at DESC, id DESC);
+CREATE INDEX idx_activity_logs_user_created ON activity_logs(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_activity_logs_action_created ON activity_logs(action_type, created_at DESC, id DESC);
+CREATE INDEX idx_activity_logs_user_type ON activity_logs(user_type);
+
+-- One partition per month from the oldest row up to three months ahead
+SELECT ensure_monthly_partitions(
+    'activity_logs',
+    COALESCE((SELECT MIN(created_at)::date FROM activity_logs_legacy), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO activity_logs (id, user_id, user_type, action_type, description, target_id, target_type,
+                           ip_address, user_agent, extra_data, created_at)
+SELECT id, user_id, user_type, action_type, description, target_id, target_type,
+       ip_address, user_agent, extra_data, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM activity_logs_legacy;
+
+DROP TABLE activity_logs_legacy;
+
+COMMENT ON TABLE activity_logs IS 'System activity audit log, range partitioned by month on created_at';
+
+COMMIT;
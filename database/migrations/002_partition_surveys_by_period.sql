@@ -0,0 +1,185 @@
+-- ============================================
+-- MIGRATION 002 - Evaluation periods and period partitioned surveys/comments
+-- Adds evaluation_periods and period_aggregates, then rebuilds surveys and comments
+-- as LIST partitioned tables on the new period column. Existing rows get the
+-- semester of their created_at; every period except the current one is left 'closed'
+-- so it can be archived with: flask --app run.py periods archive <code>
+-- Run once with: psql -d uaem_evaluation -f 002_partition_surveys_by_period.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE evaluation_periods (
+    code VARCHAR(20) PRIMARY KEY,
+    starts_on DATE NOT NULL,
+    ends_on DATE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open' CHECK (status IN ('open', 'closed', 'archived')),
+    archive_path VARCHAR(255),
+    archived_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_evaluation_periods_status ON evaluation_periods(status);
+
+CREATE OR REPLACE FUNCTION period_for_date(ts TIMESTAMP)
+RETURNS VARCHAR AS $$
+    SELECT to_char(ts, 'YYYY') || '-' || CASE WHEN EXTRACT(MONTH FROM ts) <= 6 THEN '1' ELSE '2' END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- The view depends on surveys; it is recreated unchanged at the end
+DROP VIEW IF EXISTS student_survey_progress;
+
+-- Move the old tables aside and free their constraint/index names
+ALTER TABLE comments RENAME TO comments_legacy;
+ALTER TABLE surveys RENAME TO surveys_legacy;
+ALTER TABLE comments_legacy DROP CONSTRAINT IF EXISTS comments_survey_id_fkey;
+ALTER TABLE comments_legacy DROP CONSTRAINT IF EXISTS comments_pkey;
+ALTER TABLE comments_legacy DROP CONSTRAINT IF EXISTS comments_sentiment_check;
+ALTER TABLE comments_legacy DROP CONSTRAINT IF EXISTS comments_confidence_score_check;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS surveys_pkey;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS unique_student_professor_subject;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS surveys_student_id_fkey;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS surveys_professor_id_fkey;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS surveys_subject_id_fkey;
+ALTER TABLE surveys_legacy DROP CONSTRAINT IF EXISTS surveys_status_check;
+DROP INDEX IF EXISTS idx_surveys_student_id;
+DROP INDEX IF EXISTS idx_surveys_professor_id;
+DROP INDEX IF EXISTS idx_surveys_subject_id;
+DROP INDEX IF EXISTS idx_surveys_status;
+DROP INDEX IF EXISTS idx_comments_survey_id;
+DROP INDEX IF EXISTS idx_comments_sentiment;
+
+CREATE TABLE surveys (
+    id INTEGER NOT NULL DEFAULT nextval('surveys_id_seq'),
+    student_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    period VARCHAR(20) NOT NULL DEFAULT period_for_date(CURRENT_TIMESTAMP::timestamp) REFERENCES evaluation_periods(code),
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'cancelled')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP,
+    PRIMARY KEY (id, period),
+    CONSTRAINT unique_student_professor_subject UNIQUE (student_id, professor_id, subject_id, period)
+) PARTITION BY LIST (period);
+ALTER SEQUENCE surveys_id_seq OWNED BY surveys.id;
+CREATE INDEX idx_surveys_student_id ON surveys(student_id);
+CREATE INDEX idx_surveys_professor_id ON surveys(professor_id);
+CREATE INDEX idx_surveys_subject_id ON surveys(subject_id);
+CREATE INDEX idx_surveys_status ON surveys(status);
+
+CREATE TABLE comments (
+    id INTEGER NOT NULL DEFAULT nextval('comments_id_seq'),
+    survey_id INTEGER NOT NULL,
+    period VARCHAR(20) NOT NULL,
+    text TEXT NOT NULL,
+    sentiment VARCHAR(20) CHECK (sentiment IN ('positive', 'negative', 'neutral')),
+    confidence_score FLOAT CHECK (confidence_score >= 0 AND confidence_score <= 1),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, period),
+    FOREIGN KEY (survey_id, period) REFERENCES surveys(id, period) ON DELETE CASCADE
+) PARTITION BY LIST (period);
+ALTER SEQUENCE comments_id_seq OWNED BY comments.id;
+CREATE INDEX idx_comments_survey_id ON comments(survey_id);
+CREATE INDEX idx_comments_sentiment ON comments(sentiment);
+
+CREATE OR REPLACE FUNCTION ensure_period_partitions(period_code VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    suffix TEXT := regexp_replace(period_code, '[^0-9A-Za-z]', '_', 'g');
+BEGIN
+    IF to_regclass('surveys_' || suffix) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF surveys FOR VALUES IN (%L)', 'surveys_' || suffix, period_code);
+    END IF;
+    IF to_regclass('comments_' || suffix) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF comments FOR VALUES IN (%L)', 'comments_' || suffix, period_code);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION create_period_partitions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ensure_period_partitions(NEW.code);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER evaluation_periods_create_partitions AFTER INSERT ON evaluation_periods
+    FOR EACH ROW EXECUTE FUNCTION create_period_partitions();
+
+CREATE OR REPLACE FUNCTION ensure_evaluation_period(period_code VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    period_year INTEGER := split_part(period_code, '-', 1)::integer;
+    half INTEGER := split_part(period_code, '-', 2)::integer;
+BEGIN
+    INSERT INTO evaluation_periods (code, starts_on, ends_on)
+    VALUES (period_code,
+            make_date(period_year, CASE WHEN half = 1 THEN 1 ELSE 7 END, 1),
+            make_date(period_year, CASE WHEN half = 1 THEN 6 ELSE 12 END, CASE WHEN half = 1 THEN 30 ELSE 31 END))
+    ON CONFLICT (code) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Register every period present in the data plus the current one (creates the partitions)
+SELECT ensure_evaluation_period(code)
+FROM (
+    SELECT DISTINCT period_for_date(COALESCE(created_at, CURRENT_TIMESTAMP)::timestamp) AS code FROM surveys_legacy
+    UNION
+    SELECT period_for_date(CURRENT_TIMESTAMP::timestamp)
+) periods;
+UPDATE evaluation_periods SET status = 'closed' WHERE code <> period_for_date(CURRENT_TIMESTAMP::timestamp);
+
+INSERT INTO surveys (id, student_id, professor_id, subject_id, period, status, created_at, completed_at)
+SELECT id, student_id, professor_id, subject_id,
+       period_for_date(COALESCE(created_at, CURRENT_TIMESTAMP)::timestamp),
+       status, created_at, completed_at
+FROM surveys_legacy;
+
+INSERT INTO comments (id, survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT c.id, c.survey_id, s.period, c.text, c.sentiment, c.confidence_score, c.created_at
+FROM comments_legacy c
+JOIN surveys s ON s.id = c.survey_id;
+
+DROP TABLE comments_legacy;
+DROP TABLE surveys_legacy;
+
+CREATE TABLE period_aggregates (
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL,
+    total_surveys INTEGER NOT NULL DEFAULT 0,
+    completed_surveys INTEGER NOT NULL DEFAULT 0,
+    total_comments INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_confidence FLOAT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (period, professor_id, subject_id)
+);
+CREATE INDEX idx_period_aggregates_professor ON period_aggregates(professor_id);
+
+CREATE OR REPLACE VIEW student_survey_progress AS
+SELECT
+    st.id AS student_id,
+    st.matricula,
+    u.first_name || ' ' || u.last_name AS student_name,
+    st.semester,
+    st.career,
+    COUNT(DISTINCT ss.subject_id) AS total_enrolled_subjects,
+    COUNT(DISTINCT CASE WHEN sv.status = 'completed' THEN sv.id END) AS completed_surveys,
+    COUNT(DISTINCT CASE WHEN sv.status = 'pending' THEN sv.id END) AS pending_surveys,
+    st.has_completed_survey,
+    st.survey_completed_at
+FROM students st
+INNER JOIN users u ON u.id = st.user_id
+LEFT JOIN student_subjects ss ON ss.student_id = st.id
+LEFT JOIN surveys sv ON sv.student_id = u.id
+WHERE st.status = 'active'
+GROUP BY st.id, st.matricula, u.first_name, u.last_name, st.semester, st.career,
+         st.has_completed_survey, st.survey_completed_at;
+
+COMMENT ON TABLE evaluation_periods IS 'Evaluation periods (semesters); open -> closed -> archived';
+COMMENT ON TABLE surveys IS 'Student surveys/evaluations of professors, list partitioned by period';
+COMMENT ON TABLE comments IS 'Survey comments with sentiment analysis, list partitioned by period';
+COMMENT ON TABLE period_aggregates IS 'Per period professor/subject sentiment summary, survives archiving';
+
+COMMIT;
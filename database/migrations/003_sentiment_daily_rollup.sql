@@ -0,0 +1,110 @@
+-- ============================================
+-- MIGRATION 003 - Daily sentiment rollup for trend charts
+-- Adds sentiment_daily, the triggers that keep it current as comments are written,
+-- and backfills it from the existing comments.
+-- Run once with: psql -d uaem_evaluation -f 003_sentiment_daily_rollup.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE sentiment_daily (
+    day DATE NOT NULL,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,  -- users.id, same as surveys.professor_id
+    subject_id INTEGER NOT NULL,
+    department VARCHAR(100),
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum FLOAT NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, period, professor_id, subject_id)
+);
+CREATE INDEX idx_sentiment_daily_professor ON sentiment_daily(professor_id, day);
+CREATE INDEX idx_sentiment_daily_subject ON sentiment_daily(subject_id, day);
+CREATE INDEX idx_sentiment_daily_department ON sentiment_daily(department, day);
+CREATE INDEX idx_sentiment_daily_period ON sentiment_daily(period);
+
+-- Add (delta = 1) or remove (delta = -1) one comment from its day's rollup row
+CREATE OR REPLACE FUNCTION bump_sentiment_daily(p_survey_id INTEGER, p_period VARCHAR, p_created_at TIMESTAMP,
+                                                p_sentiment VARCHAR, p_confidence FLOAT, delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO sentiment_daily AS d (day, period, professor_id, subject_id, department,
+                                      positive_count, neutral_count, negative_count, total_count,
+                                      confidence_sum, confidence_count)
+    SELECT COALESCE(p_created_at, CURRENT_TIMESTAMP)::date, s.period, s.professor_id, s.subject_id, p.department,
+           CASE WHEN p_sentiment = 'positive' THEN delta ELSE 0 END,
+           CASE WHEN p_sentiment = 'neutral' THEN delta ELSE 0 END,
+           CASE WHEN p_sentiment = 'negative' THEN delta ELSE 0 END,
+           delta,
+           COALESCE(p_confidence, 0) * delta,
+           CASE WHEN p_confidence IS NULL THEN 0 ELSE delta END
+    FROM surveys s
+    LEFT JOIN professors p ON p.user_id = s.professor_id
+    WHERE s.id = p_survey_id AND s.period = p_period
+    ON CONFLICT (day, period, professor_id, subject_id) DO UPDATE SET
+        positive_count = d.positive_count + EXCLUDED.positive_count,
+        neutral_count = d.neutral_count + EXCLUDED.neutral_count,
+        negative_count = d.negative_count + EXCLUDED.negative_count,
+        total_count = d.total_count + EXCLUDED.total_count,
+        confidence_sum = d.confidence_sum + EXCLUDED.confidence_sum,
+        confidence_count = d.confidence_count + EXCLUDED.confidence_count,
+        department = EXCLUDED.department,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION comments_update_sentiment_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_sentiment_daily(OLD.survey_id, OLD.period, OLD.created_at, OLD.sentiment, OLD.confidence_score, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_sentiment_daily(NEW.survey_id, NEW.period, NEW.created_at, NEW.sentiment, NEW.confidence_score, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER comments_sentiment_daily AFTER INSERT OR DELETE OR UPDATE OF sentiment, confidence_score, created_at
+    ON comments FOR EACH ROW EXECUTE FUNCTION comments_update_sentiment_daily();
+
+-- A survey's comments are cascade-deleted after the survey row is gone, when the comment
+-- trigger can no longer resolve the professor/subject, so subtract them here first
+CREATE OR REPLACE FUNCTION surveys_remove_sentiment_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_sentiment_daily(c.survey_id, c.period, c.created_at, c.sentiment, c.confidence_score, -1)
+    FROM comments c
+    WHERE c.survey_id = OLD.id AND c.period = OLD.period;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_sentiment_daily BEFORE DELETE ON surveys
+    FOR EACH ROW EXECUTE FUNCTION surveys_remove_sentiment_daily();
+
+INSERT INTO sentiment_daily (day, period, professor_id, subject_id, department,
+                             positive_count, neutral_count, negative_count, total_count,
+                             confidence_sum, confidence_count)
+SELECT
+    COALESCE(c.created_at, CURRENT_TIMESTAMP)::date,
+    c.period,
+    s.professor_id,
+    s.subject_id,
+    MAX(p.department),
+    COUNT(*) FILTER (WHERE c.sentiment = 'positive'),
+    COUNT(*) FILTER (WHERE c.sentiment = 'neutral'),
+    COUNT(*) FILTER (WHERE c.sentiment = 'negative'),
+    COUNT(*),
+    COALESCE(SUM(c.confidence_score), 0),
+    COUNT(c.confidence_score)
+FROM comments c
+JOIN surveys s ON s.id = c.survey_id AND s.period = c.period
+LEFT JOIN professors p ON p.user_id = s.professor_id
+GROUP BY 1, 2, 3, 4;
+
+COMMENT ON TABLE sentiment_daily IS 'Daily sentiment counts per professor/subject, maintained by triggers on comments';
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- ============================================
+-- MIGRATION 004 - Composite indexes for the professor comment feed
+-- Replaces the single column surveys(professor_id) and comments(survey_id) indexes,
+-- which are prefixes of the new ones.
+-- Indexes on partitioned tables cannot be built CONCURRENTLY; run outside peak hours.
+-- Run once with: psql -d uaem_evaluation -f 004_comment_feed_indexes.sql
+-- ============================================
+BEGIN;
+
+CREATE INDEX idx_surveys_professor_status ON surveys(professor_id, status, completed_at DESC);
+CREATE INDEX idx_comments_survey_sentiment ON comments(survey_id, sentiment, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_surveys_professor_id;
+DROP INDEX IF EXISTS idx_comments_survey_id;
+
+COMMIT;
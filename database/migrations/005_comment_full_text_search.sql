@@ -0,0 +1,21 @@
+-- ============================================
+-- MIGRATION 005 - Spanish full-text search over comments
+-- Adds the spanish_unaccent text search configuration, a stored search_vector column
+-- and its GIN index. Adding the generated column rewrites every comments partition.
+-- Requires the unaccent extension (shipped with PostgreSQL contrib).
+-- Run once with: psql -d uaem_evaluation -f 005_comment_full_text_search.sql
+-- ============================================
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE TEXT SEARCH DICTIONARY spanish_stem_nostop (TEMPLATE = snowball, Language = spanish);
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR asciiword, asciihword, hword_asciipart, word, hword, hword_part
+    WITH unaccent, spanish_stem_nostop;
+
+ALTER TABLE comments
+    ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('spanish_unaccent', text)) STORED;
+CREATE INDEX idx_comments_search ON comments USING GIN (search_vector);
+
+COMMIT;
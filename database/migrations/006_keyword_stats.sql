@@ -0,0 +1,27 @@
+-- ============================================
+-- MIGRATION 006 - Keyword statistics per professor and sentiment
+-- Creates keyword_stats and keyword_terms. They are filled by the backend, so after
+-- running this script populate them once with: flask --app run.py keywords rebuild
+-- Run once with: psql -d uaem_evaluation -f 006_keyword_stats.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE keyword_stats (
+    professor_id INTEGER NOT NULL,  -- users.id, same as surveys.professor_id
+    sentiment VARCHAR(20) NOT NULL,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    term VARCHAR(100) NOT NULL,     -- unigram or bigram of the cleaned comment text
+    occurrences INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (professor_id, sentiment, period, term)
+);
+CREATE INDEX idx_keyword_stats_period ON keyword_stats(period);
+CREATE TABLE keyword_terms (
+    term VARCHAR(100) PRIMARY KEY,
+    comment_count INTEGER NOT NULL DEFAULT 0  -- comments containing the term (document frequency)
+);
+
+COMMENT ON TABLE keyword_stats IS 'Comment term counts per professor, sentiment and period';
+COMMENT ON TABLE keyword_terms IS 'Number of comments containing each term (document frequency for TF-IDF)';
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- ============================================
+-- MIGRATION 007 - Near-duplicate comment detection
+-- Adds the MinHash signature and duplicate flag to comments and the LSH bucket table.
+-- Signatures are computed by the backend, so afterwards run once:
+--     flask --app run.py duplicates rebuild
+-- Run once with: psql -d uaem_evaluation -f 007_comment_duplicates.sql
+-- ============================================
+BEGIN;
+
+ALTER TABLE comments ADD COLUMN minhash BYTEA;
+ALTER TABLE comments ADD COLUMN duplicate_of INTEGER;
+CREATE INDEX idx_comments_duplicate_of ON comments(duplicate_of) WHERE duplicate_of IS NOT NULL;
+
+CREATE TABLE comment_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    comment_id INTEGER NOT NULL,
+    period VARCHAR(20) NOT NULL,
+    PRIMARY KEY (band, bucket, comment_id)
+);
+CREATE INDEX idx_comment_lsh_buckets_period ON comment_lsh_buckets(period);
+
+COMMENT ON TABLE comment_lsh_buckets IS 'MinHash LSH band buckets of comments, for near-duplicate lookups';
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- ============================================
+-- MIGRATION 008 - Comment embeddings
+-- Adds the table holding the sentence embedding of each comment for similar-comment search.
+-- Embeddings are only captured at submit time when STORE_COMMENT_EMBEDDINGS is enabled;
+-- existing comments are filled in with:
+--     flask --app run.py embeddings backfill
+-- Run once with: psql -d uaem_evaluation -f 008_comment_embeddings.sql
+-- ============================================
+BEGIN;
+
+-- Sentence embeddings of comments (normalized float16 bytes) for similar-comment search
+CREATE TABLE comment_embeddings (
+    comment_id INTEGER PRIMARY KEY,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,
+    dim SMALLINT NOT NULL,
+    embedding BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_comment_embeddings_professor ON comment_embeddings(professor_id);
+CREATE INDEX idx_comment_embeddings_period ON comment_embeddings(period);
+
+COMMENT ON TABLE comment_embeddings IS 'Comment sentence embeddings (float16, L2-normalized) for similar-comment search';
+
+COMMIT;
@@ -0,0 +1,24 @@
+-- ============================================
+-- MIGRATION 009 - Model shadow scoring statistics
+-- Adds the table where the shadow scorer counts how a candidate sentiment model labels
+-- sampled live comments compared with the active model.
+-- Run once with: psql -d uaem_evaluation -f 009_model_shadow_stats.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE model_shadow_stats (
+    shadow_version VARCHAR(64) NOT NULL,   -- candidate model scored in the background
+    active_version VARCHAR(64) NOT NULL,   -- model whose result was stored
+    active_sentiment VARCHAR(20) NOT NULL,
+    shadow_sentiment VARCHAR(20) NOT NULL,
+    comparisons INTEGER NOT NULL DEFAULT 0,
+    confidence_delta_sum DOUBLE PRECISION NOT NULL DEFAULT 0,  -- sum of |shadow - active| confidence
+    shadow_ms_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (shadow_version, active_version, active_sentiment, shadow_sentiment)
+);
+
+COMMENT ON TABLE model_shadow_stats IS 'Shadow scoring confusion counts of a candidate sentiment model against the active one';
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- ============================================
+-- MIGRATION 010 - Model version stamping of comments
+-- Records which model (or lexicon) version classified each comment and whether the
+-- sentiment is a real result, the neutral fallback stored after a failure, or still
+-- pending, so re-scoring after a model change only touches the rows that need it:
+--     flask --app run.py models rescore
+-- Existing comments have no version. The ones holding exactly the fallback result
+-- (neutral, 0.5) are marked 'fallback'; the rest stay unstamped until rescored or
+-- adopted with `flask models rescore --adopt-legacy`
+-- Run once with: psql -d uaem_evaluation -f 010_comment_model_version.sql
+-- ============================================
+BEGIN;
+
+ALTER TABLE comments ADD COLUMN model_version VARCHAR(80);
+ALTER TABLE comments ADD COLUMN sentiment_status VARCHAR(10) NOT NULL DEFAULT 'scored'
+    CHECK (sentiment_status IN ('scored', 'fallback', 'pending'));
+CREATE INDEX idx_comments_model_status ON comments(sentiment_status, model_version);
+
+UPDATE comments SET sentiment_status = 'fallback'
+WHERE sentiment = 'neutral' AND confidence_score = 0.5;
+
+COMMIT;
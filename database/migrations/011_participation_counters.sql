@@ -0,0 +1,215 @@
+-- ============================================
+-- MIGRATION 011 - Live participation counters
+-- Adds participation_counts (surveys per status for each professor, subject and student
+-- group of a period) and period_participation (students with surveys, started and done),
+-- the triggers on surveys that keep them current, and keeps students.has_completed_survey /
+-- survey_completed_at up to date; then fills everything from the existing surveys.
+-- Run once with: psql -d uaem_evaluation -f 011_participation_counters.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE participation_counts (
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,            -- users.id, same as surveys.professor_id
+    subject_id INTEGER NOT NULL,
+    group_name VARCHAR(20) NOT NULL DEFAULT '',  -- students."group" of the surveyed students
+    department VARCHAR(100),
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    canceled_count INTEGER NOT NULL DEFAULT 0,
+    last_completed_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (period, professor_id, subject_id, group_name)
+);
+CREATE INDEX idx_participation_counts_department ON participation_counts(period, department);
+-- Students with surveys in the period, with at least one completed and with all of them completed
+CREATE TABLE period_participation (
+    period VARCHAR(20) PRIMARY KEY REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    students_total INTEGER NOT NULL DEFAULT 0,
+    students_started INTEGER NOT NULL DEFAULT 0,
+    students_completed INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add (delta = 1) or remove (delta = -1) one survey from its group's counters
+CREATE OR REPLACE FUNCTION bump_participation(p_period VARCHAR, p_student_id INTEGER, p_professor_id INTEGER,
+                                              p_subject_id INTEGER, p_status VARCHAR, p_completed_at TIMESTAMP,
+                                              delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO participation_counts AS pc (period, professor_id, subject_id, group_name, department,
+                                            pending_count, completed_count, canceled_count, last_completed_at)
+    VALUES (
+        p_period, p_professor_id, p_subject_id,
+        COALESCE((SELECT st."group" FROM students st WHERE st.user_id = p_student_id), ''),
+        (SELECT p.department FROM professors p WHERE p.user_id = p_professor_id),
+        CASE WHEN p_status = 'pending' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'completed' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'canceled' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'completed' AND delta > 0 THEN p_completed_at END
+    )
+    ON CONFLICT (period, professor_id, subject_id, group_name) DO UPDATE SET
+        pending_count = pc.pending_count + EXCLUDED.pending_count,
+        completed_count = pc.completed_count + EXCLUDED.completed_count,
+        canceled_count = pc.canceled_count + EXCLUDED.canceled_count,
+        last_completed_at = GREATEST(pc.last_completed_at, EXCLUDED.last_completed_at),
+        department = COALESCE(EXCLUDED.department, pc.department),
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move one student between the period's student counters after a statement changed their
+-- surveys; counted_delta / completed_delta are the net change of their non-canceled /
+-- completed survey counts, which gives the counts before it. Most completions change
+-- nothing here
+CREATE OR REPLACE FUNCTION bump_period_participation(p_period VARCHAR, p_student_id INTEGER,
+                                                     counted_delta INTEGER, completed_delta INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    counted INTEGER;
+    completed INTEGER;
+    total_change INTEGER;
+    started_change INTEGER;
+    completed_change INTEGER;
+BEGIN
+    SELECT COUNT(*) FILTER (WHERE status <> 'canceled'), COUNT(*) FILTER (WHERE status = 'completed')
+    INTO counted, completed
+    FROM surveys WHERE student_id = p_student_id AND period = p_period;
+
+    total_change := (counted > 0)::int - (counted - counted_delta > 0)::int;
+    started_change := (completed > 0)::int - (completed - completed_delta > 0)::int;
+    completed_change := (counted > 0 AND completed = counted)::int
+        - (counted - counted_delta > 0 AND completed - completed_delta = counted - counted_delta)::int;
+    IF total_change = 0 AND started_change = 0 AND completed_change = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO period_participation AS pp (period, students_total, students_started, students_completed)
+    VALUES (p_period, total_change, started_change, completed_change)
+    ON CONFLICT (period) DO UPDATE SET
+        students_total = pp.students_total + EXCLUDED.students_total,
+        students_started = pp.students_started + EXCLUDED.students_started,
+        students_completed = pp.students_completed + EXCLUDED.students_completed,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- students.has_completed_survey: the student has completed every survey of the open periods
+CREATE OR REPLACE FUNCTION refresh_student_completion(p_student_id INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    done BOOLEAN;
+    finished_at TIMESTAMP;
+BEGIN
+    SELECT COUNT(*) > 0 AND COUNT(*) FILTER (WHERE s.status = 'pending') = 0, MAX(s.completed_at)
+    INTO done, finished_at
+    FROM surveys s
+    JOIN evaluation_periods ep ON ep.code = s.period AND ep.status = 'open'
+    WHERE s.student_id = p_student_id AND s.status <> 'canceled';
+
+    UPDATE students
+    SET has_completed_survey = done, survey_completed_at = CASE WHEN done THEN finished_at END
+    WHERE user_id = p_student_id
+      AND (has_completed_survey IS DISTINCT FROM done
+           OR survey_completed_at IS DISTINCT FROM CASE WHEN done THEN finished_at END);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION surveys_update_participation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.student_id = NEW.student_id
+       AND OLD.professor_id = NEW.professor_id AND OLD.subject_id = NEW.subject_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_participation(OLD.period, OLD.student_id, OLD.professor_id, OLD.subject_id,
+                                   OLD.status::text, OLD.completed_at, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_participation(NEW.period, NEW.student_id, NEW.professor_id, NEW.subject_id,
+                                   NEW.status::text, NEW.completed_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_participation AFTER INSERT OR DELETE OR UPDATE OF status, student_id, professor_id, subject_id
+    ON surveys FOR EACH ROW EXECUTE FUNCTION surveys_update_participation();
+
+-- Student counters need the state of the student's surveys before and after the whole
+-- statement (a row trigger only sees the end state), so they run once per statement
+-- over its transition tables with the net change per student
+CREATE OR REPLACE FUNCTION surveys_update_student_participation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_period_participation(period, student_id, counted, completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, COUNT(*) FILTER (WHERE status <> 'canceled')::int AS counted,
+                     COUNT(*) FILTER (WHERE status = 'completed')::int AS completed
+              FROM new_surveys GROUP BY period, student_id) changes;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_period_participation(period, student_id, -counted, -completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, COUNT(*) FILTER (WHERE status <> 'canceled')::int AS counted,
+                     COUNT(*) FILTER (WHERE status = 'completed')::int AS completed
+              FROM old_surveys GROUP BY period, student_id) changes;
+    ELSE
+        PERFORM bump_period_participation(period, student_id, counted, completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, SUM(counted)::int AS counted, SUM(completed)::int AS completed
+              FROM (SELECT period, student_id, (status <> 'canceled')::int AS counted,
+                           (status = 'completed')::int AS completed
+                    FROM new_surveys
+                    UNION ALL
+                    SELECT period, student_id, -(status <> 'canceled')::int, -(status = 'completed')::int
+                    FROM old_surveys) moves
+              GROUP BY period, student_id
+              HAVING SUM(counted) <> 0 OR SUM(completed) <> 0) changes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_student_participation_insert AFTER INSERT ON surveys
+    REFERENCING NEW TABLE AS new_surveys FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+CREATE TRIGGER surveys_student_participation_update AFTER UPDATE ON surveys
+    REFERENCING OLD TABLE AS old_surveys NEW TABLE AS new_surveys
+    FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+CREATE TRIGGER surveys_student_participation_delete AFTER DELETE ON surveys
+    REFERENCING OLD TABLE AS old_surveys FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+
+INSERT INTO participation_counts (period, professor_id, subject_id, group_name, department,
+                                  pending_count, completed_count, canceled_count, last_completed_at)
+SELECT
+    s.period,
+    s.professor_id,
+    s.subject_id,
+    COALESCE(st."group", ''),
+    MAX(p.department),
+    COUNT(*) FILTER (WHERE s.status = 'pending'),
+    COUNT(*) FILTER (WHERE s.status = 'completed'),
+    COUNT(*) FILTER (WHERE s.status = 'canceled'),
+    MAX(s.completed_at) FILTER (WHERE s.status = 'completed')
+FROM surveys s
+LEFT JOIN students st ON st.user_id = s.student_id
+LEFT JOIN professors p ON p.user_id = s.professor_id
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO period_participation (period, students_total, students_started, students_completed)
+SELECT
+    period,
+    COUNT(*) FILTER (WHERE counted > 0),
+    COUNT(*) FILTER (WHERE completed > 0),
+    COUNT(*) FILTER (WHERE counted > 0 AND completed = counted)
+FROM (
+    SELECT period, student_id,
+           COUNT(*) FILTER (WHERE status <> 'canceled') AS counted,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed
+    FROM surveys
+    GROUP BY period, student_id
+) per_student
+GROUP BY period;
+
+SELECT refresh_student_completion(user_id) FROM students;
+
+COMMENT ON TABLE participation_counts IS 'Surveys per status and professor/subject/student group, maintained by triggers on surveys';
+COMMENT ON TABLE period_participation IS 'Students with surveys, started and done per period, maintained by triggers on surveys';
+
+COMMIT;
@@ -0,0 +1,26 @@
+-- ============================================
+-- MIGRATION 012 - Shared response cache
+-- Tables of the database backend of the response cache (RESPONSE_CACHE_BACKEND=database),
+-- which every worker process shares: cached JSON responses with their dependency tags,
+-- and the last invalidation of each tag. Both are UNLOGGED, their content is disposable.
+-- Run once with: psql -d uaem_evaluation -f 012_response_cache.sql
+-- ============================================
+BEGIN;
+
+CREATE UNLOGGED TABLE response_cache (
+    key TEXT PRIMARY KEY,                  -- endpoint, principal, arguments and query string
+    body TEXT NOT NULL,                    -- JSON response
+    status SMALLINT NOT NULL,
+    tags TEXT[] NOT NULL,                  -- professor:<users.id>, subject:<id>, period:<code>, ...
+    expires_at DOUBLE PRECISION NOT NULL   -- epoch seconds
+);
+CREATE INDEX idx_response_cache_tags ON response_cache USING GIN (tags);
+-- Last invalidation of each tag: responses computed before it are not stored
+CREATE UNLOGGED TABLE response_cache_invalidations (
+    tag TEXT PRIMARY KEY,
+    invalidated_at DOUBLE PRECISION NOT NULL
+);
+
+COMMENT ON TABLE response_cache IS 'Cached JSON responses of read endpoints with their dependency tags, shared by every worker';
+
+COMMIT;
@@ -0,0 +1,67 @@
+-- ============================================
+-- MIGRATION 013 - Table change counters
+-- One row per tracked table (users, students, professors, admins) with a version that
+-- statement-level triggers bump whenever a statement changes rows of the table. The admin
+-- listings derive their ETag / Last-Modified from it and answer conditional GETs with
+-- 304 without running their queries.
+-- Run once with: psql -d uaem_evaluation -f 013_table_versions.sql
+-- ============================================
+BEGIN;
+
+CREATE TABLE table_versions (
+    table_name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO table_versions (table_name) VALUES ('users'), ('students'), ('professors'), ('admins');
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Statements that matched no row (e.g. refresh_student_completion with nothing to change)
+    -- leave the version, and the cached listings, alone
+    IF TG_LEVEL = 'STATEMENT' THEN
+        IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO table_versions AS tv (table_name, version, changed_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        version = tv.version + 1,
+        changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_version_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+-- Logins only write last_login (and updated_at): they leave the listings' validators alone
+CREATE TRIGGER users_version_update AFTER UPDATE ON users FOR EACH ROW
+    WHEN ((OLD.email, OLD.first_name, OLD.last_name, OLD.role, OLD.matricula, OLD.is_active, OLD.created_at)
+          IS DISTINCT FROM (NEW.email, NEW.first_name, NEW.last_name, NEW.role, NEW.matricula, NEW.is_active, NEW.created_at))
+    EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER users_version_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_update AFTER UPDATE ON students
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_insert AFTER INSERT ON professors
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_update AFTER UPDATE ON professors
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_delete AFTER DELETE ON professors
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_insert AFTER INSERT ON admins
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_update AFTER UPDATE ON admins
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_delete AFTER DELETE ON admins
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+COMMENT ON TABLE table_versions IS 'Change counter per table, bumped by statement triggers; ETag/Last-Modified of admin listings';
+
+COMMIT;
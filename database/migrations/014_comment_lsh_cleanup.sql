@@ -0,0 +1,30 @@
+-- ============================================
+-- MIGRATION 014 - LSH buckets of original comments only
+-- Near-duplicate comments are no longer indexed in comment_lsh_buckets (a new copy matches
+-- the original, not every earlier copy), and the buckets of deleted comments are removed
+-- by a trigger instead of piling up. Drops the buckets of existing duplicates and of
+-- comments that no longer exist.
+-- Run once with: psql -d uaem_evaluation -f 014_comment_lsh_cleanup.sql
+-- ============================================
+BEGIN;
+
+DELETE FROM comment_lsh_buckets b
+WHERE NOT EXISTS (
+    SELECT 1 FROM comments c
+    WHERE c.id = b.comment_id AND c.period = b.period AND c.duplicate_of IS NULL
+);
+
+CREATE INDEX idx_comment_lsh_buckets_comment ON comment_lsh_buckets(comment_id);
+
+-- Not a foreign key: archiving drops whole comment partitions and clears the period's buckets itself
+CREATE OR REPLACE FUNCTION comments_delete_lsh_buckets()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM comment_lsh_buckets WHERE comment_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER comments_lsh_buckets AFTER DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION comments_delete_lsh_buckets();
+
+COMMIT;
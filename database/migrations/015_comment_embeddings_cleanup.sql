@@ -0,0 +1,24 @@
+-- ============================================
+-- MIGRATION 015 - Embeddings of deleted comments
+-- The trigger that removes the LSH buckets of deleted comments (migration 014) now removes
+-- their embeddings too, so similar-comment search never ranks comments that no longer
+-- exist. Drops the embeddings already left behind by deleted comments.
+-- Run once with: psql -d uaem_evaluation -f 015_comment_embeddings_cleanup.sql
+-- ============================================
+BEGIN;
+
+DELETE FROM comment_embeddings e
+WHERE NOT EXISTS (
+    SELECT 1 FROM comments c WHERE c.id = e.comment_id AND c.period = e.period
+);
+
+CREATE OR REPLACE FUNCTION comments_delete_lsh_buckets()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM comment_lsh_buckets WHERE comment_id = OLD.id;
+    DELETE FROM comment_embeddings WHERE comment_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -4,10 +4,23 @@
 -- ============================================
 -- Drop existing tables in correct order (respecting foreign keys)
 DROP TABLE IF EXISTS activity_logs CASCADE;
+DROP TABLE IF EXISTS table_versions CASCADE;
+DROP TABLE IF EXISTS response_cache_invalidations CASCADE;
+DROP TABLE IF EXISTS response_cache CASCADE;
+DROP TABLE IF EXISTS model_shadow_stats CASCADE;
 DROP TABLE IF EXISTS subject_ratings CASCADE;
 DROP TABLE IF EXISTS evaluations CASCADE;
+DROP TABLE IF EXISTS keyword_terms CASCADE;
+DROP TABLE IF EXISTS period_participation CASCADE;
+DROP TABLE IF EXISTS participation_counts CASCADE;
+DROP TABLE IF EXISTS keyword_stats CASCADE;
+DROP TABLE IF EXISTS sentiment_daily CASCADE;
+DROP TABLE IF EXISTS period_aggregates CASCADE;
+DROP TABLE IF EXISTS comment_embeddings CASCADE;
+DROP TABLE IF EXISTS comment_lsh_buckets CASCADE;
 DROP TABLE IF EXISTS comments CASCADE;
 DROP TABLE IF EXISTS surveys CASCADE;
+DROP TABLE IF EXISTS evaluation_periods CASCADE;
 DROP TABLE IF EXISTS student_subjects CASCADE;
 DROP TABLE IF EXISTS group_classes CASCADE;
 DROP TABLE IF EXISTS subjects CASCADE;
@@ -138,37 +151,484 @@ CREATE TABLE student_subjects (
 CREATE INDEX idx_student_subjects_student ON student_subjects(student_id);
 CREATE INDEX idx_student_subjects_subject ON student_subjects(subject_id);
 -- ============================================
--- 8. SURVEYS TABLE (Student evaluations)
+-- 8. EVALUATION_PERIODS TABLE (Semesters; surveys and comments are partitioned by period)
+-- ============================================
+CREATE TABLE evaluation_periods (
+    code VARCHAR(20) PRIMARY KEY,  -- Same format as group_classes.semester_period, e.g. '2025-1'
+    starts_on DATE NOT NULL,
+    ends_on DATE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open' CHECK (status IN ('open', 'closed', 'archived')),
+    archive_path VARCHAR(255),
+    archived_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_evaluation_periods_status ON evaluation_periods(status);
+-- Semester code for a timestamp: January-June -> 'YYYY-1', July-December -> 'YYYY-2'
+CREATE OR REPLACE FUNCTION period_for_date(ts TIMESTAMP)
+RETURNS VARCHAR AS $$
+    SELECT to_char(ts, 'YYYY') || '-' || CASE WHEN EXTRACT(MONTH FROM ts) <= 6 THEN '1' ELSE '2' END;
+$$ LANGUAGE sql IMMUTABLE;
+-- ============================================
+-- 9. SURVEYS TABLE (Student evaluations, list partitioned by period)
 -- ============================================
 CREATE TABLE surveys (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     student_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     professor_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    period VARCHAR(20) NOT NULL DEFAULT period_for_date(CURRENT_TIMESTAMP::timestamp) REFERENCES evaluation_periods(code),
     status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'cancelled')),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     completed_at TIMESTAMP,
-    CONSTRAINT unique_student_professor_subject UNIQUE (student_id, professor_id, subject_id)
-);
+    PRIMARY KEY (id, period),
+    CONSTRAINT unique_student_professor_subject UNIQUE (student_id, professor_id, subject_id, period)
+) PARTITION BY LIST (period);
 CREATE INDEX idx_surveys_student_id ON surveys(student_id);
-CREATE INDEX idx_surveys_professor_id ON surveys(professor_id);
+-- Professor dashboards/feeds: completed surveys of one professor, most recent first
+CREATE INDEX idx_surveys_professor_status ON surveys(professor_id, status, completed_at DESC);
 CREATE INDEX idx_surveys_subject_id ON surveys(subject_id);
 CREATE INDEX idx_surveys_status ON surveys(status);
 -- ============================================
--- 9. COMMENTS TABLE (Survey comments with sentiment)
--- ============================================
+-- 10. COMMENTS TABLE (Survey comments with sentiment, list partitioned by period)
+-- ============================================
+-- Full-text search configuration: Spanish stemming with accents folded. The stemmer has no
+-- stop word list so negations survive ("no explica" does not collapse to "explica")
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;
+DROP TEXT SEARCH DICTIONARY IF EXISTS spanish_stem_nostop;
+CREATE TEXT SEARCH DICTIONARY spanish_stem_nostop (TEMPLATE = snowball, Language = spanish);
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR asciiword, asciihword, hword_asciipart, word, hword, hword_part
+    WITH unaccent, spanish_stem_nostop;
 CREATE TABLE comments (
-    id SERIAL PRIMARY KEY,
-    survey_id INTEGER NOT NULL REFERENCES surveys(id) ON DELETE CASCADE,
+    id SERIAL,
+    survey_id INTEGER NOT NULL,
+    period VARCHAR(20) NOT NULL,  -- Always the period of the survey
     text TEXT NOT NULL,
     sentiment VARCHAR(20) CHECK (sentiment IN ('positive', 'negative', 'neutral')),
     confidence_score FLOAT CHECK (confidence_score >= 0 AND confidence_score <= 1),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('spanish_unaccent', text)) STORED,
+    minhash BYTEA,                  -- MinHash signature of the text (near-duplicate detection)
+    duplicate_of INTEGER,           -- id of the original comment when this one is a near-duplicate
+    model_version VARCHAR(80),      -- stamp of the model (or lexicon) that produced the sentiment
+    sentiment_status VARCHAR(10) NOT NULL DEFAULT 'scored'
+        CHECK (sentiment_status IN ('scored', 'fallback', 'pending')),
+    PRIMARY KEY (id, period),
+    FOREIGN KEY (survey_id, period) REFERENCES surveys(id, period) ON DELETE CASCADE
+) PARTITION BY LIST (period);
+-- Comment feed: a survey's comments by sentiment in (created_at, id) keyset order
+CREATE INDEX idx_comments_survey_sentiment ON comments(survey_id, sentiment, created_at DESC, id DESC);
+CREATE INDEX idx_comments_sentiment ON comments(sentiment);
+CREATE INDEX idx_comments_search ON comments USING GIN (search_vector);
+CREATE INDEX idx_comments_duplicate_of ON comments(duplicate_of) WHERE duplicate_of IS NOT NULL;
+-- Re-scoring: fallback/pending rows and rows stamped with an older model version
+CREATE INDEX idx_comments_model_status ON comments(sentiment_status, model_version);
+-- LSH buckets of the original comments' signatures: comments sharing a (band, bucket) are
+-- duplicate candidates. Near-duplicates are not indexed, they match their original
+CREATE TABLE comment_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    comment_id INTEGER NOT NULL,
+    period VARCHAR(20) NOT NULL,
+    PRIMARY KEY (band, bucket, comment_id)
+);
+CREATE INDEX idx_comment_lsh_buckets_period ON comment_lsh_buckets(period);
+CREATE INDEX idx_comment_lsh_buckets_comment ON comment_lsh_buckets(comment_id);
+-- Deleted comments (including cascades from surveys and subjects) leave no buckets or
+-- embeddings behind. Not foreign keys: archiving drops whole comment partitions and clears
+-- the period's buckets and embeddings itself
+CREATE OR REPLACE FUNCTION comments_delete_lsh_buckets()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM comment_lsh_buckets WHERE comment_id = OLD.id;
+    DELETE FROM comment_embeddings WHERE comment_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER comments_lsh_buckets AFTER DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION comments_delete_lsh_buckets();
+-- Sentence embeddings of comments (normalized float16 bytes) for similar-comment search
+CREATE TABLE comment_embeddings (
+    comment_id INTEGER PRIMARY KEY,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,
+    dim SMALLINT NOT NULL,
+    embedding BYTEA NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
-CREATE INDEX idx_comments_survey_id ON comments(survey_id);
-CREATE INDEX idx_comments_sentiment ON comments(sentiment);
+CREATE INDEX idx_comment_embeddings_professor ON comment_embeddings(professor_id);
+CREATE INDEX idx_comment_embeddings_period ON comment_embeddings(period);
+-- Creates the surveys_<period> and comments_<period> partitions (e.g. surveys_2025_1)
+CREATE OR REPLACE FUNCTION ensure_period_partitions(period_code VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    suffix TEXT := regexp_replace(period_code, '[^0-9A-Za-z]', '_', 'g');
+BEGIN
+    IF to_regclass('surveys_' || suffix) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF surveys FOR VALUES IN (%L)', 'surveys_' || suffix, period_code);
+    END IF;
+    IF to_regclass('comments_' || suffix) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF comments FOR VALUES IN (%L)', 'comments_' || suffix, period_code);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+-- Every new evaluation period gets its partitions right away
+CREATE OR REPLACE FUNCTION create_period_partitions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ensure_period_partitions(NEW.code);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER evaluation_periods_create_partitions AFTER INSERT ON evaluation_periods
+    FOR EACH ROW EXECUTE FUNCTION create_period_partitions();
+-- Registers a semester period ('YYYY-1' or 'YYYY-2') with its default dates if it does not exist
+CREATE OR REPLACE FUNCTION ensure_evaluation_period(period_code VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    period_year INTEGER := split_part(period_code, '-', 1)::integer;
+    half INTEGER := split_part(period_code, '-', 2)::integer;
+BEGIN
+    INSERT INTO evaluation_periods (code, starts_on, ends_on)
+    VALUES (period_code,
+            make_date(period_year, CASE WHEN half = 1 THEN 1 ELSE 7 END, 1),
+            make_date(period_year, CASE WHEN half = 1 THEN 6 ELSE 12 END, CASE WHEN half = 1 THEN 30 ELSE 31 END))
+    ON CONFLICT (code) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+SELECT ensure_evaluation_period(period_for_date(CURRENT_TIMESTAMP::timestamp));
+-- ============================================
+-- 11. PERIOD_AGGREGATES TABLE (Per professor/subject summary, kept when a period is archived)
+-- ============================================
+CREATE TABLE period_aggregates (
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,  -- users.id, same as surveys.professor_id
+    subject_id INTEGER NOT NULL,
+    total_surveys INTEGER NOT NULL DEFAULT 0,
+    completed_surveys INTEGER NOT NULL DEFAULT 0,
+    total_comments INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_confidence FLOAT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (period, professor_id, subject_id)
+);
+CREATE INDEX idx_period_aggregates_professor ON period_aggregates(professor_id);
+-- ============================================
+-- 12. SENTIMENT_DAILY TABLE (Daily sentiment rollup per professor/subject, feeds the trend charts)
+-- ============================================
+CREATE TABLE sentiment_daily (
+    day DATE NOT NULL,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,  -- users.id, same as surveys.professor_id
+    subject_id INTEGER NOT NULL,
+    department VARCHAR(100),
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum FLOAT NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, period, professor_id, subject_id)
+);
+CREATE INDEX idx_sentiment_daily_professor ON sentiment_daily(professor_id, day);
+CREATE INDEX idx_sentiment_daily_subject ON sentiment_daily(subject_id, day);
+CREATE INDEX idx_sentiment_daily_department ON sentiment_daily(department, day);
+CREATE INDEX idx_sentiment_daily_period ON sentiment_daily(period);
+
+-- Add (delta = 1) or remove (delta = -1) one comment from its day's rollup row
+CREATE OR REPLACE FUNCTION bump_sentiment_daily(p_survey_id INTEGER, p_period VARCHAR, p_created_at TIMESTAMP,
+                                                p_sentiment VARCHAR, p_confidence FLOAT, delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO sentiment_daily AS d (day, period, professor_id, subject_id, department,
+                                      positive_count, neutral_count, negative_count, total_count,
+                                      confidence_sum, confidence_count)
+    SELECT COALESCE(p_created_at, CURRENT_TIMESTAMP)::date, s.period, s.professor_id, s.subject_id, p.department,
+           CASE WHEN p_sentiment = 'positive' THEN delta ELSE 0 END,
+           CASE WHEN p_sentiment = 'neutral' THEN delta ELSE 0 END,
+           CASE WHEN p_sentiment = 'negative' THEN delta ELSE 0 END,
+           delta,
+           COALESCE(p_confidence, 0) * delta,
+           CASE WHEN p_confidence IS NULL THEN 0 ELSE delta END
+    FROM surveys s
+    LEFT JOIN professors p ON p.user_id = s.professor_id
+    WHERE s.id = p_survey_id AND s.period = p_period
+    ON CONFLICT (day, period, professor_id, subject_id) DO UPDATE SET
+        positive_count = d.positive_count + EXCLUDED.positive_count,
+        neutral_count = d.neutral_count + EXCLUDED.neutral_count,
+        negative_count = d.negative_count + EXCLUDED.negative_count,
+        total_count = d.total_count + EXCLUDED.total_count,
+        confidence_sum = d.confidence_sum + EXCLUDED.confidence_sum,
+        confidence_count = d.confidence_count + EXCLUDED.confidence_count,
+        department = EXCLUDED.department,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION comments_update_sentiment_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_sentiment_daily(OLD.survey_id, OLD.period, OLD.created_at, OLD.sentiment, OLD.confidence_score, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_sentiment_daily(NEW.survey_id, NEW.period, NEW.created_at, NEW.sentiment, NEW.confidence_score, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER comments_sentiment_daily AFTER INSERT OR DELETE OR UPDATE OF sentiment, confidence_score, created_at
+    ON comments FOR EACH ROW EXECUTE FUNCTION comments_update_sentiment_daily();
+
+-- A survey's comments are cascade-deleted after the survey row is gone, when the comment
+-- trigger can no longer resolve the professor/subject, so subtract them here first
+CREATE OR REPLACE FUNCTION surveys_remove_sentiment_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_sentiment_daily(c.survey_id, c.period, c.created_at, c.sentiment, c.confidence_score, -1)
+    FROM comments c
+    WHERE c.survey_id = OLD.id AND c.period = OLD.period;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_sentiment_daily BEFORE DELETE ON surveys
+    FOR EACH ROW EXECUTE FUNCTION surveys_remove_sentiment_daily();
 -- ============================================
--- 10. EVALUATIONS TABLE (Professor evaluations)
+-- 13. PARTICIPATION_COUNTS / PERIOD_PARTICIPATION TABLES (Survey completion progress, kept by triggers on surveys)
+-- ============================================
+CREATE TABLE participation_counts (
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    professor_id INTEGER NOT NULL,            -- users.id, same as surveys.professor_id
+    subject_id INTEGER NOT NULL,
+    group_name VARCHAR(20) NOT NULL DEFAULT '',  -- students."group" of the surveyed students
+    department VARCHAR(100),
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    canceled_count INTEGER NOT NULL DEFAULT 0,
+    last_completed_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (period, professor_id, subject_id, group_name)
+);
+CREATE INDEX idx_participation_counts_department ON participation_counts(period, department);
+-- Students with surveys in the period, with at least one completed and with all of them completed
+CREATE TABLE period_participation (
+    period VARCHAR(20) PRIMARY KEY REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    students_total INTEGER NOT NULL DEFAULT 0,
+    students_started INTEGER NOT NULL DEFAULT 0,
+    students_completed INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add (delta = 1) or remove (delta = -1) one survey from its group's counters
+CREATE OR REPLACE FUNCTION bump_participation(p_period VARCHAR, p_student_id INTEGER, p_professor_id INTEGER,
+                                              p_subject_id INTEGER, p_status VARCHAR, p_completed_at TIMESTAMP,
+                                              delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO participation_counts AS pc (period, professor_id, subject_id, group_name, department,
+                                            pending_count, completed_count, canceled_count, last_completed_at)
+    VALUES (
+        p_period, p_professor_id, p_subject_id,
+        COALESCE((SELECT st."group" FROM students st WHERE st.user_id = p_student_id), ''),
+        (SELECT p.department FROM professors p WHERE p.user_id = p_professor_id),
+        CASE WHEN p_status = 'pending' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'completed' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'canceled' THEN delta ELSE 0 END,
+        CASE WHEN p_status = 'completed' AND delta > 0 THEN p_completed_at END
+    )
+    ON CONFLICT (period, professor_id, subject_id, group_name) DO UPDATE SET
+        pending_count = pc.pending_count + EXCLUDED.pending_count,
+        completed_count = pc.completed_count + EXCLUDED.completed_count,
+        canceled_count = pc.canceled_count + EXCLUDED.canceled_count,
+        last_completed_at = GREATEST(pc.last_completed_at, EXCLUDED.last_completed_at),
+        department = COALESCE(EXCLUDED.department, pc.department),
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move one student between the period's student counters after a statement changed their
+-- surveys; counted_delta / completed_delta are the net change of their non-canceled /
+-- completed survey counts, which gives the counts before it. Most completions change
+-- nothing here
+CREATE OR REPLACE FUNCTION bump_period_participation(p_period VARCHAR, p_student_id INTEGER,
+                                                     counted_delta INTEGER, completed_delta INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    counted INTEGER;
+    completed INTEGER;
+    total_change INTEGER;
+    started_change INTEGER;
+    completed_change INTEGER;
+BEGIN
+    SELECT COUNT(*) FILTER (WHERE status <> 'canceled'), COUNT(*) FILTER (WHERE status = 'completed')
+    INTO counted, completed
+    FROM surveys WHERE student_id = p_student_id AND period = p_period;
+
+    total_change := (counted > 0)::int - (counted - counted_delta > 0)::int;
+    started_change := (completed > 0)::int - (completed - completed_delta > 0)::int;
+    completed_change := (counted > 0 AND completed = counted)::int
+        - (counted - counted_delta > 0 AND completed - completed_delta = counted - counted_delta)::int;
+    IF total_change = 0 AND started_change = 0 AND completed_change = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO period_participation AS pp (period, students_total, students_started, students_completed)
+    VALUES (p_period, total_change, started_change, completed_change)
+    ON CONFLICT (period) DO UPDATE SET
+        students_total = pp.students_total + EXCLUDED.students_total,
+        students_started = pp.students_started + EXCLUDED.students_started,
+        students_completed = pp.students_completed + EXCLUDED.students_completed,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- students.has_completed_survey: the student has completed every survey of the open periods
+CREATE OR REPLACE FUNCTION refresh_student_completion(p_student_id INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    done BOOLEAN;
+    finished_at TIMESTAMP;
+BEGIN
+    SELECT COUNT(*) > 0 AND COUNT(*) FILTER (WHERE s.status = 'pending') = 0, MAX(s.completed_at)
+    INTO done, finished_at
+    FROM surveys s
+    JOIN evaluation_periods ep ON ep.code = s.period AND ep.status = 'open'
+    WHERE s.student_id = p_student_id AND s.status <> 'canceled';
+
+    UPDATE students
+    SET has_completed_survey = done, survey_completed_at = CASE WHEN done THEN finished_at END
+    WHERE user_id = p_student_id
+      AND (has_completed_survey IS DISTINCT FROM done
+           OR survey_completed_at IS DISTINCT FROM CASE WHEN done THEN finished_at END);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION surveys_update_participation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.student_id = NEW.student_id
+       AND OLD.professor_id = NEW.professor_id AND OLD.subject_id = NEW.subject_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_participation(OLD.period, OLD.student_id, OLD.professor_id, OLD.subject_id,
+                                   OLD.status::text, OLD.completed_at, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_participation(NEW.period, NEW.student_id, NEW.professor_id, NEW.subject_id,
+                                   NEW.status::text, NEW.completed_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_participation AFTER INSERT OR DELETE OR UPDATE OF status, student_id, professor_id, subject_id
+    ON surveys FOR EACH ROW EXECUTE FUNCTION surveys_update_participation();
+
+-- Student counters need the state of the student's surveys before and after the whole
+-- statement (a row trigger only sees the end state), so they run once per statement
+-- over its transition tables with the net change per student
+CREATE OR REPLACE FUNCTION surveys_update_student_participation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_period_participation(period, student_id, counted, completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, COUNT(*) FILTER (WHERE status <> 'canceled')::int AS counted,
+                     COUNT(*) FILTER (WHERE status = 'completed')::int AS completed
+              FROM new_surveys GROUP BY period, student_id) changes;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_period_participation(period, student_id, -counted, -completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, COUNT(*) FILTER (WHERE status <> 'canceled')::int AS counted,
+                     COUNT(*) FILTER (WHERE status = 'completed')::int AS completed
+              FROM old_surveys GROUP BY period, student_id) changes;
+    ELSE
+        PERFORM bump_period_participation(period, student_id, counted, completed), refresh_student_completion(student_id)
+        FROM (SELECT period, student_id, SUM(counted)::int AS counted, SUM(completed)::int AS completed
+              FROM (SELECT period, student_id, (status <> 'canceled')::int AS counted,
+                           (status = 'completed')::int AS completed
+                    FROM new_surveys
+                    UNION ALL
+                    SELECT period, student_id, -(status <> 'canceled')::int, -(status = 'completed')::int
+                    FROM old_surveys) moves
+              GROUP BY period, student_id
+              HAVING SUM(counted) <> 0 OR SUM(completed) <> 0) changes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER surveys_student_participation_insert AFTER INSERT ON surveys
+    REFERENCING NEW TABLE AS new_surveys FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+CREATE TRIGGER surveys_student_participation_update AFTER UPDATE ON surveys
+    REFERENCING OLD TABLE AS old_surveys NEW TABLE AS new_surveys
+    FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+CREATE TRIGGER surveys_student_participation_delete AFTER DELETE ON surveys
+    REFERENCING OLD TABLE AS old_surveys FOR EACH STATEMENT EXECUTE FUNCTION surveys_update_student_participation();
+-- ============================================
+-- 14. KEYWORD_STATS / KEYWORD_TERMS TABLES (What students talk about, per professor and sentiment)
+-- ============================================
+CREATE TABLE keyword_stats (
+    professor_id INTEGER NOT NULL,  -- users.id, same as surveys.professor_id
+    sentiment VARCHAR(20) NOT NULL,
+    period VARCHAR(20) NOT NULL REFERENCES evaluation_periods(code) ON DELETE CASCADE,
+    term VARCHAR(100) NOT NULL,     -- unigram or bigram of the cleaned comment text
+    occurrences INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (professor_id, sentiment, period, term)
+);
+CREATE INDEX idx_keyword_stats_period ON keyword_stats(period);
+CREATE TABLE keyword_terms (
+    term VARCHAR(100) PRIMARY KEY,
+    comment_count INTEGER NOT NULL DEFAULT 0  -- comments containing the term (document frequency)
+);
+-- ============================================
+-- 15. MODEL_SHADOW_STATS TABLE (Candidate model vs active model on sampled live comments)
+-- ============================================
+CREATE TABLE model_shadow_stats (
+    shadow_version VARCHAR(64) NOT NULL,   -- candidate model scored in the background
+    active_version VARCHAR(64) NOT NULL,   -- model whose result was stored
+    active_sentiment VARCHAR(20) NOT NULL,
+    shadow_sentiment VARCHAR(20) NOT NULL,
+    comparisons INTEGER NOT NULL DEFAULT 0,
+    confidence_delta_sum DOUBLE PRECISION NOT NULL DEFAULT 0,  -- sum of |shadow - active| confidence
+    shadow_ms_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (shadow_version, active_version, active_sentiment, shadow_sentiment)
+);
+-- ============================================
+-- 16. RESPONSE_CACHE (Shared response cache of read endpoints, RESPONSE_CACHE_BACKEND=database)
+-- ============================================
+-- Disposable: UNLOGGED (no WAL, emptied after a crash) and rebuilt by the requests themselves
+CREATE UNLOGGED TABLE response_cache (
+    key TEXT PRIMARY KEY,                  -- endpoint, principal, arguments and query string
+    body TEXT NOT NULL,                    -- JSON response
+    status SMALLINT NOT NULL,
+    tags TEXT[] NOT NULL,                  -- professor:<users.id>, subject:<id>, period:<code>, ...
+    expires_at DOUBLE PRECISION NOT NULL   -- epoch seconds
+);
+CREATE INDEX idx_response_cache_tags ON response_cache USING GIN (tags);
+-- Last invalidation of each tag: responses computed before it are not stored
+CREATE UNLOGGED TABLE response_cache_invalidations (
+    tag TEXT PRIMARY KEY,
+    invalidated_at DOUBLE PRECISION NOT NULL
+);
+-- ============================================
+-- 17. TABLE_VERSIONS (Change counter per table, validators of conditional GETs)
+-- ============================================
+-- Bumped once per statement that changes rows of a tracked table (triggers below), so
+-- the admin listings can answer If-None-Match / If-Modified-Since with 304 before querying
+CREATE TABLE table_versions (
+    table_name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO table_versions (table_name) VALUES ('users'), ('students'), ('professors'), ('admins');
+-- ============================================
+-- 18. EVALUATIONS TABLE (Professor evaluations)
 -- ============================================
 CREATE TABLE evaluations (
     id SERIAL PRIMARY KEY,
@@ -187,7 +647,7 @@ CREATE TABLE evaluations (
 CREATE INDEX idx_evaluations_professor_id ON evaluations(professor_id);
 CREATE INDEX idx_evaluations_sentiment ON evaluations(sentiment);
 -- ============================================
--- 11. SUBJECT_RATINGS TABLE (Professor ratings per subject with sentiment)
+-- 19. SUBJECT_RATINGS TABLE (Professor ratings per subject with sentiment)
 -- ============================================
 CREATE TABLE subject_ratings (
     id SERIAL PRIMARY KEY,
@@ -211,10 +671,10 @@ CREATE INDEX idx_subject_ratings_professor ON subject_ratings(professor_id);
 CREATE INDEX idx_subject_ratings_subject ON subject_ratings(subject_id);
 CREATE INDEX idx_subject_ratings_average ON subject_ratings(average_score);
 -- ============================================
--- 12. ACTIVITY_LOGS TABLE (Audit trail)
+-- 20. ACTIVITY_LOGS TABLE (Audit trail, partitioned by month on created_at)
 -- ============================================
 CREATE TABLE activity_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     user_type VARCHAR(20) NOT NULL CHECK (user_type IN ('admin', 'professor', 'student')),
     action_type VARCHAR(50) NOT NULL,
@@ -224,12 +684,39 @@ CREATE TABLE activity_logs (
     ip_address VARCHAR(45),
     user_agent VARCHAR(255),
     extra_data JSONB,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-CREATE INDEX idx_activity_logs_user_id ON activity_logs(user_id);
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+-- Keyset pagination indexes for the activity browser: (created_at, id) plus the common filters
+CREATE INDEX idx_activity_logs_created_at_id ON activity_logs(created_at DESC, id DESC);
+CREATE INDEX idx_activity_logs_user_created ON activity_logs(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_activity_logs_action_created ON activity_logs(action_type, created_at DESC, id DESC);
 CREATE INDEX idx_activity_logs_user_type ON activity_logs(user_type);
-CREATE INDEX idx_activity_logs_action_type ON activity_logs(action_type);
-CREATE INDEX idx_activity_logs_created_at ON activity_logs(created_at);
+-- Creates the missing monthly partitions <parent>_YYYY_MM between two months (inclusive)
+-- There is no DEFAULT partition so old months can be detached CONCURRENTLY;
+-- the retention job (flask activity-logs maintain) keeps future months created ahead of time
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent_table TEXT, from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= date_trunc('month', to_month)::date LOOP
+        partition_name := format('%s_%s', parent_table, to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, parent_table, month_start, (month_start + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+SELECT ensure_monthly_partitions('activity_logs',
+                                 (CURRENT_DATE - INTERVAL '1 month')::date,
+                                 (CURRENT_DATE + INTERVAL '3 months')::date);
 -- ============================================
 -- TRIGGERS AND FUNCTIONS
 -- ============================================
@@ -246,6 +733,51 @@ CREATE TRIGGER update_professors_updated_at BEFORE UPDATE ON professors FOR EACH
 CREATE TRIGGER update_students_updated_at BEFORE UPDATE ON students FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_subjects_updated_at BEFORE UPDATE ON subjects FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_group_classes_updated_at BEFORE UPDATE ON group_classes FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Statements that matched no row (e.g. refresh_student_completion with nothing to change)
+    -- leave the version, and the cached listings, alone
+    IF TG_LEVEL = 'STATEMENT' THEN
+        IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO table_versions AS tv (table_name, version, changed_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        version = tv.version + 1,
+        changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER users_version_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+-- Logins only write last_login (and updated_at): they leave the listings' validators alone
+CREATE TRIGGER users_version_update AFTER UPDATE ON users FOR EACH ROW
+    WHEN ((OLD.email, OLD.first_name, OLD.last_name, OLD.role, OLD.matricula, OLD.is_active, OLD.created_at)
+          IS DISTINCT FROM (NEW.email, NEW.first_name, NEW.last_name, NEW.role, NEW.matricula, NEW.is_active, NEW.created_at))
+    EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER users_version_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_update AFTER UPDATE ON students
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER students_version_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_insert AFTER INSERT ON professors
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_update AFTER UPDATE ON professors
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER professors_version_delete AFTER DELETE ON professors
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_insert AFTER INSERT ON admins
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_update AFTER UPDATE ON admins
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER admins_version_delete AFTER DELETE ON admins
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
 -- ============================================
 -- VIEWS FOR REPORTING
 -- ============================================
@@ -322,8 +854,20 @@ COMMENT ON TABLE students IS 'Student-specific data linked to users table';
 COMMENT ON TABLE subjects IS 'Academic subjects/courses catalog';
 COMMENT ON TABLE group_classes IS 'Class groups/sections with schedule and enrollment limits';
 COMMENT ON TABLE student_subjects IS 'Student enrollment in subjects (many-to-many)';
-COMMENT ON TABLE surveys IS 'Student surveys/evaluations of professors';
-COMMENT ON TABLE comments IS 'Survey comments with sentiment analysis';
+COMMENT ON TABLE evaluation_periods IS 'Evaluation periods (semesters); open -> closed -> archived';
+COMMENT ON TABLE surveys IS 'Student surveys/evaluations of professors, list partitioned by period';
+COMMENT ON TABLE comments IS 'Survey comments with sentiment analysis, list partitioned by period';
+COMMENT ON TABLE comment_lsh_buckets IS 'MinHash LSH band buckets of comments, for near-duplicate lookups';
+COMMENT ON TABLE comment_embeddings IS 'Comment sentence embeddings (float16, L2-normalized) for similar-comment search';
+COMMENT ON TABLE period_aggregates IS 'Per period professor/subject sentiment summary, survives archiving';
+COMMENT ON TABLE keyword_stats IS 'Comment term counts per professor, sentiment and period';
+COMMENT ON TABLE keyword_terms IS 'Number of comments containing each term (document frequency for TF-IDF)';
+COMMENT ON TABLE model_shadow_stats IS 'Shadow scoring confusion counts of a candidate sentiment model against the active one';
+COMMENT ON TABLE sentiment_daily IS 'Daily sentiment counts per professor/subject, maintained by triggers on comments';
+COMMENT ON TABLE participation_counts IS 'Surveys per status and professor/subject/student group, maintained by triggers on surveys';
+COMMENT ON TABLE period_participation IS 'Students with surveys, started and done per period, maintained by triggers on surveys';
+COMMENT ON TABLE response_cache IS 'Cached JSON responses of read endpoints with their dependency tags, shared by every worker';
+COMMENT ON TABLE table_versions IS 'Change counter per table, bumped by statement triggers; ETag/Last-Modified of admin listings';
 COMMENT ON TABLE evaluations IS 'Professor evaluations with sentiment metrics';
 COMMENT ON TABLE subject_ratings IS 'Aggregated professor ratings per subject with sentiment analysis';
-COMMENT ON TABLE activity_logs IS 'System activity audit log';
+COMMENT ON TABLE activity_logs IS 'System activity audit log, range partitioned by month on created_at';
@@ -209,56 +209,71 @@ WHERE u1.matricula = 'A01700002'
   AND subj.code = 'MA150';
 
 -- ---------- 9) Comments on surveys ----------
+-- comments.period must match the period of the survey (composite FK)
 -- POSITIVE comments for Alberto Garcia (CS101)
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 1, 'El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar. Las clases son dinámicas y el material es excelente.', 'positive', 0.94, NOW() - INTERVAL '5 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'El profesor explica muy bien los conceptos y siempre está dispuesto a ayudar. Las clases son dinámicas y el material es excelente.', 'positive', 0.94, NOW() - INTERVAL '5 days'
+FROM surveys s WHERE s.id = 1;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 1, 'Excelente dominio de la materia. Los ejemplos prácticos ayudan mucho a entender la teoría. Muy recomendado.', 'positive', 0.91, NOW() - INTERVAL '5 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Excelente dominio de la materia. Los ejemplos prácticos ayudan mucho a entender la teoría. Muy recomendado.', 'positive', 0.91, NOW() - INTERVAL '5 days'
+FROM surveys s WHERE s.id = 1;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 1, 'Me gusta cómo hace las clases interactivas, siempre aprendes algo nuevo y útil. Gran profesor.', 'positive', 0.88, NOW() - INTERVAL '5 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Me gusta cómo hace las clases interactivas, siempre aprendes algo nuevo y útil. Gran profesor.', 'positive', 0.88, NOW() - INTERVAL '5 days'
+FROM surveys s WHERE s.id = 1;
 
 -- NEUTRAL comments for Alberto Garcia (CS201)
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 2, 'La materia es interesante pero a veces el ritmo es muy rápido. Sería bueno tener más tiempo para practicar en clase.', 'neutral', 0.78, NOW() - INTERVAL '3 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'La materia es interesante pero a veces el ritmo es muy rápido. Sería bueno tener más tiempo para practicar en clase.', 'neutral', 0.78, NOW() - INTERVAL '3 days'
+FROM surveys s WHERE s.id = 2;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 2, 'El contenido está bien pero las explicaciones podrían ser más detalladas. Las tareas son muy demandantes.', 'neutral', 0.72, NOW() - INTERVAL '3 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'El contenido está bien pero las explicaciones podrían ser más detalladas. Las tareas son muy demandantes.', 'neutral', 0.72, NOW() - INTERVAL '3 days'
+FROM surveys s WHERE s.id = 2;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 2, 'Regular. Algunos temas son confusos y no siempre hay tiempo para resolver todas las dudas. Podría mejorar.', 'neutral', 0.65, NOW() - INTERVAL '3 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Regular. Algunos temas son confusos y no siempre hay tiempo para resolver todas las dudas. Podría mejorar.', 'neutral', 0.65, NOW() - INTERVAL '3 days'
+FROM surveys s WHERE s.id = 2;
 
 -- NEGATIVE comment for Alberto Garcia (CS201)
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 2, 'Las clases son demasiado rápidas y no explica bien los conceptos difíciles. Me cuesta seguir el ritmo y hay poca retroalimentación.', 'negative', 0.85, NOW() - INTERVAL '3 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Las clases son demasiado rápidas y no explica bien los conceptos difíciles. Me cuesta seguir el ritmo y hay poca retroalimentación.', 'negative', 0.85, NOW() - INTERVAL '3 days'
+FROM surveys s WHERE s.id = 2;
 
 -- POSITIVE comments for Maria Lopez (MA150)
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 3, 'Profesora muy dedicada y paciente. Explica los conceptos matemáticos de forma clara y accesible. Excelente maestra.', 'positive', 0.96, NOW() - INTERVAL '2 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Profesora muy dedicada y paciente. Explica los conceptos matemáticos de forma clara y accesible. Excelente maestra.', 'positive', 0.96, NOW() - INTERVAL '2 days'
+FROM surveys s WHERE s.id = 3;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 3, 'Me encanta su metodología de enseñanza. Siempre disponible para resolver dudas y los ejemplos son muy útiles.', 'positive', 0.93, NOW() - INTERVAL '2 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Me encanta su metodología de enseñanza. Siempre disponible para resolver dudas y los ejemplos son muy útiles.', 'positive', 0.93, NOW() - INTERVAL '2 days'
+FROM surveys s WHERE s.id = 3;
 
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 3, 'Hace que las matemáticas sean menos intimidantes. Sus explicaciones son claras y bien estructuradas.', 'positive', 0.89, NOW() - INTERVAL '2 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Hace que las matemáticas sean menos intimidantes. Sus explicaciones son claras y bien estructuradas.', 'positive', 0.89, NOW() - INTERVAL '2 days'
+FROM surveys s WHERE s.id = 3;
 
 -- NEUTRAL comment for Maria Lopez (MA150)
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 3, 'Buena profesora en general, aunque a veces los ejercicios en clase son repetitivos. Podría variar más los ejemplos.', 'neutral', 0.70, NOW() - INTERVAL '2 days';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Buena profesora en general, aunque a veces los ejercicios en clase son repetitivos. Podría variar más los ejemplos.', 'neutral', 0.70, NOW() - INTERVAL '2 days'
+FROM surveys s WHERE s.id = 3;
 
 -- Additional comments for Maria Lopez from Ana Ruiz (Survey 4)
 -- POSITIVE comment
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 4, 'La profesora López es muy buena explicando. Me ayudó a mejorar mis calificaciones en matemáticas.', 'positive', 0.92, NOW() - INTERVAL '1 day';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'La profesora López es muy buena explicando. Me ayudó a mejorar mis calificaciones en matemáticas.', 'positive', 0.92, NOW() - INTERVAL '1 day'
+FROM surveys s WHERE s.id = 4;
 
 -- NEUTRAL comment
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 4, 'Las clases están bien organizadas pero a veces siento que falta más práctica con problemas complejos.', 'neutral', 0.68, NOW() - INTERVAL '1 day';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'Las clases están bien organizadas pero a veces siento que falta más práctica con problemas complejos.', 'neutral', 0.68, NOW() - INTERVAL '1 day'
+FROM surveys s WHERE s.id = 4;
 
 -- NEGATIVE comment
-INSERT INTO comments (survey_id, text, sentiment, confidence_score, created_at)
-SELECT 4, 'A veces es difícil entender los temas porque va muy rápido y no siempre responde las preguntas en clase.', 'negative', 0.82, NOW() - INTERVAL '1 day';
+INSERT INTO comments (survey_id, period, text, sentiment, confidence_score, created_at)
+SELECT s.id, s.period, 'A veces es difícil entender los temas porque va muy rápido y no siempre responde las preguntas en clase.', 'negative', 0.82, NOW() - INTERVAL '1 day'
+FROM surveys s WHERE s.id = 4;
 
 -- ---------- 10) Evaluations (aggregated per professor) ----------
 -- Simple illustrative row (your app may compute this)
@@ -0,0 +1,114 @@
+/**
+ * Live Dashboard Events
+ * Reads the Server-Sent Events streams of /api/admin/events and /api/professor/events.
+ * EventSource cannot send the Authorization header, so the stream is read with fetch.
+ */
+
+/**
+ * Subscribe to a live events stream
+ * The server ends each stream after a while (the token is checked again on reconnect);
+ * after a dropped connection events may have been missed, so onEvent gets a 'resync'
+ * once the stream is back.
+ * @param {string} url - Stream URL, e.g. `${API_BASE_URL}/admin/events`
+ * @param {Function} onEvent - Called with (type, data) for every event
+ * @returns {Object} Subscription with close()
+ */
+function subscribeLiveEvents(url, onEvent) {
+    let stopped = false;
+    let controller = null;
+    let retryMs = 3000;
+
+    function dispatch(frame) {
+        let type = 'message';
+        const data = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                type = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data.push(line.slice(5).trim());
+            } else if (line.startsWith('retry:')) {
+                retryMs = parseInt(line.slice(6), 10) || retryMs;
+            }
+            // Lines starting with ':' are keep-alive comments
+        });
+        if (data.length && type !== 'ready') {
+            onEvent(type, JSON.parse(data.join('\n')));
+        }
+    }
+
+    async function run() {
+        let missed = false;
+        while (!stopped) {
+            const token = localStorage.getItem('authToken');
+            if (!token) {
+                return;
+            }
+            let waitMs = 0;
+            controller = new AbortController();
+            try {
+                const response = await fetch(url, {
+                    headers: {
+                        'Authorization': `Bearer ${token}`,
+                        'Accept': 'text/event-stream'
+                    },
+                    signal: controller.signal
+                });
+
+                if ([401, 403, 404].includes(response.status)) {
+                    console.warn('Live events unavailable:', response.status);
+                    return;
+                }
+                if (!response.ok) {
+                    // 503: this server has too many open streams
+                    waitMs = (parseInt(response.headers.get('Retry-After'), 10) || retryMs / 1000) * 1000;
+                    missed = true;
+                    continue;
+                }
+
+                if (missed) {
+                    onEvent('resync', {});
+                    missed = false;
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) {
+                        break;
+                    }
+                    buffer += decoder.decode(value, { stream: true });
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                        dispatch(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                    }
+                }
+                // The server ended the stream: reconnect right away
+            } catch (error) {
+                if (stopped) {
+                    return;
+                }
+                console.warn('Live events connection lost:', error.message);
+                waitMs = retryMs;
+                missed = true;
+            } finally {
+                if (waitMs) {
+                    await new Promise(resolve => setTimeout(resolve, waitMs));
+                }
+            }
+        }
+    }
+
+    run();
+
+    return {
+        close() {
+            stopped = true;
+            if (controller) {
+                controller.abort();
+            }
+        }
+    };
+}
@@ -166,18 +166,32 @@ const SurveyAPI = {
                 throw new Error('No pending survey found for this professor');
             }
             
-            // Submit the survey
-            const response = await fetch(`${API_BASE_URL}/student/surveys/${survey.id}/submit`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                body: JSON.stringify({
-                    answers: surveyData.answers,
-                    comment: surveyData.comment
-                })
-            });
+            // Submit the survey; when the server is busy (503) try again after the
+            // Retry-After it suggests, a couple of times. The idempotency key makes the
+            // retries (and double clicks) count once
+            const idempotencyKey = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+            let response;
+            for (let attempt = 0; ; attempt++) {
+                response = await fetch(`${API_BASE_URL}/student/surveys/${survey.id}/submit`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Authorization': `Bearer ${token}`,
+                        'Idempotency-Key': `survey-${survey.id}-${idempotencyKey}`
+                    },
+                    body: JSON.stringify({
+                        answers: surveyData.answers,
+                        comment: surveyData.comment
+                    })
+                });
+                if (response.status !== 503 || attempt >= 2) {
+                    break;
+                }
+                const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 5;
+                await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            }
             
             if (!response.ok) {
                 const errorData = await response.json();